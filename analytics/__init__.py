@@ -1,7 +1,12 @@
 """
 АНАЛИТИКА И ОТЧЕТНОСТЬ
 """
-from .metrics import AnalyticsMetrics
-from .reporter import ReportGenerator
+from utils.startup import lazy_exports
 
-__all__ = ['AnalyticsMetrics', 'ReportGenerator']
\ No newline at end of file
+_EXPORTS = {
+    'AnalyticsMetrics': '.metrics',
+    'ReportGenerator': '.reporter',
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ['AnalyticsMetrics', 'ReportGenerator']
@@ -0,0 +1,226 @@
+"""
+ЖУРНАЛ СДЕЛОК (SQLITE, ИНДЕКСЫ И ИТОГИ ПО ДНЯМ/НЕДЕЛЯМ/МЕСЯЦАМ)
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from utils.logger import log_error
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LEDGER_PATH = os.path.join(PROJECT_ROOT, 'data', 'trades.db')
+
+# Период итогов -> формат ключа периода (локальное время, как datetime.now() в метриках)
+PERIODS = {
+    'day': '%Y-%m-%d',
+    'week': '%G-W%V',
+    'month': '%Y-%m',
+    'all': '',
+}
+
+ALL_SCOPE = '*'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL DEFAULT '',
+    strategy TEXT NOT NULL DEFAULT '',
+    signal TEXT NOT NULL DEFAULT '',
+    profit REAL NOT NULL DEFAULT 0,
+    profit_percent REAL NOT NULL DEFAULT 0,
+    profit_usdt REAL NOT NULL DEFAULT 0,
+    position_size_usdt REAL NOT NULL DEFAULT 0,
+    price REAL NOT NULL DEFAULT 0,
+    position_size REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades (symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_trades_strategy_ts ON trades (strategy, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    scope TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    profit REAL NOT NULL,
+    profit_usdt REAL NOT NULL,
+    win_profit REAL NOT NULL,
+    loss_profit REAL NOT NULL,
+    best REAL NOT NULL,
+    worst REAL NOT NULL,
+    PRIMARY KEY (scope, period, bucket)
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_TRADE_FIELDS = ('symbol', 'strategy', 'signal', 'profit', 'profit_percent', 'profit_usdt',
+                 'position_size_usdt', 'price', 'position_size')
+_TEXT_FIELDS = ('symbol', 'strategy', 'signal')
+
+_ROLLUP_FIELDS = ('trades', 'wins', 'losses', 'profit', 'profit_usdt', 'win_profit', 'loss_profit', 'best', 'worst')
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (scope, period, bucket, trades, wins, losses, profit, profit_usdt, win_profit, loss_profit, best, worst)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (scope, period, bucket) DO UPDATE SET
+    trades = trades + 1,
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    profit = profit + excluded.profit,
+    profit_usdt = profit_usdt + excluded.profit_usdt,
+    win_profit = win_profit + excluded.win_profit,
+    loss_profit = loss_profit + excluded.loss_profit,
+    best = max(best, excluded.best),
+    worst = min(worst, excluded.worst)
+"""
+
+
+def bucket_key(period, moment):
+    """Ключ периода для времени moment (datetime)"""
+    fmt = PERIODS[period]
+    return moment.strftime(fmt) if fmt else ''
+
+
+class TradeLedger:
+    """Журнал закрытых сделок.
+
+    Каждая сделка - одна транзакция: строка в trades и обновление итогов
+    (все сделки, пара, стратегия) за день, неделю, месяц и всё время.
+    Отчеты читают одну строку итогов, а не перебирают историю.
+    """
+
+    def __init__(self, db_path=DEFAULT_LEDGER_PATH):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, trade, state=None):
+        """Запись сделки (и снимка счетчиков метрик state) одной транзакцией"""
+        moment = trade.get('timestamp') or datetime.now()
+        profit = trade.get('profit', 0) or 0
+        win = profit > 0
+        values = [trade.get(field) or ('' if field in _TEXT_FIELDS else 0) for field in _TRADE_FIELDS]
+        rollup_values = (1 if win else 0, 0 if win else 1, profit, trade.get('profit_usdt', 0) or 0,
+                         profit if win else 0, 0 if win else profit, profit, profit)
+        scopes = [ALL_SCOPE]
+        if trade.get('symbol'):
+            scopes.append(f"symbol:{trade['symbol']}")
+        if trade.get('strategy'):
+            scopes.append(f"strategy:{trade['strategy']}")
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                cursor = self._conn.execute(
+                    f"INSERT INTO trades (ts, {', '.join(_TRADE_FIELDS)}) VALUES (?{', ?' * len(_TRADE_FIELDS)})",
+                    [moment.timestamp()] + values)
+                for scope in scopes:
+                    for period in PERIODS:
+                        self._conn.execute(_UPSERT_ROLLUP, (scope, period, bucket_key(period, moment)) + rollup_values)
+                if state is not None:
+                    self._conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)',
+                                       ('metrics', json.dumps(state)))
+                self._conn.execute('COMMIT')
+                return cursor.lastrowid
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    # ---------- итоги ----------
+
+    def rollup(self, period='all', moment=None, scope=ALL_SCOPE):
+        """Итоги периода, в который попадает moment (по умолчанию - текущий)"""
+        bucket = bucket_key(period, moment or datetime.now())
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_ROLLUP_FIELDS)} FROM rollups WHERE scope = ? AND period = ? AND bucket = ?",
+                (scope, period, bucket)).fetchone()
+        if row is None:
+            return dict.fromkeys(_ROLLUP_FIELDS, 0)
+        return dict(zip(_ROLLUP_FIELDS, row))
+
+    def rollups(self, period, limit=30, scope=ALL_SCOPE):
+        """Итоги последних limit периодов: [(ключ периода, итоги), ...] от новых к старым"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bucket, {', '.join(_ROLLUP_FIELDS)} FROM rollups "
+                f"WHERE scope = ? AND period = ? ORDER BY bucket DESC LIMIT ?",
+                (scope, period, limit)).fetchall()
+        return [(row[0], dict(zip(_ROLLUP_FIELDS, row[1:]))) for row in rows]
+
+    def scopes(self, kind):
+        """Итоги за всё время по парам (kind='symbol') или стратегиям (kind='strategy')"""
+        prefix = f"{kind}:"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT scope, {', '.join(_ROLLUP_FIELDS)} FROM rollups "
+                f"WHERE period = 'all' AND scope >= ? AND scope < ?",
+                (prefix, prefix[:-1] + ';')).fetchall()
+        return {row[0][len(prefix):]: dict(zip(_ROLLUP_FIELDS, row[1:])) for row in rows}
+
+    # ---------- сделки ----------
+
+    def recent(self, limit=10, symbol=None):
+        """Последние limit сделок (от старых к новым), формат записи trade_history"""
+        query = f"SELECT ts, {', '.join(_TRADE_FIELDS)} FROM trades"
+        params = []
+        if symbol:
+            query += " WHERE symbol = ?"
+            params.append(symbol)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        trades = []
+        for row in reversed(rows):
+            trade = dict(zip(_TRADE_FIELDS, row[1:]))
+            trade['timestamp'] = datetime.fromtimestamp(row[0])
+            trades.append(trade)
+        return trades
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM trades').fetchone()[0]
+
+    def prune(self, before):
+        """Удаление сделок старше before (datetime); итоги периодов сохраняются"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM trades WHERE ts < ?', (before.timestamp(),))
+            return cursor.rowcount
+
+    # ---------- состояние метрик ----------
+
+    def load_state(self):
+        """Последний снимок счетчиков AnalyticsMetrics (None, если сделок еще не было)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'metrics'").fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError as e:
+            log_error(f"❌ Поврежден снимок метрик в {self.db_path}: {e}")
+            return None
+
+    def clear(self):
+        """Удаление всех сделок, итогов и снимка метрик"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('DELETE FROM trades')
+            self._conn.execute('DELETE FROM rollups')
+            self._conn.execute('DELETE FROM state')
+            self._conn.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,14 +2,38 @@
 МЕТРИКИ И СТАТИСТИКА
 """
 from datetime import datetime, timedelta
-from utils.logger import log_info
+from utils.logger import log_info, log_error
+
+TRADE_HISTORY_LIMIT = 500  # сделок в памяти (полная история - в журнале analytics/ledger.py)
+
+# Счетчики, которые сохраняются в журнал вместе со сделкой и восстанавливаются при запуске
+_STATE_FIELDS = (
+    'total_trades', 'winning_trades', 'losing_trades', 'total_profit', 'total_profit_usdt',
+    'max_drawdown', 'current_drawdown', 'consecutive_wins', 'consecutive_losses',
+    'best_trade', 'worst_trade', 'best_trade_usdt', 'worst_trade_usdt',
+    'average_win', 'average_loss', 'average_win_usdt', 'average_loss_usdt',
+    'win_rate', 'profit_factor', 'peak_equity', 'current_equity',
+    'returns_mean', 'returns_m2', 'equity_usdt', 'peak_equity_usdt', 'max_drawdown_usdt',
+)
 
 class AnalyticsMetrics:
-    def __init__(self):
-        self.reset_metrics()
+    def __init__(self, ledger=None):
+        # 💾 Журнал сделок (analytics/ledger.py): история и итоги переживают перезапуск
+        self.ledger = ledger
+        self._reset_counters()
+        if ledger is not None:
+            self._restore()
     
     def reset_metrics(self):
         """Сброс метрик"""
+        self._reset_counters()
+        if self.ledger is not None:
+            try:
+                self.ledger.clear()
+            except Exception as e:
+                log_error(f"❌ Ошибка очистки журнала сделок: {e}")
+    
+    def _reset_counters(self):
         self.total_trades = 0
         self.winning_trades = 0
         self.losing_trades = 0
@@ -39,14 +63,39 @@ class AnalyticsMetrics:
         self.daily_profit = 0.0
         self.daily_profit_usdt = 0.0
         self.last_reset_date = datetime.now().date()
+        
+        # ⚡ ОПТИМИЗАЦИЯ: накопители для get_risk_metrics() без перебора истории
+        self.returns_mean = 0.0  # средняя доходность сделки и сумма квадратов отклонений (метод Уэлфорда)
+        self.returns_m2 = 0.0
+        self.equity_usdt = 10000.0  # Начальный капитал
+        self.peak_equity_usdt = None
+        self.max_drawdown_usdt = 0.0
+    
+    def _restore(self):
+        """Счетчики и последние сделки из журнала"""
+        try:
+            state = self.ledger.load_state()
+            if not state:
+                return
+            for field in _STATE_FIELDS:
+                if field in state:
+                    setattr(self, field, state[field])
+            self.trade_history = self.ledger.recent(TRADE_HISTORY_LIMIT)
+            log_info(f"💾 Метрики восстановлены из журнала: сделок {self.total_trades}")
+        except Exception as e:
+            log_error(f"❌ Ошибка восстановления метрик из журнала: {e}")
+    
+    def _state(self):
+        return {field: getattr(self, field) for field in _STATE_FIELDS}
     
     def get_current_time(self):
         """Получение текущего времени"""
         return datetime.now().strftime("%H:%M:%S")
     
-    def update_metrics(self, trade_result):
-        """Обновление метрик после сделки с USDT"""
+    def update_metrics(self, trade_result, timestamp=None):
+        """Обновление метрик после сделки с USDT (timestamp - время сделки, по умолчанию сейчас)"""
         try:
+            trade_time = timestamp or datetime.now()
             self.total_trades += 1
             profit = trade_result.get('profit', 0)
             profit_percent = trade_result.get('profit_percent', 0)
@@ -114,10 +163,23 @@ class AnalyticsMetrics:
             if drawdown > self.max_drawdown:
                 self.max_drawdown = drawdown
             
+            # Накопители метрик риска (доходность и просадка в USDT)
+            delta = profit - self.returns_mean
+            self.returns_mean += delta / self.total_trades
+            self.returns_m2 += delta * (profit - self.returns_mean)
+            self.equity_usdt += profit_usdt
+            if self.peak_equity_usdt is None or self.equity_usdt > self.peak_equity_usdt:
+                self.peak_equity_usdt = self.equity_usdt
+            if self.peak_equity_usdt:
+                drawdown_usdt = (self.peak_equity_usdt - self.equity_usdt) / self.peak_equity_usdt * 100
+                if drawdown_usdt > self.max_drawdown_usdt:
+                    self.max_drawdown_usdt = drawdown_usdt
+            
             # Добавляем в историю с USDT
             trade_record = {
-                'timestamp': datetime.now(),
+                'timestamp': trade_time,
                 'symbol': trade_result.get('symbol', ''),
+                'strategy': trade_result.get('strategy', ''),
                 'signal': trade_result.get('signal', ''),
                 'profit': profit,
                 'profit_percent': profit_percent,
@@ -127,9 +189,11 @@ class AnalyticsMetrics:
                 'position_size': trade_result.get('position_size', 0)
             }
             self.trade_history.append(trade_record)
+            if len(self.trade_history) > 2 * TRADE_HISTORY_LIMIT:
+                del self.trade_history[:-TRADE_HISTORY_LIMIT]
             
             # Обновляем дневную статистику
-            today = datetime.now().date()
+            today = trade_time.date()
             if today not in self.daily_performance:
                 self.daily_performance[today] = {
                     'trades': 0,
@@ -147,6 +211,13 @@ class AnalyticsMetrics:
             else:
                 self.daily_performance[today]['losing_trades'] += 1
             
+            # 💾 Сделка и счетчики - одной транзакцией
+            if self.ledger is not None:
+                try:
+                    self.ledger.record(trade_record, self._state())
+                except Exception as e:
+                    log_error(f"❌ Ошибка записи сделки в журнал: {e}")
+            
             log_info(f"📊 Метрики обновлены: сделок {self.total_trades}, "
                     f"Win Rate {self.win_rate:.1f}%, прибыль {self.total_profit:.2f}% ({self.total_profit_usdt:.2f} USDT)")
                     
@@ -208,9 +279,11 @@ class AnalyticsMetrics:
 """
         return report
     
-    def get_daily_summary(self):
-        """Сводка за сегодня"""
-        today = datetime.now().date()
+    def get_daily_summary(self, day=None):
+        """Сводка за день day (date, по умолчанию - сегодня)"""
+        today = day or datetime.now().date()
+        if self.ledger is not None:
+            return self.get_period_summary('day', datetime.combine(today, datetime.min.time()))
         daily_data = self.daily_performance.get(today, {})
         
         trades_today = daily_data.get('trades', 0)
@@ -231,6 +304,56 @@ class AnalyticsMetrics:
             'win_rate': win_rate_today
         }
     
+    def get_period_summary(self, period='day', moment=None):
+        """Сводка за день/неделю/месяц/всё время из итогов журнала (одна строка, без перебора сделок)"""
+        moment = moment or datetime.now()
+        rollup = self.ledger.rollup(period, moment) if self.ledger is not None else {}
+        trades = rollup.get('trades', 0)
+        wins = rollup.get('wins', 0)
+        losses = rollup.get('losses', 0)
+        return {
+            'date': moment.date(),
+            'period': period,
+            'trades': trades,
+            'profit': rollup.get('profit', 0),
+            'profit_usdt': rollup.get('profit_usdt', 0),
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'win_rate': (wins / trades * 100) if trades > 0 else 0,
+            'average_win': rollup.get('win_profit', 0) / wins if wins else 0,
+            'average_loss': rollup.get('loss_profit', 0) / losses if losses else 0,
+            'profit_factor': rollup.get('win_profit', 0) / abs(rollup['loss_profit']) if rollup.get('loss_profit') else 0,
+            'best_trade': rollup.get('best', 0),
+            'worst_trade': rollup.get('worst', 0)
+        }
+    
+    def get_strategy_performance(self):
+        """Итоги по стратегиям за всё время (из журнала): {стратегия: статистика}"""
+        if self.ledger is None:
+            return {}
+        performance = {}
+        try:
+            for strategy, rollup in self.ledger.scopes('strategy').items():
+                trades = rollup['trades']
+                performance[strategy] = {
+                    'trades': trades,
+                    'win_rate': rollup['wins'] / trades * 100 if trades else 0,
+                    'profit': rollup['profit_usdt'],
+                    'profit_factor': rollup['win_profit'] / abs(rollup['loss_profit']) if rollup['loss_profit'] else 0,
+                }
+        except Exception as e:
+            log_error(f"❌ Ошибка чтения итогов стратегий: {e}")
+        return performance
+    
+    def get_recent_trades(self, limit=10):
+        """Последние сделки (из журнала, если он подключен)"""
+        if self.ledger is not None:
+            try:
+                return self.ledger.recent(limit)
+            except Exception as e:
+                log_error(f"❌ Ошибка чтения журнала сделок: {e}")
+        return self.trade_history[-limit:]
+    
     def get_trade_history_formatted(self, limit=10):
         """Форматированная история сделок"""
         if not self.trade_history:
@@ -291,6 +414,10 @@ class AnalyticsMetrics:
                 if date > cutoff_date.date()
             }
             
+            # Старые сделки журнала (по индексу времени); итоги периодов остаются
+            if self.ledger is not None:
+                self.ledger.prune(cutoff_date)
+            
             log_info(f"🧹 Очищены данные старше {days_to_keep} дней")
             
         except Exception as e:
@@ -307,33 +434,16 @@ class AnalyticsMetrics:
         if self.total_trades == 0:
             return {}
         
-        # Расчет Sharpe Ratio (упрощенный)
-        returns = [trade['profit'] for trade in self.trade_history]
-        avg_return = sum(returns) / len(returns)
-        std_dev = (sum((r - avg_return) ** 2 for r in returns) / len(returns)) ** 0.5
+        # Расчет Sharpe Ratio (упрощенный) по накопленным значениям - O(1) при любой длине истории
+        avg_return = self.returns_mean
+        std_dev = (max(self.returns_m2, 0.0) / self.total_trades) ** 0.5
         
         sharpe_ratio = avg_return / std_dev if std_dev > 0 else 0
         
-        # Расчет максимальной просадки в USDT
-        equity_curve = []
-        current_equity = 10000  # Начальный капитал
-        for trade in self.trade_history:
-            current_equity += trade['profit_usdt']
-            equity_curve.append(current_equity)
-        
-        max_drawdown_usdt = 0
-        peak = equity_curve[0] if equity_curve else 0
-        for equity in equity_curve:
-            if equity > peak:
-                peak = equity
-            drawdown = (peak - equity) / peak * 100
-            if drawdown > max_drawdown_usdt:
-                max_drawdown_usdt = drawdown
-        
         return {
             'sharpe_ratio': sharpe_ratio,
             'volatility': std_dev,
-            'max_drawdown_usdt': max_drawdown_usdt,
+            'max_drawdown_usdt': self.max_drawdown_usdt,
             'avg_trade_return': avg_return,
             'expectancy': (self.win_rate/100 * self.average_win + 
                           (1 - self.win_rate/100) * self.average_loss)
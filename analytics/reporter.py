@@ -11,6 +11,24 @@ class ReportGenerator:
     def generate_performance_report(self, period='all'):
         """Генерация отчета о производительности"""
         summary = self.metrics.get_summary()
+        all_time = ''  # пометка метрик, которые журнал за период не хранит
+        if period in ('day', 'week', 'month') and getattr(self.metrics, 'ledger', None) is not None:
+            # ⚡ ОПТИМИЗАЦИЯ: итоги периода - одна строка журнала, без перебора сделок
+            period_summary = self.metrics.get_period_summary(period)
+            summary.update({
+                'total_trades': period_summary['trades'],
+                'total_profit': period_summary['profit'],
+                'winning_trades': period_summary['winning_trades'],
+                'losing_trades': period_summary['losing_trades'],
+                'win_rate': period_summary['win_rate'],
+                'profit_factor': period_summary['profit_factor'],
+                'average_win': period_summary['average_win'],
+                'average_loss': abs(period_summary['average_loss']),  # как в AnalyticsMetrics - по модулю
+                'best_trade': period_summary['best_trade'],
+                'worst_trade': period_summary['worst_trade'],
+            })
+            all_time = ' (всё время)'
+        win_loss_ratio = summary['average_win'] / abs(summary['average_loss']) if summary['average_loss'] else 0
         
         report = f"""
 📊 <b>ОТЧЕТ О ПРОИЗВОДИТЕЛЬНОСТИ</b>
@@ -21,20 +39,20 @@ class ReportGenerator:
 • Win Rate: <b>{summary['win_rate']:.1f}%</b>
 • Profit Factor: <b>{summary['profit_factor']:.2f}</b>
 • Общая прибыль: <b>{summary['total_profit']:.2f} USDT</b>
-• Макс просадка: <b>{summary['max_drawdown']:.2f}%</b>
+• Макс просадка{all_time}: <b>{summary['max_drawdown']:.2f}%</b>
 
 💰 <b>СТАТИСТИКА СДЕЛОК:</b>
 • Прибыльных: <b>{summary['winning_trades']}</b>
 • Убыточных: <b>{summary['losing_trades']}</b>
 • Средняя прибыль: <b>{summary['average_win']:.2f} USDT</b>
 • Средний убыток: <b>{summary['average_loss']:.2f} USDT</b>
-• Соотношение прибыль/убыток: <b>{summary['average_win']/abs(summary['average_loss']):.2f}</b>
+• Соотношение прибыль/убыток: <b>{win_loss_ratio:.2f}</b>
 
 🎯 <b>РЕКОРДЫ И СЕРИИ:</b>
 • Лучшая сделка: <b>{summary['best_trade']:.2f} USDT</b>
 • Худшая сделка: <b>{summary['worst_trade']:.2f} USDT</b>
-• Серия побед: <b>{summary['consecutive_wins']}</b>
-• Серия поражений: <b>{summary['consecutive_losses']}</b>
+• Серия побед{all_time}: <b>{summary['consecutive_wins']}</b>
+• Серия поражений{all_time}: <b>{summary['consecutive_losses']}</b>
 
 ⚡ <b>ЭФФЕКТИВНОСТЬ:</b>
 • Sharpe Ratio: <b>{summary.get('sharpe_ratio', 0):.2f}</b>
@@ -46,14 +64,14 @@ class ReportGenerator:
     def generate_daily_report(self):
         """Генерация дневного отчета"""
         today = datetime.now().date()
-        daily_data = self.metrics.daily_performance.get(today, {})
+        daily_data = self.metrics.get_daily_summary()
         
         trades_today = daily_data.get('trades', 0)
         profit_today = daily_data.get('profit', 0)
         winning_trades_today = daily_data.get('winning_trades', 0)
         losing_trades_today = daily_data.get('losing_trades', 0)
         
-        win_rate_today = (winning_trades_today / trades_today * 100) if trades_today > 0 else 0
+        win_rate_today = daily_data.get('win_rate', 0)
         
         report = f"""
 📅 <b>ДНЕВНОЙ ОТЧЕТ</b>
@@ -77,8 +95,10 @@ class ReportGenerator:
 """
         return report
     
-    def generate_strategy_comparison(self, strategy_performance):
-        """Генерация сравнения стратегий"""
+    def generate_strategy_comparison(self, strategy_performance=None):
+        """Генерация сравнения стратегий (по умолчанию - итоги стратегий из журнала сделок)"""
+        if strategy_performance is None:
+            strategy_performance = self.metrics.get_strategy_performance()
         if not strategy_performance:
             return "📊 <b>СРАВНЕНИЕ СТРАТЕГИЙ</b>\n\nНет данных для сравнения"
         
@@ -152,6 +172,7 @@ class ReportGenerator:
         """Получение названия периода"""
         periods = {
             'all': 'Всё время',
+            'day': 'День',
             'week': 'Неделя',
             'month': 'Месяц',
             'year': 'Год'
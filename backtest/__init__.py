@@ -0,0 +1,7 @@
+"""
+БЭКТЕСТ СТРАТЕГИЙ
+"""
+from .engine import BacktestEngine
+from .optimizer import StrategyOptimizer
+
+__all__ = ['BacktestEngine', 'StrategyOptimizer']
@@ -0,0 +1,231 @@
+"""
+БЭКТЕСТ СТРАТЕГИЙ НА ИСТОРИЧЕСКИХ СВЕЧАХ
+"""
+import copy
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+from analytics.metrics import AnalyticsMetrics
+from utils.indicators import EMA
+from utils.logger import log_info, log_error
+
+DEFAULT_TAKER_FEE = 0.001   # KuCoin taker fee = 0.1%
+DEFAULT_WARMUP = 50         # столько свечей бот запрашивает для расчета сигнала
+MIN_TRADE_INTERVAL = 60     # защита от частых сделок, как в торговом цикле бота
+
+
+@contextmanager
+def quiet_logs():
+    """Приглушает INFO-логи стратегий и метрик на время прогона"""
+    logger = logging.getLogger('TradingBot')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+def timeframe_seconds(candles):
+    """Длительность свечи по меткам времени (мс -> сек)"""
+    if len(candles) < 2:
+        return 0.0
+    return float(np.min(np.diff(candles[:, 0]))) / 1000
+
+
+def risk_exit(closes, entry_price, config):
+    """Срабатывание TP/SL по цене закрытия: (маска TP, маска SL).
+
+    TP считается по чистой прибыли (минус комиссия за вход и выход), SL - по цене,
+    так же как в EmaMlStrategy. Работает и со скаляром, и с массивом цен.
+    """
+    gross = ((closes - entry_price) / entry_price) * 100
+    take_profit = config['take_profit_percent']
+    stop_loss = config['stop_loss_percent']
+    hit_tp = gross - config['taker_fee'] * 2 * 100 >= take_profit if take_profit is not None else np.zeros_like(gross, dtype=bool)
+    hit_sl = gross <= -stop_loss if stop_loss is not None else np.zeros_like(gross, dtype=bool)
+    return hit_tp, hit_sl
+
+
+class BacktestEngine:
+    """Прогон исторических свечей через стратегии с симуляцией исполнения.
+
+    mode='event' - каждая свеча проходит через calculate_signal (стратегии не меняются),
+    mode='vectorized' - сигналы простых стратегий (EMA + ML, Bollinger) считаются массивами,
+    mode='auto' - векторный режим, если стратегия и настройки его поддерживают.
+    Результат содержит ту же сводку, что AnalyticsMetrics.get_summary().
+    """
+
+    def __init__(self, position_size_usdt=100.0, taker_fee=None, take_profit_percent=None,
+                 stop_loss_percent=None, min_hold_time=None, min_trade_interval=MIN_TRADE_INTERVAL,
+                 ml_confidence=0.5, ml_signal="⚪ НЕЙТРАЛЬНО", ml_model=None,
+                 warmup=DEFAULT_WARMUP, symbol='BTC/USDT'):
+        self.position_size_usdt = position_size_usdt
+        self.taker_fee = taker_fee
+        self.take_profit_percent = take_profit_percent
+        self.stop_loss_percent = stop_loss_percent
+        self.min_hold_time = min_hold_time
+        self.min_trade_interval = min_trade_interval
+        self.ml_confidence = ml_confidence
+        self.ml_signal = ml_signal
+        self.ml_model = ml_model  # модель с predict(ohlcv) - только для событийного режима
+        self.warmup = warmup
+        self.symbol = symbol
+
+    def resolve_config(self, strategy):
+        """Параметры симуляции: явно заданные или из настроек стратегии"""
+        settings = strategy.settings
+        take_profit = self.take_profit_percent
+        if take_profit is None and not settings.get('take_profit_usdt'):
+            # В режиме TP в USDT выход по прибыли остается за стратегией
+            take_profit = settings.get('take_profit_percent')
+        return {
+            'taker_fee': self.taker_fee if self.taker_fee is not None else settings.get('taker_fee', DEFAULT_TAKER_FEE),
+            'take_profit_percent': take_profit,
+            'stop_loss_percent': (self.stop_loss_percent if self.stop_loss_percent is not None
+                                  else settings.get('stop_loss_percent')),
+            'min_hold_time': self.min_hold_time if self.min_hold_time is not None else settings.get('min_hold_time', 0),
+            'min_trade_interval': self.min_trade_interval,
+            'ema_fast_period': settings.get('ema_fast_period', 9),
+            'ema_slow_period': settings.get('ema_slow_period', 21),
+            'position_size_usdt': self.position_size_usdt,
+        }
+
+    def run(self, strategy, ohlcv, mode='auto'):
+        """Бэктест стратегии на свечах [timestamp, open, high, low, close, volume]"""
+        from backtest.vectorized import supports_vectorized, run_vectorized
+        candles = np.ascontiguousarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        config = self.resolve_config(strategy)
+        if mode == 'auto':
+            mode = 'vectorized' if supports_vectorized(self, strategy, config) else 'event'
+        elif mode == 'vectorized' and not supports_vectorized(self, strategy, config):
+            raise ValueError(f"Стратегия {strategy.name} не поддерживает векторный режим с этими настройками")
+
+        started = time.perf_counter()
+        with quiet_logs():
+            if mode == 'vectorized':
+                trades, open_position = run_vectorized(self, strategy, candles, config)
+            else:
+                trades, open_position = self._run_event(strategy, candles, config)
+        elapsed = time.perf_counter() - started
+
+        metrics = AnalyticsMetrics()
+        with quiet_logs():
+            for trade in trades:
+                self._record(metrics, trade, config)
+        result = {
+            'strategy': strategy.name,
+            'symbol': self.symbol,
+            'mode': mode,
+            'candles': len(candles),
+            'elapsed': elapsed,
+            'candles_per_minute': len(candles) / elapsed * 60 if elapsed > 0 else float('inf'),
+            'summary': metrics.get_summary(),
+            'risk': metrics.get_risk_metrics(),
+            'trades': trades,
+            'open_position': open_position,
+            'metrics': metrics,
+        }
+        log_info(f"🧪 Бэктест {strategy.name} ({mode}): {len(candles)} свечей за {elapsed:.2f} сек, "
+                 f"сделок {result['summary']['total_trades']}, прибыль {result['summary']['total_profit']:.2f}%")
+        return result
+
+    def _run_event(self, strategy, candles, config):
+        """Событийный режим: свечи по одной проходят через calculate_signal"""
+        # Часы и позиция подменяются у копии: переданная стратегия может быть живой стратегией бота
+        strategy = copy.deepcopy(strategy)
+        closes = candles[:, 4]
+        times = candles[:, 0] / 1000 + timeframe_seconds(candles)  # сигнал считается на закрытии свечи
+        fast_ema = EMA(config['ema_fast_period'])
+        slow_ema = EMA(config['ema_slow_period'])
+        size = config['position_size_usdt']
+        extra = {'position_size_usdt': size} if 'position_size_usdt' in inspect.signature(
+            strategy.calculate_signal).parameters else {}
+
+        now = [0.0]
+        strategy.clock = lambda: now[0]
+        trades = []
+        entry = None  # (индекс, цена) открытой позиции
+        last_trade_time = float('-inf')
+        ml_confidence, ml_signal = self.ml_confidence, self.ml_signal
+
+        for i in range(len(candles)):
+            close = closes[i]
+            fast = fast_ema.update(close)
+            slow = slow_ema.update(close)
+            if i < self.warmup:
+                continue
+            now[0] = times[i]
+            window = candles[max(0, i - self.warmup + 1):i + 1]
+            market_data = {
+                'fast_ema': fast,
+                'slow_ema': slow,
+                'ema_diff_percent': (fast - slow) / slow if slow else 0,
+                'current_price': close,
+                'price_change_24h': (close - closes[i - 23]) / closes[i - 23] * 100 if i >= 23 and closes[i - 23] else 0,
+                'ohlcv': window,
+            }
+            if self.ml_model is not None:
+                ml_confidence, ml_signal = self.ml_model.predict(window)
+            try:
+                signal = strategy.calculate_signal(market_data, ml_confidence, ml_signal, **extra)
+            except Exception as e:
+                log_error(f"❌ Ошибка стратегии в бэктесте на свече {i}: {e}")
+                signal = 'wait'
+
+            if entry is not None:
+                hit_tp, hit_sl = risk_exit(close, entry[1], config)
+                reason = 'take_profit' if hit_tp else 'stop_loss' if hit_sl else None
+                if reason is None and signal == 'sell' and times[i] - times[entry[0]] >= config['min_hold_time']:
+                    reason = 'signal'
+                if reason:
+                    trades.append(self._trade(candles, times, entry[0], i, reason))
+                    strategy.update_position_info('sell', close)
+                    strategy.position = None
+                    strategy.entry_price = 0
+                    strategy.position_size_usdt = 0
+                    entry = None
+                    last_trade_time = times[i]
+            elif signal == 'buy' and times[i] - last_trade_time >= config['min_trade_interval']:
+                entry = (i, close)
+                strategy.update_position_info('buy', close)
+                strategy.position_size_usdt = size
+                last_trade_time = times[i]
+
+        open_position = None
+        if entry is not None:
+            open_position = {'entry_time': times[entry[0]], 'entry_price': float(entry[1])}
+        return trades, open_position
+
+    @staticmethod
+    def _trade(candles, times, entry_index, exit_index, reason):
+        """Описание закрытой сделки"""
+        return {
+            'entry_index': int(entry_index),
+            'exit_index': int(exit_index),
+            'entry_time': float(times[entry_index]),
+            'exit_time': float(times[exit_index]),
+            'entry_price': float(candles[entry_index, 4]),
+            'exit_price': float(candles[exit_index, 4]),
+            'reason': reason,
+        }
+
+    def _record(self, metrics, trade, config):
+        """Прибыль сделки с учетом комиссий и запись в AnalyticsMetrics"""
+        size = config['position_size_usdt']
+        gross = (trade['exit_price'] - trade['entry_price']) / trade['entry_price'] * 100
+        net = gross - config['taker_fee'] * 2 * 100
+        trade['profit_percent'] = net
+        trade['profit_usdt'] = size * net / 100
+        metrics.update_metrics({
+            'symbol': self.symbol,
+            'signal': 'sell',
+            'price': trade['exit_price'],
+            'profit': net,
+            'profit_percent': net,
+            'profit_usdt': trade['profit_usdt'],
+            'position_size_usdt': size,
+        }, timestamp=datetime.fromtimestamp(trade['exit_time']))
@@ -0,0 +1,243 @@
+"""
+ОПТИМИЗАЦИЯ ПАРАМЕТРОВ СТРАТЕГИЙ (ПЕРЕБОР НА ПУЛЕ ПРОЦЕССОВ)
+"""
+import copy
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from backtest.engine import BacktestEngine, quiet_logs
+from utils.logger import log_info, log_error
+
+# Сетки параметров по умолчанию (те же параметры, что оператор меняет в Telegram)
+PARAM_GRIDS = {
+    'ema_ml': {
+        'ema_fast_period': [5, 7, 9, 12],
+        'ema_slow_period': [13, 21, 26, 34],
+        'ema_threshold': [0.001, 0.0025, 0.005],
+        'take_profit_percent': [0.3, 0.5, 1.0, 2.0],
+        'stop_loss_percent': [0.5, 1.0, 1.5, 2.5],
+    },
+    'bollinger': {
+        'bb_period': [14, 20, 30],
+        'bb_std_dev': [1.5, 2, 2.5],
+        'exit_on_middle': [False, True],
+    },
+    'macd_rsi': {
+        'rsi_period': [7, 14, 21],
+        'rsi_oversold': [25, 30, 35],
+        'rsi_overbought': [65, 70, 75],
+        'macd_fast': [8, 12],
+        'macd_slow': [21, 26],
+    },
+}
+
+# Куда сохраняются параметры EMA + ML (их читает get_active_strategy и load_strategy_settings)
+EMA_ML_SETTING_KEYS = {
+    'ema_fast_period': 'last_ema_fast_period',
+    'ema_slow_period': 'last_ema_slow_period',
+    'ema_threshold': 'last_ema_threshold',
+    'take_profit_percent': 'last_take_profit_percent',
+    'stop_loss_percent': 'last_stop_loss_percent',
+}
+
+# Состояние процесса-воркера
+_worker = {}
+
+
+def strategy_classes():
+    """Классы стратегий по ключам настроек"""
+    from strategies.ema_ml import EmaMlStrategy
+    from strategies.price_action import PriceActionStrategy
+    from strategies.macd_rsi import MacdRsiStrategy
+    from strategies.bollinger import BollingerStrategy
+    return {
+        'ema_ml': EmaMlStrategy,
+        'price_action': PriceActionStrategy,
+        'macd_rsi': MacdRsiStrategy,
+        'bollinger': BollingerStrategy,
+    }
+
+
+def is_valid_params(params):
+    """Отсев заведомо бессмысленных комбинаций"""
+    if params.get('ema_fast_period', 0) >= params.get('ema_slow_period', float('inf')):
+        return False
+    if params.get('macd_fast', 0) >= params.get('macd_slow', float('inf')):
+        return False
+    return True
+
+
+def grid_candidates(grid):
+    """Все комбинации сетки"""
+    keys = list(grid)
+    combos = (dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys)))
+    return [params for params in combos if is_valid_params(params)]
+
+
+def random_candidates(grid, count, seed=None):
+    """Случайные комбинации: значение берется из списка или из диапазона (min, max)"""
+    rng = random.Random(seed)
+    candidates = []
+    seen = set()
+    attempts = 0
+    while len(candidates) < count and attempts < count * 50:
+        attempts += 1
+        params = {}
+        for key, values in grid.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[key] = rng.randint(low, high) if isinstance(low, int) else rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(values)
+        marker = tuple(sorted(params.items()))
+        if marker in seen or not is_valid_params(params):
+            continue
+        seen.add(marker)
+        candidates.append(params)
+    return candidates
+
+
+def _attach_shared(shm_name):
+    """Подключение к общей памяти без передачи владения (сегмент удаляет родитель)"""
+    try:
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        # Python < 3.13: воркеры пула делят resource_tracker с родителем, повторная регистрация безопасна
+        return shared_memory.SharedMemory(name=shm_name)
+
+
+def _init_worker(shm_name, shape, strategy_name, engine_settings, mode):
+    """Инициализация процесса пула: свечи читаются из общей памяти без копирования"""
+    logging.getLogger('TradingBot').setLevel(logging.WARNING)
+    shm = _attach_shared(shm_name)
+    _worker['shm'] = shm
+    _setup_worker(np.ndarray(shape, dtype=np.float64, buffer=shm.buf), strategy_name, engine_settings, mode)
+
+
+def _setup_worker(candles, strategy_name, engine_settings, mode):
+    """Состояние воркера: свечи, шаблон стратегии и движок бэктеста"""
+    _worker['candles'] = candles
+    # Шаблон создается один раз, для каждого прогона - свежая копия
+    _worker['template'] = strategy_classes()[strategy_name]()
+    _worker['engine'] = BacktestEngine(**engine_settings)
+    _worker['mode'] = mode
+
+
+def _evaluate(params):
+    """Бэктест одной комбинации параметров в воркере"""
+    try:
+        strategy = copy.deepcopy(_worker['template'])
+        strategy.settings.update(params)
+        if 'take_profit_percent' in params and 'take_profit_usdt' in strategy.settings:
+            strategy.settings['take_profit_usdt'] = 0.0  # перебирается TP в процентах
+        result = _worker['engine'].run(strategy, _worker['candles'], mode=_worker['mode'])
+        summary = result['summary']
+        return {
+            'params': params,
+            'net_profit_usdt': summary['total_profit_usdt'],
+            'net_profit_percent': summary['total_profit'],
+            'max_drawdown': summary['max_drawdown'],
+            'total_trades': summary['total_trades'],
+            'win_rate': summary['win_rate'],
+            'profit_factor': summary['profit_factor'],
+            'mode': result['mode'],
+        }
+    except Exception as e:
+        log_error(f"❌ Ошибка бэктеста параметров {params}: {e}")
+        return None
+
+
+def rank_results(results, min_trades=1):
+    """Сортировка: чистая прибыль, затем меньшая просадка, затем больше сделок"""
+    results = [r for r in results if r and r['total_trades'] >= min_trades]
+    return sorted(results, key=lambda r: (-r['net_profit_usdt'], r['max_drawdown'], -r['total_trades']))
+
+
+class StrategyOptimizer:
+    """Перебор параметров стратегии (сетка или случайный поиск) на пуле процессов.
+
+    Свечи кладутся в shared_memory один раз, воркеры читают их напрямую,
+    по каналу передаются только словари параметров и итоговые метрики.
+    """
+
+    def __init__(self, strategy_name='ema_ml', engine_settings=None, workers=None, mode='auto'):
+        self.strategy_name = strategy_name
+        self.engine_settings = engine_settings or {}
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+
+    def grid(self, grid=None):
+        """Кандидаты полного перебора"""
+        return grid_candidates(grid or PARAM_GRIDS[self.strategy_name])
+
+    def random(self, count, grid=None, seed=None):
+        """Кандидаты случайного поиска"""
+        return random_candidates(grid or PARAM_GRIDS[self.strategy_name], count, seed)
+
+    def optimize(self, ohlcv, candidates, min_trades=1):
+        """Бэктест всех кандидатов, возвращает отсортированные результаты"""
+        candles = np.ascontiguousarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        started = time.perf_counter()
+        if self.workers <= 1 or len(candidates) <= 1:
+            # Без пула: свечи уже в памяти процесса
+            with quiet_logs():
+                _setup_worker(candles, self.strategy_name, self.engine_settings, self.mode)
+                try:
+                    results = [_evaluate(params) for params in candidates]
+                finally:
+                    _worker.clear()
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(candles.nbytes, 1))
+            try:
+                np.ndarray(candles.shape, dtype=np.float64, buffer=shm.buf)[:] = candles
+                init_args = (shm.name, candles.shape, self.strategy_name, self.engine_settings, self.mode)
+                chunksize = max(1, len(candidates) // (self.workers * 4))
+                with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=init_args) as pool:
+                    results = list(pool.map(_evaluate, candidates, chunksize=chunksize))
+            finally:
+                shm.close()
+                shm.unlink()
+
+        ranked = rank_results(results, min_trades)
+        elapsed = time.perf_counter() - started
+        log_info(f"🔬 Оптимизация {self.strategy_name}: {len(candidates)} комбинаций на {self.workers} процессах "
+                 f"за {elapsed:.1f} сек")
+        if ranked:
+            best = ranked[0]
+            log_info(f"🏆 Лучшие параметры: {best['params']} | прибыль {best['net_profit_usdt']:.2f} USDT, "
+                     f"просадка {best['max_drawdown']:.2f}%, сделок {best['total_trades']}")
+        return ranked
+
+    def apply_best(self, settings_manager, result):
+        """Применение параметров победителя через SettingsManager"""
+        params = result['params'] if 'params' in result else result
+        bot = getattr(settings_manager, 'bot', None)
+        if bot is not None:
+            # Живая стратегия пары получает параметры сразу
+            pair = bot.get_pair_state(settings_manager.trading_pairs['active_pair'])
+            strategy = pair.strategies.get(self.strategy_name)
+            if strategy is not None:
+                strategy.settings.update(params)
+                if 'take_profit_percent' in params and 'take_profit_usdt' in strategy.settings:
+                    strategy.settings['take_profit_usdt'] = 0.0
+
+        if self.strategy_name == 'ema_ml':
+            # Одно сохранение без синхронизации: иначе save_settings перезапишет last_* из активной
+            # стратегии, когда она не ema_ml
+            if 'take_profit_percent' in params:
+                settings_manager.ml_settings['last_take_profit_usdt'] = 0.0
+            for key, value in params.items():
+                if key in EMA_ML_SETTING_KEYS:
+                    settings_manager.ml_settings[EMA_ML_SETTING_KEYS[key]] = value
+            settings_manager.save_settings(sync_from_strategy=False)
+        else:
+            optimized = dict(settings_manager.strategy_settings.get('optimized_params', {}))
+            optimized[self.strategy_name] = dict(params)
+            settings_manager.update_setting('strategy', 'optimized_params', optimized)
+        log_info(f"✅ Параметры {self.strategy_name} применены: {params}")
+        return params
@@ -0,0 +1,119 @@
+"""
+ВЕКТОРНЫЙ БЭКТЕСТ ПРОСТЫХ СТРАТЕГИЙ
+"""
+import numpy as np
+import pandas as pd
+from strategies.ema_ml import EmaMlStrategy
+from strategies.bollinger import BollingerStrategy
+from backtest.engine import risk_exit, timeframe_seconds
+
+SEARCH_CHUNK = 256
+
+
+def ema_ml_signals(engine, strategy, candles, config):
+    """Входы EMA + ML: разница EMA выше порога и уверенность ML выше порога покупки"""
+    closes = pd.Series(candles[:, 4])
+    fast = closes.ewm(span=config['ema_fast_period'], adjust=False).mean().to_numpy()
+    slow = closes.ewm(span=config['ema_slow_period'], adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ema_diff = np.where(slow != 0, (fast - slow) / slow, 0.0)
+    entries = ema_diff > strategy.settings['ema_threshold']
+    if not engine.ml_confidence > strategy.settings['ml_confidence_buy']:
+        entries[:] = False
+    # Выходы стратегии - только TP/SL, они проверяются при симуляции
+    return entries, np.zeros(len(candles), dtype=bool)
+
+
+def bollinger_signals(engine, strategy, candles, config):
+    """Входы у нижней полосы, выходы у верхней (и у средней, если exit_on_middle)"""
+    closes = candles[:, 4]
+    rolling = pd.Series(closes).rolling(strategy.settings.get('bb_period', 20))
+    middle = rolling.mean().to_numpy()
+    std = rolling.std().to_numpy()
+    std_dev = strategy.settings.get('bb_std_dev', 2)
+    upper = middle + std * std_dev
+    lower = middle - std * std_dev
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = upper != lower
+        no_squeeze = ~((upper - lower) / middle < 0.05)
+        entries = valid & (closes <= lower) & no_squeeze
+        exits = valid & (closes >= upper) & no_squeeze
+        if strategy.settings.get('exit_on_middle', False):
+            exits |= valid & (np.abs(closes - middle) / middle < 0.01)
+    return entries, exits
+
+
+VECTORIZED_SIGNALS = {
+    EmaMlStrategy: ema_ml_signals,
+    BollingerStrategy: bollinger_signals,
+}
+
+
+def supports_vectorized(engine, strategy, config):
+    """Можно ли посчитать стратегию векторно с теми же результатами"""
+    if type(strategy) not in VECTORIZED_SIGNALS or engine.ml_model is not None:
+        return False
+    if isinstance(strategy, EmaMlStrategy):
+        settings = strategy.settings
+        # Трейлинг и TP в USDT зависят от пути цены, а TP/SL движка должны совпадать с TP/SL стратегии
+        if settings.get('trailing_stop') or settings.get('take_profit_usdt'):
+            return False
+        if (config['take_profit_percent'] != settings.get('take_profit_percent')
+                or config['stop_loss_percent'] != settings.get('stop_loss_percent')):
+            return False
+    return True
+
+
+def first_true(mask, start):
+    """Индекс первого True начиная со start (поиск блоками растущего размера)"""
+    chunk = SEARCH_CHUNK
+    while start < len(mask):
+        stop = min(len(mask), start + chunk)
+        hits = np.flatnonzero(mask[start:stop])
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        chunk *= 2
+    return None
+
+
+def first_exit(closes, times, exits, start, entry_index, config):
+    """Первая свеча выхода после входа: (индекс, причина) или (None, None)"""
+    entry_price = closes[entry_index]
+    chunk = SEARCH_CHUNK
+    while start < len(closes):
+        stop = min(len(closes), start + chunk)
+        hit_tp, hit_sl = risk_exit(closes[start:stop], entry_price, config)
+        by_signal = exits[start:stop] & (times[start:stop] - times[entry_index] >= config['min_hold_time'])
+        hits = np.flatnonzero(hit_tp | hit_sl | by_signal)
+        if len(hits):
+            k = int(hits[0])
+            reason = 'take_profit' if hit_tp[k] else 'stop_loss' if hit_sl[k] else 'signal'
+            return start + k, reason
+        start = stop
+        chunk *= 2
+    return None, None
+
+
+def run_vectorized(engine, strategy, candles, config):
+    """Симуляция по массивам сигналов: цикл идет по сделкам, а не по свечам"""
+    entries, exits = VECTORIZED_SIGNALS[type(strategy)](engine, strategy, candles, config)
+    closes = candles[:, 4]
+    times = candles[:, 0] / 1000 + timeframe_seconds(candles)
+    entries[:engine.warmup] = False
+
+    trades = []
+    open_position = None
+    start = engine.warmup
+    while True:
+        entry_index = first_true(entries, start)
+        if entry_index is None:
+            break
+        exit_index, reason = first_exit(closes, times, exits, entry_index + 1, entry_index, config)
+        if exit_index is None:
+            open_position = {'entry_time': times[entry_index], 'entry_price': float(closes[entry_index])}
+            break
+        trades.append(engine._trade(candles, times, entry_index, exit_index, reason))
+        # Следующий вход - не раньше свечи после выхода и не чаще min_trade_interval
+        start = max(exit_index + 1, int(np.searchsorted(times, times[exit_index] + config['min_trade_interval'])))
+    return trades, open_position
@@ -0,0 +1,7 @@
+"""
+МИКРОБЕНЧМАРКИ ГОРЯЧИХ ПУТЕЙ (ИНДИКАТОРЫ, ФИЧИ, ML, СТРАТЕГИИ, ПОЗИЦИИ, АНАЛИТИКА)
+
+python -m benchmarks                 - прогон и сравнение с benchmarks/baseline.json
+python -m benchmarks --update        - записать результаты как новые базовые
+python -m benchmarks --filter ml.    - только бенчмарки с подстрокой в имени
+"""
@@ -0,0 +1,7 @@
+"""
+ЗАПУСК: python -m benchmarks
+"""
+import sys
+from benchmarks.runner import main
+
+sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+СИНТЕТИЧЕСКИЕ ДАННЫЕ ДЛЯ БЕНЧМАРКОВ (СВЕЧИ, РЫНОЧНЫЕ ДАННЫЕ, СДЕЛКИ)
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from utils.indicators import EMA
+
+HOUR_MS = 3600000
+START_MS = 1_600_000_000_000
+
+
+def make_prices(count, seed=7, start=100.0, volatility=0.01):
+    """Цены закрытия: случайное блуждание (логнормальное)"""
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+
+
+def make_ohlcv(count, seed=7, volatility=0.01):
+    """Свечи 1h как из ccxt: список [время, open, high, low, close, объем]"""
+    rng = np.random.default_rng(seed)
+    closes = make_prices(count, seed, volatility=volatility)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    highs = np.maximum(opens, closes) * (1 + rng.random(count) * volatility)
+    lows = np.minimum(opens, closes) * (1 - rng.random(count) * volatility)
+    times = START_MS + np.arange(count) * HOUR_MS
+    return np.column_stack([times, opens, highs, lows, closes, rng.random(count) * 100]).tolist()
+
+
+def make_market_stream(window, count, seed=7, ema_fast=9, ema_slow=21):
+    """Рыночные данные последовательных циклов (как get_market_data): окно сдвигается на одну свечу"""
+    candles = make_ohlcv(window + count, seed)
+    fast_ema, slow_ema = EMA(ema_fast), EMA(ema_slow)
+    stream = []
+    for i, candle in enumerate(candles):
+        close = candle[4]
+        fast, slow = fast_ema.update(close), slow_ema.update(close)
+        if i + 1 < window:
+            continue
+        previous = candles[i - 23][4] if i >= 23 else close
+        stream.append({
+            'fast_ema': fast,
+            'slow_ema': slow,
+            'ema_diff_percent': (fast - slow) / slow if slow else 0,
+            'current_price': close,
+            'price_change_24h': (close - previous) / previous * 100,
+            'ohlcv': candles[i + 1 - window:i + 1],
+        })
+    return stream
+
+
+def make_trades(count, seed=7, symbol='BTC/USDT'):
+    """Результаты сделок для AnalyticsMetrics.update_metrics: [(trade_result, время), ...]"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    trades = []
+    for i, profit in enumerate(rng.normal(0.1, 1.5, count)):
+        size = float(10 + rng.random() * 90)
+        trades.append(({
+            'symbol': symbol,
+            'strategy': 'ema_ml',
+            'signal': 'sell',
+            'profit': float(profit),
+            'profit_percent': float(profit),
+            'profit_usdt': size * float(profit) / 100,
+            'position_size_usdt': size,
+            'price': 100.0,
+            'position_size': size / 100,
+        }, start + timedelta(hours=i)))
+    return trades
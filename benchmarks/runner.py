@@ -0,0 +1,189 @@
+"""
+ЗАПУСК БЕНЧМАРКОВ, БАЗОВЫЕ РЕЗУЛЬТАТЫ В JSON И ПРОВЕРКА РЕГРЕССИЙ
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 0.30  # замедление больше чем на 30% - регрессия
+MIN_DELTA_US = 1.0        # разница меньше 1 мкс - шум таймера, не регрессия
+RUN_TIME = 0.05           # сек на один повтор (число вызовов подбирается)
+REPEATS = 5               # повторов; берется лучший (наименее зашумленный)
+RECHECKS = 2              # повторных замеров регрессии: засчитывается, только если воспроизвелась
+QUICK_RUN_TIME = 0.005
+QUICK_REPEATS = 1
+
+
+def measure(call, run_time=RUN_TIME, repeats=REPEATS):
+    """Время одного вызова (мкс): лучший из repeats прогонов по loops вызовов (сборщик мусора выключен, как в timeit)"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(call, run_time, repeats)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure(call, run_time, repeats):
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            call()
+        elapsed = time.perf_counter() - started
+        if elapsed >= run_time or loops >= 1_000_000:
+            break
+        loops = max(loops * 2, int(loops * run_time / elapsed) if elapsed > 0 else loops * 10)
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            call()
+        best = min(best, (time.perf_counter() - started) / loops)
+    return {'us': round(best * 1e6, 3), 'loops': loops}
+
+
+def run(name_filter=None, quick=False, report=None, keys=None):
+    """Прогон набора: {'имя[размер]': {'us': ..., 'loops': ...}}; keys - только эти замеры"""
+    from backtest.engine import quiet_logs
+    from benchmarks.suite import BENCHMARKS
+    run_time, repeats = (QUICK_RUN_TIME, QUICK_REPEATS) if quick else (RUN_TIME, REPEATS)
+    results = {}
+    tmpdir = tempfile.mkdtemp(prefix='kucoinbot_bench_')
+    try:
+        with quiet_logs():
+            for name, (setup, sizes) in BENCHMARKS.items():
+                if name_filter and name_filter not in name:
+                    continue
+                for size in sizes:
+                    key = f"{name}[{size}]"
+                    if keys is not None and key not in keys:
+                        continue
+                    results[key] = measure(setup(size, tmpdir), run_time, repeats)
+                    if report:
+                        report(key, results[key])
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Базовые результаты ({} - файла нет)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH, merge=True):
+    """Запись базовых результатов (с merge - поверх прежних, для прогонов с --filter)"""
+    previous = load_baseline(path).get('results', {}) if merge else {}
+    payload = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'results': dict(sorted({**previous, **{key: {'us': value['us']} for key, value in results.items()}}.items())),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    return payload
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta_us=MIN_DELTA_US):
+    """Сравнение с базовыми: [{'name', 'us', 'baseline_us', 'ratio', 'status'}, ...].
+
+    status: regression (медленнее порога), improved (быстрее порога), ok, new (нет в baseline).
+    """
+    rows = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append({'name': name, 'us': value['us'], 'baseline_us': None, 'ratio': None, 'status': 'new'})
+            continue
+        ratio = value['us'] / base['us'] if base['us'] else float('inf')
+        delta = value['us'] - base['us']
+        if ratio > 1 + threshold and delta > min_delta_us:
+            status = 'regression'
+        elif ratio < 1 - threshold and -delta > min_delta_us:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'us': value['us'], 'baseline_us': base['us'], 'ratio': round(ratio, 3),
+                     'status': status})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Микробенчмарки горячих путей бота')
+    parser.add_argument('--filter', help='только бенчмарки с этой подстрокой в имени')
+    parser.add_argument('--update', action='store_true', help='записать результаты в baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='допустимое замедление (0.3 = 30%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='файл базовых результатов')
+    parser.add_argument('--quick', action='store_true', help='короткие прогоны (проверка, что набор работает)')
+    parser.add_argument('--json', help='сохранить результаты и сравнение в файл')
+    args = parser.parse_args(argv)
+
+    baseline_data = load_baseline(args.baseline)
+    baseline = baseline_data.get('results', {})
+    if baseline and baseline_data.get('environment', {}).get('python') != platform.python_version():
+        print(f"⚠️ Базовые результаты сняты на Python {baseline_data['environment'].get('python')} - сравнение приблизительное")
+
+    def report(key, value):
+        base = baseline.get(key)
+        suffix = f"  (база {base['us']:.1f} мкс, x{value['us'] / base['us']:.2f})" if base and base['us'] else ''
+        print(f"{key:<40} {value['us']:>12.1f} мкс{suffix}")
+
+    results = run(args.filter, args.quick, report)
+    rows = compare(results, baseline, args.threshold)
+    # Шум соседних процессов: в зачет идет лучший из нескольких прогонов - для базы
+    # перемеряется весь набор, при проверке - только замедлившиеся бенчмарки
+    for _ in range(RECHECKS):
+        suspects = set(results) if args.update else {row['name'] for row in rows if row['status'] == 'regression'}
+        if not suspects:
+            break
+        if not args.update:
+            print(f"🔁 Повторный замер: {', '.join(sorted(suspects))}")
+        for key, value in run(args.filter, args.quick, keys=suspects).items():
+            if value['us'] < results[key]['us']:
+                results[key] = value
+        rows = compare(results, baseline, args.threshold)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': results, 'comparison': rows}, f, indent=2)
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"💾 Базовые результаты записаны: {args.baseline} ({len(results)} замеров)")
+        return 0
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    for row in rows:
+        if row['status'] in ('regression', 'improved'):
+            mark = '🔴' if row['status'] == 'regression' else '🟢'
+            print(f"{mark} {row['name']}: {row['baseline_us']:.1f} -> {row['us']:.1f} мкс (x{row['ratio']:.2f})")
+    new = sum(1 for row in rows if row['status'] == 'new')
+    print(f"Итого: {len(rows)} замеров, регрессий {len(regressions)}, без базы {new} (порог {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+НАБОР БЕНЧМАРКОВ: ПОДГОТОВКА ДАННЫХ И ЗАМЕРЯЕМЫЕ ВЫЗОВЫ
+"""
+import itertools
+import os
+import numpy as np
+from benchmarks.data import make_prices, make_ohlcv, make_market_stream, make_trades
+
+# Имя -> (подготовка, размеры входа). Подготовка setup(size, tmpdir) не замеряется
+# и возвращает функцию без аргументов - один замеряемый вызов
+BENCHMARKS = {}
+STREAM_LENGTH = 2000  # циклов в потоке рыночных данных (дальше поток повторяется)
+
+
+def benchmark(name, sizes):
+    def register(setup):
+        BENCHMARKS[name] = (setup, tuple(sizes))
+        return setup
+    return register
+
+
+def _cycled(items, call):
+    """Каждый замеряемый вызов получает следующий элемент (как новая свеча в следующем цикле)"""
+    iterator = itertools.cycle(items)
+    return lambda: call(next(iterator))
+
+
+# ---------- utils/helpers: индикаторы по списку цен ----------
+
+def _register_indicator(name, function_name, **kwargs):
+    @benchmark(f"indicators.{name}", sizes=(100, 1000, 10000))
+    def setup(size, tmpdir):
+        from utils import helpers
+        function = getattr(helpers, function_name)
+        prices = make_prices(size).tolist()
+        return lambda: function(prices, **kwargs)
+
+
+_register_indicator('ema', 'calculate_ema', period=21)
+_register_indicator('rsi', 'calculate_rsi', period=14)
+_register_indicator('macd', 'calculate_macd')
+_register_indicator('bollinger', 'calculate_bollinger_bands')
+
+
+@benchmark('indicators.volatility', sizes=(100, 1000, 10000))
+def bench_volatility(size, tmpdir):
+    from utils.helpers import calculate_volatility
+    prices = make_prices(size)
+    return lambda: calculate_volatility(prices)
+
+
+# ---------- ml: фичи и предсказание ----------
+
+@benchmark('features.prepare', sizes=(50, 200, 1000))
+def bench_prepare_features(size, tmpdir):
+    from ml.features import FeatureEngineer
+    engineer = FeatureEngineer()
+    candles = make_ohlcv(size)
+    return lambda: engineer.prepare_features(candles)
+
+
+@benchmark('features.batch', sizes=(1000, 5000))
+def bench_prepare_features_batch(size, tmpdir):
+    from ml.features import FeatureEngineer
+    engineer = FeatureEngineer()
+    candles = make_ohlcv(size)
+    return lambda: engineer.prepare_features_batch(candles)
+
+
+_trained_model = None
+
+
+def trained_model():
+    """MLModel, обученная как в MLModel.train() на синтетических свечах (без записи файлов модели)"""
+    global _trained_model
+    if _trained_model is None:
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+        from ml.model import MLModel
+        model = MLModel()
+        candles = make_ohlcv(2000, seed=11)
+        features = model.feature_engineer.prepare_features_batch(candles)
+        closes = np.asarray(candles)[:, 4]
+        start = model.feature_engineer.required_period
+        y = (closes[start:] > closes[start - 1:-1]).astype(int)
+        model.scaler = StandardScaler()
+        model.model = RandomForestClassifier(n_estimators=50, max_depth=8, min_samples_split=10,
+                                             min_samples_leaf=4, random_state=42, n_jobs=-1)
+        model.model.fit(model.scaler.fit_transform(features[:-1]), y)
+        model.is_trained = True
+        _trained_model = model
+    return _trained_model
+
+
+@benchmark('ml.predict', sizes=(50, 200))
+def bench_ml_predict(size, tmpdir):
+    model = trained_model()
+    windows = [data['ohlcv'] for data in make_market_stream(size, 200)]
+    return _cycled(windows, model.predict)
+
+
+# ---------- strategies: calculate_signal в установившемся режиме ----------
+
+def _register_strategy(name):
+    @benchmark(f"strategy.{name}", sizes=(50, 200))
+    def setup(size, tmpdir):
+        import inspect
+        from strategies import get_strategy_class
+        strategy = get_strategy_class(name)()
+        # Время идет вперед на свечу за вызов: защита от частых сигналов не обрывает расчет
+        strategy.clock = itertools.count(0, 3600).__next__
+        extra = {'position_size_usdt': 100.0} if 'position_size_usdt' in inspect.signature(
+            strategy.calculate_signal).parameters else {}
+        stream = make_market_stream(size, STREAM_LENGTH)
+        return _cycled(stream, lambda data: strategy.calculate_signal(data, 0.55, "⚪ НЕЙТРАЛЬНО", **extra))
+
+
+def _strategy_names():
+    from strategies import STRATEGY_CLASSES
+    return list(STRATEGY_CLASSES)
+
+
+for _name in _strategy_names():
+    _register_strategy(_name)
+
+
+# ---------- utils/position_manager: позиции в SQLite ----------
+
+def _position_file(size, tmpdir, name):
+    from utils.position_manager import add_position
+    file_path = os.path.join(tmpdir, f"{name}_{size}.json")
+    for i in range(size):
+        add_position('BTC/USDT', 100.0 + i, 10.0, 0.1, file_path=file_path)
+    return file_path
+
+
+@benchmark('positions.read', sizes=(1, 10, 100))
+def bench_positions_read(size, tmpdir):
+    from utils.position_manager import load_position_state, get_positions_count, get_total_position_size
+    file_path = _position_file(size, tmpdir, 'read')
+
+    def read():
+        get_positions_count('BTC/USDT', file_path=file_path)
+        get_total_position_size('BTC/USDT', file_path=file_path)
+        return load_position_state(file_path)
+    return read
+
+
+@benchmark('positions.write', sizes=(1, 10, 100))
+def bench_positions_write(size, tmpdir):
+    from utils.position_manager import add_position, remove_position
+    file_path = _position_file(size, tmpdir, 'write')
+
+    def write():
+        position = add_position('BTC/USDT', 123.0, 10.0, 0.1, file_path=file_path)
+        remove_position('BTC/USDT', position['id'], file_path=file_path)
+    return write
+
+
+# ---------- analytics: метрики и журнал сделок ----------
+
+def _metrics_with_history(size, ledger=None):
+    from analytics.metrics import AnalyticsMetrics
+    metrics = AnalyticsMetrics(ledger=ledger)
+    for trade, moment in make_trades(size):
+        metrics.update_metrics(trade, moment)
+    return metrics
+
+
+@benchmark('analytics.update', sizes=(100, 1000))
+def bench_analytics_update(size, tmpdir):
+    metrics = _metrics_with_history(size)
+    return _cycled(make_trades(500, seed=3), lambda item: metrics.update_metrics(*item))
+
+
+@benchmark('analytics.update_ledger', sizes=(100,))
+def bench_analytics_update_ledger(size, tmpdir):
+    from analytics.ledger import TradeLedger
+    metrics = _metrics_with_history(size, TradeLedger(os.path.join(tmpdir, f"ledger_{size}.db")))
+    return _cycled(make_trades(500, seed=3), lambda item: metrics.update_metrics(*item))
+
+
+@benchmark('analytics.reports', sizes=(100, 1000))
+def bench_analytics_reports(size, tmpdir):
+    metrics = _metrics_with_history(size)
+    day = make_trades(1)[0][1].date()
+
+    def reports():
+        metrics.get_summary()
+        metrics.get_risk_metrics()
+        metrics.get_daily_summary(day)
+        return metrics.get_performance_report()
+    return reports
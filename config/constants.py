@@ -35,6 +35,12 @@ DEFAULT_SETTINGS = {
     'enable_trade_signals': True,
     'demo_mode': True,
     'trading_enabled': True,
+    # ⏰ Планировщик: сигналы по закрытию свечи, отдельные интервалы для рисков и баланса
+    'signal_timeframe': '1h',
+    'candle_close_delay': 2,         # сек после закрытия свечи
+    'risk_check_interval': 10,       # сек между проверками TP/SL внутри свечи
+    'balance_check_interval': 300,   # сек между обновлениями баланса
+    'market_feed_enabled': True,     # 📡 тикеры и свечи по WebSocket вместо REST-опроса
 }
 
 # Настройки ML по умолчанию
@@ -45,6 +51,9 @@ DEFAULT_ML_SETTINGS = {
     'retrain_frequency_hours': 24
 }
 
+# Количество свечей для обучения ML-модели
+ML_TRAINING_CANDLES = 5000
+
 # Настройки рисков по умолчанию
 DEFAULT_RISK_SETTINGS = {
     'max_daily_loss': 3.0,
@@ -19,7 +19,9 @@ class SettingsManager:
         }
         self.trading_pairs = {
             'active_pair': 'BTC/USDT',
-            'available_pairs': TRADING_PAIRS
+            'available_pairs': TRADING_PAIRS,
+            # Пары, которые торгуются одновременно в одном цикле
+            'enabled_pairs': list(TRADING_PAIRS.keys())
         }
         self.ml_settings = DEFAULT_ML_SETTINGS.copy()
         self.risk_settings = DEFAULT_RISK_SETTINGS.copy()
@@ -113,6 +115,11 @@ class SettingsManager:
                 if last_ema_threshold is not None:
                     strategy.settings['ema_threshold'] = last_ema_threshold
                 
+                # Параметры остальных стратегий, подобранные оптимизатором
+                for name, params in self.strategy_settings.get('optimized_params', {}).items():
+                    if name != 'ema_ml' and name in self.bot.strategies:
+                        self.bot.strategies[name].settings.update(params)
+                
                 print(f"✅ Настройки стратегии загружены: TP_USDT={last_tp_usdt}, TP_%={last_tp_percent}, SL_%={last_sl_percent}, EMA={last_ema_fast}/{last_ema_slow}, Threshold={last_ema_threshold*100:.2f}%")
         except Exception as e:
             print(f"❌ Ошибка загрузки настроек стратегии: {e}")
@@ -1,8 +1,15 @@
 """
 ОСНОВНЫЕ КОМПОНЕНТЫ СИСТЕМЫ
 """
-from .bot import AdvancedTradingBot
-from .exchange import ExchangeManager
-from .risk_manager import RiskManager
+from utils.startup import lazy_exports
 
-__all__ = ['AdvancedTradingBot', 'ExchangeManager', 'RiskManager']
\ No newline at end of file
+# ⚡ ОПТИМИЗАЦИЯ: модули загружаются при первом обращении к имени - импорт
+# core.rate_limiter или core.exchange не тянет бота, ML и Telegram
+_EXPORTS = {
+    'AdvancedTradingBot': '.bot',
+    'ExchangeManager': '.exchange',
+    'RiskManager': '.risk_manager',
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ['AdvancedTradingBot', 'ExchangeManager', 'RiskManager']
@@ -3,39 +3,51 @@
 """
 import threading
 import time
-import json
-import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from config.settings import SettingsManager
 from core.exchange import ExchangeManager
+from core.rate_limiter import exchange_lane
 from core.risk_manager import RiskManager
 from analytics.metrics import AnalyticsMetrics
+from analytics.ledger import TradeLedger
 from ml.model import MLModel
 from telegram.bot import TelegramBot
-from strategies.ema_ml import EmaMlStrategy
-from strategies.price_action import PriceActionStrategy
-from strategies.macd_rsi import MacdRsiStrategy
-from strategies.bollinger import BollingerStrategy
+from core.pair_state import PairState
+from core.scheduler import Scheduler
 from utils.logger import log_info, log_error, log_separator, log_section, log_empty_line
+from utils.startup import startup_profiler
+from utils.telemetry import TRADING_CYCLE_SECONDS
+from utils.tracing import attach, capture, cycle_tracer, span
+
+MIN_TRADE_INTERVAL = 60  # сек между сделками по паре (защита от частых сделок)
 
 class AdvancedTradingBot:
     def __init__(self):
         """Оптимизированная инициализация бота"""
         # БЫСТРАЯ инициализация основных компонентов
-        self.settings = SettingsManager()
-        self.exchange = ExchangeManager() 
+        # ⏱️ Время готовности подсистем - startup_profiler (/api/debug/startup)
+        with startup_profiler.stage('settings'):
+            self.settings = SettingsManager()
+        with startup_profiler.stage('exchange'):
+            self.exchange = ExchangeManager() 
         self.risk_manager = RiskManager(self.settings.risk_settings)
-        self.metrics = AnalyticsMetrics()
+        # 💾 Сделки и метрики сохраняются в журнал (analytics/ledger.py) и переживают перезапуск
+        with startup_profiler.stage('metrics'):
+            self.metrics = AnalyticsMetrics(ledger=TradeLedger())
         # Состояние бота
-        self.position = None
-        self.entry_price = 0
-        self.last_signal = None
         self.last_price = None
         self.is_running = True
-        # Размер текущей позиции в USDT (фиксируется при открытии)
-        self.current_position_size_usdt = 0
-        # Время последней сделки (для защиты от частых сделок)
-        self.last_trade_time = 0
+        self.scheduler = None
+        # 🔧 СОСТОЯНИЕ ПО ПАРАМ: у каждой пары свои стратегии, позиция и таймер сделок
+        self._init_pairs()
+        # 📡 Тикеры и свечи всех пар приходят по WebSocket, REST - только запасной путь
+        if self.settings.settings.get('market_feed_enabled', True):
+            with startup_profiler.stage('market_feed'):
+                self.exchange.start_market_feed(
+                    self.get_enabled_pairs(), self.settings.settings.get('signal_timeframe', '1h')
+                )
         
         # 🔧 УСТАНАВЛИВАЕМ ССЫЛКУ НА БОТА В НАСТРОЙКАХ ДО ИНИЦИАЛИЗАЦИИ TELEGRAM
         self.settings.set_bot_reference(self)
@@ -43,17 +55,14 @@ class AdvancedTradingBot:
         # Сразу запускаем Telegram для мгновенного отклика
         # 🔧 ИНИЦИАЛИЗИРУЕМ telegram ДАЖЕ ЕСЛИ ОШИБКА (чтобы избежать AttributeError)
         try:
-            self.telegram = TelegramBot(self)
+            with startup_profiler.stage('telegram'):
+                self.telegram = TelegramBot(self)
         except Exception as e:
             log_error(f"❌ Ошибка инициализации Telegram бота: {e}")
             self.telegram = None  # Устанавливаем None, чтобы избежать AttributeError
-        # Стратегии (быстрая инициализация)
-        self.strategies = {
-            'ema_ml': EmaMlStrategy(),
-            'price_action': PriceActionStrategy(), 
-            'macd_rsi': MacdRsiStrategy(),
-            'bollinger': BollingerStrategy()
-        }
+        # Стратегии активной пары (остальные пары создаются при первом обращении)
+        with startup_profiler.stage('strategies'):
+            self.get_pair_state(self.settings.trading_pairs['active_pair'])
         
         # 🔧 ЗАГРУЖАЕМ НАСТРОЙКИ СТРАТЕГИЙ ПОСЛЕ ИХ СОЗДАНИЯ
         self.settings.load_strategy_settings()
@@ -65,12 +74,108 @@ class AdvancedTradingBot:
 
         log_info("⚡ Бот быстро инициализирован, ML загружается в фоне...")
         # ML в фоне - не блокирует старт
-        self.ml_model = MLModel()
+        self.ml_model = MLModel(archive=self.exchange.candle_archive)
         self.start_background_ml()
         # 🟢 ЛЕНИВАЯ ЗАГРУЗКА ПОЗИЦИИ - не блокирует старт WebApp
         self._position_loaded = False
         self._position_loading = False  # Флаг, что загрузка уже идет
         threading.Thread(target=self._load_position_background, daemon=True).start()
+        startup_profiler.ready('bot')
+
+    # 🔀 СОСТОЯНИЕ ПАР
+    def _init_pairs(self):
+        """Инициализация мультипарного движка"""
+        self.pairs = {}
+        self._pairs_lock = threading.Lock()
+        self._pair_context = threading.local()
+        self._cycle_balance = None
+        # Рыночные данные всех пар запрашиваются параллельно одним ccxt-клиентом
+        self._market_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='market')
+
+    def get_pair_state(self, symbol):
+        """Состояние пары (создается при первом обращении)"""
+        pair = self.pairs.get(symbol)
+        if pair is None:
+            with self._pairs_lock:
+                pair = self.pairs.get(symbol)
+                if pair is None:
+                    pair = PairState(symbol)
+                    self.pairs[symbol] = pair
+        return pair
+
+    def get_enabled_pairs(self):
+        """Пары, которые торгуются в цикле (активная пара всегда первая)"""
+        active_pair = self.settings.trading_pairs['active_pair']
+        available = self.settings.trading_pairs.get('available_pairs', {})
+        enabled = self.settings.trading_pairs.get('enabled_pairs', [active_pair])
+        symbols = [active_pair]
+        for symbol in enabled:
+            if symbol in available and symbol not in symbols:
+                symbols.append(symbol)
+        return symbols
+
+    @contextmanager
+    def pair_context(self, symbol):
+        """Переключает position/entry_price/strategies бота на указанную пару (в текущем потоке)"""
+        previous = getattr(self._pair_context, 'symbol', None)
+        self._pair_context.symbol = symbol
+        try:
+            yield self.get_pair_state(symbol)
+        finally:
+            self._pair_context.symbol = previous
+
+    @property
+    def current_symbol(self):
+        """Пара текущего контекста (по умолчанию - активная)"""
+        return getattr(self._pair_context, 'symbol', None) or self.settings.trading_pairs['active_pair']
+
+    @property
+    def current_pair(self):
+        return self.get_pair_state(self.current_symbol)
+
+    @property
+    def strategies(self):
+        return self.current_pair.strategies
+
+    @property
+    def position(self):
+        return self.current_pair.position
+
+    @position.setter
+    def position(self, value):
+        self.current_pair.position = value
+
+    @property
+    def entry_price(self):
+        return self.current_pair.entry_price
+
+    @entry_price.setter
+    def entry_price(self, value):
+        self.current_pair.entry_price = value
+
+    @property
+    def current_position_size_usdt(self):
+        return self.current_pair.current_position_size_usdt
+
+    @current_position_size_usdt.setter
+    def current_position_size_usdt(self, value):
+        self.current_pair.current_position_size_usdt = value
+
+    @property
+    def last_trade_time(self):
+        return self.current_pair.last_trade_time
+
+    @last_trade_time.setter
+    def last_trade_time(self, value):
+        self.current_pair.last_trade_time = value
+
+    @property
+    def last_signal(self):
+        return self.current_pair.last_signal
+
+    @last_signal.setter
+    def last_signal(self, value):
+        self.current_pair.last_signal = value
 
     def start_background_ml(self):
         """Фоновая загрузка ML"""
@@ -78,10 +183,12 @@ class AdvancedTradingBot:
             if self.settings.ml_settings['enabled']:
                 if not self.ml_model.load_model():
                     log_info("🤖 Фоновое обучение ML...")
-                    # Используем легкий режим обучения
-                    self.ml_model.train(self.exchange.exchange, limit=80)
+                    # Матрица фич строится за один проход - можно учиться на длинной истории
+                    with exchange_lane('background'):
+                        self.ml_model.train(self.exchange.exchange)
                 else:
                     log_info("✅ ML модель загружена из кэша")
+                startup_profiler.ready('ml')
             else:
                 log_info("🤖 ML отключен в настройках")
         threading.Thread(target=ml_worker, daemon=True).start()
@@ -90,6 +197,12 @@ class AdvancedTradingBot:
         """Получение активной стратегии с актуальными настройками"""
         strategy_name = self.settings.strategy_settings['active_strategy']
         strategy = self.strategies.get(strategy_name, self.strategies['ema_ml'])
+        # Настройки задаются через активную пару - остальные пары их повторяют
+        active_pair = self.settings.trading_pairs['active_pair']
+        if self.current_symbol != active_pair:
+            active_strategies = self.get_pair_state(active_pair).strategies
+            source = active_strategies.get(strategy_name, active_strategies['ema_ml'])
+            strategy.settings.update(source.settings)
         # 🔧 ОБНОВЛЯЕМ НАСТРОЙКИ СТРАТЕГИИ ИЗ МЕНЕДЖЕРА НАСТРОЕК
         if strategy_name == 'ema_ml':
             # Загружаем EMA настройки из сохраненных значений
@@ -108,37 +221,89 @@ class AdvancedTradingBot:
         return strategy
 
     def execute_trading_cycle(self):
-        """Выполнение одного цикла торговли"""
+        """Выполнение одного цикла торговли по всем включенным парам"""
+        started = time.perf_counter()
+        # ⏱️ Этапы цикла записываются в кольцевой буфер (/api/debug/cycles)
+        with cycle_tracer.cycle('trading_cycle'):
+            try:
+                symbols = self.get_enabled_pairs()
+                # ⚡ ОПТИМИЗАЦИЯ: рыночные данные всех пар запрашиваются параллельно
+                with span('market_data', pairs=len(symbols)):
+                    market_data_by_pair = self.fetch_market_data(symbols)
+                self._cycle_balance = None
+                for symbol in symbols:
+                    with self.pair_context(symbol) as pair, span('pair', symbol=symbol):
+                        pair.market_data = market_data_by_pair.get(symbol)
+                        self.execute_pair_cycle(symbol, pair.market_data)
+            except Exception as e:
+                log_error(f"❌ Ошибка в торговом цикле: {e}")
+            finally:
+                TRADING_CYCLE_SECONDS.observe(time.perf_counter() - started)
+
+    def fetch_market_data(self, symbols):
+        """Параллельная загрузка рыночных данных для списка пар"""
+        # Запросы идут в потоках пула - трасса цикла передается им явно
+        trace_context = capture()
+
+        def fetch(symbol):
+            with attach(trace_context), span('market_data_pair', symbol=symbol):
+                with self.pair_context(symbol):
+                    strategy = self.get_active_strategy()
+                    ema_fast = strategy.settings.get('ema_fast_period', 9)
+                    ema_slow = strategy.settings.get('ema_slow_period', 21)
+                timeframe = self.settings.settings.get('signal_timeframe', '1h')
+                return self.exchange.get_market_data(
+                    symbol, timeframe=timeframe, ema_fast_period=ema_fast, ema_slow_period=ema_slow
+                )
+
+        futures = {symbol: self._market_executor.submit(fetch, symbol) for symbol in symbols}
+        result = {}
+        for symbol, future in futures.items():
+            try:
+                result[symbol] = future.result()
+            except Exception as e:
+                log_error(f"❌ Ошибка получения рыночных данных {symbol}: {e}")
+                result[symbol] = None
+        return result
+
+    def get_cycle_balance(self):
+        """Баланс, общий для всех пар в рамках цикла (обновляется после сделки)"""
+        if self._cycle_balance is None:
+            self._cycle_balance = self.exchange.get_balance()
+        return self._cycle_balance
+
+    def execute_pair_cycle(self, symbol, market_data):
+        """Выполнение торгового цикла для одной пары"""
         try:
             log_empty_line()
             log_separator("-", 80)
+            log_info(f"🔀 ПАРА: {symbol}")
             
-            # Получаем рыночные данные для обновления (даже если торговля отключена)
-            symbol = self.settings.trading_pairs['active_pair']
-            # Получаем стратегию для настройки EMA периодов
+            # Получаем стратегию пары с актуальными настройками
             strategy = self.get_active_strategy()
-            ema_fast = strategy.settings.get('ema_fast_period', 9)
-            ema_slow = strategy.settings.get('ema_slow_period', 21)
-            market_data = self.exchange.get_market_data(symbol, ema_fast_period=ema_fast, ema_slow_period=ema_slow)
             if not market_data:
-                log_info("❌ Не удалось получить рыночные данные")
+                log_info(f"❌ Не удалось получить рыночные данные {symbol}")
                 log_separator("-", 80)
                 return
             
             # Получаем ML предсказание (если модель готова)
             ml_confidence, ml_signal = 0.5, "⚪ ML ЗАГРУЗКА"
             if self.ml_model.is_trained:
-                ml_confidence, ml_signal = self.ml_model.predict(market_data.get('ohlcv', []))
-            signal = strategy.calculate_signal(
-                market_data, 
-                ml_confidence, 
-                ml_signal,
-                position_size_usdt=0  # Не важно для сигнала
-            )
+                with span('ml_predict'):
+                    ml_confidence, ml_signal = self.ml_model.predict(market_data.get('ohlcv', []))
+            with span('signal'):
+                signal = strategy.calculate_signal(
+                    market_data, 
+                    ml_confidence, 
+                    ml_signal,
+                    position_size_usdt=0  # Не важно для сигнала
+                )
             
             # 🔧 ОТПРАВЛЯЕМ ОБНОВЛЕНИЕ РЫНКА ДАЖЕ ЕСЛИ ТОРГОВЛЯ ОТКЛЮЧЕНА
-            # Это нужно для отображения информации о позиции и рынке
-            self.telegram.send_market_update(market_data, signal, ml_confidence, ml_signal)
+            # Это нужно для отображения информации о позиции и рынке (только для активной пары)
+            if symbol == self.settings.trading_pairs['active_pair']:
+                with span('telegram_update'):
+                    self.telegram.send_market_update(market_data, signal, ml_confidence, ml_signal)
             
             # 🔧 ПРОВЕРКА: разрешена ли торговля
             if not self.settings.settings.get('trading_enabled', False):
@@ -146,7 +311,8 @@ class AdvancedTradingBot:
                 log_separator("-", 80)
                 return
             # 🔧 ПРОВЕРКА: достаточно ли средств
-            balance = self.exchange.get_balance()
+            with span('balance'):
+                balance = self.get_cycle_balance()
             if not balance or balance['free_usdt'] < 0.1:  # Минимум 0.1 USDT
                 log_info("❌ Недостаточно средств для торговли (минимум 0.1 USDT)")
                 log_separator("-", 80)
@@ -158,7 +324,8 @@ class AdvancedTradingBot:
             trade_amount_percent = self.settings.settings['trade_amount_percent']
             initial_position_size_usdt = balance['free_usdt'] * trade_amount_percent
             # 🔧 РАСЧЕТ МИНИМАЛЬНОГО РАЗМЕРА СТАВКИ ДЛЯ ДАННОЙ ПАРЫ (биржевые лимиты)
-            min_amount, min_cost = self.exchange.get_min_limits(symbol)
+            with span('min_limits'):
+                min_amount, min_cost = self.exchange.get_min_limits(symbol)
             min_position_usdt_from_amount = float(min_amount) * market_data['current_price']
             # Минимальная сумма в USDT берется из биржи (fallback 0.1)
             min_position_usdt = max(min_position_usdt_from_amount, float(min_cost))
@@ -181,12 +348,14 @@ class AdvancedTradingBot:
                 log_info(f"💰 ИТОГОВАЯ СТАВКА: {position_size_usdt:.4f} USDT (увеличена до минимума)")
             else:
                 log_info(f"💰 ИТОГОВАЯ СТАВКА: {position_size_usdt:.4f} USDT")
-            signal = strategy.calculate_signal(
-                market_data, 
-                ml_confidence, 
-                ml_signal,
-                position_size_usdt=position_size_usdt
-            )
+            # Повторный расчет с размером позиции - отдельный этап, чтобы было видно его цену
+            with span('signal_sized'):
+                signal = strategy.calculate_signal(
+                    market_data, 
+                    ml_confidence, 
+                    ml_signal,
+                    position_size_usdt=position_size_usdt
+                )
             # 🔍 ДИАГНОСТИЧЕСКОЕ ЛОГИРОВАНИЕ
             log_empty_line()
             log_section("ДИАГНОСТИКА ТОРГОВОГО ЦИКЛА", "=", 80)
@@ -200,12 +369,13 @@ class AdvancedTradingBot:
                 log_info(f"⚙️ ПАРАМЕТРЫ СТРАТЕГИИ: EMA_threshold={ema_threshold:.4f}, ML_buy_threshold={ml_buy_threshold:.2f}")
             log_empty_line()
             # Проверяем риски
-            risk_ok, risk_message = self.risk_manager.check_trade_risk(
-                signal, 
-                market_data['current_price'],
-                (position_size_usdt / balance['free_usdt']) * 100 if balance['free_usdt'] > 0 else 0,
-                market_data
-            )
+            with span('risk_check'):
+                risk_ok, risk_message = self.risk_manager.check_trade_risk(
+                    signal, 
+                    market_data['current_price'],
+                    (position_size_usdt / balance['free_usdt']) * 100 if balance['free_usdt'] > 0 else 0,
+                    market_data
+                )
             log_info(f"⚡ ПРОВЕРКА РИСКОВ: risk_ok={risk_ok}, message='{risk_message}'")
             log_empty_line()
             # 🔧 ИСПРАВЛЕННАЯ ЛОГИКА ПРОВЕРКИ СИГНАЛОВ
@@ -215,7 +385,7 @@ class AdvancedTradingBot:
                 # 🔧 ЗАЩИТА ОТ ЧАСТЫХ СДЕЛОК (минимум 60 секунд между сделками)
                 current_time = time.time()
                 time_since_last_trade = current_time - self.last_trade_time
-                min_trade_interval = 60  # 60 секунд
+                min_trade_interval = MIN_TRADE_INTERVAL
                 if time_since_last_trade < min_trade_interval:
                     log_info(f"⏰ Слишком рано для новой сделки: {time_since_last_trade:.0f} сек < {min_trade_interval} сек")
                     should_execute = False
@@ -255,17 +425,20 @@ class AdvancedTradingBot:
             log_section("РЕШЕНИЕ О СДЕЛКЕ", "-", 80)
             if should_execute:
                 log_info(f"🚀 ВЫПОЛНЯЕМ СДЕЛКУ: {signal} - {execution_reason}")
-                self.execute_trade(signal, market_data, ml_confidence, ml_signal, position_size_usdt)
+                with span('execute_trade', signal=signal):
+                    self.execute_trade(signal, market_data, ml_confidence, ml_signal, position_size_usdt)
                 # 🔧 ОБНОВЛЯЕМ LAST_SIGNAL И ВРЕМЯ СДЕЛКИ ТОЛЬКО ПРИ ВЫПОЛНЕНИИ СДЕЛКИ
                 self.last_signal = signal
                 self.last_trade_time = time.time()
+                # Баланс изменился - следующая пара запросит его заново
+                self._cycle_balance = None
             else:
                 log_info(f"🔍 СДЕЛКА НЕ ВЫПОЛНЕНА: {execution_reason}")
             log_empty_line()
             # Обновление рынка уже отправлено выше (до проверки торговли)
             log_separator("-", 80)
         except Exception as e:
-            log_error(f"❌ Ошибка в торговом цикле: {e}")
+            log_error(f"❌ Ошибка в торговом цикле {symbol}: {e}")
 
     def execute_trade(self, signal, market_data, ml_confidence, ml_signal, position_size_usdt):
         """Исполнение сделки с информацией о размере позиции"""
@@ -273,7 +446,7 @@ class AdvancedTradingBot:
             log_empty_line()
             log_section(f"ИСПОЛНЕНИЕ СДЕЛКИ: {signal.upper()}", "=", 80)
             strategy = self.get_active_strategy()
-            symbol = self.settings.trading_pairs['active_pair']
+            symbol = self.current_symbol
             current_price = market_data['current_price']
             
             # ⚠️ КРИТИЧЕСКАЯ ПРОВЕРКА В ПЕРВУЮ ОЧЕРЕДЬ: блокируем покупки если есть открытые позиции
@@ -403,6 +576,7 @@ class AdvancedTradingBot:
                 # Обновляем метрики
                 trade_result = {
                     'symbol': symbol,
+                    'strategy': strategy.name,
                     'signal': 'buy',
                     'price': executed_price,
                     'profit': 0,
@@ -469,6 +643,7 @@ class AdvancedTradingBot:
                 # Обновляем метрики
                 trade_result = {
                     'symbol': symbol,
+                    'strategy': strategy.name,
                     'signal': 'sell',
                     'price': executed_price,
                     'profit': profit_percent,
@@ -524,49 +699,111 @@ class AdvancedTradingBot:
             return balance['free_usdt'] * self.settings.settings['trade_amount_percent']
         return 0
 
+    def execute_risk_checks(self):
+        """Быстрая проверка TP/SL по текущей цене для пар с открытой позицией"""
+        if not self.is_running or not self.settings.settings.get('trading_enabled', False):
+            return
+        for symbol in self.get_enabled_pairs():
+            with self.pair_context(symbol) as pair:
+                # Позиция, восстановленная при запуске, проверяется до первого цикла сигналов:
+                # уровням TP/SL нужна только цена тикера
+                if not pair.has_position():
+                    continue
+                ticker = self.exchange.get_ticker(symbol)
+                if not ticker or not ticker.get('last'):
+                    continue
+                # Только цена против уровней TP/SL открытой позиции - сигналы стратегии ждут закрытия свечи
+                current_price = ticker['last']
+                strategy = self.get_active_strategy()
+                reason = strategy.check_exit_levels(current_price, self.entry_price, self.current_position_size_usdt)
+                if not reason:
+                    continue
+                market_data = dict(pair.market_data or {}, current_price=current_price)
+                allowed, message = self.check_exit_risk(market_data)
+                if not allowed:
+                    log_info(f"⚡ {symbol}: {reason} по цене {current_price:.2f}, выход отложен: {message}")
+                    continue
+                log_info(f"⚡ {symbol}: {reason} внутри свечи по цене {current_price:.2f}")
+                self.execute_trade('sell', market_data, 0.5, "⚪ ПРОВЕРКА TP/SL", self.current_position_size_usdt)
+                self.last_signal = 'sell'
+                self.last_trade_time = time.time()
+
+    def check_exit_risk(self, market_data):
+        """Те же проверки, что в торговом цикле: риск-менеджер и защита от частых сделок"""
+        position_percent = self.settings.settings['trade_amount_percent'] * 100
+        risk_ok, risk_message = self.risk_manager.check_trade_risk(
+            'sell', market_data['current_price'], position_percent, market_data
+        )
+        if not risk_ok:
+            return False, risk_message
+        time_since_last_trade = time.time() - self.last_trade_time
+        if time_since_last_trade < MIN_TRADE_INTERVAL:
+            return False, f"Слишком частые сделки ({time_since_last_trade:.0f} сек < {MIN_TRADE_INTERVAL} сек)"
+        return True, risk_message
+
+    def execute_signal_cycle(self):
+        """Оценка сигналов по закрытию свечи"""
+        if not self.is_running:
+            log_info("⏸️ Бот приостановлен")
+        elif self.settings.settings.get('trading_enabled', False):
+            log_info("🔍 Выполняем торговый цикл...")
+            self.execute_trading_cycle()
+            log_info("✅ Торговый цикл завершен")
+        else:
+            log_info("⏸️ Торговля отключена в настройках")
+
+    def trigger_signal_cycle(self):
+        """Внеочередная оценка сигналов (после включения торговли не ждем закрытия свечи)"""
+        if self.scheduler:
+            self.scheduler.run_now('signals')
+
+    def refresh_balance(self):
+        """Периодическая проверка баланса"""
+        log_empty_line()
+        log_separator("-", 80)
+        log_info("💰 Проверка баланса...")
+        self._cycle_balance = self.exchange.get_balance()
+        # self.telegram.send_balance_update()  # Отключено: не выводить обновления баланса в чат
+        log_separator("-", 80)
+
+    def create_scheduler(self):
+        """Планировщик: сигналы по закрытию свечи, риски и баланс - со своими интервалами"""
+        scheduler = Scheduler()
+        settings = self.settings.settings
+        scheduler.add_candle_job(
+            'signals', settings.get('signal_timeframe', '1h'), self.execute_signal_cycle,
+            delay=settings.get('candle_close_delay', 2), run_immediately=True
+        )
+        scheduler.add_interval_job(
+            'risk', lambda: self.settings.settings.get('risk_check_interval', 10), self.execute_risk_checks
+        )
+        scheduler.add_interval_job(
+            'balance', lambda: self.settings.settings.get('balance_check_interval', 300), self.refresh_balance
+        )
+        return scheduler
+
     def run(self):
-        """Основной цикл работы бота - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
+        """Основной цикл работы бота - задачи запускаются планировщиком"""
         log_empty_line()
         log_separator("=", 80)
         log_section("ЗАПУСК ОСНОВНОГО ЦИКЛА БОТА", "=", 80)
         log_separator("=", 80)
         log_empty_line()
-        last_balance_check = time.time()
-        cycle_count = 0
-        while self.is_running:
-            try:
-                cycle_count += 1
-                log_info(f"🔄 ЦИКЛ #{cycle_count}")
-                if self.settings.settings.get('trading_enabled', False):
-                    log_info("🔍 Выполняем торговый цикл...")
-                    self.execute_trading_cycle()
-                    log_info("✅ Торговый цикл завершен")
-                else:
-                    log_info("⏸️ Торговля отключена в настройках")
-                # Проверяем баланс каждые 5 минут
-                current_time = time.time()
-                if current_time - last_balance_check > 300:  # 5 минут
-                    log_empty_line()
-                    log_separator("-", 80)
-                    log_info("💰 Проверка баланса...")
-                    # self.telegram.send_balance_update()  # Отключено: не выводить обновления баланса в чат
-                    last_balance_check = current_time
-                    log_separator("-", 80)
-                log_info(f"💤 Пауза 30 секунд перед следующим циклом...")
-                time.sleep(30)
-            except KeyboardInterrupt:
-                log_info("🛑 Бот остановлен пользователем (Ctrl+C)")
-                self.stop()
-                break
-            except Exception as e:
-                log_error(f"❌ Ошибка в основном цикле: {e}")
-                log_info("💤 Пауза 60 секунд перед повторной попыткой...")
-                time.sleep(60)
+        self.scheduler = self.create_scheduler()
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            log_info("🛑 Бот остановлен пользователем (Ctrl+C)")
+            self.stop()
         log_info("🔚 Основной цикл бота завершен")
 
     def stop(self):
         """Остановка бота"""
         self.is_running = False
+        if self.scheduler:
+            self.scheduler.stop()
+        self._market_executor.shutdown(wait=False)
+        self.exchange.stop_market_feed()
         # 🔧 СОХРАНЯЕМ НАСТРОЙКИ ПРИ ОСТАНОВКЕ
         self.settings.save_settings()
         log_info("🛑 Бот остановлен")
@@ -578,41 +815,16 @@ class AdvancedTradingBot:
         # 🔧 ИСПОЛЬЗУЕМ entry_price ИЗ СТРАТЕГИИ, ЕСЛИ В БОТЕ ОН НУЛЕВОЙ (для обратной совместимости)
         entry_price_to_save = self.entry_price if self.entry_price > 0 else getattr(strategy, 'entry_price', 0)
         
-        current_symbol = self.settings.trading_pairs['active_pair']
+        current_symbol = self.current_symbol
         
-        # 🔧 ИЗМЕНЕНИЕ: Загружаем существующие позиции для всех пар
-        all_positions = {}
-        if os.path.exists('position_state.json'):
-            try:
-                with open('position_state.json', 'r') as f:
-                    data = json.load(f)
-                    # Если старый формат (одна позиция) - конвертируем
-                    if 'symbol' in data and 'position' in data:
-                        # Старый формат - сохраняем как позицию для этой пары
-                        old_symbol = data.get('symbol', current_symbol)
-                        all_positions[old_symbol] = {
-                            'position': data.get('position'),
-                            'entry_price': data.get('entry_price', 0),
-                            'position_size_usdt': data.get('position_size_usdt', 0),
-                            'opened_at': data.get('opened_at', 0),
-                            'strategy_position_size_usdt': data.get('strategy_position_size_usdt', 0),
-                            'strategy_entry_price': data.get('strategy_entry_price', 0)
-                        }
-                    elif isinstance(data, dict):
-                        # Новый формат - словарь позиций по парам
-                        all_positions = data
-            except Exception as e:
-                log_error(f"⚠️ Ошибка загрузки позиций: {e}")
-                all_positions = {}
-        
-        # 🔧 НОВАЯ ЛОГИКА: Используем position_manager для работы с массивом позиций
-        from utils.position_manager import load_position_state, add_position, close_all_positions
+        # ⚡ ОПТИМИЗАЦИЯ: позиции в utils/position_store.py - чтение из памяти, запись одной транзакцией
+        from utils.position_manager import add_position, close_all_positions
+        from utils.position_store import get_position_store
         
         if self.position == 'long':
             # Если позиция открывается - добавляем её через position_manager
             # НО! Не добавляем дубликаты - проверяем, была ли уже добавлена
-            state = load_position_state('position_state.json')
-            pair_data = state.get(current_symbol, {})
+            pair_data = get_position_store('position_state.json').get_pair(current_symbol)
             existing_positions = pair_data.get('positions', [])
             
             # Проверяем, есть ли уже позиция с такой же ценой входа (избегаем дублирования)
@@ -653,8 +865,11 @@ class AdvancedTradingBot:
         time.sleep(1.5) # Сокращено с 3 до 1.5 сек
         log_info("🔄 Фоновая загрузка позиций...")
         try:
-            self.load_position_state()
+            for symbol in self.get_enabled_pairs():
+                with self.pair_context(symbol):
+                    self.load_position_state()
             self._position_loaded = True
+            startup_profiler.ready('positions')
             log_info("✅ Позиции загружены в фоне")
         except Exception as e:
             log_error(f"❌ Ошибка фоновой загрузки позиций: {e}")
@@ -665,25 +880,16 @@ class AdvancedTradingBot:
     def load_position_state(self):
         """Загружает состояние позиции из файла для текущей пары и проверяет реальные позиции на KuCoin"""
         try:
-            symbol = self.settings.trading_pairs['active_pair']
+            symbol = self.current_symbol
             strategy = self.get_active_strategy()
             position_loaded_from_file = False
             
-            # 🔧 ИЗМЕНЕНИЕ: Загружаем позицию для текущей пары из словаря позиций
-            if os.path.exists('position_state.json'):
-                with open('position_state.json', 'r') as f:
-                    data = json.load(f)
-                
-                # Определяем формат файла
-                state = None
-                if isinstance(data, dict):
-                    if 'symbol' in data and 'position' in data:
-                        # Старый формат (одна позиция) - используем только если это та же пара
-                        if data.get('symbol') == symbol:
-                            state = data
-                    else:
-                        # Новый формат (словарь позиций по парам) - загружаем позицию для текущей пары
-                        state = data.get(symbol)
+            # 🔧 ИЗМЕНЕНИЕ: Загружаем позицию для текущей пары из хранилища позиций
+            # ⚡ ОПТИМИЗАЦИЯ: из памяти utils/position_store.py, без разбора файла на каждую пару
+            from utils.position_store import get_position_store
+            store = get_position_store('position_state.json', create=False)
+            if store is not None:
+                state = store.get_pair(symbol)
                 
                 if state:
                     self.position = state.get('position')
@@ -0,0 +1,240 @@
+"""
+АРХИВ СВЕЧЕЙ НА ДИСКЕ (MEMORY-MAPPED NUMPY)
+"""
+import json
+import os
+import threading
+import time
+import numpy as np
+from core.candle_store import OHLCV_COLUMNS, MAX_FETCH_LIMIT
+from utils.logger import log_info, log_error
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ARCHIVE_DIR = os.path.join(PROJECT_ROOT, 'data', 'candles')
+ROW_BYTES = OHLCV_COLUMNS * 8
+
+
+def fetch_range(exchange, symbol, timeframe, since, until):
+    """Свечи [since, until) постранично через ccxt (пустые страницы перешагиваются)"""
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    rows = []
+    cursor = since
+    while cursor < until:
+        batch = exchange.fetch_ohlcv(symbol, timeframe, since=int(cursor), limit=MAX_FETCH_LIMIT) or []
+        batch = [candle for candle in batch if cursor <= candle[0] < until]
+        if not batch:
+            # Нет торгов (или простой биржи) - переходим к следующей странице
+            cursor += MAX_FETCH_LIMIT * timeframe_ms
+            continue
+        rows.extend(batch)
+        cursor = batch[-1][0] + timeframe_ms
+    return rows
+
+
+class CandleArchive:
+    """Локальный архив закрытых свечей: один файл на (symbol, timeframe).
+
+    Файл - строки float64 [timestamp, open, high, low, close, volume] подряд,
+    новые свечи дописываются в конец, чтение - через np.memmap без копирования.
+    Незакрытая свеча в архив не попадает (она живет в CandleStore).
+    Рядом с файлом в .meta.json хранится то, что биржа уже подтвердила:
+    начало ее истории по паре и пропуски, которых на бирже нет, - они
+    повторно не запрашиваются.
+    """
+
+    def __init__(self, root=DEFAULT_ARCHIVE_DIR):
+        self.root = root
+        self._maps = {}  # (symbol, timeframe) -> (размер файла, memmap)
+        self._meta = {}  # (symbol, timeframe) -> {'history_start': мс, 'empty_gaps': [[начало, конец], ...]}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.stats = {'archive_loads': 0, 'fetched_candles': 0}
+
+    def path(self, symbol, timeframe):
+        """Путь к файлу архива"""
+        return os.path.join(self.root, f"{symbol.replace('/', '-')}_{timeframe}.f64")
+
+    def meta_path(self, symbol, timeframe):
+        """Путь к метаданным архива"""
+        return os.path.join(self.root, f"{symbol.replace('/', '-')}_{timeframe}.meta.json")
+
+    def meta(self, symbol, timeframe):
+        """Подтвержденные биржей начало истории и незаполнимые пропуски"""
+        key = (symbol, timeframe)
+        meta = self._meta.get(key)
+        if meta is None:
+            meta = {'history_start': None, 'empty_gaps': []}
+            try:
+                with open(self.meta_path(symbol, timeframe), 'r', encoding='utf-8') as f:
+                    meta.update(json.load(f))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                log_error(f"⚠️ Метаданные архива {symbol} {timeframe} не прочитаны: {e}")
+            self._meta[key] = meta
+        return meta
+
+    def _save_meta(self, symbol, timeframe, meta):
+        path = self.meta_path(symbol, timeframe)
+        tmp_path = path + '.tmp'
+        os.makedirs(self.root, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _confirm_history_start(self, symbol, timeframe, rows, wanted_since):
+        """Биржа не отдала свечей раньше первой полученной - раньше истории нет"""
+        first = int(rows[0][0]) if len(rows) else None
+        meta = self.meta(symbol, timeframe)
+        if first is None or first <= wanted_since or meta['history_start'] == first:
+            return
+        meta['history_start'] = first
+        self._save_meta(symbol, timeframe, meta)
+        log_info(f"📅 История {symbol} {timeframe} на бирже начинается с {first}")
+
+    def lock(self, symbol, timeframe):
+        """Блокировка записи для пары и таймфрейма"""
+        with self._lock:
+            return self._locks.setdefault((symbol, timeframe), threading.RLock())
+
+    def load(self, symbol, timeframe):
+        """Все свечи архива (read-only memmap, срезы не копируют данные)"""
+        path = self.path(symbol, timeframe)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty((0, OHLCV_COLUMNS), dtype=np.float64)
+        if size % ROW_BYTES:
+            # Недописанная строка (например, сбой при записи) - отбрасываем хвост
+            with self.lock(symbol, timeframe):
+                size -= size % ROW_BYTES
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        if size == 0:
+            return np.empty((0, OHLCV_COLUMNS), dtype=np.float64)
+
+        key = (symbol, timeframe)
+        cached = self._maps.get(key)
+        if cached and cached[0] == size:
+            return cached[1]
+        data = np.memmap(path, dtype=np.float64, mode='r', shape=(size // ROW_BYTES, OHLCV_COLUMNS))
+        self._maps[key] = (size, data)
+        return data
+
+    def last_timestamp(self, symbol, timeframe):
+        data = self.load(symbol, timeframe)
+        return int(data[-1, 0]) if len(data) else None
+
+    def append(self, symbol, timeframe, rows):
+        """Дописывание свечей новее последней сохраненной"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, OHLCV_COLUMNS)
+        with self.lock(symbol, timeframe):
+            last_ts = self.last_timestamp(symbol, timeframe)
+            if last_ts is not None:
+                rows = rows[rows[:, 0] > last_ts]
+            if not len(rows):
+                return 0
+            rows = rows[np.unique(rows[:, 0], return_index=True)[1]]
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.path(symbol, timeframe), 'ab') as f:
+                f.write(np.ascontiguousarray(rows).tobytes())
+            return len(rows)
+
+    def _rewrite(self, symbol, timeframe, rows):
+        """Полная перезапись (вставка истории в начало или в пропуски)"""
+        existing = np.array(self.load(symbol, timeframe))
+        merged = np.concatenate([existing, np.asarray(rows, dtype=np.float64).reshape(-1, OHLCV_COLUMNS)])
+        _, index = np.unique(merged[::-1, 0], return_index=True)  # при дублях - уже сохраненная свеча
+        merged = merged[::-1][index]
+        path = self.path(symbol, timeframe)
+        tmp_path = path + '.tmp'
+        os.makedirs(self.root, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(merged).tobytes())
+        self._maps.pop((symbol, timeframe), None)
+        os.replace(tmp_path, path)
+        return len(merged) - len(existing)
+
+    def find_gaps(self, symbol, timeframe, timeframe_ms):
+        """Пропуски внутри архива: список (начало, конец) отсутствующих свечей"""
+        times = self.load(symbol, timeframe)[:, 0]
+        if len(times) < 2:
+            return []
+        breaks = np.flatnonzero(np.diff(times) > timeframe_ms)
+        return [(int(times[i]) + timeframe_ms, int(times[i + 1])) for i in breaks]
+
+    def history(self, exchange, symbol, timeframe='1h', limit=1000, fill_gaps=True):
+        """Последние limit закрытых свечей: догружает только то, чего нет на диске"""
+        timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+        now = exchange.milliseconds()
+        closed_until = now // timeframe_ms * timeframe_ms  # начало текущей (незакрытой) свечи
+        wanted_since = closed_until - limit * timeframe_ms
+        with self.lock(symbol, timeframe):
+            try:
+                data = self.load(symbol, timeframe)
+                if not len(data):
+                    rows = fetch_range(exchange, symbol, timeframe, wanted_since, closed_until)
+                    self._store(symbol, timeframe, rows)
+                    self._confirm_history_start(symbol, timeframe, rows, wanted_since)
+                else:
+                    first = int(data[0, 0])
+                    history_start = self.meta(symbol, timeframe)['history_start']
+                    # Раньше подтвержденного начала истории биржа свечей не отдаст
+                    if first > wanted_since and (history_start is None or first > history_start):
+                        older = fetch_range(exchange, symbol, timeframe, wanted_since, first)
+                        if older:
+                            self.stats['fetched_candles'] += len(older)
+                            self._rewrite(symbol, timeframe, older)
+                        self._confirm_history_start(symbol, timeframe, older or [[first]], wanted_since)
+                    self._store(symbol, timeframe, fetch_range(
+                        exchange, symbol, timeframe, self.last_timestamp(symbol, timeframe) + timeframe_ms, closed_until))
+                    if fill_gaps:
+                        self.fill_gaps(exchange, symbol, timeframe)
+            except Exception as e:
+                log_error(f"❌ Ошибка догрузки архива свечей {symbol} {timeframe}: {e}")
+            self.stats['archive_loads'] += 1
+            return self.load(symbol, timeframe)[-limit:]
+
+    def fill_gaps(self, exchange, symbol, timeframe):
+        """Догрузка пропусков внутри архива (пропуски, которых нет и на бирже, запоминаются)"""
+        timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+        meta = self.meta(symbol, timeframe)
+        known_empty = {tuple(gap) for gap in meta['empty_gaps']}
+        filled = 0
+        checked = []
+        for start, end in self.find_gaps(symbol, timeframe, timeframe_ms):
+            if (start, end) in known_empty:
+                continue
+            rows = fetch_range(exchange, symbol, timeframe, start, end)
+            checked.append((start, end))
+            if rows:
+                self.stats['fetched_candles'] += len(rows)
+                filled += self._rewrite(symbol, timeframe, rows)
+        if filled:
+            log_info(f"🩹 Заполнены пропуски архива {symbol} {timeframe}: {filled} свечей")
+        if checked:
+            # Что осталось незаполненным в запрошенных диапазонах - на бирже этих свечей нет
+            empty = [gap for gap in self.find_gaps(symbol, timeframe, timeframe_ms)
+                     if any(start <= gap[0] and gap[1] <= end for start, end in checked)]
+            if empty:
+                meta['empty_gaps'] = sorted(known_empty.union(empty))
+                self._save_meta(symbol, timeframe, meta)
+                log_info(f"🕳️ Пропуски архива {symbol} {timeframe}, которых нет на бирже: {len(empty)}")
+        return filled
+
+    def _store(self, symbol, timeframe, rows):
+        if rows:
+            self.stats['fetched_candles'] += len(rows)
+            self.append(symbol, timeframe, rows)
+
+    def store_closed(self, symbol, timeframe, rows, timeframe_ms, now_ms=None):
+        """Сохранение закрытых свечей из рабочего буфера (незакрытая отбрасывается)"""
+        if rows is None or not len(rows):
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, OHLCV_COLUMNS)
+        try:
+            return self.append(symbol, timeframe, rows[rows[:, 0] + timeframe_ms <= now_ms])
+        except Exception as e:
+            log_error(f"❌ Ошибка записи архива свечей {symbol} {timeframe}: {e}")
+            return 0
@@ -0,0 +1,196 @@
+"""
+ИНКРЕМЕНТАЛЬНОЕ ХРАНИЛИЩЕ СВЕЧЕЙ (OHLCV)
+"""
+import threading
+import time
+import numpy as np
+from utils.logger import log_info
+
+# Колонки свечи в порядке ccxt: timestamp, open, high, low, close, volume
+OHLCV_COLUMNS = 6
+DEFAULT_CAPACITY = 1000
+# Максимум свечей, которые KuCoin отдает за один запрос
+MAX_FETCH_LIMIT = 1500
+
+
+class CandleBuffer:
+    """Кольцевой буфер свечей одной пары и таймфрейма"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        # Буфер двойной емкости: свечи дописываются в хвост, а при заполнении
+        # актуальное окно переносится в новый массив - срезы всегда непрерывны
+        self._data = np.zeros((capacity * 2, OHLCV_COLUMNS), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self._shared = False  # из _data выданы срезы view() - менять строки на месте нельзя
+        self.loaded_limit = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self):
+        """Время открытия последней свечи (мс)"""
+        if not len(self):
+            return None
+        return int(self._data[self._end - 1, 0])
+
+    def reset(self, rows):
+        """Полная перезагрузка буфера"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, OHLCV_COLUMNS)
+        if len(rows) > self.capacity:
+            rows = rows[-self.capacity:]
+        self._data = np.zeros((self.capacity * 2, OHLCV_COLUMNS), dtype=np.float64)
+        self._data[:len(rows)] = rows
+        self._start = 0
+        self._end = len(rows)
+        self._shared = False
+
+    def merge(self, rows):
+        """Добавление новых свечей, последняя (незакрытая) свеча перезаписывается"""
+        if rows is None or len(rows) == 0:
+            return 0
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, OHLCV_COLUMNS)
+        last_ts = self.last_timestamp
+        if last_ts is None:
+            self.reset(rows)
+            return len(rows)
+
+        rows = rows[rows[:, 0] >= last_ts]
+        if len(rows) and int(rows[0, 0]) == last_ts:
+            if self._shared:
+                # Копирование при записи: выданные срезы (свечи текущего цикла) не меняются
+                self._data = self._data.copy()
+                self._shared = False
+            self._data[self._end - 1] = rows[0]
+            rows = rows[1:]
+
+        for row in rows:
+            self._append(row)
+        return len(rows)
+
+    def _append(self, row):
+        """Добавление одной свечи в хвост"""
+        if self._end == len(self._data):
+            # Переносим окно в новый массив, чтобы не портить уже выданные срезы
+            keep = self.capacity - 1
+            data = np.zeros_like(self._data)
+            data[:keep] = self._data[self._end - keep:self._end]
+            self._data = data
+            self._start = 0
+            self._end = keep
+            self._shared = False
+        self._data[self._end] = row
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def view(self, limit=None):
+        """Последние свечи без копирования (только для чтения)"""
+        start = self._start
+        if limit is not None:
+            start = max(self._start, self._end - limit)
+        window = self._data[start:self._end]
+        window.flags.writeable = False
+        self._shared = True
+        return window
+
+
+class CandleStore:
+    """Хранилище свечей по парам (symbol, timeframe) с догрузкой только новых свечей"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, archive=None):
+        self.capacity = capacity
+        self.archive = archive  # CandleArchive: история с диска и запись закрытых свечей
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self.stats = {'full_loads': 0, 'incremental_loads': 0}
+
+    def get_buffer(self, symbol, timeframe, limit=0):
+        """Получение (создание) буфера для пары и таймфрейма"""
+        key = (symbol, timeframe)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.capacity < limit:
+                buffer = CandleBuffer(max(self.capacity, limit))
+                self._buffers[key] = buffer
+            return buffer
+
+    def sync(self, exchange, symbol, timeframe='1h', limit=50):
+        """Синхронизация буфера с биржей и возврат последних limit свечей"""
+        buffer = self.get_buffer(symbol, timeframe, limit)
+        with buffer.lock:
+            timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+            now_ms = int(time.time() * 1000)
+            last_ts = buffer.last_timestamp
+            missing = None
+            if last_ts is not None:
+                missing = (now_ms - last_ts) // timeframe_ms + 2
+
+            if last_ts is None or limit > buffer.loaded_limit or missing > MAX_FETCH_LIMIT:
+                if self._seed_from_archive(buffer, symbol, timeframe, limit, timeframe_ms, now_ms):
+                    # 💾 История с диска, с биржи - только свечи после последней сохраненной
+                    last_ts = buffer.last_timestamp
+                    missing = (now_ms - last_ts) // timeframe_ms + 2
+                    rows = exchange.fetch_ohlcv(symbol, timeframe, since=last_ts, limit=max(int(missing), 2))
+                    buffer.merge(rows or [])
+                    log_info(f"💾 История {symbol} {timeframe} из архива: {len(buffer)} свечей")
+                else:
+                    rows = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+                    buffer.reset(rows or [])
+                    self.stats['full_loads'] += 1
+                    log_info(f"📥 Загружена история {symbol} {timeframe}: {len(buffer)} свечей")
+                buffer.loaded_limit = limit
+            else:
+                rows = exchange.fetch_ohlcv(symbol, timeframe, since=last_ts, limit=max(int(missing), 2))
+                buffer.merge(rows or [])
+                self.stats['incremental_loads'] += 1
+
+            if self.archive is not None and rows:
+                self.archive.store_closed(symbol, timeframe, rows, timeframe_ms, now_ms)
+            return buffer.view(limit)
+
+    def _seed_from_archive(self, buffer, symbol, timeframe, limit, timeframe_ms, now_ms):
+        """Заполнение буфера из архива, если там хватает свечей и разрыв до текущей мал"""
+        if self.archive is None:
+            return False
+        archived = self.archive.load(symbol, timeframe)
+        if len(archived) < limit:
+            return False
+        if archived[-1, 0] - archived[-limit, 0] != (limit - 1) * timeframe_ms:
+            return False  # в окне есть пропуск - надежнее загрузить с биржи
+        if (now_ms - int(archived[-1, 0])) // timeframe_ms + 2 > MAX_FETCH_LIMIT:
+            return False
+        buffer.reset(archived[-limit:])
+        return True
+
+    def merge(self, symbol, timeframe, rows):
+        """Дописывание свечей из потока (только в уже загруженный буфер)"""
+        with self._lock:
+            buffer = self._buffers.get((symbol, timeframe))
+        if buffer is None:
+            return 0
+        with buffer.lock:
+            if not len(buffer):
+                return 0
+            return buffer.merge(rows)
+
+    def get_candles(self, symbol, timeframe='1h', limit=None):
+        """Свечи из хранилища без обращения к бирже"""
+        with self._lock:
+            buffer = self._buffers.get((symbol, timeframe))
+        if buffer is None:
+            return None
+        with buffer.lock:
+            return buffer.view(limit)
+
+    def clear(self, symbol=None):
+        """Очистка хранилища (целиком или для одной пары)"""
+        with self._lock:
+            if symbol is None:
+                self._buffers.clear()
+            else:
+                for key in [key for key in self._buffers if key[0] == symbol]:
+                    del self._buffers[key]
@@ -8,23 +8,70 @@ import traceback
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 from utils.logger import log_info, log_error
+from core.candle_store import CandleStore
+from core.candle_archive import CandleArchive
+from core.fills_cache import FillsCache
+from core.rate_limiter import ExchangeRateLimiter, exchange_lane
+from core.markets_snapshot import DEFAULT_SNAPSHOT_PATH, build_limits_index, load_snapshot, save_snapshot
+from utils.startup import startup_profiler
 import threading
 
 load_dotenv()
 
+TICKER_CACHE_TTL = 2.0       # сек: тикеры REST переиспользуются всеми эндпоинтами
+TICKER_FETCH_TIMEOUT = 10.0  # сек: ожидание чужого запроса тех же тикеров
+FILLS_HISTORY_DAYS = 60      # дней истории сделок для поиска открытых покупок
+FILLS_PAGE_SIZE = 500        # сделок на страницу /api/v1/fills
+FILLS_MAX_PAGES = 3          # защитный предел пагинации при загрузке истории
+FILLS_MAX_SYNC_PAGES = 10    # защитный предел пагинации при догрузке новых сделок
+FILLS_SYNC_INTERVAL = 5.0    # сек: повторная синхронизация в пределах интервала не ходит в сеть
+
 class ExchangeManager:
     def __init__(self):
         self.exchange = None
         self.connected = False
         self.markets_loaded = threading.Event() # Событие для синхронизации
+        self.candle_archive = CandleArchive()  # Закрытые свечи на диске (memmap)
+        self.candle_store = CandleStore(archive=self.candle_archive)  # Свечи догружаются инкрементально
+        self.market_feed = None  # Потоковые тикеры/свечи (start_market_feed)
+        self._ticker_cache = {}  # symbol -> (время получения, тикер)
+        self._ticker_inflight = {}  # symbol -> Event запроса, который уже выполняется
+        self._ticker_lock = threading.Lock()
+        self.fills_cache = FillsCache()  # Исполненные сделки (синхронизируются инкрементально)
+        self._fills_synced = {}  # symbol -> время последней синхронизации кэша сделок
+        self._fills_lock = threading.Lock()
+        self.rate_limiter = ExchangeRateLimiter()  # Веса KuCoin и приоритетные очереди для всех потоков
+        self.markets_snapshot_path = DEFAULT_SNAPSHOT_PATH
+        self.market_limits = {}  # symbol -> лимиты и точность (build_limits_index)
         self.connect()
 
+    def _load_markets_snapshot(self):
+        """Рынки из снимка на диске (миллисекунды вместо загрузки всей таблицы KuCoin)"""
+        snapshot = load_snapshot(self.markets_snapshot_path)
+        if not snapshot:
+            return False
+        try:
+            self.exchange.set_markets(snapshot['markets'], snapshot.get('currencies') or None)
+            self.market_limits = build_limits_index(self.exchange.markets)
+            self.markets_loaded.set()
+            startup_profiler.ready('markets')
+            return True
+        except Exception as e:
+            log_error(f"❌ Ошибка применения снимка рынков: {e}")
+            return False
+
     def _load_markets_background(self):
         """Загружает рынки в фоновом потоке."""
         try:
             print("🔄 Фоновая загрузка рынков...", flush=True)
+            # ccxt подменяет markets/symbols/markets_by_id новыми словарями целиком,
+            # индекс лимитов - одним присваиванием: читатели видят старый или новый снимок
             self.exchange.load_markets(reload=True)
+            self.market_limits = build_limits_index(self.exchange.markets)
             self.markets_loaded.set() # Устанавливаем флаг, что рынки загружены
+            startup_profiler.ready('markets')
+            startup_profiler.ready('markets_refresh')
+            save_snapshot(self.exchange.markets, self.exchange.currencies, self.markets_snapshot_path)
             print(f"✅ Рынки загружены в фоне ({len(self.exchange.markets)} пар)", flush=True)
         except Exception as e:
             log_error(f"❌ Ошибка фоновой загрузки рынков: {e}")
@@ -45,7 +92,6 @@ class ExchangeManager:
             'password': passphrase or '',
             'sandbox': False,
             'enableRateLimit': True,
-            'rateLimit': 300,
             'timeout': 30000,
         }
         proxy = os.getenv('PROXY_URL')
@@ -59,6 +105,12 @@ class ExchangeManager:
             try:
                 print(f"🔌 Попытка {attempt}/{attempts}: Создание клиента KuCoin...", flush=True)
                 self.exchange = ccxt.kucoin(base_config)
+                # 🚦 Все REST-запросы клиента - через общий ограничитель (веса эндпоинтов, очереди)
+                self.rate_limiter.install(self.exchange)
+                
+                # 💾 Рынки из снимка на диске: эндпоинты не ждут загрузку таблицы рынков
+                if self._load_markets_snapshot():
+                    print(f"✅ Рынки из снимка ({len(self.exchange.markets)} пар), обновление в фоне...", flush=True)
                 
                 # ⚡ ОПТИМИЗАЦИЯ: Запускаем загрузку рынков в фоне
                 threading.Thread(target=self._load_markets_background, daemon=True).start()
@@ -74,7 +126,8 @@ class ExchangeManager:
                         _s = os.getenv('KUCOIN_SECRET_KEY')
                         _p = os.getenv('KUCOIN_PASSPHRASE')
                         if _k and _s and _p:
-                            self.exchange.fetch_balance()
+                            with exchange_lane('account'):
+                                self.exchange.fetch_balance()
                             log_info("🧊 Warmup: баланс получен в фоне")
                     except Exception as e:
                         log_error(f"⚠️ Warmup ошибка: {e}")
@@ -106,6 +159,7 @@ class ExchangeManager:
             return False
         return True
 
+    @exchange_lane('account')
     def get_balance(self):
         """Получение баланса"""
         if not self.connected:
@@ -147,14 +201,16 @@ class ExchangeManager:
             start_t = time.time()
             try:
                 log_info(f"🔄 Запрос OHLCV {symbol} timeframe={timeframe} limit={limit} (попытка {attempt}/{retries})")
-                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+                # ⚡ ОПТИМИЗАЦИЯ: история грузится один раз, дальше запрашиваются только новые свечи
+                ohlcv = self.candle_store.sync(self.exchange, symbol, timeframe, limit)
                 duration = (time.time() - start_t) * 1000
-                if not ohlcv or len(ohlcv) < 2:
-                    log_error(f"⚠️ Пустой или недостаточный OHLCV ответ (len={len(ohlcv) if ohlcv else 0}) за {duration:.1f} ms")
+                if ohlcv is None or len(ohlcv) < 2:
+                    log_error(f"⚠️ Пустой или недостаточный OHLCV ответ (len={len(ohlcv) if ohlcv is not None else 0}) за {duration:.1f} ms")
                     last_exception = ValueError("Недостаточно свечей")
                 else:
-                    closes = [candle[4] for candle in ohlcv]
-                    current_price = closes[-1]
+                    closes = ohlcv[:, 4]
+                    current_price = float(closes[-1])
+                    # EMA по окну из limit свечей, как раньше: пороги стратегий настроены под эти значения
                     from utils.helpers import calculate_ema
                     fast_ema = calculate_ema(closes, ema_fast_period)
                     slow_ema = calculate_ema(closes, ema_slow_period)
@@ -193,33 +249,108 @@ class ExchangeManager:
         log_error(f"❌ Не удалось получить рыночные данные {symbol} после {retries} попыток: {last_exception}")
         return None
     
+
+    def start_market_feed(self, symbols, timeframe='1h', transport=None):
+        """Запуск push-подписки на тикеры и свечи пар (WebSocket KuCoin)"""
+        from core.market_feed import MarketDataFeed
+        if self.market_feed is None:
+            self.market_feed = MarketDataFeed(transport, candle_store=self.candle_store, timeframe=timeframe)
+        self.market_feed.subscribe(symbols)
+        self.market_feed.start()
+        return self.market_feed
+
+    def stop_market_feed(self):
+        """Остановка потока рыночных данных"""
+        if self.market_feed:
+            self.market_feed.stop()
+
     def get_ticker(self, symbol):
         """Получение тикера"""
-        if not self.wait_for_markets():
-            return None
-            
+        return self.get_tickers([symbol]).get(symbol)
+
+    def get_tickers(self, symbols, max_age=TICKER_CACHE_TTL):
+        """Тикеры нескольких пар одним запросом: {symbol: ticker}"""
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        tickers = {}
+        now = time.time()
+        for symbol in symbols:
+            # ⚡ ОПТИМИЗАЦИЯ: свежий снимок из WebSocket без REST-запроса
+            if self.market_feed is not None:
+                ticker = self.market_feed.get_ticker(symbol)
+                if ticker:
+                    tickers[symbol] = ticker
+                    continue
+                self.market_feed.subscribe([symbol])
+            cached = self._ticker_cache.get(symbol)
+            if cached and now - cached[0] <= max_age:
+                tickers[symbol] = cached[1]
+
+        missing = [symbol for symbol in symbols if symbol not in tickers]
+        if missing and self.wait_for_markets():
+            tickers.update(self._fetch_tickers_coalesced(missing))
+        return tickers
+
+    def _fetch_tickers_coalesced(self, symbols):
+        """REST-запрос тикеров: пары, которые уже запрашивает другой поток, не запрашиваются повторно"""
+        with self._ticker_lock:
+            pending = {s: self._ticker_inflight[s] for s in symbols if s in self._ticker_inflight}
+            own = [s for s in symbols if s not in pending]
+            done = threading.Event()
+            for symbol in own:
+                self._ticker_inflight[symbol] = done
+
+        tickers = {}
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
-            
-            # Защита от None значений
-            change = ticker.get('percentage', 0)
-            if change is None:
-                log_error(f"⚠️ ticker['percentage'] is None для {symbol}, используем 0")
-                change = 0
-            
-            return {
-                'symbol': symbol,
-                'last': ticker.get('last', 0) or 0,
-                'high': ticker.get('high', 0) or 0,
-                'low': ticker.get('low', 0) or 0,
-                'volume': ticker.get('baseVolume', 0) or 0,
-                'change': change,
-                'timestamp': ticker.get('timestamp', 0) or 0
-            }
+            if own:
+                tickers = self._fetch_tickers_rest(own)
+                received_at = time.time()
+                for symbol, ticker in tickers.items():
+                    self._ticker_cache[symbol] = (received_at, ticker)
+        finally:
+            with self._ticker_lock:
+                for symbol in own:
+                    self._ticker_inflight.pop(symbol, None)
+            done.set()
+
+        for symbol, event in pending.items():
+            event.wait(TICKER_FETCH_TIMEOUT)
+            cached = self._ticker_cache.get(symbol)
+            if cached:
+                tickers[symbol] = cached[1]
+        return tickers
+
+    def _fetch_tickers_rest(self, symbols):
+        """Один запрос к бирже: fetch_ticker для одной пары, fetch_tickers для нескольких"""
+        try:
+            if len(symbols) == 1:
+                raw = {symbols[0]: self.exchange.fetch_ticker(symbols[0])}
+            else:
+                raw = self.exchange.fetch_tickers(symbols)
+            return {symbol: self._format_ticker(symbol, raw[symbol]) for symbol in symbols if raw.get(symbol)}
         except Exception as e:
-            log_error(f"❌ Ошибка получения тикера {symbol}: {e}")
-            return None
+            log_error(f"❌ Ошибка получения тикеров {', '.join(symbols)}: {e}")
+            return {}
+
+    @staticmethod
+    def _format_ticker(symbol, ticker):
+        """Тикер ccxt -> формат бота"""
+        # Защита от None значений
+        change = ticker.get('percentage', 0)
+        if change is None:
+            log_error(f"⚠️ ticker['percentage'] is None для {symbol}, используем 0")
+            change = 0
+
+        return {
+            'symbol': symbol,
+            'last': ticker.get('last', 0) or 0,
+            'high': ticker.get('high', 0) or 0,
+            'low': ticker.get('low', 0) or 0,
+            'volume': ticker.get('baseVolume', 0) or 0,
+            'change': change,
+            'timestamp': ticker.get('timestamp', 0) or 0
+        }
     
+    @exchange_lane('orders')
     def create_order(self, symbol, order_type, side, amount, price=None):
         """Создание ордера с проверкой минимального объема"""
         if not self.wait_for_markets():
@@ -227,9 +358,9 @@ class ExchangeManager:
             
         try:
             # 🔧 ПОЛУЧАЕМ ИНФОРМАЦИЮ О РЫНКЕ ДЛЯ ПРОВЕРКИ МИНИМАЛЬНОГО ОБЪЕМА
-            market = self.exchange.market(symbol)
-            min_amount = market['limits']['amount']['min']
-            min_cost = market['limits']['cost']['min']  # Минимальная сумма в quote currency (USDT)
+            limits = self.get_market_limits(symbol)
+            min_amount = limits['min_amount'] or 0
+            min_cost = limits['min_cost'] or 0  # Минимальная сумма в quote currency (USDT)
             
             log_info(f"🔍 Проверка ордера: amount={amount:.6f}, min_amount={min_amount}, min_cost={min_cost}")
             
@@ -270,6 +401,7 @@ class ExchangeManager:
             log_error(error_msg)
             return None, error_msg
     
+    @exchange_lane('orders')
     def get_order_status(self, order_id, symbol):
         """Получение статуса ордера"""
         if not self.wait_for_markets():
@@ -281,6 +413,7 @@ class ExchangeManager:
             log_error(f"❌ Ошибка получения статуса ордера {order_id}: {e}")
             return None
     
+    @exchange_lane('orders')
     def cancel_order(self, order_id, symbol):
         """Отмена ордера"""
         if not self.wait_for_markets():
@@ -294,6 +427,7 @@ class ExchangeManager:
             log_error(f"❌ Ошибка отмены ордера {order_id}: {e}")
             return False
     
+    @exchange_lane('account')
     def get_open_orders(self, symbol=None):
         """Получение открытых ордеров"""
         if not self.wait_for_markets():
@@ -305,24 +439,20 @@ class ExchangeManager:
             log_error(f"❌ Ошибка получения открытых ордеров: {e}")
             return []
     
+    def get_market_limits(self, symbol):
+        """Лимиты и точность пары из индекса (пары нет в индексе - из таблицы рынков ccxt)"""
+        limits = self.market_limits.get(symbol)
+        if limits is None:
+            limits = build_limits_index({symbol: self.exchange.market(symbol)})[symbol]
+        return limits
+
     def get_market_info(self, symbol):
         """Получение информации о рынке"""
         if not self.wait_for_markets():
             return None
             
         try:
-            market = self.exchange.market(symbol)
-            return {
-                'symbol': symbol,
-                'base': market['base'],
-                'quote': market['quote'],
-                'min_amount': market['limits']['amount']['min'],
-                'max_amount': market['limits']['amount']['max'],
-                'min_cost': market['limits']['cost']['min'],
-                'max_cost': market['limits']['cost']['max'],
-                'price_precision': market['precision']['price'],
-                'amount_precision': market['precision']['amount']
-            }
+            return {'symbol': symbol, **self.get_market_limits(symbol)}
         except Exception as e:
             log_error(f"❌ Ошибка получения информации о рынке {symbol}: {e}")
             return None
@@ -339,9 +469,9 @@ class ExchangeManager:
             
         try:
             if self.connected:
-                market = self.exchange.market(symbol)
-                min_amount = market['limits']['amount']['min'] or 0
-                min_cost = market['limits']['cost']['min'] or 0.1
+                limits = self.get_market_limits(symbol)
+                min_amount = limits['min_amount'] or 0
+                min_cost = limits['min_cost'] or 0.1
             else:
                 # Fallback: используем константы проекта
                 from config.constants import MIN_TRADE_AMOUNTS, MIN_TRADE_USDT
@@ -354,71 +484,114 @@ class ExchangeManager:
             from config.constants import MIN_TRADE_USDT
             return 0.001, MIN_TRADE_USDT
     
-    def fetch_my_trades(self, symbol, limit=500, days_back=60):
-        """Получение истории сделок пользователя с расширенным окном по времени и параметрами KuCoin.
-        - limit: желаемое максимальное количество сделок (до 500 за страницу)
-        - days_back: сколько дней назад начинать выборку (по умолчанию 60)
-        """
-        if not self.wait_for_markets():
-            return []
-            
-        try:
-            # Начало окна выборки
-            since_ms = int((time.time() - days_back * 86400) * 1000)
+    def _fetch_fills(self, symbol, start_ms, end_ms=None, max_pages=FILLS_MAX_PAGES):
+        """Сделки пользователя за [start_ms, end_ms) из API: постранично назад по времени (endAt).
+        Возвращает (сделки, окно загружено полностью)"""
+        # Параметры, специфичные для KuCoin (см. /api/v1/fills: pageSize/startAt/endAt)
+        params = {}
+        since = None
+        is_kucoin = getattr(self.exchange, 'id', '') == 'kucoin'
+        if is_kucoin:
+            params['pageSize'] = FILLS_PAGE_SIZE
+            params['startAt'] = start_ms // 1000  # сек
+        else:
+            since = start_ms
 
-            # Параметры, специфичные для KuCoin (см. /api/v1/fills: pageSize/startAt/endAt)
-            params = {}
-            page_size = 500 if (limit is None or limit > 500) else int(limit)
-            if getattr(self.exchange, 'id', '') == 'kucoin':
-                params['pageSize'] = page_size
-                params['startAt'] = since_ms // 1000  # сек
-
-            collected = []
-            remaining = limit or page_size
-            max_pages = 3  # защитный предел пагинации
-            end_at_sec = None
-
-            for _ in range(max_pages):
-                call_params = dict(params)
-                if end_at_sec is not None:
-                    # Пагинация назад по времени: берём до endAt
-                    call_params['endAt'] = end_at_sec
-
-                # 🔧 ИСПРАВЛЕНИЕ: KuCoin не работает с since + startAt одновременно
-                # Используем ЛИБО since (ccxt), ЛИБО startAt (kucoin params)
-                batch = self.exchange.fetch_my_trades(
-                    symbol,
-                    since=None,  # Не передаем since, используем только params
-                    limit=min(page_size, remaining),
-                    params=call_params,
-                )
-                
-                log_info(f"🔍 DEBUG fetch_my_trades: API вернул {len(batch) if batch else 0} сделок для {symbol}, params={call_params}")
+        collected = []
+        end_at_sec = end_ms // 1000 if end_ms else None
+        for _ in range(max_pages):
+            call_params = dict(params)
+            if end_at_sec is not None and is_kucoin:
+                # Пагинация назад по времени: берём до endAt
+                call_params['endAt'] = end_at_sec
+
+            # 🔧 ИСПРАВЛЕНИЕ: KuCoin не работает с since + startAt одновременно
+            # Используем ЛИБО since (ccxt), ЛИБО startAt (kucoin params)
+            batch = self.exchange.fetch_my_trades(symbol, since=since, limit=FILLS_PAGE_SIZE, params=call_params)
+            if not batch:
+                return collected, True
+            collected.extend(batch)
 
-                if not batch:
-                    break
+            # Если получили меньше страницы — дальше нечего запрашивать
+            if len(batch) < FILLS_PAGE_SIZE or not is_kucoin:
+                return collected, True
 
-                collected.extend(batch)
+            # Готовим endAt для следующей страницы (строго раньше самой старой сделки из batch)
+            oldest_ts_ms = min(t.get('timestamp') or start_ms for t in batch)
+            end_at_sec = max(0, (oldest_ts_ms // 1000) - 1)
+        return collected, False
 
-                # Если получили меньше страницы — дальше нечего запрашивать
-                if len(batch) < min(page_size, remaining):
-                    break
+    @exchange_lane('account')
+    def sync_fills(self, symbol, days_back=FILLS_HISTORY_DAYS, max_age=FILLS_SYNC_INTERVAL):
+        """Синхронизация кэша сделок пары с биржей.
 
-                # Готовим endAt для следующей страницы (строго раньше самой старой сделки из batch)
-                oldest_ts_ms = min(t.get('timestamp', since_ms) for t in batch)
-                end_at_sec = max(0, (oldest_ts_ms // 1000) - 1)
+        ⚡ ОПТИМИЗАЦИЯ: из сети загружаются только сделки новее последней известной
+        (и один раз - окно истории days_back). Повторный вызов в пределах max_age
+        сек (покупки после продажи + проверка позиции в одном цикле) в сеть не ходит.
+        Возвращает False, если синхронизация не удалась (кэш при этом остается доступен).
+        """
+        since_ms = int((time.time() - days_back * 86400) * 1000)
+        with self._fills_lock:
+            covered = self.fills_cache.covered_since(symbol)
+            fresh = time.time() - self._fills_synced.get(symbol, 0) < max_age
+            if fresh and covered is not None and covered <= since_ms:
+                return True
+            try:
+                added = 0
+                if covered is None or since_ms < covered:
+                    # История, которая еще не загружалась (первый запуск или окно расширилось)
+                    batch, complete = self._fetch_fills(symbol, since_ms, end_ms=covered)
+                    loaded_since = since_ms
+                    if not complete:
+                        # Загружены только новые страницы окна - покрытие до самой старой полученной
+                        # сделки, следующая синхронизация продолжит с нее
+                        loaded_since = min(t.get('timestamp') or since_ms for t in batch)
+                        log_error(f"⚠️ История сделок {symbol}: больше {len(batch)} сделок, загружено с {loaded_since}, догрузка продолжится")
+                    added += self.fills_cache.merge(symbol, batch, covered_since=loaded_since)
+                if covered is not None:
+                    # Промежутки, не догруженные прошлыми синхронизациями (страницы идут от новых к старым)
+                    for gap_start, gap_end in self.fills_cache.gaps(symbol):
+                        if gap_end < since_ms:
+                            added += self.fills_cache.merge(symbol, [], filled_gap=(gap_start, gap_end))
+                            continue
+                        batch, complete = self._fetch_fills(symbol, gap_start, end_ms=gap_end,
+                                                            max_pages=FILLS_MAX_SYNC_PAGES)
+                        oldest = min((t.get('timestamp') or gap_end for t in batch), default=gap_end)
+                        # Дошли до начала промежутка (сделка на его границе уже в кэше) - он закрыт
+                        rest = None if complete or oldest <= gap_start else (gap_start, oldest)
+                        added += self.fills_cache.merge(symbol, batch, gap=rest, filled_gap=(gap_start, gap_end))
+                    # Только новые сделки: от последней известной (та же секунда - отсеется по id)
+                    last_ts = self.fills_cache.last_timestamp(symbol) or covered
+                    batch, complete = self._fetch_fills(symbol, last_ts, max_pages=FILLS_MAX_SYNC_PAGES)
+                    gap = None
+                    oldest = min((t.get('timestamp') or last_ts for t in batch), default=last_ts)
+                    if not complete and oldest > last_ts:
+                        # Загружены самые новые страницы - промежуток до них догрузит следующая синхронизация
+                        gap = (last_ts, oldest)
+                        log_error(f"⚠️ Синхронизация сделок {symbol}: новых сделок больше {len(batch)}, "
+                                  f"промежуток {gap[0]}-{gap[1]} будет догружен")
+                    added += self.fills_cache.merge(symbol, batch, gap=gap)
+                self._fills_synced[symbol] = time.time()
+                if added:
+                    log_info(f"🔄 Кэш сделок {symbol}: +{added} (всего {self.fills_cache.count(symbol)})")
+                return True
+            except Exception as e:
+                log_error(f"❌ Ошибка синхронизации истории сделок {symbol}: {e}")
+                return False
 
-                # Контроль общего лимита
-                if limit is not None:
-                    remaining = max(0, remaining - len(batch))
-                    if remaining == 0:
-                        break
+    def fetch_my_trades(self, symbol, limit=500, days_back=FILLS_HISTORY_DAYS):
+        """Получение истории сделок пользователя (из локального кэша после синхронизации).
+        - limit: максимальное количество последних сделок
+        - days_back: за сколько дней (по умолчанию 60)
+        """
+        if not self.wait_for_markets():
+            return []
 
-            # Сортируем по времени (от старых к новым)
-            collected.sort(key=lambda x: x['timestamp'])
-            # Лог: сколько всего собрали
-            log_info(f"🔍 DEBUG: fetch_my_trades: собрано {len(collected)} сделок за ~{days_back} дней (limit={limit}, page_size={page_size})")
-            return collected
+        try:
+            self.sync_fills(symbol, days_back)
+            since_ms = int((time.time() - days_back * 86400) * 1000)
+            # Сортировка по времени (от старых к новым), как у ccxt
+            return self.fills_cache.trades(symbol, since=since_ms, limit=limit)
         except Exception as e:
             log_error(f"❌ Ошибка получения истории сделок {symbol}: {e}")
             return []
@@ -432,66 +605,22 @@ class ExchangeManager:
             return [], 0.0
         
         try:
-            # Берём расширенную историю (уже отсортирована)
-            trades = self.fetch_my_trades(symbol, limit=500)
-            if not trades:
-                return [], 0.0
-            
-            # Логирование для отладки - показываем ВСЕ полученные сделки
-            from utils.logger import log_info
-            log_info(f"🔍 DEBUG: Всего получено сделок из API: {len(trades)}")
-            for i, trade in enumerate(trades, 1):
-                log_info(f"   DEBUG Сделка {i}: {trade['side'].upper()} по {trade.get('price', 0):.2f} USDT, время: {trade.get('timestamp', 0)}")
-            
-            # Ищем последнюю продажу
-            last_sell_time = 0
-            last_sell_index = -1
-            for i, trade in enumerate(reversed(trades)):
-                if trade['side'] == 'sell':
-                    last_sell_time = trade['timestamp']
-                    last_sell_index = len(trades) - 1 - i
-                    log_info(f"🔍 DEBUG: Найдена последняя продажа на индексе {last_sell_index}, timestamp: {last_sell_time}")
-                    break
-            
-            if last_sell_index < 0:
-                log_info(f"🔍 DEBUG: Продажи не найдено, берем все покупки")
-            
-            # УПРОЩЕННЫЙ АЛГОРИТМ: просто берем все покупки ПОСЛЕ последней продажи
-            # Это работает для большинства случаев и проще в отладке
-            buy_trades = []
-            
-            if last_sell_index >= 0:
-                # Берем все покупки после последней продажи
-                for trade in trades:
-                    if trade['side'] == 'buy' and trade['timestamp'] > last_sell_time:
-                        buy_trades.append({
-                            'price': trade.get('price', 0.0),
-                            'amount': trade.get('amount', 0.0),
-                            'timestamp': trade.get('timestamp', 0),
-                            'cost': trade.get('cost', 0) or (trade.get('amount', 0) * trade.get('price', 0))
-                        })
-            else:
-                # Если продаж не было, берем все покупки
-                for trade in trades:
-                    if trade['side'] == 'buy':
-                        buy_trades.append({
-                            'price': trade.get('price', 0.0),
-                            'amount': trade.get('amount', 0.0),
-                            'timestamp': trade.get('timestamp', 0),
-                            'cost': trade.get('cost', 0) or (trade.get('amount', 0) * trade.get('price', 0))
-                        })
-            
-            log_info(f"🔍 DEBUG: Открытых покупок после последней продажи: {len(buy_trades)}")
-            for i, bt in enumerate(buy_trades, 1):
-                log_info(f"   DEBUG LOT {i}: {bt['amount']:.8f} BTC @ {bt['price']:.2f} USDT (стоимость {bt.get('cost', 0):.2f} USDT) ts={bt['timestamp']}")
-            
-            log_info(f"🔍 Открытые позиции: найдено {len(buy_trades)} покупок после последней продажи (timestamp: {last_sell_time})")
+            # ⚡ ОПТИМИЗАЦИЯ: только новые сделки из сети, ответ - запрос по индексу кэша
+            self.sync_fills(symbol)
+            since_ms = int((time.time() - FILLS_HISTORY_DAYS * 86400) * 1000)
+            trades, last_sell_time = self.fills_cache.open_buys(symbol, since=since_ms)
+            buy_trades = [{
+                'price': trade.get('price', 0.0),
+                'amount': trade.get('amount', 0.0),
+                'timestamp': trade.get('timestamp', 0),
+                'cost': trade.get('cost', 0) or (trade.get('amount', 0) * trade.get('price', 0))
+            } for trade in trades]
             
             # Находим максимальную цену среди открытых покупок
-            max_price = 0.0
-            if buy_trades:
-                max_price_trade = max(buy_trades, key=lambda t: t.get('price', 0))
-                max_price = max_price_trade.get('price', 0)
+            max_price = max((trade['price'] for trade in buy_trades), default=0.0)
+            
+            log_info(f"🔍 Открытые позиции {symbol}: {len(buy_trades)} покупок после последней продажи "
+                     f"(timestamp: {last_sell_time}), максимальная цена {max_price:.2f}")
             
             return buy_trades, max_price
             
@@ -501,6 +630,7 @@ class ExchangeManager:
             log_error(f"   Traceback: {traceback.format_exc()}")
             return [], 0.0
     
+    @exchange_lane('account')
     def check_open_position(self, symbol):
         """
         Проверка открытой позиции на KuCoin через баланс и историю сделок
@@ -538,7 +668,10 @@ class ExchangeManager:
             quote_balance = balance['free'].get(quote_currency, 0) + balance['used'].get(quote_currency, 0)
             
             # Получаем историю сделок
-            trades = self.fetch_my_trades(symbol, limit=100)
+            # ⚡ ОПТИМИЗАЦИЯ: история сделок - из локального кэша (в сеть только новые сделки)
+            self.sync_fills(symbol)
+            since_ms = int((time.time() - FILLS_HISTORY_DAYS * 86400) * 1000)
+            last_trade = self.fills_cache.last_fill(symbol, since=since_ms)
             
             # Если есть баланс базовой валюты, значит есть позиция
             has_position = base_balance > 0
@@ -549,33 +682,19 @@ class ExchangeManager:
                     'position_type': None,
                     'base_balance': base_balance,
                     'quote_balance': quote_balance,
-                    'last_trade': trades[-1] if trades else None,
+                    'last_trade': last_trade,
                     'entry_price': None,
                     'position_size_usdt': None
                 }
             
-            # Если есть баланс, проверяем последние сделки
-            # Находим последнюю покупку и все покупки после последней продажи
-            buy_trades = []
-            last_sell_time = 0
-            
-            # Ищем последнюю продажу
-            for trade in reversed(trades):
-                if trade['side'] == 'sell':
-                    last_sell_time = trade['timestamp']
-                    break
-            
-            # Собираем все покупки после последней продажи
-            for trade in trades:
-                if trade['timestamp'] > last_sell_time and trade['side'] == 'buy':
-                    buy_trades.append(trade)
+            # Если есть баланс, берем все покупки после последней продажи (запрос по индексу)
+            buy_trades, _ = self.fills_cache.open_buys(symbol, since=since_ms)
             
             # Если нет покупок после последней продажи, но есть баланс - берем последнюю покупку
-            if not buy_trades and trades:
-                for trade in reversed(trades):
-                    if trade['side'] == 'buy':
-                        buy_trades.append(trade)
-                        break
+            if not buy_trades:
+                last_buy = self.fills_cache.last_fill(symbol, side='buy', since=since_ms)
+                if last_buy:
+                    buy_trades.append(last_buy)
             
             if not buy_trades:
                 # Если нет покупок в истории, но есть баланс - используем текущую цену как приблизительную
@@ -590,7 +709,7 @@ class ExchangeManager:
                     'position_type': 'long',
                     'base_balance': base_balance,
                     'quote_balance': quote_balance,
-                    'last_trade': trades[-1] if trades else None,
+                    'last_trade': last_trade,
                     'entry_price': entry_price,
                     'position_size_usdt': position_size_usdt
                 }
@@ -637,7 +756,7 @@ class ExchangeManager:
                     'position_type': None,
                     'base_balance': base_balance,
                     'quote_balance': quote_balance,
-                    'last_trade': trades[-1] if trades else None,
+                    'last_trade': last_trade,
                     'entry_price': None,
                     'position_size_usdt': None
                 }
@@ -0,0 +1,179 @@
+"""
+ЛОКАЛЬНЫЙ КЭШ ИСПОЛНЕННЫХ СДЕЛОК (FILLS) С ИНКРЕМЕНТАЛЬНОЙ СИНХРОНИЗАЦИЕЙ
+"""
+import os
+import sqlite3
+import threading
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FILLS_PATH = os.path.join(PROJECT_ROOT, 'data', 'fills.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    symbol TEXT NOT NULL,
+    id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    price REAL NOT NULL DEFAULT 0,
+    amount REAL NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    order_id TEXT,
+    fee_cost REAL,
+    fee_currency TEXT,
+    PRIMARY KEY (symbol, id)
+);
+CREATE INDEX IF NOT EXISTS idx_fills_symbol_ts ON fills (symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_fills_symbol_side_ts ON fills (symbol, side, ts);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    since_ts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gaps (
+    symbol TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    PRIMARY KEY (symbol, start_ts)
+);
+"""
+
+_COLUMNS = 'id, ts, side, price, amount, cost, order_id, fee_cost, fee_currency'
+
+
+def _fill_row(symbol, trade):
+    """ccxt-сделка -> строка таблицы fills"""
+    price = trade.get('price') or 0
+    amount = trade.get('amount') or 0
+    fee = trade.get('fee') or {}
+    trade_id = trade.get('id')
+    if trade_id is None:
+        # Без id биржи - ключ из времени, ордера и объема (повторная загрузка не дублирует)
+        trade_id = f"{trade.get('timestamp')}:{trade.get('order')}:{trade.get('side')}:{amount}"
+    return (symbol, str(trade_id), int(trade.get('timestamp') or 0), trade.get('side') or '',
+            price, amount, trade.get('cost') or amount * price,
+            trade.get('order'), fee.get('cost'), fee.get('currency'))
+
+
+def _to_trade(symbol, row):
+    """Строка таблицы fills -> словарь в формате ccxt fetch_my_trades"""
+    trade_id, ts, side, price, amount, cost, order_id, fee_cost, fee_currency = row
+    trade = {
+        'id': trade_id,
+        'order': order_id,
+        'timestamp': ts,
+        'symbol': symbol,
+        'side': side,
+        'price': price,
+        'amount': amount,
+        'cost': cost,
+    }
+    if fee_cost is not None:
+        trade['fee'] = {'cost': fee_cost, 'currency': fee_currency}
+    return trade
+
+
+class FillsCache:
+    """Исполненные сделки пользователя, каждая хранится один раз.
+
+    Сеть нужна только для новых сделок (после last_timestamp), для окна
+    истории, которое еще не загружалось (coverage), и для промежутков, не
+    догруженных из-за предела страниц (gaps). Вопрос «какие покупки
+    открыты после последней продажи» - два запроса по индексу (symbol, side, ts).
+    """
+
+    def __init__(self, db_path=DEFAULT_FILLS_PATH):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def merge(self, symbol, trades, covered_since=None, gap=None, filled_gap=None):
+        """Добавление сделок (известные id пропускаются); covered_since - начало загруженного окна, мс.
+        gap - (начало, конец) незагруженного промежутка, filled_gap - промежуток, который больше не пуст.
+        Возвращает количество новых сделок"""
+        rows = [_fill_row(symbol, trade) for trade in trades or []]
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO fills (symbol, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                added = self._conn.total_changes - before
+                if covered_since is not None:
+                    self._conn.execute(
+                        "INSERT INTO coverage (symbol, since_ts) VALUES (?, ?) "
+                        "ON CONFLICT (symbol) DO UPDATE SET since_ts = min(since_ts, excluded.since_ts)",
+                        (symbol, int(covered_since)))
+                if filled_gap is not None:
+                    self._conn.execute("DELETE FROM gaps WHERE symbol = ? AND start_ts = ?",
+                                       (symbol, int(filled_gap[0])))
+                if gap is not None:
+                    self._conn.execute("INSERT OR REPLACE INTO gaps (symbol, start_ts, end_ts) VALUES (?, ?, ?)",
+                                       (symbol, int(gap[0]), int(gap[1])))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return added
+
+    def covered_since(self, symbol):
+        """Начало окна истории, которое уже загружено (мс), None - пара еще не загружалась"""
+        with self._lock:
+            row = self._conn.execute('SELECT since_ts FROM coverage WHERE symbol = ?', (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def gaps(self, symbol):
+        """Промежутки [начало, конец] (мс), сделки которых еще не загружены, от старых к новым"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT start_ts, end_ts FROM gaps WHERE symbol = ? ORDER BY start_ts', (symbol,)).fetchall()
+
+    def last_timestamp(self, symbol):
+        """Время самой новой сделки пары в кэше (мс)"""
+        with self._lock:
+            row = self._conn.execute('SELECT max(ts) FROM fills WHERE symbol = ?', (symbol,)).fetchone()
+        return row[0]
+
+    def trades(self, symbol, since=None, limit=None):
+        """Последние limit сделок пары начиная с since (мс), от старых к новым"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM fills WHERE symbol = ? AND ts >= ? ORDER BY ts DESC, rowid DESC LIMIT ?",
+                (symbol, since or 0, -1 if limit is None else limit)).fetchall()
+        return [_to_trade(symbol, row) for row in reversed(rows)]
+
+    def last_fill(self, symbol, side=None, since=None):
+        """Самая новая сделка пары (только покупки/продажи, если задан side)"""
+        query = f"SELECT {_COLUMNS} FROM fills WHERE symbol = ? AND ts >= ?"
+        params = [symbol, since or 0]
+        if side:
+            query += " AND side = ?"
+            params.append(side)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY ts DESC, rowid DESC LIMIT 1", params).fetchone()
+        return _to_trade(symbol, row) if row else None
+
+    def open_buys(self, symbol, since=None):
+        """Покупки после последней продажи (от старых к новым) и время этой продажи (0 - продаж не было)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max(ts) FROM fills WHERE symbol = ? AND side = 'sell' AND ts >= ?",
+                (symbol, since or 0)).fetchone()
+            last_sell = row[0] or 0
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM fills WHERE symbol = ? AND side = 'buy' AND ts > ? AND ts >= ? "
+                f"ORDER BY ts, rowid", (symbol, last_sell, since or 0)).fetchall()
+        return [_to_trade(symbol, row) for row in rows], last_sell
+
+    def count(self, symbol=None):
+        with self._lock:
+            if symbol:
+                return self._conn.execute('SELECT count(*) FROM fills WHERE symbol = ?', (symbol,)).fetchone()[0]
+            return self._conn.execute('SELECT count(*) FROM fills').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
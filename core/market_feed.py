@@ -0,0 +1,269 @@
+"""
+ПОТОКОВЫЕ РЫНОЧНЫЕ ДАННЫЕ (ПУБЛИЧНЫЙ WEBSOCKET KUCOIN)
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from utils.logger import log_info, log_error
+
+KUCOIN_REST_URL = 'https://api.kucoin.com'
+# Таймфреймы ccxt -> интервалы свечей KuCoin
+KUCOIN_CANDLE_INTERVALS = {
+    '1m': '1min', '3m': '3min', '5m': '5min', '15m': '15min', '30m': '30min',
+    '1h': '1hour', '2h': '2hour', '4h': '4hour', '6h': '6hour', '8h': '8hour',
+    '12h': '12hour', '1d': '1day', '1w': '1week',
+}
+DEFAULT_PING_INTERVAL = 18
+DEFAULT_MAX_AGE = 10  # секунд: более старый снимок считается неактуальным
+MAX_RECONNECT_DELAY = 30
+
+
+def to_kucoin_symbol(symbol):
+    """'BTC/USDT' -> 'BTC-USDT'"""
+    return symbol.replace('/', '-')
+
+
+def from_kucoin_symbol(symbol):
+    """'BTC-USDT' -> 'BTC/USDT'"""
+    return symbol.replace('-', '/')
+
+
+class KucoinPublicTransport:
+    """Адрес публичного WebSocket KuCoin (токен через /api/v1/bullet-public)"""
+
+    def __init__(self, rest_url=KUCOIN_REST_URL, timeout=10):
+        self.rest_url = rest_url
+        self.timeout = timeout
+
+    def get_endpoint(self):
+        """Возвращает (url, интервал пинга в секундах)"""
+        import requests
+        proxy = os.getenv('PROXY_URL')
+        proxies = {'http': proxy, 'https': proxy} if proxy else None
+        response = requests.post(f"{self.rest_url}/api/v1/bullet-public", timeout=self.timeout, proxies=proxies)
+        response.raise_for_status()
+        data = response.json()['data']
+        server = data['instanceServers'][0]
+        url = f"{server['endpoint']}?token={data['token']}&connectId={uuid.uuid4().hex}"
+        return url, server.get('pingInterval', DEFAULT_PING_INTERVAL * 1000) / 1000
+
+
+class StaticTransport:
+    """Фиксированный адрес (локальный тестовый сервер, прокси-ретранслятор)"""
+
+    def __init__(self, url, ping_interval=DEFAULT_PING_INTERVAL):
+        self.url = url
+        self.ping_interval = ping_interval
+
+    def get_endpoint(self):
+        return self.url, self.ping_interval
+
+
+class MarketDataFeed:
+    """Одна push-подписка на тикер и свечи для каждой пары.
+
+    Все потребители (торговый цикл, WebApp, Telegram) читают снимок из памяти,
+    REST-запрос нужен только если снимок устарел или подписки еще нет.
+    Сетевая часть работает в отдельном потоке со своим asyncio-циклом.
+    """
+
+    def __init__(self, transport=None, candle_store=None, timeframe='1h', max_age=DEFAULT_MAX_AGE):
+        self.transport = transport or KucoinPublicTransport()
+        self.candle_store = candle_store
+        self.timeframe = timeframe
+        self.max_age = max_age
+        self.symbols = set()
+        self.connected = False
+        self.running = False
+        self.stats = {'messages': 0, 'reconnects': 0, 'errors': 0}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._loop = None
+        self._wake = None  # asyncio.Event: появились новые пары для подписки
+
+    # 📡 ПОДПИСКИ
+    def subscribe(self, symbols):
+        """Добавление пар в подписку (повторная подписка не создается)"""
+        with self._lock:
+            new = set(symbols) - self.symbols
+            self.symbols |= new
+        if new:
+            self._notify()
+        return new
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and self._wake is not None:
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def _topics(self, symbols):
+        """Топики KuCoin для набора пар"""
+        ids = ','.join(sorted(to_kucoin_symbol(s) for s in symbols))
+        topics = [f"/market/snapshot:{ids}", f"/market/ticker:{ids}"]
+        interval = KUCOIN_CANDLE_INTERVALS.get(self.timeframe)
+        if self.candle_store is not None and interval:
+            candles = ','.join(f"{to_kucoin_symbol(s)}_{interval}" for s in sorted(symbols))
+            topics.append(f"/market/candles:{candles}")
+        return topics
+
+    # 📊 СНИМОК
+    def get_ticker(self, symbol, max_age=None):
+        """Последний тикер пары в формате ExchangeManager.get_ticker или None, если устарел"""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshots.get(symbol)
+            if snapshot is None or time.time() - snapshot['received_at'] > max_age:
+                return None
+            return dict(snapshot)
+
+    def wait_for_ticker(self, symbol, timeout=5.0):
+        """Ожидание первого тикера пары (для старта и тестов)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            ticker = self.get_ticker(symbol)
+            if ticker:
+                return ticker
+            time.sleep(0.02)
+        return None
+
+    def _update_snapshot(self, symbol, values):
+        with self._lock:
+            snapshot = self._snapshots.get(symbol)
+            if snapshot is None:
+                snapshot = {'symbol': symbol, 'last': 0, 'high': 0, 'low': 0,
+                            'volume': 0, 'change': 0, 'timestamp': 0}
+                self._snapshots[symbol] = snapshot
+            snapshot.update(values)
+            snapshot['received_at'] = time.time()
+
+    def _handle_message(self, raw):
+        """Разбор сообщения KuCoin"""
+        message = json.loads(raw)
+        if message.get('type') != 'message':
+            return
+        self.stats['messages'] += 1
+        topic = message.get('topic', '')
+        data = message.get('data') or {}
+
+        if topic.startswith('/market/snapshot:'):
+            data = data.get('data', data)
+            self._update_snapshot(from_kucoin_symbol(data['symbol']), {
+                'last': float(data.get('lastTradedPrice') or 0),
+                'high': float(data.get('high') or 0),
+                'low': float(data.get('low') or 0),
+                'volume': float(data.get('vol') or 0),
+                'change': float(data.get('changeRate') or 0) * 100,
+                'timestamp': int(data.get('datetime') or 0),
+            })
+        elif topic.startswith('/market/ticker:'):
+            symbol = from_kucoin_symbol(topic.split(':', 1)[1])
+            self._update_snapshot(symbol, {
+                'last': float(data['price']),
+                'timestamp': int(data.get('time') or 0),
+            })
+        elif topic.startswith('/market/candles:') and self.candle_store is not None:
+            # KuCoin: [начало (сек), open, close, high, low, volume, turnover]
+            start, open_, close, high, low, volume = data['candles'][:6]
+            row = [int(start) * 1000, float(open_), float(high), float(low), float(close), float(volume)]
+            self.candle_store.merge(from_kucoin_symbol(data['symbol']), self.timeframe, [row])
+
+    # 🔌 СОЕДИНЕНИЕ
+    def start(self):
+        """Запуск фонового потока"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run_loop, name='market-feed', daemon=True)
+        self._thread.start()
+        log_info(f"📡 Поток рыночных данных запущен: {', '.join(sorted(self.symbols)) or 'нет пар'}")
+
+    def stop(self, timeout=5):
+        """Остановка потока и закрытие соединения"""
+        self.running = False
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._cancel_all)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _cancel_all(self):
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._wake = asyncio.Event()
+        try:
+            loop.run_until_complete(self._connection_loop())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop = None
+            self.connected = False
+            loop.close()
+
+    async def _connection_loop(self):
+        """Подключение с переподключением и экспоненциальной задержкой"""
+        delay = 1
+        while self.running:
+            try:
+                await self._session()
+                delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                log_error(f"❌ Ошибка потока рыночных данных: {e}")
+            if not self.running:
+                break
+            self.stats['reconnects'] += 1
+            log_info(f"🔄 Переподключение потока рыночных данных через {delay} сек...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _session(self):
+        """Одно соединение: подписка на все пары и чтение сообщений"""
+        import websockets
+        loop = asyncio.get_running_loop()
+        url, ping_interval = await loop.run_in_executor(None, self.transport.get_endpoint)
+        async with websockets.connect(url, ping_interval=None, max_size=2 ** 22) as ws:
+            self.connected = True
+            sender = asyncio.ensure_future(self._sender(ws, ping_interval))
+            try:
+                async for raw in ws:
+                    try:
+                        self._handle_message(raw)
+                    except Exception as e:
+                        self.stats['errors'] += 1
+                        log_error(f"⚠️ Некорректное сообщение потока рыночных данных: {e}")
+            finally:
+                self.connected = False
+                sender.cancel()
+
+    async def _sender(self, ws, ping_interval):
+        """Подписка на новые пары и пинг KuCoin"""
+        subscribed = set()
+        while True:
+            self._wake.clear()
+            with self._lock:
+                new = self.symbols - subscribed
+            if new:
+                for topic in self._topics(new):
+                    await ws.send(json.dumps({
+                        'id': str(next(self._ids)), 'type': 'subscribe', 'topic': topic,
+                        'privateChannel': False, 'response': True,
+                    }))
+                subscribed |= new
+            try:
+                await asyncio.wait_for(self._wake.wait(), ping_interval)
+            except asyncio.TimeoutError:
+                await ws.send(json.dumps({'id': str(next(self._ids)), 'type': 'ping'}))
@@ -0,0 +1,79 @@
+"""
+СНИМОК РЫНКОВ БИРЖИ НА ДИСКЕ (БЫСТРЫЙ ХОЛОДНЫЙ СТАРТ)
+"""
+import gzip
+import json
+import os
+import time
+from utils.logger import log_info, log_error
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SNAPSHOT_PATH = os.path.join(PROJECT_ROOT, 'data', 'markets.json.gz')
+SNAPSHOT_VERSION = 1
+# Снимок старше - не используется: лимиты и точность ордеров могли измениться
+SNAPSHOT_MAX_AGE_HOURS = float(os.getenv('MARKETS_SNAPSHOT_MAX_AGE_HOURS', 24))
+
+
+def build_limits_index(markets):
+    """symbol -> минимальные/максимальные объемы и точность (без обхода вложенных словарей ccxt)"""
+    index = {}
+    for symbol, market in (markets or {}).items():
+        limits = market.get('limits') or {}
+        amount = limits.get('amount') or {}
+        cost = limits.get('cost') or {}
+        precision = market.get('precision') or {}
+        index[symbol] = {
+            'base': market.get('base'),
+            'quote': market.get('quote'),
+            'min_amount': amount.get('min'),
+            'max_amount': amount.get('max'),
+            'min_cost': cost.get('min'),
+            'max_cost': cost.get('max'),
+            'price_precision': precision.get('price'),
+            'amount_precision': precision.get('amount'),
+        }
+    return index
+
+
+def save_snapshot(markets, currencies=None, path=DEFAULT_SNAPSHOT_PATH):
+    """Атомарная запись снимка: временный файл + os.replace (читатель не увидит половину файла)"""
+    try:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'markets': list((markets or {}).values()),
+            'currencies': currencies or {},
+        }
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+            json.dump(payload, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        log_error(f"❌ Ошибка сохранения снимка рынков {path}: {e}")
+        return False
+
+
+def load_snapshot(path=DEFAULT_SNAPSHOT_PATH, max_age_hours=None):
+    """Снимок рынков {'markets': [...], 'currencies': {...}, 'saved_at': ...} или None (нет, поврежден, устарел)"""
+    max_age_hours = SNAPSHOT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    if not os.path.exists(path):
+        return None
+    try:
+        started = time.perf_counter()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') != SNAPSHOT_VERSION or not payload.get('markets'):
+            return None
+        age_hours = (time.time() - payload.get('saved_at', 0)) / 3600
+        if age_hours > max_age_hours:
+            log_info(f"💾 Снимок рынков устарел ({age_hours:.1f} ч > {max_age_hours:g} ч) - ждем загрузку с биржи")
+            return None
+        log_info(f"💾 Снимок рынков: {len(payload['markets'])} пар за {(time.perf_counter() - started) * 1000:.0f} мс "
+                 f"(возраст {age_hours:.1f} ч)")
+        return payload
+    except Exception as e:
+        log_error(f"❌ Поврежден снимок рынков {path}: {e}")
+        return None
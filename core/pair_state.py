@@ -0,0 +1,32 @@
+"""
+СОСТОЯНИЕ ТОРГОВЫХ ПАР
+"""
+import threading
+from strategies import STRATEGY_CLASSES, get_strategy_class
+
+
+def create_strategies():
+    """Набор экземпляров стратегий для одной пары (модули стратегий загружаются при первом вызове)"""
+    return {name: get_strategy_class(name)() for name in STRATEGY_CLASSES}
+
+
+class PairState:
+    """Состояние одной пары: свои стратегии, позиция и защита от частых сделок"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.strategies = create_strategies()
+        self.position = None
+        self.entry_price = 0
+        self.last_signal = None
+        # Размер текущей позиции в USDT (фиксируется при открытии)
+        self.current_position_size_usdt = 0
+        # Время последней сделки по паре (для защиты от частых сделок)
+        self.last_trade_time = 0
+        # Последние рыночные данные пары
+        self.market_data = None
+        self.lock = threading.RLock()
+
+    def has_position(self):
+        """Есть ли открытая позиция"""
+        return self.position == 'long'
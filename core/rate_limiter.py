@@ -0,0 +1,303 @@
+"""
+ОБЩИЙ ОГРАНИЧИТЕЛЬ ЗАПРОСОВ К БИРЖЕ (ВЕСА ЭНДПОИНТОВ KUCOIN И ПРИОРИТЕТНЫЕ ОЧЕРЕДИ)
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from utils.logger import log_info, log_error
+from utils.telemetry import EXCHANGE_REQUEST_SECONDS, EXCHANGE_ERRORS_TOTAL, RATE_LIMIT_WAIT_SECONDS
+from utils.tracing import record_span
+
+# Очереди по убыванию приоритета: ордера > баланс/позиции > рыночные данные > UI > фоновые загрузки
+LANES = ('orders', 'account', 'market', 'ui', 'background')
+DEFAULT_LANE = 'market'
+
+# Доля емкости пула, которую очередь обязана оставить свободной: ордерам всегда
+# хватает токенов, сколько бы запросов ни поставили UI и фоновые задачи
+LANE_RESERVE = {
+    'orders': 0.0,
+    'account': 0.05,
+    'market': 0.15,
+    'ui': 0.3,
+    'background': 0.5,
+}
+
+# Пулы лимитов KuCoin (VIP0): (вес, окно в секундах)
+KUCOIN_POOLS = {
+    'public': (2000, 30),
+    'spot': (4000, 30),
+    'management': (2000, 30),
+}
+
+# Веса эндпоинтов из документации KuCoin: (api, метод, путь) -> (пул, вес).
+# Остальные эндпоинты - вес из описания API ccxt (config['cost'])
+KUCOIN_WEIGHTS = {
+    ('public', 'GET', 'market/allTickers'): ('public', 15),
+    ('public', 'GET', 'market/orderbook/level1'): ('public', 2),
+    ('public', 'GET', 'market/candles'): ('public', 3),
+    ('public', 'GET', 'market/stats'): ('public', 15),
+    ('public', 'GET', 'symbols'): ('public', 4),
+    ('public', 'GET', 'currencies'): ('public', 3),
+    ('private', 'GET', 'accounts'): ('management', 5),
+    ('private', 'POST', 'orders'): ('spot', 2),
+    ('private', 'GET', 'orders'): ('spot', 2),
+    ('private', 'GET', 'orders/{orderId}'): ('spot', 2),
+    ('private', 'DELETE', 'orders/{orderId}'): ('spot', 3),
+    ('private', 'GET', 'fills'): ('spot', 10),
+}
+
+BACKOFF_BASE = 1.0   # сек: первая пауза после ответа 429
+BACKOFF_MAX = 30.0   # сек: предел экспоненциальной паузы
+# Заголовки KuCoin с остатком лимита пула и временем до его сброса (мс)
+REMAINING_HEADER = 'gw-ratelimit-remaining'
+RESET_HEADER = 'gw-ratelimit-reset'
+
+_local = threading.local()
+
+
+def current_lane():
+    """Очередь запросов текущего потока"""
+    return getattr(_local, 'lane', None) or DEFAULT_LANE
+
+
+@contextmanager
+def exchange_lane(lane):
+    """Запросы к бирже внутри блока идут в очередь lane.
+
+    Внешний блок важнее внутреннего: запрос баланса из Web App остается в очереди
+    'ui', хотя get_balance() сам по себе помечен как 'account'.
+    """
+    previous = getattr(_local, 'lane', None)
+    if previous is None:
+        _local.lane = lane
+    try:
+        yield
+    finally:
+        _local.lane = previous
+
+
+class RateLimiter:
+    """Взвешенный token bucket одного пула лимитов с приоритетными очередями.
+
+    Запрос получает токены, только если перед ним нет ожидающих запросов более
+    важных очередей и после списания в пуле остается резерв его очереди.
+    """
+
+    def __init__(self, capacity, window, name='pool'):
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = capacity / float(window)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff_level = 0
+        self._cond = threading.Condition()
+        self._queues = {lane: deque() for lane in LANES}
+        self._stats = {lane: {'granted': 0, 'weight': 0.0, 'wait_total': 0.0, 'wait_max': 0.0} for lane in LANES}
+        self.backoffs = 0
+        self.timeouts = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _is_next(self, ticket, lane):
+        if self._queues[lane][0] is not ticket:
+            return False
+        for other in LANES:
+            if other == lane:
+                return True
+            if self._queues[other]:
+                return False
+        return True
+
+    def _delay(self, weight, lane, now):
+        """Сколько ждать до выдачи weight токенов (0 - можно сейчас)"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        floor = LANE_RESERVE.get(lane, 0.0) * self.capacity
+        if self._tokens - weight >= floor or self._tokens >= self.capacity:
+            return 0.0
+        need = min(weight + floor, self.capacity) - self._tokens
+        return max(need / self.rate, 0.001)
+
+    def acquire(self, weight=1, lane=DEFAULT_LANE, timeout=None):
+        """Ожидание weight токенов в очереди lane. Возвращает время ожидания (сек)
+        или None, если не дождались за timeout"""
+        if lane not in self._queues:
+            lane = DEFAULT_LANE
+        started = time.monotonic()
+        ticket = object()
+        with self._cond:
+            queue = self._queues[lane]
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay(weight, lane, now) if self._is_next(ticket, lane) else None
+                    if delay == 0.0:
+                        self._tokens -= weight
+                        waited = now - started
+                        stats = self._stats[lane]
+                        stats['granted'] += 1
+                        stats['weight'] += weight
+                        stats['wait_total'] += waited
+                        stats['wait_max'] = max(stats['wait_max'], waited)
+                        return waited
+                    if timeout is not None:
+                        left = started + timeout - now
+                        if left <= 0:
+                            self.timeouts += 1
+                            return None
+                        delay = left if delay is None else min(delay, left)
+                    self._cond.wait(delay)
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+
+    def backoff(self, retry_after=None):
+        """Биржа сообщила о превышении лимита: пауза пула (экспоненциальная, если срок не указан)"""
+        with self._cond:
+            if retry_after is None:
+                retry_after = min(BACKOFF_BASE * (2 ** self._backoff_level), BACKOFF_MAX)
+                self._backoff_level += 1
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + retry_after)
+            self._tokens = 0.0
+            self._updated = now
+            self.backoffs += 1
+        log_error(f"⏳ Лимит запросов KuCoin ({self.name}): пауза {retry_after:.1f}s")
+        return retry_after
+
+    def observe(self, remaining=None, reset_ms=None):
+        """Успешный ответ биржи; remaining - остаток пула по заголовкам (счетчик не щедрее биржи)"""
+        with self._cond:
+            self._backoff_level = 0
+            if remaining is None:
+                return
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(remaining))
+            if remaining <= 0 and reset_ms:
+                self._paused_until = max(self._paused_until, time.monotonic() + reset_ms / 1000.0)
+
+    def stats(self):
+        """Глубина очередей, выданные запросы и ожидание по очередям"""
+        with self._cond:
+            self._refill(time.monotonic())
+            lanes = {}
+            for lane in LANES:
+                stats = self._stats[lane]
+                lanes[lane] = {
+                    'queued': len(self._queues[lane]),
+                    'granted': stats['granted'],
+                    'weight': stats['weight'],
+                    'avg_wait_ms': round(stats['wait_total'] / stats['granted'] * 1000, 2) if stats['granted'] else 0.0,
+                    'max_wait_ms': round(stats['wait_max'] * 1000, 2),
+                }
+            return {
+                'capacity': self.capacity,
+                'tokens': round(self._tokens, 2),
+                'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 3),
+                'backoffs': self.backoffs,
+                'timeouts': self.timeouts,
+                'lanes': lanes,
+            }
+
+
+class ExchangeRateLimiter:
+    """Ограничитель для всех запросов ccxt-клиента KuCoin.
+
+    install() подменяет fetch2 клиента: любой REST-вызов (торговый поток,
+    обучение ML, Telegram, Web App, рассылка WebSocket) сначала получает токены
+    своего пула в очереди текущего потока (exchange_lane).
+    """
+
+    def __init__(self, pools=None, weights=None):
+        self.pools = {name: RateLimiter(capacity, window, name)
+                      for name, (capacity, window) in (pools or KUCOIN_POOLS).items()}
+        self.weights = KUCOIN_WEIGHTS if weights is None else weights
+
+    def classify(self, api, method, path, config=None):
+        """(пул, вес) запроса"""
+        api_name = api if isinstance(api, str) else '.'.join(str(part) for part in api)
+        known = self.weights.get((api_name, method, path))
+        if known:
+            return known
+        weight = (config or {}).get('cost', 1)
+        if 'public' in api_name.lower():
+            pool = 'public'
+        elif path.startswith('account'):
+            pool = 'management'
+        else:
+            pool = 'spot'
+        return (pool if pool in self.pools else next(iter(self.pools))), weight
+
+    def acquire(self, api, method, path, config=None, lane=None):
+        pool, weight = self.classify(api, method, path, config)
+        limiter = self.pools[pool]
+        lane = lane or current_lane()
+        waited = limiter.acquire(weight, lane)
+        if waited is not None:
+            RATE_LIMIT_WAIT_SECONDS.labels(pool, lane).observe(waited)
+        return limiter
+
+    def install(self, exchange):
+        """Все REST-запросы клиента ccxt идут через ограничитель"""
+        import ccxt  # клиент уже создан - ccxt загружен; Web App импортирует модуль без него
+
+        original_fetch2 = exchange.fetch2
+        original_on_rest_response = exchange.on_rest_response
+        limiter_self = self
+        # Заголовки ответа - в потоке запроса: last_response_headers общий для всех потоков клиента
+        response = threading.local()
+
+        def on_rest_response(code, reason, url, method, response_headers, response_body, request_headers,
+                             request_body):
+            response.headers = response_headers
+            return original_on_rest_response(code, reason, url, method, response_headers, response_body,
+                                             request_headers, request_body)
+
+        def fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            limiter = limiter_self.acquire(api, method, path, config)
+            response.headers = None
+            # 📊 Длительность по эндпоинту: путь ccxt - шаблон ('orders/{orderId}'), число меток ограничено
+            started = time.perf_counter()
+            try:
+                result = original_fetch2(path, api, method, params, headers, body, config)
+            except Exception as e:
+                EXCHANGE_ERRORS_TOTAL.labels(path, type(e).__name__).inc()
+                if isinstance(e, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+                    limiter.backoff()
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                EXCHANGE_REQUEST_SECONDS.labels(path, method).observe(elapsed)
+                record_span('exchange', started, elapsed, endpoint=f"{method} {path}")
+            limiter.observe(*limiter_self._limit_headers(response.headers))
+            return result
+
+        exchange.on_rest_response = on_rest_response
+        exchange.fetch2 = fetch2
+        # Собственная задержка ccxt (rateLimit * cost после каждого запроса) больше не нужна
+        exchange.throttle = lambda cost=None: None
+        log_info(f"🚦 Ограничитель запросов KuCoin: пулы {', '.join(self.pools)}, очереди {' > '.join(LANES)}")
+        return exchange
+
+    @staticmethod
+    def _limit_headers(headers):
+        """(остаток пула, мс до сброса) из заголовков ответа KuCoin"""
+        if not headers:
+            return None, None
+        try:
+            lowered = {str(key).lower(): value for key, value in headers.items()}
+            remaining = lowered.get(REMAINING_HEADER)
+            reset = lowered.get(RESET_HEADER)
+            return (float(remaining) if remaining is not None else None,
+                    float(reset) if reset is not None else None)
+        except (TypeError, ValueError, AttributeError):
+            return None, None
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in self.pools.items()}
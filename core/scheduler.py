@@ -0,0 +1,148 @@
+"""
+ПЛАНИРОВЩИК ЗАДАЧ БОТА (ВЫРАВНИВАНИЕ ПО ЗАКРЫТИЮ СВЕЧИ)
+"""
+import heapq
+import itertools
+import threading
+import time
+from utils.logger import log_info, log_error
+
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_to_seconds(timeframe):
+    """Длительность таймфрейма в секундах ('15m' -> 900)"""
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+
+
+def next_candle_close(timeframe, now=None):
+    """Время закрытия текущей свечи (unix-время, свечи выровнены по UTC)"""
+    now = time.time() if now is None else now
+    period = timeframe_to_seconds(timeframe)
+    return (int(now // period) + 1) * period
+
+
+class ScheduledJob:
+    """Задача планировщика"""
+
+    def __init__(self, name, callback, interval=None, timeframe=None, delay=0.0, retry_delay=60):
+        self.name = name
+        self.callback = callback
+        self.interval = interval  # число секунд или функция, возвращающая секунды
+        self.timeframe = timeframe
+        self.delay = delay  # задержка после закрытия свечи (биржа успевает ее опубликовать)
+        self.retry_delay = retry_delay
+        self.runs = 0
+        self.errors = 0
+        self.last_run = None
+        self.last_duration = 0.0
+
+    def get_interval(self):
+        return self.interval() if callable(self.interval) else self.interval
+
+    def next_run_after(self, now):
+        """Время следующего запуска после now"""
+        if self.timeframe:
+            return next_candle_close(self.timeframe, now - self.delay) + self.delay
+        return now + self.get_interval()
+
+
+class Scheduler:
+    """Запускает задачи точно в срок: по закрытию свечей и с заданной периодичностью"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.jobs = {}
+        self._queue = []  # (время запуска, порядковый номер, имя задачи)
+        self._counter = itertools.count()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.running = False
+
+    def _push(self, run_at, name):
+        with self._lock:
+            heapq.heappush(self._queue, (run_at, next(self._counter), name))
+        self._wake.set()
+
+    def add_candle_job(self, name, timeframe, callback, delay=2.0, run_immediately=False, retry_delay=60):
+        """Задача, которая запускается при закрытии каждой свечи таймфрейма"""
+        job = ScheduledJob(name, callback, timeframe=timeframe, delay=delay, retry_delay=retry_delay)
+        self.jobs[name] = job
+        now = self.clock()
+        self._push(now if run_immediately else job.next_run_after(now), name)
+        return job
+
+    def add_interval_job(self, name, interval, callback, run_immediately=False, retry_delay=None):
+        """Задача с фиксированным интервалом (секунды или функция от настроек)"""
+        job = ScheduledJob(name, callback, interval=interval, retry_delay=retry_delay)
+        self.jobs[name] = job
+        now = self.clock()
+        self._push(now if run_immediately else job.next_run_after(now), name)
+        return job
+
+    def run_now(self, name):
+        """Внеочередной запуск задачи (например, сигналы сразу после включения торговли)"""
+        if name not in self.jobs:
+            return False
+        with self._lock:
+            self._queue = [entry for entry in self._queue if entry[2] != name]
+            heapq.heapify(self._queue)
+            heapq.heappush(self._queue, (self.clock(), next(self._counter), name))
+        self._wake.set()
+        return True
+
+    def seconds_until_next(self):
+        """Сколько ждать до ближайшей задачи"""
+        with self._lock:
+            if not self._queue:
+                return None
+            return max(0.0, self._queue[0][0] - self.clock())
+
+    def run_pending(self):
+        """Запуск всех задач, срок которых наступил. Возвращает имена выполненных задач"""
+        executed = []
+        while True:
+            with self._lock:
+                if not self._queue or self._queue[0][0] > self.clock():
+                    break
+                _, _, name = heapq.heappop(self._queue)
+            job = self.jobs.get(name)
+            if job is None:
+                continue
+            started = self.clock()
+            next_run = None
+            try:
+                job.callback()
+            except Exception as e:
+                job.errors += 1
+                log_error(f"❌ Ошибка задачи '{name}': {e}")
+                if job.retry_delay:
+                    next_run = self.clock() + job.retry_delay
+            job.runs += 1
+            job.last_run = started
+            job.last_duration = self.clock() - started
+            executed.append(name)
+            if next_run is None:
+                next_run = job.next_run_after(self.clock())
+            with self._lock:
+                # run_now() во время выполнения уже поставил задачу в очередь
+                queued = any(entry[2] == name for entry in self._queue)
+            if not queued:
+                self._push(next_run, name)
+        return executed
+
+    def run(self):
+        """Основной цикл: спим до ближайшей задачи (stop() будит немедленно)"""
+        self.running = True
+        log_info(f"⏰ Планировщик запущен: {', '.join(self.jobs)}")
+        while self.running:
+            self._wake.clear()
+            self.run_pending()
+            wait = self.seconds_until_next()
+            if self.running:
+                self._wake.wait(wait)
+
+    def stop(self):
+        """Остановка планировщика"""
+        self.running = False
+        self._wake.set()
@@ -1,7 +1,12 @@
 """
 MACHINE LEARNING КОМПОНЕНТЫ
 """
-from .model import MLModel
-from .features import FeatureEngineer
+from utils.startup import lazy_exports
 
-__all__ = ['MLModel', 'FeatureEngineer']
\ No newline at end of file
+_EXPORTS = {
+    'MLModel': '.model',
+    'FeatureEngineer': '.features',
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ['MLModel', 'FeatureEngineer']
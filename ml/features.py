@@ -2,7 +2,7 @@
 ПОДГОТОВКА ФИЧ ДЛЯ ML
 """
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from utils.helpers import calculate_ema, calculate_rsi, calculate_macd, calculate_bollinger_bands
 
 class FeatureEngineer:
@@ -86,6 +86,91 @@ class FeatureEngineer:
             print(f"❌ Ошибка подготовки фич: {e}")
             return []
 
+    def prepare_features_batch(self, ohlcv_data):
+        """Матрица фич для всего OHLCV за один проход.
+
+        Строка j совпадает с prepare_features(ohlcv_data[:required_period + j]).
+        """
+        try:
+            candles = np.asarray(ohlcv_data, dtype=np.float64)
+            period = self.required_period
+            if candles.ndim != 2 or len(candles) < period:
+                return np.empty((0, len(self.get_feature_names())))
+
+            closes = candles[:, 4]
+            highs = candles[:, 2]
+            lows = candles[:, 3]
+            rows = slice(period - 1, None)  # индексы последних свечей каждого префикса
+
+            def window(values, size, offset=0):
+                """Окна [i - size + 1, i] для всех строк (offset - values короче closes, как np.diff)"""
+                return sliding_window_view(values, size)[period - size - offset:]
+
+            current_price = closes[rows]
+            price_change_1h = (current_price - closes[period - 4:-3]) / closes[period - 4:-3] * 100
+            price_change_4h = (current_price - closes[period - 16:len(closes) - 15]) / closes[period - 16:len(closes) - 15] * 100
+            price_change_24h = (current_price - closes[period - 24:len(closes) - 23]) / closes[period - 24:len(closes) - 23] * 100
+
+            sma_5 = np.mean(window(closes, 5), axis=1)
+            sma_10 = np.mean(window(closes, 10), axis=1)
+            sma_20 = np.mean(window(closes, 20), axis=1)
+            sma_50 = np.mean(window(closes, 50), axis=1)
+
+            # Те же расчеты, что в utils/helpers, по всей серии: ewm и rolling рекурсивны,
+            # значение на i-й свече совпадает с расчетом по префиксу
+            import pandas as pd
+            series = pd.Series(closes)
+            ema_9 = series.ewm(span=9, adjust=False).mean().values[rows]
+            ema_21 = series.ewm(span=21, adjust=False).mean().values[rows]
+            macd_line = series.ewm(span=12).mean() - series.ewm(span=26).mean()
+            macd = macd_line.values[rows]
+            macd_signal = macd_line.ewm(span=9).mean().values[rows]
+            sma = series.rolling(20).mean()
+            std = series.rolling(20).std()
+            bb_middle = sma.values[rows]
+            bb_upper = (sma + (std * 2)).values[rows]
+            bb_lower = (sma - (std * 2)).values[rows]
+
+            # RSI: средние изменения за 14 последних свечей префикса
+            deltas = np.diff(closes)
+            avg_gains = np.mean(window(np.where(deltas > 0, deltas, 0), 14, offset=1), axis=1)
+            avg_losses = np.mean(window(np.where(deltas < 0, -deltas, 0), 14, offset=1), axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(avg_losses == 0, 100, 100 - (100 / (1 + avg_gains / avg_losses)))
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bb_position = np.where(
+                    bb_upper != bb_lower, (current_price - bb_lower) / (bb_upper - bb_lower), 0.5
+                )
+
+            closes_5 = window(closes, 5)
+            closes_20 = window(closes, 20)
+            volatility_5 = np.std(closes_5, axis=1) / np.mean(closes_5, axis=1) * 100
+            volatility_20 = np.std(closes_20, axis=1) / np.mean(closes_20, axis=1) * 100
+            high_low_ratio_5 = (np.max(window(highs, 5), axis=1) - np.min(window(lows, 5), axis=1)) / sma_5
+            high_low_ratio_20 = (np.max(window(highs, 20), axis=1) - np.min(window(lows, 20), axis=1)) / sma_20
+
+            return np.column_stack([
+                current_price,
+                price_change_1h,
+                price_change_4h,
+                price_change_24h,
+                sma_5, sma_10, sma_20, sma_50,
+                current_price / sma_5,
+                current_price / sma_20,
+                current_price / sma_50,
+                ema_9, ema_21, (ema_9 - ema_21) / ema_21 * 100,
+                rsi,
+                macd, macd_signal, macd - macd_signal,
+                bb_middle, bb_upper, bb_lower, bb_position,
+                volatility_5, volatility_20,
+                high_low_ratio_5, high_low_ratio_20
+            ])
+
+        except Exception as e:
+            print(f"❌ Ошибка пакетной подготовки фич: {e}")
+            return np.empty((0, len(self.get_feature_names())))
+
     def get_feature_names(self):
         """Получение названий фич"""
         return [
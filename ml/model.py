@@ -1,24 +1,32 @@
 """
 ML МОДЕЛЬ И ОБУЧЕНИЕ (ОПТИМИЗИРОВАННАЯ ВЕРСИЯ) - ИСПРАВЛЕННЫЙ ВЫВОД
 """
-import joblib
+import os
+import time
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
 from .features import FeatureEngineer
+from config.constants import ML_TRAINING_CANDLES
+from utils.telemetry import ML_INFERENCE_SECONDS
+
+# Максимум свечей, которые KuCoin отдает за один запрос
+OHLCV_PAGE_LIMIT = 1500
+
+# ⚡ ОПТИМИЗАЦИЯ: sklearn и joblib (~1.5 с импорта) загружаются при обучении или загрузке
+# модели в фоновом потоке, а не при импорте бота - Web App отвечает раньше
 
 class MLModel:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.model = None
-        self.scaler = StandardScaler()
+        self.archive = archive  # CandleArchive: история для обучения с диска
+        self.scaler = None  # StandardScaler (создается при обучении или загрузке)
         self.feature_engineer = FeatureEngineer()
         self.is_trained = False
         
     def load_model(self):
         """Загрузка модели"""
         try:
-            if joblib.os.path.exists('ml_model.pkl') and joblib.os.path.exists('scaler.pkl'):
+            if os.path.exists('ml_model.pkl') and os.path.exists('scaler.pkl'):
+                import joblib
                 self.model = joblib.load('ml_model.pkl')
                 self.scaler = joblib.load('scaler.pkl')
                 self.is_trained = True
@@ -31,39 +39,54 @@ class MLModel:
             print(f"❌ Ошибка загрузки ML: {e}")
             return False
 
-    def train(self, exchange, symbol='BTC/USDT', timeframe='1h', limit=80):
-        """ОБЛЕГЧЕННОЕ обучение модели для быстрого старта"""
+    def _fetch_training_ohlcv(self, exchange, symbol, timeframe, limit):
+        """Загрузка истории для обучения (постранично, если свечей больше лимита биржи)"""
+        if self.archive is not None:
+            # 💾 История с диска (memmap без копирования), с биржи - только недостающие свечи
+            return self.archive.history(exchange, symbol, timeframe, limit)
+        if limit <= OHLCV_PAGE_LIMIT:
+            return exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+
+        timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+        since = exchange.milliseconds() - limit * timeframe_ms
+        ohlcv = []
+        while len(ohlcv) < limit:
+            batch = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=OHLCV_PAGE_LIMIT)
+            if not batch:
+                break
+            ohlcv.extend(candle for candle in batch if not ohlcv or candle[0] > ohlcv[-1][0])
+            since = batch[-1][0] + timeframe_ms
+            if len(batch) < OHLCV_PAGE_LIMIT:
+                break
+        return ohlcv[-limit:]
+
+    def train(self, exchange, symbol='BTC/USDT', timeframe='1h', limit=ML_TRAINING_CANDLES):
+        """Обучение модели на истории свечей"""
         try:
-            # Используем МЕНЬШЕ данных для быстрого старта
-            print(f"🤖 Быстрое обучение ML на {limit} свечах...")
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            print(f"🤖 Обучение ML на {limit} свечах...")
+            ohlcv = self._fetch_training_ohlcv(exchange, symbol, timeframe, limit)
             
             if len(ohlcv) < 40:  # Уменьшили минимальное количество
                 print("⚠️ Недостаточно данных для быстрого обучения ML")
                 return False
             
-            X = []
-            y = []
-            
-            # Упрощенная подготовка данных
-            for i in range(20, len(ohlcv) - 1):  # Меньше данных для обучения
-                features = self.feature_engineer.prepare_features(ohlcv[:i+1])
-                if features:
-                    future_price = ohlcv[i+1][4]
-                    current_price = ohlcv[i][4]
-                    target = 1 if future_price > current_price else 0
-                    
-                    X.append(features)
-                    y.append(target)
+            # ⚡ ОПТИМИЗАЦИЯ: матрица фич строится за один проход вместо пересчета каждого префикса
+            features = self.feature_engineer.prepare_features_batch(ohlcv)
+            closes = np.asarray(ohlcv, dtype=np.float64)[:, 4]
+            start = self.feature_engineer.required_period
+            X = features[:-1]  # для последней свечи еще нет следующей цены
+            y = (closes[start:] > closes[start - 1:-1]).astype(int)
             
             if len(X) < 25:  # Уменьшили порог
                 print("⚠️ Недостаточно данных для быстрого обучения")
                 return False
             
-            X = np.array(X)
-            y = np.array(y)
-            
+            import joblib
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.preprocessing import StandardScaler
+
             # УПРОЩЕННАЯ МОДЕЛЬ для быстрого обучения
+            self.scaler = StandardScaler()
             self.model = RandomForestClassifier(
                 n_estimators=50,  # Меньше деревьев
                 max_depth=8,      # Меньшая глубина
@@ -100,12 +123,14 @@ class MLModel:
             return 0.5, "⚪ ML НЕ ОБУЧЕН"
         
         try:
+            started = time.perf_counter()
             features = self.feature_engineer.prepare_features(ohlcv_data)
             if not features:
                 return 0.5, "⚠️ НЕДОСТАТОЧНО ДАННЫХ"
             
             features_scaled = self.scaler.transform([features])
             prediction_proba = self.model.predict_proba(features_scaled)[0]
+            ML_INFERENCE_SECONDS.observe(time.perf_counter() - started)
             confidence = prediction_proba[1]  # Вероятность роста
             
             # ИСПРАВЛЕННАЯ ИНТЕРПРЕТАЦИЯ УВЕРЕННОСТИ
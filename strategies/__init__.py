@@ -1,11 +1,28 @@
 """
 ТОРГОВЫЕ СТРАТЕГИИ
 """
-from .base_strategy import BaseStrategy
-from .ema_ml import EmaMlStrategy
-from .price_action import PriceActionStrategy
-from .macd_rsi import MacdRsiStrategy
-from .bollinger import BollingerStrategy
+import importlib
+from utils.startup import lazy_exports
+
+# Реестр стратегий: имя -> (модуль, класс). Регистрация не импортирует модуль
+# стратегии и его зависимости - это делает get_strategy_class() при первом создании
+STRATEGY_CLASSES = {
+    'ema_ml': ('.ema_ml', 'EmaMlStrategy'),
+    'price_action': ('.price_action', 'PriceActionStrategy'),
+    'macd_rsi': ('.macd_rsi', 'MacdRsiStrategy'),
+    'bollinger': ('.bollinger', 'BollingerStrategy'),
+}
+
+
+def get_strategy_class(name):
+    """Класс стратегии по имени из реестра"""
+    module_name, class_name = STRATEGY_CLASSES[name]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+_EXPORTS = {'BaseStrategy': '.base_strategy'}
+_EXPORTS.update({class_name: module_name for module_name, class_name in STRATEGY_CLASSES.values()})
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ['BaseStrategy', 'EmaMlStrategy', 'PriceActionStrategy', 
-           'MacdRsiStrategy', 'BollingerStrategy']
\ No newline at end of file
+           'MacdRsiStrategy', 'BollingerStrategy']
@@ -14,6 +14,7 @@ class BaseStrategy(ABC):
         self.entry_price = 0
         self.position_opened_at = None
         self.position_size_usdt = 0  # Размер позиции в USDT
+        self.clock = time.time  # Источник времени (бэктест подставляет время свечи)
         
     @abstractmethod
     def calculate_signal(self, market_data, ml_confidence=0.5, ml_signal="⚪ НЕЙТРАЛЬНО"):
@@ -51,12 +52,39 @@ class BaseStrategy(ABC):
             else:
                 self.entry_price = price
             self.position = 'long'
-            self.position_opened_at = time.time()
+            self.position_opened_at = self.clock()
         elif signal == 'sell':
             self.position = None
             self.entry_price = 0
             self.position_opened_at = None
     
+    def check_exit_levels(self, current_price, entry_price=None, position_size_usdt=None):
+        """Достигнуты ли Take Profit / Stop Loss из настроек стратегии (только цена, без индикаторов).
+
+        Возвращает причину выхода или None; стратегии без TP/SL в настройках не выходят.
+        """
+        entry_price = entry_price or self.entry_price
+        if not entry_price or not current_price:
+            return None
+        position_size_usdt = self.position_size_usdt if position_size_usdt is None else position_size_usdt
+        fees_percent = self.settings.get('taker_fee', 0.001) * 2 * 100
+        gross_profit_percent = (current_price - entry_price) / entry_price * 100
+
+        take_profit_usdt = self.settings.get('take_profit_usdt', 0.0)
+        if take_profit_usdt > 0:
+            net_profit_usdt = position_size_usdt * (gross_profit_percent - fees_percent) / 100
+            if net_profit_usdt >= take_profit_usdt:
+                return f"Take Profit (USDT): +{net_profit_usdt:.4f} USDT"
+        elif 'take_profit_percent' in self.settings:
+            net_profit_percent = gross_profit_percent - fees_percent
+            if net_profit_percent >= self.settings['take_profit_percent']:
+                return f"Take Profit (%): +{net_profit_percent:.4f}%"
+
+        # Stop Loss - по валовой прибыли (падению цены), как в стратегиях
+        if 'stop_loss_percent' in self.settings and gross_profit_percent <= -self.settings['stop_loss_percent']:
+            return f"Stop Loss: {gross_profit_percent:.2f}%"
+        return None
+
     def get_position_info(self):
         """Получение информации о текущей позиции"""
         if self.position:
@@ -64,7 +92,7 @@ class BaseStrategy(ABC):
                 'position': self.position,
                 'entry_price': self.entry_price,
                 'opened_at': self.position_opened_at,
-                'hold_time': time.time() - self.position_opened_at if self.position_opened_at else 0
+                'hold_time': self.clock() - self.position_opened_at if self.position_opened_at else 0
             }
         return None
     
@@ -2,7 +2,7 @@
 СТРАТЕГИЯ BOLLINGER BANDS
 """
 from .base_strategy import BaseStrategy
-from utils.helpers import calculate_bollinger_bands
+from utils.indicators import IndicatorEngine, BollingerBands
 from utils.logger import log_info
 
 class BollingerStrategy(BaseStrategy):
@@ -20,6 +20,16 @@ class BollingerStrategy(BaseStrategy):
         }
         self.settings = self.default_settings.copy()
         self.in_squeeze = False
+        self._indicators = None
+        self._indicators_key = None
+    
+    def _get_indicators(self):
+        """Потоковые индикаторы под текущие настройки"""
+        key = (self.settings.get('bb_period', 20), self.settings.get('bb_std_dev', 2))
+        if key != self._indicators_key:
+            self._indicators = IndicatorEngine(lambda: {'bb': BollingerBands(*key)})
+            self._indicators_key = key
+        return self._indicators
     
     def calculate_signal(self, market_data, ml_confidence=0.5, ml_signal="⚪ НЕЙТРАЛЬНО"):
         """Расчет сигнала Bollinger Bands"""
@@ -31,14 +41,13 @@ class BollingerStrategy(BaseStrategy):
             return 'wait'
         
         try:
-            closes = [candle[4] for candle in market_data['ohlcv']]
             current_price = market_data['current_price']
             
-            period = self.settings.get('bb_period', 20)
-            std_dev = self.settings.get('bb_std_dev', 2)
-            
-            # Расчет Bollinger Bands
-            bb_middle, bb_upper, bb_lower = calculate_bollinger_bands(closes, period, std_dev)
+            # ⚡ ОПТИМИЗАЦИЯ: полосы обновляются инкрементально только по новым свечам
+            values = self._get_indicators().sync(market_data['ohlcv'])
+            if 'bb' not in values:
+                return 'wait'
+            bb_middle, bb_upper, bb_lower = values['bb']
             
             if bb_upper == bb_lower:  # Избегаем деления на ноль
                 return 'wait'
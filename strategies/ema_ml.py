@@ -1,7 +1,6 @@
 """
 УЛУЧШЕННАЯ СТРАТЕГИЯ EMA + ML С УЧЕТОМ КОМИССИЙ И TAKE PROFIT В USDT
 """
-import time
 from .base_strategy import BaseStrategy
 from utils.logger import log_info, log_error
 
@@ -82,7 +81,7 @@ class EmaMlStrategy(BaseStrategy):
 
         current_price = market_data['current_price']
         ema_diff = market_data['ema_diff_percent']
-        current_time = time.time()
+        current_time = self.clock()
 
         # Защита от частых сигналов
         if current_time - self.last_signal_time < 30:
@@ -235,7 +234,7 @@ class EmaMlStrategy(BaseStrategy):
             self.position = 'long'
             self.entry_price = price
             self.highest_price_since_entry = price
-            self.position_opened_at = time.time()
+            self.position_opened_at = self.clock()
         elif signal == 'sell':
             self.position = None
             self.entry_price = 0
@@ -2,7 +2,8 @@
 СТРАТЕГИЯ MACD + RSI
 """
 from .base_strategy import BaseStrategy
-from utils.helpers import calculate_rsi, calculate_macd
+from utils.helpers import calculate_macd
+from utils.indicators import IndicatorEngine, RSI
 from utils.logger import log_info
 
 class MacdRsiStrategy(BaseStrategy):
@@ -21,6 +22,16 @@ class MacdRsiStrategy(BaseStrategy):
             'use_histogram': True
         }
         self.settings = self.default_settings.copy()
+        self._indicators = None
+        self._indicators_key = None
+    
+    def _get_indicators(self):
+        """Потоковый RSI под текущие настройки"""
+        key = self.settings.get('rsi_period', 14)
+        if key != self._indicators_key:
+            self._indicators = IndicatorEngine(lambda: {'rsi': RSI(key)})
+            self._indicators_key = key
+        return self._indicators
     
     def calculate_signal(self, market_data, ml_confidence=0.5, ml_signal="⚪ НЕЙТРАЛЬНО"):
         """Расчет сигнала MACD + RSI"""
@@ -32,19 +43,21 @@ class MacdRsiStrategy(BaseStrategy):
             return 'wait'
         
         try:
-            closes = [candle[4] for candle in market_data['ohlcv']]
             current_price = market_data['current_price']
             
-            # Расчет RSI
-            rsi_period = self.settings.get('rsi_period', 14)
-            rsi = calculate_rsi(closes, rsi_period)
-            
-            # Расчет MACD
-            macd_fast = self.settings.get('macd_fast', 12)
-            macd_slow = self.settings.get('macd_slow', 26)
-            macd_signal_period = self.settings.get('macd_signal', 9)
-            
-            macd, macd_signal = calculate_macd(closes, macd_fast, macd_slow, macd_signal_period)
+            # ⚡ ОПТИМИЗАЦИЯ: RSI обновляется инкрементально только по новым свечам
+            ohlcv = market_data['ohlcv']
+            rsi = self._get_indicators().sync(ohlcv).get('rsi')
+            if rsi is None:
+                return 'wait'
+            # MACD зависит от начала окна свечей - считается по окну, как раньше
+            closes = [candle[4] for candle in ohlcv]
+            macd, macd_signal = calculate_macd(
+                closes,
+                self.settings.get('macd_fast', 12),
+                self.settings.get('macd_slow', 26),
+                self.settings.get('macd_signal', 9),
+            )
             macd_histogram = macd - macd_signal
             
             # Получаем настройки RSI
@@ -1,8 +1,13 @@
 """
 TELEGRAM ИНТЕРФЕЙС
 """
-from .bot import TelegramBot
-from .menus import MenuManager
-from .handlers import MessageHandler
+from utils.startup import lazy_exports
 
-__all__ = ['TelegramBot', 'MenuManager', 'MessageHandler']
\ No newline at end of file
+_EXPORTS = {
+    'TelegramBot': '.bot',
+    'MenuManager': '.menus',
+    'MessageHandler': '.handlers',
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ['TelegramBot', 'MenuManager', 'MessageHandler']
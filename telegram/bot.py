@@ -7,9 +7,13 @@ import time
 import os
 from datetime import datetime
 from utils.logger import log_info, log_error
+from utils.cache import SWRCache
+from utils.telemetry import TELEGRAM_SEND_SECONDS
 from .menus import MenuManager
 from .handlers import MessageHandler
 
+STATUS_CACHE_TTL = 5  # сек: баланс и рыночные данные в экранах статуса
+
 class TelegramBot:
     def __init__(self, trading_bot):
         self.bot = trading_bot
@@ -21,6 +25,8 @@ class TelegramBot:
         self.connection_issues = 0
         self.last_balance = None  # Для отслеживания изменений баланса
         self.welcome_message_id = None  # ID приветственного сообщения для редактирования
+        # ⚡ Данные для экранов статуса: повторные нажатия не ходят на биржу
+        self.status_cache = SWRCache(max_size=32, ttl=STATUS_CACHE_TTL, stale_ttl=30, name='telegram')
         
         # Настройка прокси для Telegram (если указано в .env)
         self.proxies = None
@@ -95,7 +101,14 @@ class TelegramBot:
                     timeout = 25 if attempt > 0 else 15
                 else:
                     timeout = 15 if attempt > 0 else 8
-                response = requests.post(url, json=payload, timeout=timeout, proxies=self.proxies)
+                started = time.perf_counter()
+                try:
+                    response = requests.post(url, json=payload, timeout=timeout, proxies=self.proxies)
+                except Exception:
+                    TELEGRAM_SEND_SECONDS.labels('error').observe(time.perf_counter() - started)
+                    raise
+                TELEGRAM_SEND_SECONDS.labels('ok' if response.status_code == 200 else 'http_error').observe(
+                    time.perf_counter() - started)
                 
                 if response.status_code == 200:
                     self.connection_issues = 0  # Сбрасываем счетчик проблем
@@ -505,6 +518,27 @@ Telegram WebApp требует HTTPS URL.
             log_error(f"❌ Ошибка ответа на callback: {e}")
             return False
 
+    def send_document(self, filename, content, caption=None):
+        """Отправка текстового файла (например, свернутых стеков профилировщика)"""
+        if not self.token or not self.chat_id:
+            return False
+        try:
+            url = f"https://api.telegram.org/bot{self.token}/sendDocument"
+            data = {'chat_id': self.chat_id}
+            if caption:
+                data['caption'] = caption
+                data['parse_mode'] = 'HTML'
+            files = {'document': (filename, content.encode('utf-8'), 'text/plain')}
+            timeout = 60 if self.use_proxy else 30
+            response = requests.post(url, data=data, files=files, timeout=timeout, proxies=self.proxies)
+            if response.status_code == 200:
+                return True
+            log_error(f"❌ Ошибка отправки файла в Telegram: {response.text}")
+            return False
+        except Exception as e:
+            log_error(f"❌ Ошибка отправки файла в Telegram: {e}")
+            return False
+
     def edit_message_text(self, chat_id, message_id, text, reply_markup=None):
         """Редактирование сообщения с обработкой ошибок"""
         try:
@@ -536,6 +570,21 @@ Telegram WebApp требует HTTPS URL.
             # При ошибке отправляем новое сообщение
             return self.send_message(text, reply_markup)
 
+    def get_cached_balance(self):
+        """Баланс для экранов статуса (кэш с фоновым обновлением)"""
+        balance = self.status_cache.get('balance', self.bot.exchange.get_balance)
+        if balance is None:
+            self.status_cache.invalidate('balance')  # ошибку не кэшируем
+        return balance
+
+    def get_cached_market_data(self, symbol=None):
+        """Рыночные данные для экранов статуса (кэш с фоновым обновлением)"""
+        symbol = symbol or self.bot.settings.trading_pairs['active_pair']
+        data = self.status_cache.get(('market', symbol), lambda: self.bot.exchange.get_market_data(symbol))
+        if data is None:
+            self.status_cache.invalidate(('market', symbol))
+        return data
+
     def smart_format(self, value, decimals=4):
         """Форматирует число, убирая лишние нули в конце"""
         formatted = f"{value:.{decimals}f}"
@@ -594,14 +643,13 @@ Telegram WebApp требует HTTPS URL.
             else:
                 # 🔧 ПОДСЧЕТ ОТКРЫТЫХ ПОЗИЦИЙ - ИСПОЛЬЗУЕМ position_state.json КАК ОСНОВНОЙ ИСТОЧНИК
                 # Причина: KuCoin API не возвращает старые сделки (history только ~1 сделка)
-                import json
-                import os
+                # ⚡ ОПТИМИЗАЦИЯ: позиции из памяти utils/position_store.py, а не разбор файла на каждое сообщение
+                from utils.position_store import get_position_store
+                position_state = None
                 try:
-                    state_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'position_state.json')
-                    if os.path.exists(state_file):
-                        with open(state_file, 'r') as f:
-                            position_state = json.load(f)
-                        
+                    store = get_position_store(create=False)
+                    position_state = store.get_state() if store else None
+                    if position_state is not None:
                         # Считаем открытые позиции по НОВОЙ структуре (массив positions)
                         open_positions_count = 0
                         total_position_size_all_pairs = 0
@@ -634,11 +682,11 @@ Telegram WebApp требует HTTPS URL.
                         current_pair_data = position_state.get(symbol, {})
                         position_size_for_current = current_pair_data.get('position_size_usdt', 0)
                     else:
-                        log_info(f"📊 Telegram: Файл position_state.json не найден")
+                        log_info(f"📊 Telegram: Сохраненных позиций нет")
                         open_positions_count = 1 if has_entry_price and has_position_size else 0
                         total_position_size_all_pairs = 0
                 except Exception as e:
-                    log_error(f"❌ Ошибка чтения position_state.json: {e}")
+                    log_error(f"❌ Ошибка чтения позиций: {e}")
                     open_positions_count = 1 if has_entry_price and has_position_size else 0
                     total_position_size_all_pairs = 0
                 
@@ -664,11 +712,8 @@ Telegram WebApp требует HTTPS URL.
                 # Если открыто 2+ позиций, используем МАКСИМАЛЬНУЮ цену входа (чтобы не продавать в минус)
                 # Если 1 позиция, используем её цену входа
                 try:
-                    state_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'position_state.json')
-                    if os.path.exists(state_file):
-                        with open(state_file, 'r') as f:
-                            position_state_for_tp = json.load(f)
-                        current_pair_data = position_state_for_tp.get(symbol, {})
+                    if position_state is not None:
+                        current_pair_data = position_state.get(symbol, {})
                         
                         # Проверяем, есть ли max_entry_price (для нескольких позиций)
                         if open_positions_count >= 2 and 'max_entry_price' in current_pair_data:
@@ -958,11 +1003,13 @@ Telegram WebApp требует HTTPS URL.
             return
             
         strategy = self.bot.get_active_strategy()
-        market_data = self.bot.exchange.get_market_data(self.bot.settings.trading_pairs['active_pair'])
-        if not market_data:
+        symbol = self.bot.settings.trading_pairs['active_pair']
+        # ⚡ ОПТИМИЗАЦИЯ: для цены достаточно тикера (общий кэш), свечи не нужны
+        ticker = self.bot.exchange.get_tickers([symbol]).get(symbol)
+        if not ticker or not ticker.get('last'):
             return
             
-        current_price = market_data['current_price']
+        current_price = ticker['last']
         
         # Используем метод из стратегии для получения информации о прибыли
         if hasattr(strategy, 'get_current_profit_info'):
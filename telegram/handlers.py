@@ -3,6 +3,8 @@
 """
 import threading
 import time
+from html import escape
+from core.rate_limiter import exchange_lane
 from utils.logger import log_info, log_error
 from utils.helpers import validate_number_input
 
@@ -41,6 +43,8 @@ class MessageHandler:
             if message_text in ['/start', '/webapp', 'Меню', '🏠 Главное меню']:
                 # Обновляем приветственное сообщение с кнопкой WebApp
                 self.bot.telegram.send_or_update_welcome_message()
+            elif message_text.split()[:1] == ['/profile']:
+                self.handle_profile_command(message_text, chat_id)
             else:
                 # На любое другое сообщение отправляем напоминание об использовании WebApp
                 reminder = """
@@ -53,6 +57,32 @@ class MessageHandler:
         except Exception as e:
             log_error(f"❌ Ошибка обработки сообщения: {e}")
 
+    def handle_profile_command(self, message_text, chat_id=None):
+        """/profile [сек] - профилирование всех потоков бота, итог и свернутые стеки в чат"""
+        from utils.profiler import sampling_profiler, PROFILE_MAX_SECONDS
+        # 🔒 Только из чата владельца (сообщения приходят из любого чата, знающего бота)
+        if str(chat_id) != str(self.bot.telegram.chat_id):
+            log_error(f"⛔ /profile из чужого чата {chat_id} отклонен")
+            return
+        parts = message_text.split()
+        if len(parts) > 1 and not validate_number_input(parts[1], 1, PROFILE_MAX_SECONDS):
+            self.bot.telegram.send_message(f"❌ Длительность: от 1 до {PROFILE_MAX_SECONDS} сек, например /profile 15")
+            return
+        seconds = float(parts[1]) if len(parts) > 1 else 10
+        self.bot.telegram.send_message(f"🔬 Профилирование {seconds:.0f} сек... Бот продолжает работать.")
+        result = sampling_profiler.profile(seconds)
+        if result is None:
+            self.bot.telegram.send_message("⏳ Профилирование уже идет")
+            return
+        summary = result.top(limit=10)
+        lines = [f"🔬 <b>Профиль за {summary['duration']:.1f} сек</b> ({summary['samples']} снимков)", "",
+                 "<b>Собственное время:</b>"]
+        for item in summary['self']:
+            lines.append(f"{item['share'] * 100:5.1f}% <code>{escape(item['function'])}</code>")
+        self.bot.telegram.send_message("\n".join(lines))
+        self.bot.telegram.send_document(f"profile_{int(time.time())}.collapsed.txt", result.collapsed(),
+                                        caption="Свернутые стеки для flamegraph.pl / speedscope")
+
     def handle_callback(self, callback_data, callback_query=None):
         """Обработка callback - перенаправляем на использование webapp"""
         try:
@@ -366,7 +396,7 @@ class MessageHandler:
     
     def send_status_inline(self):
         """Отправка статуса с inline-кнопками"""
-        data = self.bot.exchange.get_market_data(self.bot.settings.trading_pairs['active_pair'])
+        data = self.bot.telegram.get_cached_market_data()
         if not data:
             error_msg = "❌ Не удалось получить данные рынка"
             self.bot.telegram.send_message(error_msg)
@@ -379,7 +409,7 @@ class MessageHandler:
         signal = self.bot.get_active_strategy().calculate_signal(data, ml_confidence, ml_signal)
         position_status = "🟢 ОТКРЫТА" if self.bot.position == 'long' else "⚪ ОЖИДАНИЕ"
         trend_direction = "🟢 ВВЕРХ" if data['ema_diff_percent'] > 0 else "🔴 ВНИЗ"
-        balance = self.bot.exchange.get_balance()
+        balance = self.bot.telegram.get_cached_balance()
         trade_amount_percent = self.bot.settings.settings['trade_amount_percent']
         next_trade_amount = balance['total_usdt'] * trade_amount_percent if balance else 0
         
@@ -1216,6 +1246,8 @@ Stop Loss - процент убытка для автоматического з
     def toggle_trading_enabled(self, send_confirmation=True):
         self.bot.settings.settings['trading_enabled'] = not self.bot.settings.settings['trading_enabled']
         self.bot.settings.save_settings()
+        if self.bot.settings.settings['trading_enabled']:
+            self.bot.trigger_signal_cycle()
         if send_confirmation:
             status = "✅ ВКЛЮЧЕНА" if self.bot.settings.settings['trading_enabled'] else "❌ ОСТАНОВЛЕНА"
             message = f"📊 Автоматическая торговля: <b>{status}</b>"
@@ -1245,6 +1277,7 @@ Stop Loss - процент убытка для автоматического з
         self.bot.settings.settings['demo_mode'] = True
         self.bot.settings.settings['trading_enabled'] = True
         self.bot.settings.save_settings()
+        self.bot.trigger_signal_cycle()
         if send_confirmation:
             message = "🧪 <b>ДЕМО-ТОРГОВЛЯ ВКЛЮЧЕНА</b>\n\n✅ Демо-режим: ВКЛ\n✅ Торговля: ВКЛ\n\n💡 Бот будет торговать в демо-режиме для тестирования."
             self.bot.telegram.send_message(message)
@@ -1260,7 +1293,9 @@ Stop Loss - процент убытка для автоматического з
     def retrain_ml_model(self):
         message = "🤖 Запущено переобучение ML модели... Это может занять несколько минут."
         self.bot.telegram.send_message(message)
-        threading.Thread(target=self.bot.ml_model.train, args=(self.bot.exchange.exchange,), daemon=True).start()
+        # История свечей для обучения грузится в самой низкой очереди ограничителя запросов
+        train = exchange_lane('background')(self.bot.ml_model.train)
+        threading.Thread(target=train, args=(self.bot.exchange.exchange,), daemon=True).start()
 
     def restart_bot(self):
         message = "🔄 Перезагрузка бота..."
@@ -1277,7 +1312,7 @@ Stop Loss - процент убытка для автоматического з
         self.bot.telegram.send_message(message)
 
     def send_status(self):
-        data = self.bot.exchange.get_market_data(self.bot.settings.trading_pairs['active_pair'])
+        data = self.bot.telegram.get_cached_market_data()
         if not data:
             self.bot.telegram.send_message("❌ Не удалось получить данные рынка")
             return
@@ -1288,7 +1323,7 @@ Stop Loss - процент убытка для автоматического з
         signal = self.bot.get_active_strategy().calculate_signal(data, ml_confidence, ml_signal)
         position_status = "🟢 ОТКРЫТА" if self.bot.position == 'long' else "⚪ ОЖИДАНИЕ"
         trend_direction = "🟢 ВВЕРХ" if data['ema_diff_percent'] > 0 else "🔴 ВНИЗ"
-        balance = self.bot.exchange.get_balance()
+        balance = self.bot.telegram.get_cached_balance()
         trade_amount_percent = self.bot.settings.settings['trade_amount_percent']
         next_trade_amount = balance['total_usdt'] * trade_amount_percent if balance else 0
         
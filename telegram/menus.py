@@ -487,7 +487,7 @@ class MenuManager:
 
     def send_account_info(self):
         """Информация об аккаунте"""
-        balance = self.bot.exchange.get_balance()
+        balance = self.bot.telegram.get_cached_balance()
         if not balance:
             message = "❌ Не удалось получить информацию о балансе"
         else:
@@ -534,9 +534,7 @@ class MenuManager:
 
     def send_main_menu_inline(self):
         """Главное меню с inline-кнопками"""
-        market_data = self.bot.exchange.get_market_data(
-            self.bot.settings.trading_pairs['active_pair']
-        )
+        market_data = self.bot.telegram.get_cached_market_data()
         
         current_price = market_data['current_price'] if market_data else 0
         position_status = "🟢 ОТКРЫТА" if self.bot.position == 'long' else "⚪ ОЖИДАНИЕ"
@@ -0,0 +1,120 @@
+"""
+Тесты бэктеста стратегий (backtest/)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from backtest import BacktestEngine
+from analytics.metrics import AnalyticsMetrics
+from strategies.ema_ml import EmaMlStrategy
+from strategies.bollinger import BollingerStrategy
+from strategies.macd_rsi import MacdRsiStrategy
+
+MINUTE_MS = 60 * 1000
+
+
+def make_candles(n=20000, seed=7, volatility=0.004):
+    """Случайное блуждание цены на минутных свечах"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    times = 1_600_000_000_000 + np.arange(n) * MINUTE_MS
+    return np.column_stack([times, closes, closes * 1.001, closes * 0.999, closes, np.ones(n)])
+
+
+def make_ema_ml():
+    strategy = EmaMlStrategy()
+    strategy.settings.update({
+        'ema_fast_period': 9, 'ema_slow_period': 21, 'ema_threshold': 0.0025,
+        'take_profit_percent': 0.5, 'take_profit_usdt': 0.0, 'stop_loss_percent': 1.0,
+        'trailing_stop': False, 'taker_fee': 0.001,
+    })
+    return strategy
+
+
+def test_vectorized_matches_event_loop():
+    """Векторный режим дает те же сделки, что и прогон через calculate_signal"""
+    candles = make_candles()
+    engine = BacktestEngine()
+    for factory in (make_ema_ml, BollingerStrategy):
+        event = engine.run(factory(), candles, mode='event')
+        vectorized = engine.run(factory(), candles, mode='vectorized')
+        assert event['summary']['total_trades'] > 0, "Должны быть сделки"
+        assert event['trades'] == vectorized['trades'], f"Сделки {factory.__name__} не совпадают"
+        assert event['summary'] == vectorized['summary']
+    print("✅ test_vectorized_matches_event_loop PASSED")
+
+
+def test_fees_and_summary():
+    """Прибыль считается за вычетом комиссии, сводка совпадает с AnalyticsMetrics"""
+    result = BacktestEngine(position_size_usdt=200).run(make_ema_ml(), make_candles())
+    assert result['mode'] == 'vectorized'
+    assert set(result['summary']) == set(AnalyticsMetrics().get_summary())
+    for trade in result['trades']:
+        gross = (trade['exit_price'] - trade['entry_price']) / trade['entry_price'] * 100
+        assert abs(trade['profit_percent'] - (gross - 0.2)) < 1e-9, "Комиссия 0.1% за вход и выход"
+        assert abs(trade['profit_usdt'] - 200 * trade['profit_percent'] / 100) < 1e-9
+        if trade['reason'] == 'take_profit':
+            assert trade['profit_percent'] >= 0.5
+        if trade['reason'] == 'stop_loss':
+            assert gross <= -1.0
+    total = sum(trade['profit_percent'] for trade in result['trades'])
+    assert abs(result['summary']['total_profit'] - total) < 1e-6
+    print("✅ test_fees_and_summary PASSED")
+
+
+def test_min_hold_time_blocks_early_exit():
+    """Выход по сигналу стратегии не раньше min_hold_time (TP/SL - сразу)"""
+    candles = make_candles()
+    for min_hold in (0, 3600):
+        result = BacktestEngine(min_hold_time=min_hold, stop_loss_percent=5).run(BollingerStrategy(), candles)
+        for trade in result['trades']:
+            if trade['reason'] == 'signal':
+                assert trade['exit_time'] - trade['entry_time'] >= min_hold
+    print("✅ test_min_hold_time_blocks_early_exit PASSED")
+
+
+class ClockedStrategy(MacdRsiStrategy):
+    """MACD+RSI, запоминающая время, которое видит стратегия"""
+    seen = []
+
+    def calculate_signal(self, *args, **kwargs):
+        ClockedStrategy.seen.append(self.clock())
+        return super().calculate_signal(*args, **kwargs)
+
+
+def test_event_mode_uses_candle_clock():
+    """Стратегия видит время свечи, а не системное время; переданный объект стратегии не меняется"""
+    candles = make_candles(2000)
+    strategy = ClockedStrategy()
+    clock = strategy.clock
+    strategy.update_position_info('buy', 123.0)
+    position = (strategy.position, strategy.entry_price, strategy.position_opened_at)
+    result = BacktestEngine().run(strategy, candles)
+    assert result['mode'] == 'event'
+    assert ClockedStrategy.seen[-1] == candles[-1, 0] / 1000 + 60, "Часы стратегии должны стоять на последней свече"
+    assert strategy.clock is clock, "Часы живой стратегии не подменяются"
+    assert (strategy.position, strategy.entry_price, strategy.position_opened_at) == position
+    for trade in result['trades']:
+        assert trade['entry_time'] < trade['exit_time']
+    print("✅ test_event_mode_uses_candle_clock PASSED")
+
+
+def test_throughput():
+    """Не меньше 1M свечей в минуту на одном ядре"""
+    candles = make_candles(200000)
+    engine = BacktestEngine()
+    vectorized = engine.run(make_ema_ml(), candles, mode='vectorized')
+    event = engine.run(make_ema_ml(), candles, mode='event')
+    assert vectorized['candles_per_minute'] >= 1_000_000, f"Векторный режим: {vectorized['candles_per_minute']:.0f}/мин"
+    assert event['candles_per_minute'] >= 1_000_000, f"Событийный режим: {event['candles_per_minute']:.0f}/мин"
+    print("✅ test_throughput PASSED")
+
+
+if __name__ == '__main__':
+    test_vectorized_matches_event_loop()
+    test_fees_and_summary()
+    test_min_hold_time_blocks_early_exit()
+    test_event_mode_uses_candle_clock()
+    test_throughput()
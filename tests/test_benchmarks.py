@@ -0,0 +1,87 @@
+"""
+Тесты набора микробенчмарков (benchmarks/)
+
+Сами замеры сравниваются с benchmarks/baseline.json только при RUN_BENCHMARKS=1:
+время зависит от машины, в обычном прогоне проверяется, что набор исправен.
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runner import run, compare, save_baseline, load_baseline, measure, main, BASELINE_PATH
+from benchmarks.suite import BENCHMARKS
+
+
+def test_compare_statuses():
+    """Замедление выше порога - регрессия, ускорение - improved, мелкая разница и новые замеры - не регрессия"""
+    baseline = {'a[1]': {'us': 100.0}, 'b[1]': {'us': 100.0}, 'c[1]': {'us': 100.0}, 'tiny[1]': {'us': 0.5}}
+    results = {'a[1]': {'us': 140.0}, 'b[1]': {'us': 60.0}, 'c[1]': {'us': 120.0}, 'tiny[1]': {'us': 1.2},
+               'new[1]': {'us': 5.0}}
+    statuses = {row['name']: row['status'] for row in compare(results, baseline, threshold=0.3)}
+    assert statuses == {'a[1]': 'regression', 'b[1]': 'improved', 'c[1]': 'ok', 'tiny[1]': 'ok', 'new[1]': 'new'}
+    print("✅ test_compare_statuses PASSED")
+
+
+def test_baseline_roundtrip_and_merge():
+    """Базовые результаты пишутся атомарно, прогон с фильтром дополняет прежние"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.json')
+        assert load_baseline(path) == {}
+        save_baseline({'a[1]': {'us': 1.5, 'loops': 10}}, path)
+        save_baseline({'b[1]': {'us': 2.5, 'loops': 10}}, path)
+        data = load_baseline(path)
+        assert data['results'] == {'a[1]': {'us': 1.5}, 'b[1]': {'us': 2.5}}
+        assert data['environment']['python']
+        assert not os.path.exists(f"{path}.tmp")
+    print("✅ test_baseline_roundtrip_and_merge PASSED")
+
+
+def test_measure_calibrates_loops():
+    """Число вызовов подбирается под время прогона, результат - время одного вызова"""
+    calls = []
+    result = measure(lambda: calls.append(1), run_time=0.002, repeats=2)
+    assert result['loops'] > 1 and result['us'] > 0
+    assert len(calls) >= result['loops'] * 2
+    print("✅ test_measure_calibrates_loops PASSED")
+
+
+def test_suite_runs_and_baseline_complete():
+    """Все бенчмарки набора выполняются, baseline.json содержит каждый замер"""
+    results = run(quick=True)
+    expected = {f"{name}[{size}]" for name, (_, sizes) in BENCHMARKS.items() for size in sizes}
+    assert set(results) == expected
+    assert all(value['us'] > 0 for value in results.values())
+    assert any(name.startswith('strategy.') for name in BENCHMARKS)
+    assert set(load_baseline(BASELINE_PATH)['results']) == expected
+    print("✅ test_suite_runs_and_baseline_complete PASSED")
+
+
+def test_cli_fails_on_regression():
+    """Код возврата 1, если замер медленнее базового больше порога"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'environment': {}, 'results': {'analytics.reports[100]': {'us': 0.001}}}, f)
+        assert main(['--quick', '--filter', 'analytics.reports', '--baseline', path]) == 1
+        assert main(['--quick', '--filter', 'analytics.reports', '--baseline', path, '--threshold', '1e9']) == 0
+    print("✅ test_cli_fails_on_regression PASSED")
+
+
+def test_no_regressions_against_baseline():
+    """RUN_BENCHMARKS=1: полный прогон против benchmarks/baseline.json"""
+    if os.getenv('RUN_BENCHMARKS') != '1':
+        print("⏭️ test_no_regressions_against_baseline SKIPPED (RUN_BENCHMARKS=1 для запуска)")
+        return
+    assert main([]) == 0
+    print("✅ test_no_regressions_against_baseline PASSED")
+
+
+if __name__ == '__main__':
+    test_compare_statuses()
+    test_baseline_roundtrip_and_merge()
+    test_measure_calibrates_loops()
+    test_suite_runs_and_baseline_complete()
+    test_cli_fails_on_regression()
+    test_no_regressions_against_baseline()
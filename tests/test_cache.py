@@ -0,0 +1,140 @@
+"""
+Тесты кэша с фоновым обновлением (utils/cache.py)
+"""
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import SWRCache
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_single_flight_sync():
+    """Одновременные промахи по одному ключу - один вызов fetch"""
+    cache = SWRCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('status', fetch))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [42] * 10
+    assert len(calls) == 1, f"fetch вызван {len(calls)} раз"
+    assert cache.stats['misses'] == 1 and cache.stats['coalesced'] == 9
+    print("✅ test_single_flight_sync PASSED")
+
+
+def test_stale_while_revalidate():
+    """Устаревшее значение отдается сразу, обновление идет в фоне один раз"""
+    cache = SWRCache(ttl=0.05, stale_ttl=5)
+    version = [0]
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        version[0] += 1
+        if version[0] > 1:
+            started.set()
+            release.wait(2)
+        return version[0]
+
+    assert cache.get('k', fetch) == 1
+    time.sleep(0.06)
+    begin = time.perf_counter()
+    assert cache.get('k', fetch) == 1, "Должно вернуться устаревшее значение"
+    assert cache.get('k', fetch) == 1
+    assert time.perf_counter() - begin < 0.1, "Запрос не должен ждать обновления"
+    assert started.wait(1)
+    release.set()
+    assert wait_until(lambda: cache.peek('k') == 2)
+    assert version[0] == 2, "Фоновое обновление должно быть одно"
+    assert cache.stats['stale_hits'] == 2 and cache.stats['refreshes'] == 1
+    print("✅ test_stale_while_revalidate PASSED")
+
+
+def test_errors_not_cached_and_stale_kept():
+    """Ошибка при промахе пробрасывается, ошибка фонового обновления оставляет старое значение"""
+    cache = SWRCache(ttl=0.01, stale_ttl=5)
+
+    def failing():
+        raise RuntimeError("биржа недоступна")
+
+    try:
+        cache.get('k', failing)
+        assert False, "Ожидалась ошибка"
+    except RuntimeError:
+        pass
+    assert len(cache) == 0
+
+    cache.get('k', lambda: 'ok')
+    time.sleep(0.02)
+    assert cache.get('k', failing) == 'ok'
+    assert wait_until(lambda: cache.stats['errors'] == 1)
+    assert cache.peek('k') == 'ok'
+    print("✅ test_errors_not_cached_and_stale_kept PASSED")
+
+
+def test_lru_eviction_and_invalidate():
+    """Переполнение вытесняет давно не использованный ключ, invalidate - по префиксу"""
+    cache = SWRCache(max_size=2)
+    cache.set(('market', 'BTC/USDT'), 1)
+    cache.set(('market', 'ETH/USDT'), 2)
+    cache.get(('market', 'BTC/USDT'), lambda: None)  # BTC становится свежим
+    cache.set(('status', 0), 3)
+    assert cache.peek(('market', 'ETH/USDT')) is None
+    assert cache.peek(('market', 'BTC/USDT')) == 1
+    assert cache.stats['evictions'] == 1
+    cache.invalidate('market')
+    assert len(cache) == 1 and cache.peek(('status', 0)) == 3
+    stats = cache.get_stats()
+    assert stats['size'] == 1 and stats['hits'] == 1
+    print("✅ test_lru_eviction_and_invalidate PASSED")
+
+
+def test_async_single_flight_and_refresh():
+    """aget: один fetch на промах, устаревшее значение с фоновым обновлением"""
+    cache = SWRCache(ttl=0.3, stale_ttl=5)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return len(calls)
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.aget('status', fetch) for _ in range(5)))
+        assert results == [1] * 5 and len(calls) == 1
+        await asyncio.sleep(0.31)
+        assert await cache.aget('status', fetch) == 1, "Устаревшее значение без ожидания"
+        await asyncio.sleep(0.15)
+        assert await cache.aget('status', fetch) == 2
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    print("✅ test_async_single_flight_and_refresh PASSED")
+
+
+if __name__ == '__main__':
+    test_single_flight_sync()
+    test_stale_while_revalidate()
+    test_errors_not_cached_and_stale_kept()
+    test_lru_eviction_and_invalidate()
+    test_async_single_flight_and_refresh()
@@ -0,0 +1,156 @@
+"""
+Тесты архива свечей на диске (core/candle_archive.py)
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from core.candle_archive import CandleArchive, ROW_BYTES
+from core.candle_store import CandleStore
+
+HOUR_MS = 3600 * 1000
+
+
+class FakeExchange:
+    """Имитация ccxt-клиента: свечи 1h до текущего (незакрытого) часа"""
+
+    def __init__(self, count=3000):
+        self.now = int(time.time() * 1000)
+        current = self.now // HOUR_MS * HOUR_MS
+        self.candles = [
+            [current - (count - 1 - i) * HOUR_MS, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0]
+            for i in range(count)
+        ]
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append({'since': since, 'limit': limit})
+        rows = self.candles
+        if since is not None:
+            rows = [c for c in rows if c[0] >= since]
+            return [list(c) for c in rows[:limit]]
+        return [list(c) for c in rows[-limit:]]
+
+
+def test_append_and_zero_copy_load():
+    """Дописываются только новые свечи, чтение - memmap без копирования"""
+    exchange = FakeExchange(100)
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        assert len(archive.load('BTC/USDT', '1h')) == 0
+        assert archive.append('BTC/USDT', '1h', exchange.candles[:60]) == 60
+        assert archive.append('BTC/USDT', '1h', exchange.candles[50:80]) == 20, "Повторы не дописываются"
+
+        data = archive.load('BTC/USDT', '1h')
+        assert isinstance(data, np.memmap)
+        assert np.array_equal(data, np.array(exchange.candles[:80]))
+        assert np.shares_memory(data[-10:], data), "Срез должен быть без копирования"
+        assert not data.flags.writeable
+
+        # Недописанная строка в конце файла отбрасывается
+        with open(archive.path('BTC/USDT', '1h'), 'ab') as f:
+            f.write(b'\0' * (ROW_BYTES // 2))
+        assert len(CandleArchive(root).load('BTC/USDT', '1h')) == 80
+    print("✅ test_append_and_zero_copy_load PASSED")
+
+
+def test_history_fetches_only_missing():
+    """Холодный старт читает диск, с биржи догружаются только недостающие свечи"""
+    exchange = FakeExchange()
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        ohlcv = archive.history(exchange, 'BTC/USDT', '1h', 2500)
+        assert len(ohlcv) == 2500
+        assert np.array_equal(ohlcv, np.array(exchange.candles[-2501:-1])), "Незакрытая свеча не сохраняется"
+        assert len(exchange.calls) == 2, "2500 свечей - две страницы по 1500"
+
+        exchange.calls.clear()
+        restarted = CandleArchive(root)
+        ohlcv = restarted.history(exchange, 'BTC/USDT', '1h', 2500)
+        assert np.array_equal(ohlcv, np.array(exchange.candles[-2501:-1]))
+        assert len(exchange.calls) == 0, "Новых закрытых свечей нет - сеть не нужна"
+
+        # Закрылась новая свеча и нужна более длинная история
+        exchange.now += HOUR_MS
+        exchange.candles.append([exchange.candles[-1][0] + HOUR_MS, 1.0, 2.0, 0.5, 1.5, 3.0])
+        ohlcv = restarted.history(exchange, 'BTC/USDT', '1h', 2800)
+        assert np.array_equal(ohlcv, np.array(exchange.candles[-2801:-1]))
+        assert [call['since'] for call in exchange.calls] == [
+            exchange.candles[-2801][0], exchange.candles[-2][0]], "Догружаются только начало и хвост"
+    print("✅ test_history_fetches_only_missing PASSED")
+
+
+def test_gaps_detected_and_filled():
+    """Пропуски внутри архива находятся и догружаются"""
+    exchange = FakeExchange(300)
+    closed = exchange.candles[:-1]
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        archive.append('BTC/USDT', '1h', closed[:100] + closed[130:200] + closed[201:])
+        gaps = archive.find_gaps('BTC/USDT', '1h', HOUR_MS)
+        assert gaps == [(closed[100][0], closed[130][0]), (closed[200][0], closed[201][0])]
+
+        assert archive.fill_gaps(exchange, 'BTC/USDT', '1h') == 31
+        assert archive.find_gaps('BTC/USDT', '1h', HOUR_MS) == []
+        assert np.array_equal(archive.load('BTC/USDT', '1h'), np.array(closed))
+    print("✅ test_gaps_detected_and_filled PASSED")
+
+
+def test_exchange_limits_remembered():
+    """Начало истории пары на бирже и пропуски, которых нет на бирже, не запрашиваются повторно"""
+    exchange = FakeExchange(300)  # пара торгуется меньше, чем нужно истории
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        assert len(archive.history(exchange, 'NEW/USDT', '1h', 1000, fill_gaps=False)) == 299
+        exchange.calls.clear()
+        assert len(archive.history(exchange, 'NEW/USDT', '1h', 1000, fill_gaps=False)) == 299
+        assert exchange.calls == [], "Раньше начала истории на бирже свечей нет - повторный запрос не нужен"
+
+        # Дыра в торгах самой биржи: заполнить ее нельзя
+        del exchange.candles[100:130]
+        closed = exchange.candles[:-1]
+        archive.append('GAP/USDT', '1h', closed)
+        assert archive.fill_gaps(exchange, 'GAP/USDT', '1h') == 0
+        assert len(exchange.calls) > 0
+        exchange.calls.clear()
+        assert archive.fill_gaps(exchange, 'GAP/USDT', '1h') == 0
+        assert CandleArchive(root).fill_gaps(exchange, 'GAP/USDT', '1h') == 0
+        assert exchange.calls == [], "Незаполнимый пропуск запоминается (и на диске)"
+        restarted = CandleArchive(root)
+        assert restarted.history(exchange, 'NEW/USDT', '1h', 1000) is not None
+        assert exchange.calls == []
+    print("✅ test_exchange_limits_remembered PASSED")
+
+
+def test_candle_store_seeds_from_archive():
+    """CandleStore после рестарта берет историю с диска и запрашивает только хвост"""
+    exchange = FakeExchange(200)
+    with tempfile.TemporaryDirectory() as root:
+        store = CandleStore(archive=CandleArchive(root))
+        first = np.array(store.sync(exchange, 'BTC/USDT', '1h', 50))
+        assert len(CandleArchive(root).load('BTC/USDT', '1h')) == 49, "Сохраняются только закрытые свечи"
+
+        exchange.calls.clear()
+        restarted = CandleStore(archive=CandleArchive(root))
+        ohlcv = restarted.sync(exchange, 'BTC/USDT', '1h', 40)
+        assert np.array_equal(ohlcv, first[-40:])
+        assert exchange.calls == [{'since': exchange.candles[-2][0], 'limit': 3}]
+        assert restarted.stats['full_loads'] == 0
+    print("✅ test_candle_store_seeds_from_archive PASSED")
+
+
+if __name__ == '__main__':
+    test_append_and_zero_copy_load()
+    test_history_fetches_only_missing()
+    test_gaps_detected_and_filled()
+    test_exchange_limits_remembered()
+    test_candle_store_seeds_from_archive()
@@ -0,0 +1,120 @@
+"""
+Тесты инкрементального хранилища свечей (core/candle_store.py)
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from core.candle_store import CandleBuffer, CandleStore
+
+HOUR_MS = 3600 * 1000
+
+
+class FakeExchange:
+    """Имитация ccxt-клиента: свечи 1h до текущего часа"""
+
+    def __init__(self, count=200):
+        now = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        self.candles = [
+            [now - (count - 1 - i) * HOUR_MS, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0]
+            for i in range(count)
+        ]
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append({'since': since, 'limit': limit})
+        rows = self.candles
+        if since is not None:
+            rows = [c for c in rows if c[0] >= since]
+            return [list(c) for c in rows[:limit]]
+        return [list(c) for c in rows[-limit:]]
+
+
+def test_initial_load_matches_exchange():
+    """Первая загрузка возвращает те же свечи, что и fetch_ohlcv"""
+    exchange = FakeExchange()
+    store = CandleStore()
+    ohlcv = store.sync(exchange, 'BTC/USDT', '1h', 50)
+
+    assert len(ohlcv) == 50, "Должно вернуться 50 свечей"
+    assert np.array_equal(ohlcv, np.array(exchange.candles[-50:])), "Свечи не совпадают"
+    assert [candle[4] for candle in ohlcv] == [c[4] for c in exchange.candles[-50:]], "Закрытия не совпадают"
+    print("✅ test_initial_load_matches_exchange PASSED")
+
+
+def test_incremental_fetch_uses_since():
+    """Повторная синхронизация запрашивает только свечи новее последней"""
+    exchange = FakeExchange()
+    store = CandleStore()
+    store.sync(exchange, 'BTC/USDT', '1h', 50)
+    last_ts = exchange.candles[-1][0]
+
+    # Обновилась текущая свеча и закрылась новая
+    exchange.candles[-1][4] = 555.0
+    exchange.candles.append([last_ts + HOUR_MS, 1.0, 2.0, 0.5, 1.5, 3.0])
+    ohlcv = store.sync(exchange, 'BTC/USDT', '1h', 50)
+
+    assert exchange.calls[-1]['since'] == last_ts, "Должен использоваться since последней свечи"
+    assert exchange.calls[-1]['limit'] < 50, "Инкрементальный запрос должен быть коротким"
+    assert ohlcv[-2][4] == 555.0, "Незакрытая свеча должна перезаписаться"
+    assert ohlcv[-1][0] == last_ts + HOUR_MS, "Новая свеча должна добавиться"
+    assert len(ohlcv) == 50
+    assert store.stats == {'full_loads': 1, 'incremental_loads': 1}
+    print("✅ test_incremental_fetch_uses_since PASSED")
+
+
+def test_view_is_zero_copy_and_readonly():
+    """Срез отдается без копирования и защищен от записи"""
+    exchange = FakeExchange()
+    store = CandleStore()
+    first = store.sync(exchange, 'BTC/USDT', '1h', 50)
+    second = store.get_candles('BTC/USDT', '1h', 50)
+
+    assert np.shares_memory(first, second), "Срезы должны ссылаться на один буфер"
+    assert not first.flags.writeable, "Срез должен быть только для чтения"
+    print("✅ test_view_is_zero_copy_and_readonly PASSED")
+
+
+def test_ring_buffer_wraps():
+    """Буфер ограничен емкостью и сохраняет порядок свечей"""
+    buffer = CandleBuffer(capacity=5)
+    buffer.reset([[i, 0, 0, 0, i, 0] for i in range(5)])
+    old_view = buffer.view()
+    for i in range(5, 23):
+        buffer.merge([[i, 0, 0, 0, i, 0]])
+
+    assert len(buffer) == 5
+    assert list(buffer.view()[:, 0]) == [18, 19, 20, 21, 22]
+    assert list(old_view[:, 0]) == [0, 1, 2, 3, 4], "Ранее выданный срез не должен портиться"
+    print("✅ test_ring_buffer_wraps PASSED")
+
+
+def test_open_candle_update_keeps_views():
+    """Обновление незакрытой свечи не меняет уже выданный срез (копирование при записи)"""
+    buffer = CandleBuffer(capacity=10)
+    buffer.reset([[i, 0, 0, 0, i, 0] for i in range(3)])
+    cycle_view = buffer.view()
+    buffer.merge([[2, 0, 0, 0, 99, 0]])
+    assert cycle_view[-1, 4] == 2, "Срез текущего цикла не должен меняться"
+    assert buffer.view()[-1, 4] == 99
+
+    # Копия делается один раз на выданный срез, дальше обновление идет на месте
+    buffer.merge([[2, 0, 0, 0, 100, 0]])
+    data = buffer._data
+    buffer.merge([[2, 0, 0, 0, 101, 0]])
+    assert buffer._data is data
+    assert buffer.view()[-1, 4] == 101
+    print("✅ test_open_candle_update_keeps_views PASSED")
+
+
+if __name__ == '__main__':
+    test_initial_load_matches_exchange()
+    test_incremental_fetch_uses_since()
+    test_view_is_zero_copy_and_readonly()
+    test_ring_buffer_wraps()
+    test_open_candle_update_keeps_views()
@@ -0,0 +1,102 @@
+"""
+Тесты асинхронного шлюза к бирже (webapp/exchange_gateway.py)
+"""
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from webapp.exchange_gateway import ExchangeGateway
+
+
+class StallingExchange:
+    """Имитация ExchangeManager: синхронные запросы с задержкой"""
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.markets_loaded = threading.Event()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_ticker(self, symbol):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {'symbol': symbol, 'last': 1.0}
+
+    def get_tickers(self, symbols):
+        return {symbol: self.get_ticker(symbol) for symbol in symbols}
+
+
+def test_stall_does_not_block_event_loop():
+    """Пока биржа отвечает 500 мс, другие корутины продолжают работать"""
+    gateway = ExchangeGateway(StallingExchange(0.5))
+
+    async def scenario():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(heartbeat())
+        ticker = await gateway.get_ticker('BTC/USDT')
+        task.cancel()
+        return ticker, ticks
+
+    ticker, ticks = asyncio.run(scenario())
+    assert ticker['last'] == 1.0
+    assert ticks >= 20, f"Event loop был заблокирован (тиков: {ticks})"
+    gateway.shutdown()
+    print("✅ test_stall_does_not_block_event_loop PASSED")
+
+
+def test_timeout_returns_default():
+    """При превышении таймаута эндпоинта возвращается значение по умолчанию"""
+    gateway = ExchangeGateway(StallingExchange(0.5), timeouts={'ws': 0.1})
+
+    async def scenario():
+        started = time.perf_counter()
+        tickers = await gateway.get_tickers(['BTC/USDT'], endpoint='ws')
+        return tickers, time.perf_counter() - started
+
+    tickers, elapsed = asyncio.run(scenario())
+    assert tickers == {}
+    assert elapsed < 0.4, f"Обработчик ждал слишком долго: {elapsed:.2f}s"
+    assert gateway.stats['timeouts'] == 1
+    gateway.shutdown()
+    print("✅ test_timeout_returns_default PASSED")
+
+
+def test_endpoint_concurrency_limit():
+    """Параллельных запросов эндпоинта не больше его лимита, другие эндпоинты не ждут"""
+    exchange = StallingExchange(0.2)
+    gateway = ExchangeGateway(exchange, limits={'market': 2})
+
+    async def scenario():
+        market = [gateway.get_ticker(f'P{i}/USDT', endpoint='market') for i in range(6)]
+        results = await asyncio.gather(*market)
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(r and r['last'] == 1.0 for r in results)
+    assert exchange.max_active == 2, f"Одновременно выполнялось {exchange.max_active} запросов"
+    assert gateway.markets_ready() is False
+    exchange.markets_loaded.set()
+    assert gateway.markets_ready() is True
+    gateway.shutdown()
+    print("✅ test_endpoint_concurrency_limit PASSED")
+
+
+if __name__ == '__main__':
+    test_stall_does_not_block_event_loop()
+    test_timeout_returns_default()
+    test_endpoint_concurrency_limit()
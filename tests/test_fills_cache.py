@@ -0,0 +1,173 @@
+"""
+Тесты кэша исполненных сделок (core/fills_cache.py) и синхронизации ExchangeManager
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import exchange as exchange_module
+from core.exchange import ExchangeManager
+from core.fills_cache import FillsCache
+
+NOW_MS = int(time.time() * 1000)
+HOUR_MS = 3600 * 1000
+
+
+class FakeKucoin:
+    """Имитация ccxt-клиента KuCoin: /api/v1/fills со startAt/endAt/pageSize"""
+    id = 'kucoin'
+
+    def __init__(self, fills):
+        self.fills = list(fills)
+        self.calls = []
+
+    def fetch_my_trades(self, symbol, since=None, limit=None, params=None):
+        self.calls.append(dict(params or {}))
+        start = params['startAt'] * 1000
+        end = params['endAt'] * 1000 + 999 if 'endAt' in params else float('inf')
+        selected = [f for f in self.fills if start <= f['timestamp'] <= end]
+        # KuCoin отдает страницу самых новых сделок окна
+        return sorted(selected, key=lambda f: f['timestamp'])[-params['pageSize']:]
+
+
+def fill(n, side, price, hours_ago):
+    return {'id': f't{n}', 'order': f'o{n}', 'timestamp': NOW_MS - hours_ago * HOUR_MS,
+            'side': side, 'price': price, 'amount': 0.01, 'cost': price * 0.01,
+            'fee': {'cost': 0.01, 'currency': 'USDT'}}
+
+
+def make_manager(tmp, fills):
+    manager = ExchangeManager.__new__(ExchangeManager)
+    manager.exchange = FakeKucoin(fills)
+    manager.fills_cache = FillsCache(os.path.join(tmp, 'fills.db'))
+    manager._fills_synced = {}
+    manager._fills_lock = threading.Lock()
+    manager.markets_loaded = threading.Event()
+    manager.markets_loaded.set()
+    return manager
+
+
+def test_open_buys_after_last_sell():
+    """Покупки после последней продажи и максимальная цена - из индекса кэша"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, [
+            fill(1, 'buy', 100.0, 50), fill(2, 'sell', 110.0, 40),
+            fill(3, 'buy', 105.0, 30), fill(4, 'buy', 103.0, 20),
+        ])
+        buys, max_price = manager.get_open_buy_trades_after_last_sell('BTC/USDT')
+        assert [b['price'] for b in buys] == [105.0, 103.0]
+        assert max_price == 105.0
+        assert buys[0]['cost'] == 1.05
+        manager.fills_cache.close()
+    print("✅ test_open_buys_after_last_sell PASSED")
+
+
+def test_incremental_sync_fetches_only_new_fills():
+    """Повторная синхронизация запрашивает сделки только от последней известной"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, [fill(1, 'buy', 100.0, 50), fill(2, 'buy', 101.0, 10)])
+        assert manager.sync_fills('BTC/USDT')
+        first_calls = len(manager.exchange.calls)
+
+        # В пределах интервала синхронизации - без сети
+        assert manager.sync_fills('BTC/USDT')
+        assert len(manager.exchange.calls) == first_calls
+
+        manager.exchange.fills.append(fill(3, 'sell', 120.0, 1))
+        manager._fills_synced.clear()
+        assert manager.sync_fills('BTC/USDT')
+        incremental = manager.exchange.calls[first_calls:]
+        assert len(incremental) == 1
+        assert incremental[0]['startAt'] == (NOW_MS - 10 * HOUR_MS) // 1000
+        assert manager.fills_cache.count('BTC/USDT') == 3
+
+        buys, max_price = manager.get_open_buy_trades_after_last_sell('BTC/USDT')
+        assert buys == [] and max_price == 0.0
+        manager.fills_cache.close()
+    print("✅ test_incremental_sync_fetches_only_new_fills PASSED")
+
+
+def test_initial_backfill_pages_and_persists():
+    """Первая загрузка листает страницы назад, после перезапуска история берется с диска"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fills = [fill(n, 'buy', 100.0 + n, n + 1) for n in range(1, 8)]
+        original_page = exchange_module.FILLS_PAGE_SIZE
+        exchange_module.FILLS_PAGE_SIZE = 3
+        try:
+            manager = make_manager(tmp, fills)
+            trades = manager.fetch_my_trades('BTC/USDT', limit=500)
+            assert len(trades) == 7
+            assert [t['timestamp'] for t in trades] == sorted(t['timestamp'] for t in trades)
+            assert 'endAt' in manager.exchange.calls[1]
+            manager.fills_cache.close()
+
+            restarted = make_manager(tmp, fills)
+            assert restarted.fetch_my_trades('BTC/USDT', limit=2)[-1]['id'] == 't1'
+            # После перезапуска - только догрузка новых сделок
+            assert all(call['startAt'] >= (NOW_MS - 2 * HOUR_MS) // 1000 for call in restarted.exchange.calls)
+            restarted.fills_cache.close()
+        finally:
+            exchange_module.FILLS_PAGE_SIZE = original_page
+    print("✅ test_initial_backfill_pages_and_persists PASSED")
+
+
+def test_incomplete_backfill_resumes():
+    """История больше предела страниц: покрытие - до самой старой загруженной сделки, догрузка продолжается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fills = [fill(n, 'buy', 100.0 + n, n + 1) for n in range(1, 15)]
+        original_page = exchange_module.FILLS_PAGE_SIZE
+        exchange_module.FILLS_PAGE_SIZE = 3
+        try:
+            manager = make_manager(tmp, fills)
+            assert manager.sync_fills('BTC/USDT')
+            pages = exchange_module.FILLS_MAX_PAGES
+            assert manager.fills_cache.count('BTC/USDT') == 3 * pages, "Загружено только FILLS_MAX_PAGES страниц"
+            assert manager.fills_cache.covered_since('BTC/USDT') == fills[3 * pages - 1]['timestamp']
+
+            manager._fills_synced.clear()
+            assert manager.sync_fills('BTC/USDT')
+            assert manager.fills_cache.count('BTC/USDT') == 14, "Следующая синхронизация догружает остаток окна"
+            since_ms = int((time.time() - exchange_module.FILLS_HISTORY_DAYS * 86400) * 1000)
+            assert manager.fills_cache.covered_since('BTC/USDT') <= since_ms
+            assert manager.fetch_my_trades('BTC/USDT', limit=14)[0]['id'] == 't14'
+            manager.fills_cache.close()
+        finally:
+            exchange_module.FILLS_PAGE_SIZE = original_page
+    print("✅ test_incomplete_backfill_resumes PASSED")
+
+
+def test_incomplete_incremental_sync_fills_gap():
+    """Новых сделок больше предела страниц: промежуток до загруженных запоминается и догружается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        original = exchange_module.FILLS_PAGE_SIZE, exchange_module.FILLS_MAX_SYNC_PAGES
+        exchange_module.FILLS_PAGE_SIZE, exchange_module.FILLS_MAX_SYNC_PAGES = 3, 2
+        try:
+            manager = make_manager(tmp, [fill(0, 'buy', 100.0, 50)])
+            assert manager.sync_fills('BTC/USDT')
+            new_fills = [fill(n, 'buy', 100.0 + n, 40 - n) for n in range(1, 11)]
+            manager.exchange.fills.extend(new_fills)
+
+            manager._fills_synced.clear()
+            assert manager.sync_fills('BTC/USDT')
+            assert manager.fills_cache.count('BTC/USDT') == 1 + 3 * 2, "Загружены самые новые страницы"
+            assert manager.fills_cache.gaps('BTC/USDT') == [(fill(0, 'buy', 0, 50)['timestamp'], new_fills[4]['timestamp'])]
+
+            manager._fills_synced.clear()
+            assert manager.sync_fills('BTC/USDT')
+            assert manager.fills_cache.count('BTC/USDT') == 11, "Промежуток догружен следующей синхронизацией"
+            assert manager.fills_cache.gaps('BTC/USDT') == []
+            manager.fills_cache.close()
+        finally:
+            exchange_module.FILLS_PAGE_SIZE, exchange_module.FILLS_MAX_SYNC_PAGES = original
+    print("✅ test_incomplete_incremental_sync_fills_gap PASSED")
+
+
+if __name__ == '__main__':
+    test_open_buys_after_last_sell()
+    test_incremental_sync_fetches_only_new_fills()
+    test_initial_backfill_pages_and_persists()
+    test_incomplete_backfill_resumes()
+    test_incomplete_incremental_sync_fills_gap()
@@ -0,0 +1,185 @@
+"""
+Тесты потоковых индикаторов (utils/indicators.py)
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from utils.indicators import EMA, MACD, RSI, RollingWindow, BollingerBands, RollingMinMax, IndicatorEngine
+
+rng = np.random.default_rng(42)
+PRICES = 100 + np.cumsum(rng.normal(0, 1, 300))
+
+
+def reference_rsi(prices, period=14):
+    """Прежняя реализация calculate_rsi"""
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    avg_gains = np.mean(gains[-period:])
+    avg_losses = np.mean(losses[-period:])
+    if avg_losses == 0:
+        return 100
+    return 100 - (100 / (1 + avg_gains / avg_losses))
+
+
+def test_ema_matches_pandas():
+    """EMA совпадает с pandas ewm на каждом шаге"""
+    for adjust in (False, True):
+        ema = EMA(9, adjust=adjust)
+        values = [ema.update(x) for x in PRICES]
+        expected = pd.Series(PRICES).ewm(span=9, adjust=adjust).mean().values
+        assert np.allclose(values, expected, rtol=1e-12), f"EMA adjust={adjust} не совпадает"
+    print("✅ test_ema_matches_pandas PASSED")
+
+
+def test_macd_matches_pandas():
+    """MACD совпадает с прежним расчетом через pandas"""
+    series = pd.Series(PRICES)
+    macd = series.ewm(span=12).mean() - series.ewm(span=26).mean()
+    signal = macd.ewm(span=9).mean()
+    value = MACD(12, 26, 9).seed(PRICES).value
+    assert np.isclose(value[0], macd.iloc[-1], rtol=1e-12)
+    assert np.isclose(value[1], signal.iloc[-1], rtol=1e-12)
+    print("✅ test_macd_matches_pandas PASSED")
+
+
+def test_rsi_matches_helper_and_wilder():
+    """RSI (sma) совпадает с прежней формулой на каждом шаге, Уайлдер - с рекурсией"""
+    rsi = RSI(14)
+    for i, x in enumerate(PRICES):
+        value = rsi.update(x)
+        if i >= 1:
+            assert np.isclose(value, reference_rsi(PRICES[:i + 1]), rtol=1e-9), f"RSI расходится на шаге {i}"
+    assert RSI(14).seed([1, 2, 3, 4]).value == 100, "Без потерь RSI должен быть 100"
+
+    deltas = np.diff(PRICES)
+    gains, losses = np.clip(deltas, 0, None), np.clip(-deltas, 0, None)
+    avg_gain, avg_loss = gains[:14].mean(), losses[:14].mean()
+    for gain, loss in zip(gains[14:], losses[14:]):
+        avg_gain = (avg_gain * 13 + gain) / 14
+        avg_loss = (avg_loss * 13 + loss) / 14
+    wilder = RSI(14, smoothing='wilder').seed(PRICES).value
+    assert np.isclose(wilder, 100 - 100 / (1 + avg_gain / avg_loss), rtol=1e-9)
+    print("✅ test_rsi_matches_helper_and_wilder PASSED")
+
+
+def test_rolling_and_bollinger_match_pandas():
+    """Скользящие среднее/std и полосы Боллинджера совпадают с pandas rolling"""
+    window = RollingWindow(20)
+    values = np.array([window.update(x) for x in PRICES])
+    series = pd.Series(PRICES)
+    assert np.allclose(values[19:, 0], series.rolling(20).mean().values[19:], rtol=1e-10)
+    assert np.allclose(values[19:, 1], series.rolling(20).std().values[19:], rtol=1e-8)
+    assert np.isnan(values[18, 0]), "До заполнения окна значение должно быть NaN"
+
+    middle, upper, lower = BollingerBands(20, 2).seed(PRICES).value
+    std = series.rolling(20).std().iloc[-1]
+    assert np.isclose(upper, middle + 2 * std, rtol=1e-10)
+    assert np.isclose(lower, middle - 2 * std, rtol=1e-10)
+    print("✅ test_rolling_and_bollinger_match_pandas PASSED")
+
+
+def test_rolling_min_max():
+    """Скользящие минимум и максимум по окну"""
+    minmax = RollingMinMax(10)
+    for i, x in enumerate(PRICES):
+        low, high = minmax.update(x)
+        window = PRICES[max(0, i - 9):i + 1]
+        assert low == window.min() and high == window.max()
+    print("✅ test_rolling_min_max PASSED")
+
+
+def test_engine_incremental_equals_full():
+    """Движок по скользящему окну свечей дает тот же результат, что и расчет по всей истории"""
+    candles = np.column_stack([
+        np.arange(len(PRICES)) * 3600000.0, PRICES, PRICES, PRICES, PRICES, np.ones(len(PRICES))
+    ])
+    engine = IndicatorEngine(lambda: {'rsi': RSI(14), 'macd': MACD(), 'bb': BollingerBands()})
+    for end in range(60, len(candles) + 1):
+        values = engine.sync(candles[max(0, end - 50):end])
+
+    assert np.isclose(values['rsi'], reference_rsi(PRICES), rtol=1e-9)
+    assert np.allclose(values['macd'], MACD().seed(PRICES).value, rtol=1e-12)
+    assert np.allclose(values['bb'], BollingerBands().seed(PRICES).value, rtol=1e-8)
+
+    # Другая история (например, смена пары) - движок пересчитывается
+    other = candles.copy()
+    other[:, 4] *= 2
+    values = engine.sync(other[-50:])
+    assert np.allclose(values['bb'], BollingerBands().seed(other[-50:, 4]).value, rtol=1e-8)
+    print("✅ test_engine_incremental_equals_full PASSED")
+
+
+def test_helpers_match_streaming():
+    """Векторные функции utils/helpers совпадают с потоковыми индикаторами"""
+    from utils.helpers import calculate_ema, calculate_rsi, calculate_macd, calculate_bollinger_bands
+    assert np.isclose(calculate_ema(PRICES, 21), EMA(21).seed(PRICES).value, rtol=1e-12)
+    assert np.isclose(calculate_rsi(PRICES), RSI(14).seed(PRICES).value, rtol=1e-9)
+    assert np.allclose(calculate_macd(PRICES), MACD().seed(PRICES).value, rtol=1e-12)
+    assert np.allclose(calculate_bollinger_bands(PRICES), BollingerBands().seed(PRICES).value, rtol=1e-8)
+    print("✅ test_helpers_match_streaming PASSED")
+
+
+def test_window_paths_keep_previous_values():
+    """EMA в get_market_data и MACD в стратегии MACD+RSI - по окну свечей, как до потоковых индикаторов"""
+    import threading
+    from core.candle_store import CandleStore
+    from core.exchange import ExchangeManager
+    from strategies.macd_rsi import MacdRsiStrategy
+    from utils.helpers import calculate_ema, calculate_macd
+
+    class FakeExchange:
+        markets = {'BTC/USDT': {}}
+
+        def __init__(self, closes):
+            self.closes = closes
+
+        def parse_timeframe(self, timeframe):
+            return 3600
+
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            now = int(time.time() * 1000) // 3600000 * 3600000
+            rows = [[now - (len(PRICES) - 1 - i) * 3600000, c, c, c, c, 1.0] for i, c in enumerate(self.closes)]
+            if since is not None:
+                rows = [row for row in rows if row[0] >= since]
+            return rows[-limit:]
+
+    manager = ExchangeManager.__new__(ExchangeManager)
+    manager.exchange = FakeExchange(list(PRICES[:250]))
+    manager.markets_loaded = threading.Event()
+    manager.markets_loaded.set()
+    manager.candle_store = CandleStore()
+    strategy = MacdRsiStrategy()
+    for end in (250, 251, 252, 300):
+        manager.exchange.closes = list(PRICES[:end])
+        data = manager.get_market_data('BTC/USDT', limit=50)
+        window = PRICES[end - 50:end]
+        assert data['fast_ema'] == calculate_ema(window, 9)
+        assert data['slow_ema'] == calculate_ema(window, 21)
+
+    # Значения MACD, на которых стратегия принимает решение
+    calls = []
+    module = sys.modules['strategies.macd_rsi']
+    real_macd = module.calculate_macd
+    module.calculate_macd = lambda *args: calls.append(real_macd(*args)) or calls[-1]
+    try:
+        strategy.calculate_signal(data)
+    finally:
+        module.calculate_macd = real_macd
+    assert calls == [calculate_macd(list(window), 12, 26, 9)]
+    print("✅ test_window_paths_keep_previous_values PASSED")
+
+
+if __name__ == '__main__':
+    test_ema_matches_pandas()
+    test_macd_matches_pandas()
+    test_rsi_matches_helper_and_wilder()
+    test_rolling_and_bollinger_match_pandas()
+    test_rolling_min_max()
+    test_engine_incremental_equals_full()
+    test_helpers_match_streaming()
+    test_window_paths_keep_previous_values()
@@ -0,0 +1,95 @@
+"""
+Тесты асинхронного логгера (utils/logger.py): очередь, JSON, уровни категорий, прореживание, ротация
+"""
+import sys
+import os
+import glob
+import gzip
+import json
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import LogSampler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_logging(code, log_dir, **env):
+    """Логирование в отдельном процессе: свой каталог логов, очередь дописывается при выходе"""
+    env = {**os.environ, 'LOG_DIR': log_dir, 'LOG_CONSOLE': '0', **env}
+    result = subprocess.run([sys.executable, '-c', "from utils.logger import *\nimport time\n" + code],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, env=env, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def read_records(log_dir):
+    with open(os.path.join(log_dir, 'bot.jsonl'), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_records_and_category_levels():
+    """Запись - JSON-строка с категорией; уровень категории задается через LOG_LEVELS"""
+    with tempfile.TemporaryDirectory() as tmp:
+        run_logging(
+            "log_info('привет', category='core.exchange')\n"
+            "log_info('шум', category='webapp.server')\n"
+            "log_error('ошибка', category='webapp.server')\n",
+            tmp, LOG_LEVELS='webapp=WARNING')
+        records = read_records(tmp)
+        assert [(r['category'], r['level'], r['msg']) for r in records] == [
+            ('core.exchange', 'INFO', 'привет'),
+            ('webapp.server', 'ERROR', 'ошибка'),
+        ]
+        assert records[0]['ts'] and records[0]['thread'] == 'MainThread'
+    print("✅ test_json_records_and_category_levels PASSED")
+
+
+def test_repetitive_messages_are_sampled():
+    """Повторы из одной строки кода прореживаются, пропущенные учитываются в следующей записи"""
+    with tempfile.TemporaryDirectory() as tmp:
+        run_logging(
+            "def tick(i):\n"
+            "    log_info(f'tick {i}', category='ws')\n"
+            "for i in range(100):\n"
+            "    tick(i)\n"
+            "log_error('ошибки не прореживаются', category='ws')\n"
+            "time.sleep(0.3)\n"
+            "tick(100)\n",
+            tmp, LOG_SAMPLE_BURST='10', LOG_SAMPLE_WINDOW='0.2')
+        ticks = [r for r in read_records(tmp) if r['msg'].startswith('tick')]
+        assert len(ticks) == 11
+        assert ticks[-1]['msg'] == 'tick 100' and ticks[-1]['suppressed'] == 90
+    print("✅ test_repetitive_messages_are_sampled PASSED")
+
+
+def test_size_rotation_with_gzip():
+    """Ротация по размеру: старые части сжимаются gzip"""
+    with tempfile.TemporaryDirectory() as tmp:
+        run_logging(
+            "for i in range(200):\n"
+            "    log_error(f'строка {i} ' + 'x' * 50)\n",
+            tmp, LOG_MAX_BYTES='4000', LOG_BACKUPS='3')
+        archives = sorted(glob.glob(os.path.join(tmp, 'bot.jsonl.*.gz')))
+        assert len(archives) == 3, archives
+        with gzip.open(archives[0], 'rt', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines and lines[0]['msg'].startswith('строка')
+        assert read_records(tmp)[-1]['msg'].startswith('строка 199')
+    print("✅ test_size_rotation_with_gzip PASSED")
+
+
+def test_sampler_window():
+    """LogSampler: burst записей за окно, затем пропуск"""
+    sampler = LogSampler(burst=2, window=60)
+    assert [sampler.allow('site')[0] for _ in range(4)] == [True, True, False, False]
+    assert sampler.allow('other') == (True, 0)
+    print("✅ test_sampler_window PASSED")
+
+
+if __name__ == '__main__':
+    test_json_records_and_category_levels()
+    test_repetitive_messages_are_sampled()
+    test_size_rotation_with_gzip()
+    test_sampler_window()
@@ -0,0 +1,216 @@
+"""
+Тесты потока рыночных данных (core/market_feed.py) на локальном WebSocket-сервере
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import websockets
+from core.market_feed import MarketDataFeed, StaticTransport
+from core.candle_store import CandleStore
+from core.exchange import ExchangeManager
+
+HOUR_MS = 3600 * 1000
+
+
+class FakeKucoinServer:
+    """Локальная замена публичного WebSocket KuCoin"""
+
+    def __init__(self):
+        self.subscriptions = []
+        self.connections = 0
+        self.clients = []
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self._serve())
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _serve(self):
+        return await websockets.serve(self._handler, '127.0.0.1', 0)
+
+    async def _handler(self, ws, *args):
+        self.connections += 1
+        self.clients.append(ws)
+        await ws.send(json.dumps({'id': 'welcome', 'type': 'welcome'}))
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                if message['type'] == 'subscribe':
+                    self.subscriptions.append(message['topic'])
+                    await ws.send(json.dumps({'id': message['id'], 'type': 'ack'}))
+                elif message['type'] == 'ping':
+                    await ws.send(json.dumps({'id': message['id'], 'type': 'pong'}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.remove(ws)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def push(self, topic, data):
+        """Рассылка сообщения всем клиентам"""
+        message = json.dumps({'type': 'message', 'topic': topic, 'subject': 'test', 'data': data})
+
+        async def send():
+            for ws in list(self.clients):
+                await ws.send(message)
+        asyncio.run_coroutine_threadsafe(send(), self.loop).result(5)
+
+    def drop_clients(self):
+        """Обрыв всех соединений"""
+        async def close():
+            for ws in list(self.clients):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def snapshot_data(symbol, price):
+    return {'sequence': '1', 'data': {
+        'symbol': symbol, 'lastTradedPrice': price, 'high': price * 1.1, 'low': price * 0.9,
+        'vol': 123.5, 'changeRate': 0.0125, 'datetime': 1700000000000,
+    }}
+
+
+def test_snapshot_and_ticker_updates():
+    """Снимок и тикеры из потока отдаются в формате get_ticker"""
+    server = FakeKucoinServer()
+    feed = MarketDataFeed(StaticTransport(server.url))
+    feed.subscribe(['BTC/USDT', 'ETH/USDT'])
+    feed.start()
+    try:
+        assert wait_until(lambda: len(server.subscriptions) >= 2), "Подписка не отправлена"
+        assert '/market/snapshot:BTC-USDT,ETH-USDT' in server.subscriptions
+        assert '/market/ticker:BTC-USDT,ETH-USDT' in server.subscriptions
+
+        server.push('/market/snapshot:BTC-USDT', snapshot_data('BTC-USDT', 50000.0))
+        ticker = feed.wait_for_ticker('BTC/USDT')
+        assert ticker is not None, "Снимок не получен"
+        assert ticker['last'] == 50000.0
+        assert abs(ticker['change'] - 1.25) < 1e-9, "changeRate должен переводиться в проценты"
+        assert ticker['volume'] == 123.5
+        assert set(ticker) >= {'symbol', 'last', 'high', 'low', 'volume', 'change', 'timestamp', 'received_at'}
+
+        server.push('/market/ticker:BTC-USDT', {'price': '50100.5', 'time': 1700000001000})
+        assert wait_until(lambda: feed.get_ticker('BTC/USDT')['last'] == 50100.5), "Цена не обновилась"
+        assert abs(feed.get_ticker('BTC/USDT')['high'] - 55000.0) < 1e-6, "Остальные поля снимка должны сохраниться"
+        assert feed.get_ticker('ETH/USDT') is None, "По ETH данных еще нет"
+    finally:
+        feed.stop()
+    print("✅ test_snapshot_and_ticker_updates PASSED")
+
+
+def test_stale_snapshot_is_ignored():
+    """Устаревший снимок не отдается"""
+    feed = MarketDataFeed(StaticTransport('ws://unused'), max_age=0.05)
+    feed._handle_message(json.dumps({'type': 'message', 'topic': '/market/ticker:BTC-USDT',
+                                     'data': {'price': '1.0', 'time': 1}}))
+    assert feed.get_ticker('BTC/USDT')['last'] == 1.0
+    time.sleep(0.1)
+    assert feed.get_ticker('BTC/USDT') is None, "Старый снимок должен считаться неактуальным"
+    print("✅ test_stale_snapshot_is_ignored PASSED")
+
+
+def test_candles_merge_into_store():
+    """Свечи из потока дописываются в уже загруженный буфер"""
+    store = CandleStore()
+    start = 1700000000000 // HOUR_MS * HOUR_MS
+    store.get_buffer('BTC/USDT', '1h').reset([[start, 1, 2, 0.5, 1.5, 10]])
+    feed = MarketDataFeed(StaticTransport('ws://unused'), candle_store=store, timeframe='1h')
+    assert '/market/candles:BTC-USDT_1hour' in feed._topics({'BTC/USDT'})
+
+    def candle(ts_ms, close):
+        return json.dumps({'type': 'message', 'topic': '/market/candles:BTC-USDT_1hour', 'data': {
+            'symbol': 'BTC-USDT', 'candles': [str(ts_ms // 1000), '1', str(close), '3', '0.5', '11', '100'],
+            'time': ts_ms}})
+
+    feed._handle_message(candle(start, 2.5))
+    feed._handle_message(candle(start + HOUR_MS, 2.7))
+    candles = store.get_candles('BTC/USDT', '1h')
+    assert len(candles) == 2
+    assert list(candles[0]) == [start, 1, 3, 0.5, 2.5, 11], "Открытая свеча должна перезаписаться"
+    assert candles[1][4] == 2.7
+
+    store.merge('ETH/USDT', '1h', [[start, 1, 1, 1, 1, 1]])
+    assert store.get_candles('ETH/USDT', '1h') is None, "Без истории буфер не создается"
+    print("✅ test_candles_merge_into_store PASSED")
+
+
+def test_reconnect_resubscribes():
+    """После обрыва соединения подписка восстанавливается"""
+    server = FakeKucoinServer()
+    feed = MarketDataFeed(StaticTransport(server.url))
+    feed.subscribe(['BTC/USDT'])
+    feed.start()
+    try:
+        assert wait_until(lambda: len(server.subscriptions) == 2)
+        server.drop_clients()
+        assert wait_until(lambda: server.connections == 2 and len(server.subscriptions) == 4, timeout=8), \
+            "Нет переподключения"
+        feed.subscribe(['SOL/USDT'])
+        assert wait_until(lambda: '/market/ticker:SOL-USDT' in server.subscriptions), "Новая пара не подписана"
+        server.push('/market/ticker:SOL-USDT', {'price': '150', 'time': 1})
+        assert feed.wait_for_ticker('SOL/USDT')['last'] == 150.0
+        assert feed.stats['reconnects'] >= 1
+    finally:
+        feed.stop()
+    print("✅ test_reconnect_resubscribes PASSED")
+
+
+class RestExchange:
+    def __init__(self):
+        self.calls = 0
+
+    def fetch_ticker(self, symbol):
+        self.calls += 1
+        return {'last': 1.0, 'high': 1.0, 'low': 1.0, 'baseVolume': 1.0, 'percentage': 0, 'timestamp': 0}
+
+
+def test_exchange_ticker_uses_feed():
+    """ExchangeManager.get_ticker берет цену из потока, REST - только если снимка нет"""
+    manager = ExchangeManager.__new__(ExchangeManager)
+    manager.exchange = RestExchange()
+    manager._ticker_cache = {}
+    manager._ticker_inflight = {}
+    manager._ticker_lock = threading.Lock()
+    manager.markets_loaded = threading.Event()
+    manager.markets_loaded.set()
+    manager.market_feed = MarketDataFeed(StaticTransport('ws://unused'))
+    manager.market_feed._handle_message(json.dumps(
+        {'type': 'message', 'topic': '/market/snapshot:BTC-USDT', 'data': snapshot_data('BTC-USDT', 42.0)}))
+
+    assert manager.get_ticker('BTC/USDT')['last'] == 42.0
+    assert manager.exchange.calls == 0, "REST не должен вызываться при свежем снимке"
+    assert manager.get_ticker('ETH/USDT')['last'] == 1.0, "Без снимка - запасной REST"
+    assert manager.exchange.calls == 1
+    assert 'ETH/USDT' in manager.market_feed.symbols, "Пара должна добавиться в подписку"
+    print("✅ test_exchange_ticker_uses_feed PASSED")
+
+
+if __name__ == '__main__':
+    test_snapshot_and_ticker_updates()
+    test_stale_snapshot_is_ignored()
+    test_candles_merge_into_store()
+    test_reconnect_resubscribes()
+    test_exchange_ticker_uses_feed()
@@ -0,0 +1,118 @@
+"""
+Тесты снимка рынков на диске (core/markets_snapshot.py) и холодного старта ExchangeManager
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+from core.exchange import ExchangeManager
+from core.markets_snapshot import save_snapshot, load_snapshot, build_limits_index
+
+
+def make_market(base, min_amount, min_cost=0.1):
+    return {
+        'id': f'{base}-USDT', 'symbol': f'{base}/USDT', 'base': base, 'quote': 'USDT',
+        'baseId': base, 'quoteId': 'USDT', 'active': True, 'type': 'spot', 'spot': True,
+        'precision': {'amount': 1e-8, 'price': 0.01},
+        'limits': {'amount': {'min': min_amount, 'max': 10000}, 'cost': {'min': min_cost, 'max': None}},
+        'info': {'symbol': f'{base}-USDT'},
+    }
+
+
+def make_manager(path):
+    manager = ExchangeManager.__new__(ExchangeManager)
+    manager.exchange = ccxt.kucoin()
+    manager.connected = True
+    manager.markets_loaded = threading.Event()
+    manager.markets_snapshot_path = path
+    manager.market_limits = {}
+    return manager
+
+
+def test_snapshot_roundtrip():
+    """Снимок сохраняется атомарно и читается обратно"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'markets.json.gz')
+        markets = {m['symbol']: m for m in (make_market('BTC', 1e-5), make_market('ETH', 1e-4))}
+        assert save_snapshot(markets, {'USDT': {'id': 'USDT', 'code': 'USDT'}}, path)
+        assert not os.path.exists(path + '.tmp')
+        snapshot = load_snapshot(path)
+        assert [m['symbol'] for m in snapshot['markets']] == ['BTC/USDT', 'ETH/USDT']
+        assert build_limits_index(markets)['ETH/USDT']['min_amount'] == 1e-4
+
+        with open(path, 'wb') as f:
+            f.write(b'broken')
+        assert load_snapshot(path) is None
+    print("✅ test_snapshot_roundtrip PASSED")
+
+
+def test_cold_start_from_snapshot():
+    """Рынки из снимка доступны сразу, лимиты - из индекса"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'markets.json.gz')
+        markets = {f'C{i}/USDT': make_market(f'C{i}', 0.001) for i in range(1500)}
+        markets['BTC/USDT'] = make_market('BTC', 1e-5, 0.5)
+        save_snapshot(markets, None, path)
+
+        manager = make_manager(path)
+        started = time.perf_counter()
+        assert manager._load_markets_snapshot()
+        elapsed = time.perf_counter() - started
+        assert manager.markets_loaded.is_set()
+        assert elapsed < 1.0, f"Снимок загружался {elapsed:.2f}s"
+        assert manager.get_min_limits('BTC/USDT') == (1e-5, 0.5)
+        assert manager.exchange.market_id('BTC/USDT') == 'BTC-USDT'
+        assert manager.get_market_info('BTC/USDT')['price_precision'] == 0.01
+    print("✅ test_cold_start_from_snapshot PASSED")
+
+
+def test_background_refresh_swaps_and_saves():
+    """Фоновая загрузка с биржи заменяет индекс и перезаписывает снимок"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'markets.json.gz')
+        save_snapshot({'BTC/USDT': make_market('BTC', 1e-5)}, None, path)
+        manager = make_manager(path)
+        manager._load_markets_snapshot()
+
+        def fake_load_markets(reload=False):
+            manager.exchange.set_markets([make_market('BTC', 2e-5), make_market('SOL', 0.01)])
+            return manager.exchange.markets
+
+        manager.exchange.load_markets = fake_load_markets
+        manager._load_markets_background()
+        assert manager.get_min_limits('BTC/USDT')[0] == 2e-5
+        assert 'SOL/USDT' in manager.market_limits
+        assert len(load_snapshot(path)['markets']) == 2
+    print("✅ test_background_refresh_swaps_and_saves PASSED")
+
+
+def test_stale_snapshot_rejected():
+    """Снимок старше допустимого возраста не применяется - лимиты ордеров только с биржи"""
+    import gzip
+    import json
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'markets.json.gz')
+        save_snapshot({'BTC/USDT': make_market('BTC', 1e-5)}, None, path)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        payload['saved_at'] = time.time() - 48 * 3600
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f)
+
+        assert load_snapshot(path, max_age_hours=24) is None
+        assert load_snapshot(path, max_age_hours=72) is not None
+        manager = make_manager(path)
+        assert not manager._load_markets_snapshot()
+        assert not manager.markets_loaded.is_set()
+    print("✅ test_stale_snapshot_rejected PASSED")
+
+
+if __name__ == '__main__':
+    test_snapshot_roundtrip()
+    test_cold_start_from_snapshot()
+    test_background_refresh_swaps_and_saves()
+    test_stale_snapshot_rejected()
@@ -0,0 +1,167 @@
+"""
+Тесты мультипарного торгового движка (AdvancedTradingBot)
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bot import AdvancedTradingBot
+from config.settings import SettingsManager
+
+
+class FakeExchange:
+    """Имитация ExchangeManager с задержкой сети"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.requested = []
+
+    def get_market_data(self, symbol, timeframe='1h', ema_fast_period=9, ema_slow_period=21):
+        self.requested.append(symbol)
+        time.sleep(self.delay)
+        return {'current_price': 100.0, 'ema_diff_percent': 0.0, 'symbol': symbol}
+
+
+def make_bot():
+    """Бот без подключения к бирже и Telegram"""
+    bot = AdvancedTradingBot.__new__(AdvancedTradingBot)
+    bot.settings = SettingsManager()
+    bot.settings.trading_pairs['active_pair'] = 'BTC/USDT'
+    bot.settings.trading_pairs['enabled_pairs'] = ['BTC/USDT', 'SOL/USDT']
+    bot.exchange = FakeExchange()
+    bot._init_pairs()
+    return bot
+
+
+def test_enabled_pairs():
+    """Активная пара идет первой, неизвестные пары отбрасываются"""
+    bot = make_bot()
+    bot.settings.trading_pairs['enabled_pairs'] = ['SOL/USDT', 'XXX/USDT', 'BTC/USDT']
+    assert bot.get_enabled_pairs() == ['BTC/USDT', 'SOL/USDT']
+    print("✅ test_enabled_pairs PASSED")
+
+
+def test_pair_state_isolation():
+    """У каждой пары свои позиция, стратегии и таймер сделок"""
+    bot = make_bot()
+    with bot.pair_context('SOL/USDT'):
+        bot.position = 'long'
+        bot.entry_price = 150.0
+        bot.last_trade_time = 123
+        sol_strategy = bot.get_active_strategy()
+
+    assert bot.position is None, "Позиция активной пары не должна измениться"
+    assert bot.last_trade_time == 0
+    assert bot.pairs['SOL/USDT'].position == 'long'
+    assert bot.pairs['SOL/USDT'].entry_price == 150.0
+    assert bot.get_active_strategy() is not sol_strategy, "Экземпляры стратегий должны быть разными"
+    print("✅ test_pair_state_isolation PASSED")
+
+
+def test_settings_follow_active_pair():
+    """Неактивные пары используют настройки стратегии активной пары"""
+    bot = make_bot()
+    bot.get_active_strategy().settings['stop_loss_percent'] = 4.2
+    with bot.pair_context('SOL/USDT'):
+        assert bot.get_active_strategy().settings['stop_loss_percent'] == 4.2
+    print("✅ test_settings_follow_active_pair PASSED")
+
+
+def test_market_data_fetched_concurrently():
+    """Рыночные данные пар загружаются параллельно"""
+    bot = make_bot()
+    start = time.time()
+    data = bot.fetch_market_data(['BTC/USDT', 'SOL/USDT', 'ETH/USDT'])
+    elapsed = time.time() - start
+
+    assert set(data) == {'BTC/USDT', 'SOL/USDT', 'ETH/USDT'}
+    assert data['SOL/USDT']['symbol'] == 'SOL/USDT'
+    assert elapsed < 0.5, f"Загрузка должна идти параллельно, заняло {elapsed:.2f} сек"
+    bot._market_executor.shutdown(wait=False)
+    print("✅ test_market_data_fetched_concurrently PASSED")
+
+
+def test_risk_checks_exit_only_on_tp_sl():
+    """Проверка рисков внутри свечи выходит только по уровням TP/SL и через те же проверки рисков"""
+    from core.risk_manager import RiskManager
+    bot = make_bot()
+    bot.is_running = True
+    bot.settings.settings['trading_enabled'] = True
+    bot.settings.settings['trade_amount_percent'] = 0.1
+    bot.risk_manager = RiskManager(dict(bot.settings.risk_settings, volatility_limit=100))
+    trades = []
+    bot.execute_trade = lambda signal, market_data, *args: trades.append((signal, market_data['current_price']))
+    prices = {}
+    bot.exchange.get_ticker = lambda symbol: {'last': prices.get(symbol)}
+
+    pair = bot.get_pair_state('BTC/USDT')
+    pair.position, pair.entry_price, pair.current_position_size_usdt = 'long', 100.0, 10.0
+    pair.market_data = {'current_price': 100.0, 'ema_diff_percent': 0.0, 'ohlcv': [[0, 0, 0, 0, 100.0, 1]] * 30}
+    with bot.pair_context('BTC/USDT'):
+        strategy = bot.get_active_strategy()
+    strategy.settings.update({'take_profit_usdt': 0.0, 'take_profit_percent': 1.0, 'stop_loss_percent': 1.5})
+    # Сигнал стратегии по устаревшей свече не должен закрывать позицию
+    strategy.calculate_signal = lambda *args, **kwargs: 'sell'
+
+    prices['BTC/USDT'] = 100.5  # между SL и TP
+    bot.execute_risk_checks()
+    assert trades == []
+
+    prices['BTC/USDT'] = 98.0  # Stop Loss, но сделка была только что
+    pair.last_trade_time = time.time()
+    bot.execute_risk_checks()
+    assert trades == []
+
+    pair.last_trade_time = 0
+    bot.risk_manager.daily_losses = bot.settings.risk_settings['max_daily_loss']
+    bot.execute_risk_checks()
+    assert trades == [], "Дневной лимит потерь должен останавливать и выход внутри свечи"
+
+    bot.risk_manager.daily_losses = 0.0
+    bot.execute_risk_checks()
+    assert trades == [('sell', 98.0)]
+    assert pair.last_trade_time > 0 and pair.last_signal == 'sell'
+    print("✅ test_risk_checks_exit_only_on_tp_sl PASSED")
+
+
+def test_restored_position_checked_after_enabling_trading():
+    """Позиция, восстановленная при запуске: включение торговли будит цикл сигналов, TP/SL - на ближайшей проверке рисков"""
+    from core.risk_manager import RiskManager
+    bot = make_bot()
+    bot.is_running = True
+    bot.settings.settings['trading_enabled'] = False
+    bot.settings.settings['trade_amount_percent'] = 0.1
+    bot.risk_manager = RiskManager(dict(bot.settings.risk_settings, volatility_limit=100))
+    trades, cycles = [], []
+    bot.execute_trade = lambda signal, market_data, *args: trades.append((signal, market_data['current_price']))
+    bot.execute_trading_cycle = lambda: cycles.append(time.time())
+    bot.exchange.get_ticker = lambda symbol: {'last': 98.0}
+
+    pair = bot.get_pair_state('BTC/USDT')
+    pair.position, pair.entry_price, pair.current_position_size_usdt = 'long', 100.0, 10.0
+    assert not pair.market_data, "Рыночных данных еще нет - цикл сигналов не выполнялся"
+    with bot.pair_context('BTC/USDT'):
+        bot.get_active_strategy().settings.update(
+            {'take_profit_usdt': 0.0, 'take_profit_percent': 1.0, 'stop_loss_percent': 1.5})
+
+    bot.scheduler = bot.create_scheduler()
+    assert bot.scheduler.run_pending() == ['signals'] and cycles == [], "При запуске торговля выключена"
+    assert bot.scheduler.seconds_until_next() > 0
+
+    bot.settings.settings['trading_enabled'] = True
+    bot.trigger_signal_cycle()
+    assert bot.scheduler.run_pending() == ['signals'] and len(cycles) == 1, "Сигналы - сразу после включения"
+
+    bot.execute_risk_checks()
+    assert trades == [('sell', 98.0)], "Stop Loss по цене тикера без рыночных данных цикла"
+    print("✅ test_restored_position_checked_after_enabling_trading PASSED")
+
+
+if __name__ == '__main__':
+    test_enabled_pairs()
+    test_pair_state_isolation()
+    test_settings_follow_active_pair()
+    test_market_data_fetched_concurrently()
+    test_risk_checks_exit_only_on_tp_sl()
+    test_restored_position_checked_after_enabling_trading()
@@ -0,0 +1,136 @@
+"""
+Тесты оптимизатора параметров стратегий (backtest/optimizer.py)
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from backtest.optimizer import StrategyOptimizer, grid_candidates, random_candidates, rank_results
+from config.settings import SettingsManager
+from strategies.ema_ml import EmaMlStrategy
+from strategies.bollinger import BollingerStrategy
+
+MINUTE_MS = 60 * 1000
+
+
+def make_candles(n=20000, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    times = 1_600_000_000_000 + np.arange(n) * MINUTE_MS
+    return np.column_stack([times, closes, closes, closes, closes, np.ones(n)])
+
+
+def test_candidates():
+    """Сетка отсекает fast >= slow, случайный поиск не повторяется"""
+    grid = {'ema_fast_period': [9, 21], 'ema_slow_period': [9, 21], 'ema_threshold': [0.001, 0.002]}
+    candidates = grid_candidates(grid)
+    assert len(candidates) == 2
+    assert all(c['ema_fast_period'] < c['ema_slow_period'] for c in candidates)
+
+    sampled = random_candidates({'ema_fast_period': (3, 12), 'ema_slow_period': (13, 40),
+                                 'stop_loss_percent': (0.5, 3.0)}, 20, seed=1)
+    assert len(sampled) == 20
+    assert len({tuple(sorted(c.items())) for c in sampled}) == 20
+    assert all(isinstance(c['ema_fast_period'], int) and 0.5 <= c['stop_loss_percent'] <= 3.0 for c in sampled)
+    print("✅ test_candidates PASSED")
+
+
+def test_pool_matches_single_process():
+    """Пул процессов с общей памятью дает те же результаты, что и один процесс"""
+    candles = make_candles()
+    optimizer = StrategyOptimizer('bollinger', workers=1)
+    candidates = optimizer.grid({'bb_period': [14, 20], 'bb_std_dev': [1.5, 2], 'exit_on_middle': [False, True]})
+    single = optimizer.optimize(candles, candidates, min_trades=0)
+    pooled = StrategyOptimizer('bollinger', workers=2).optimize(candles, candidates, min_trades=0)
+
+    assert len(single) == len(candidates)
+    assert single == pooled, "Результаты пула должны совпадать"
+    profits = [r['net_profit_usdt'] for r in single]
+    assert profits == sorted(profits, reverse=True), "Сортировка по чистой прибыли"
+    print("✅ test_pool_matches_single_process PASSED")
+
+
+def test_rank_results():
+    """При равной прибыли выше меньшая просадка, затем больше сделок"""
+    results = [
+        {'net_profit_usdt': 5, 'max_drawdown': 3, 'total_trades': 10},
+        {'net_profit_usdt': 5, 'max_drawdown': 1, 'total_trades': 4},
+        {'net_profit_usdt': 5, 'max_drawdown': 1, 'total_trades': 8},
+        {'net_profit_usdt': 9, 'max_drawdown': 9, 'total_trades': 2},
+        {'net_profit_usdt': 50, 'max_drawdown': 0, 'total_trades': 0},
+        None,
+    ]
+    ranked = rank_results(results, min_trades=1)
+    assert [(r['net_profit_usdt'], r['max_drawdown'], r['total_trades']) for r in ranked] == [
+        (9, 9, 2), (5, 1, 8), (5, 1, 4), (5, 3, 10)]
+    print("✅ test_rank_results PASSED")
+
+
+class FakePair:
+    def __init__(self, strategy):
+        self.strategies = {'ema_ml': strategy}
+
+
+class FakeBot:
+    def __init__(self, active_strategy=None):
+        self.strategy = EmaMlStrategy()
+        self.strategy.settings['take_profit_usdt'] = 1.0
+        self.active_strategy = active_strategy or self.strategy
+
+    def get_pair_state(self, symbol):
+        return FakePair(self.strategy)
+
+    def get_active_strategy(self):
+        return self.active_strategy
+
+
+def test_apply_best_updates_settings():
+    """Параметры победителя сохраняются через update_setting и попадают в стратегию"""
+    manager = SettingsManager()
+    manager.settings_file = os.path.join(tempfile.mkdtemp(), 'bot_settings.json')
+    manager.bot = FakeBot()
+    params = {'ema_fast_period': 7, 'ema_slow_period': 26, 'ema_threshold': 0.001,
+              'take_profit_percent': 0.5, 'stop_loss_percent': 1.0}
+    StrategyOptimizer('ema_ml').apply_best(manager, {'params': params})
+
+    with open(manager.settings_file, encoding='utf-8') as f:
+        saved = json.load(f)['ml_settings']
+    assert saved['last_ema_fast_period'] == 7
+    assert saved['last_ema_slow_period'] == 26
+    assert saved['last_ema_threshold'] == 0.001
+    assert saved['last_take_profit_percent'] == 0.5
+    assert saved['last_take_profit_usdt'] == 0.0, "TP в процентах отключает TP в USDT"
+    assert manager.bot.strategy.settings['ema_fast_period'] == 7
+
+    StrategyOptimizer('bollinger').apply_best(manager, {'params': {'bb_period': 14}})
+    assert manager.strategy_settings['optimized_params']['bollinger'] == {'bb_period': 14}
+    print("✅ test_apply_best_updates_settings PASSED")
+
+
+def test_apply_best_with_other_active_strategy():
+    """Параметры ema_ml сохраняются, даже если активна другая стратегия"""
+    manager = SettingsManager()
+    manager.settings_file = os.path.join(tempfile.mkdtemp(), 'bot_settings.json')
+    manager.strategy_settings['active_strategy'] = 'bollinger'
+    manager.bot = FakeBot(active_strategy=BollingerStrategy())
+    params = {'ema_fast_period': 7, 'ema_slow_period': 26, 'take_profit_percent': 0.5}
+    StrategyOptimizer('ema_ml').apply_best(manager, {'params': params})
+
+    with open(manager.settings_file, encoding='utf-8') as f:
+        saved = json.load(f)['ml_settings']
+    assert saved['last_ema_fast_period'] == 7
+    assert saved['last_ema_slow_period'] == 26
+    assert saved['last_take_profit_percent'] == 0.5
+    assert saved['last_take_profit_usdt'] == 0.0
+    print("✅ test_apply_best_with_other_active_strategy PASSED")
+
+
+if __name__ == '__main__':
+    test_candidates()
+    test_pool_matches_single_process()
+    test_rank_results()
+    test_apply_best_updates_settings()
+    test_apply_best_with_other_active_strategy()
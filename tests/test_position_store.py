@@ -0,0 +1,92 @@
+"""
+Тесты хранилища позиций (utils/position_store.py)
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.position_store import PositionStore, get_position_store
+from utils import position_manager
+
+
+def test_aggregates_maintained_incrementally():
+    """Итоги пары обновляются при добавлении и удалении позиций"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PositionStore(os.path.join(tmp, 'positions.db'))
+        store.add_position('BTC/USDT', 100.0, 50.0, 0.5)
+        store.add_position('BTC/USDT', 200.0, 100.0, 0.5)
+        pair = store.get_pair('BTC/USDT')
+        assert pair['total_position_size_usdt'] == 150.0
+        assert pair['total_amount_crypto'] == 1.0
+        assert pair['average_entry_price'] == 150.0
+        assert pair['max_entry_price'] == 200.0
+        assert [p['id'] for p in pair['positions']] == [1, 2]
+
+        assert store.remove_position('BTC/USDT', 2)
+        pair = store.get_pair('BTC/USDT')
+        assert pair['max_entry_price'] == 100.0 and pair['total_position_size_usdt'] == 50.0
+        assert pair['next_position_id'] == 2
+        assert not store.remove_position('BTC/USDT', 42)
+
+        store.close_all('BTC/USDT')
+        assert store.count('BTC/USDT') == 0 and store.get_pair('BTC/USDT')['max_entry_price'] == 0
+        store.close()
+    print("✅ test_aggregates_maintained_incrementally PASSED")
+
+
+def test_state_survives_reopen():
+    """Позиции и номер следующей позиции восстанавливаются из базы"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'positions.db')
+        store = PositionStore(db_path)
+        store.add_position('ETH/USDT', 2000.0, 20.0, 0.01, order_id='abc')
+        store.add_position('BTC/USDT', 30000.0, 30.0, 0.001)
+        expected = store.get_state()
+        store.close()
+
+        reopened = PositionStore(db_path)
+        assert reopened.get_state() == expected
+        assert reopened.add_position('ETH/USDT', 2100.0, 21.0, 0.01)['id'] == 2
+        assert reopened.count() == 3
+        reopened.close()
+    print("✅ test_state_survives_reopen PASSED")
+
+
+def test_import_from_json_file():
+    """При первом запуске позиции переносятся из position_state.json (включая старый формат)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'position_state.json')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'BTC/USDT': {'positions': [
+                    {'id': 1, 'entry_price': 100.0, 'position_size_usdt': 10.0, 'amount_crypto': 0.1},
+                    {'id': 2, 'entry_price': 120.0, 'position_size_usdt': 12.0, 'amount_crypto': 0.1},
+                ], 'next_position_id': 3},
+                'ETH/USDT': {'position': 'long', 'entry_price': 50.0, 'position_size_usdt': 5.0},
+            }, f)
+        assert position_manager.get_positions_count('BTC/USDT', file_path) == 2
+        assert position_manager.get_max_entry_price('BTC/USDT', file_path) == 120.0
+        state = position_manager.load_position_state(file_path)
+        assert state['ETH/USDT']['positions'][0]['id'] == 'legacy_auto'
+        assert os.path.exists(os.path.join(tmp, 'position_state.db'))
+        get_position_store(file_path).close()
+    print("✅ test_import_from_json_file PASSED")
+
+
+def test_read_does_not_create_files():
+    """Чтение без базы и файла возвращает пустое состояние и ничего не создает"""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'position_state.json')
+        assert position_manager.load_position_state(file_path) == {}
+        assert position_manager.get_positions_count('BTC/USDT', file_path) == 0
+        assert os.listdir(tmp) == []
+    print("✅ test_read_does_not_create_files PASSED")
+
+
+if __name__ == '__main__':
+    test_aggregates_maintained_incrementally()
+    test_state_survives_reopen()
+    test_import_from_json_file()
+    test_read_does_not_create_files()
@@ -0,0 +1,63 @@
+"""
+Тесты профилировщика по запросу (utils/profiler.py)
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiler import SamplingProfiler
+
+
+def busy_worker(stop):
+    """Нагрузка, которую должен увидеть профилировщик"""
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_samples_all_threads():
+    """Стеки рабочего потока попадают в свернутый вывод с именем потока, поток профилировщика - нет"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name='TradingLoop', daemon=True)
+    worker.start()
+    try:
+        result = SamplingProfiler(interval=0.005).profile(0.5)
+    finally:
+        stop.set()
+        worker.join(2)
+    assert result is not None and result.samples >= 3
+    lines = result.collapsed().splitlines()
+    worker_lines = [line for line in lines if line.startswith('TradingLoop;')]
+    assert worker_lines, lines
+    assert any('busy_worker (tests/test_profiler.py:' in line for line in worker_lines)
+    stack, count = worker_lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and stack.split(';')[1].startswith('_bootstrap')
+    assert not any('profile (utils/profiler.py' in line for line in lines)
+
+    summary = result.top(limit=1000)  # в общем прогоне тестов живы потоки других тестов
+    assert summary['threads']['TradingLoop'] > 0
+    assert any(item['function'].startswith('busy_worker') for item in summary['total'])
+    print("✅ test_samples_all_threads PASSED")
+
+
+def test_single_profile_at_a_time():
+    """Второе профилирование во время первого сразу возвращает None; без профилирования потоков нет"""
+    profiler = SamplingProfiler()
+    threads_before = threading.active_count()
+    assert not profiler.running
+    results = []
+    runner = threading.Thread(target=lambda: results.append(profiler.profile(0.3)))
+    runner.start()
+    time.sleep(0.1)
+    assert profiler.running
+    assert profiler.profile(0.1) is None
+    runner.join(5)
+    assert results and results[0] is not None
+    assert not profiler.running and threading.active_count() == threads_before
+    print("✅ test_single_profile_at_a_time PASSED")
+
+
+if __name__ == '__main__':
+    test_samples_all_threads()
+    test_single_profile_at_a_time()
@@ -0,0 +1,150 @@
+"""
+Тесты ограничителя запросов к бирже (core/rate_limiter.py)
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+from core.rate_limiter import RateLimiter, ExchangeRateLimiter, exchange_lane, current_lane
+
+
+def test_weights_and_pools():
+    """Веса KuCoin из таблицы, остальные - из описания ccxt; пул по типу API"""
+    limiter = ExchangeRateLimiter()
+    assert limiter.classify('public', 'GET', 'market/allTickers') == ('public', 15)
+    assert limiter.classify('private', 'POST', 'orders') == ('spot', 2)
+    assert limiter.classify('private', 'GET', 'accounts') == ('management', 5)
+    assert limiter.classify('utaPrivate', 'GET', 'account/mode', {'cost': 60}) == ('management', 60)
+    assert limiter.classify('private', 'GET', 'hf/orders/active', {'cost': 2}) == ('spot', 2)
+    print("✅ test_weights_and_pools PASSED")
+
+
+def test_order_not_starved_by_ui():
+    """Очередь UI исчерпала пул до своего резерва - ордер проходит сразу"""
+    limiter = RateLimiter(100, 10)  # 10 токенов/сек
+    ui_waits = []
+
+    def ui_worker():
+        for _ in range(10):
+            ui_waits.append(limiter.acquire(10, 'ui'))
+
+    thread = threading.Thread(target=ui_worker, daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    assert limiter.stats()['lanes']['ui']['queued'] == 1
+
+    started = time.monotonic()
+    limiter.acquire(2, 'orders')
+    assert time.monotonic() - started < 0.05
+    stats = limiter.stats()['lanes']
+    assert stats['orders']['granted'] == 1 and stats['ui']['granted'] >= 7
+    print("✅ test_order_not_starved_by_ui PASSED")
+
+
+def test_priority_order_when_waiting():
+    """При нехватке токенов первым обслуживается более важная очередь"""
+    limiter = RateLimiter(10, 1)  # 10 токенов/сек
+    limiter.acquire(10, 'orders')
+    granted = []
+
+    def worker(lane):
+        limiter.acquire(5, lane)
+        granted.append(lane)
+
+    threads = [threading.Thread(target=worker, args=('market',)), threading.Thread(target=worker, args=('account',))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+    assert granted == ['account', 'market'], granted
+    print("✅ test_priority_order_when_waiting PASSED")
+
+
+def test_backoff_on_rate_limit_error():
+    """Ответ 429 - пауза пула, следующий запрос ждет"""
+    class FakeClient:
+        last_response_headers = None
+
+        def __init__(self):
+            self.fail = False
+
+        def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers,
+                             request_body):
+            return response_body
+
+        def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            if self.fail:
+                raise ccxt.RateLimitExceeded('429 Too Many Requests')
+            headers = {'gw-ratelimit-remaining': '3', 'gw-ratelimit-reset': '500'}
+            self.last_response_headers = headers
+            self.on_rest_response(200, 'OK', path, method, headers, '{}', {}, None)
+            return {'path': path}
+
+        def throttle(self, cost=None):
+            raise AssertionError('ccxt throttle must be disabled')
+
+    limiter = ExchangeRateLimiter(pools={'public': (100, 1), 'spot': (100, 1), 'management': (100, 1)})
+    client = limiter.install(FakeClient())
+    assert client.fetch2('market/allTickers') == {'path': 'market/allTickers'}
+    # Остаток из заголовков KuCoin ограничивает локальный счетчик
+    assert limiter.pools['public'].stats()['tokens'] <= 4
+
+    client.fail = True
+    try:
+        client.fetch2('market/allTickers')
+        assert False, 'RateLimitExceeded expected'
+    except ccxt.RateLimitExceeded:
+        pass
+    pool = limiter.pools['public'].stats()
+    assert pool['backoffs'] == 1 and pool['paused_for'] > 0.5
+    print("✅ test_backoff_on_rate_limit_error PASSED")
+
+
+def test_headers_taken_from_own_response():
+    """Остаток пула - из заголовков своего ответа, а не из last_response_headers, общего для потоков"""
+    class FakeClient:
+        last_response_headers = None
+
+        def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers,
+                             request_body):
+            return response_body
+
+        def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            self.on_rest_response(200, 'OK', path, method, {'gw-ratelimit-remaining': '90'}, '{}', {}, None)
+            # Пока ответ разбирается, другой поток успел получить ответ спотового пула
+            self.last_response_headers = {'gw-ratelimit-remaining': '2', 'gw-ratelimit-reset': '500'}
+            return {'path': path}
+
+        def throttle(self, cost=None):
+            pass
+
+    limiter = ExchangeRateLimiter(pools={'public': (100, 1), 'spot': (100, 1), 'management': (100, 1)})
+    client = limiter.install(FakeClient())
+    client.fetch2('market/allTickers')
+    assert limiter.pools['public'].stats()['tokens'] > 50, "Чужой остаток не должен урезать пул"
+    print("✅ test_headers_taken_from_own_response PASSED")
+
+
+def test_outer_lane_wins():
+    """Вложенный exchange_lane не повышает приоритет внешнего блока"""
+    assert current_lane() == 'market'
+    with exchange_lane('ui'):
+        with exchange_lane('account'):
+            assert current_lane() == 'ui'
+    with exchange_lane('orders'):
+        assert current_lane() == 'orders'
+    assert current_lane() == 'market'
+    print("✅ test_outer_lane_wins PASSED")
+
+
+if __name__ == '__main__':
+    test_weights_and_pools()
+    test_order_not_starved_by_ui()
+    test_priority_order_when_waiting()
+    test_backoff_on_rate_limit_error()
+    test_headers_taken_from_own_response()
+    test_outer_lane_wins()
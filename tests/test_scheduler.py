@@ -0,0 +1,115 @@
+"""
+Тесты планировщика задач (core/scheduler.py)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.scheduler import Scheduler, next_candle_close, timeframe_to_seconds
+
+
+class FakeClock:
+    """Управляемые часы"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_candle_boundaries():
+    """Закрытие свечи считается по границам UTC"""
+    assert timeframe_to_seconds('15m') == 900
+    assert timeframe_to_seconds('4h') == 14400
+    assert next_candle_close('1h', 7200) == 10800, "Ровно на границе - ждем следующую свечу"
+    assert next_candle_close('1h', 7201) == 10800
+    assert next_candle_close('5m', 1000) == 1200
+    print("✅ test_candle_boundaries PASSED")
+
+
+def test_candle_job_runs_at_close():
+    """Задача сигналов срабатывает только в момент закрытия свечи (+ задержка)"""
+    clock = FakeClock(3600 * 10 + 100)
+    scheduler = Scheduler(clock=clock)
+    runs = []
+    scheduler.add_candle_job('signals', '1h', lambda: runs.append(clock.now), delay=2)
+
+    assert scheduler.seconds_until_next() == 3600 - 100 + 2
+    clock.now = 3600 * 11 + 1
+    assert scheduler.run_pending() == [], "До задержки задача не запускается"
+    clock.now = 3600 * 11 + 2
+    assert scheduler.run_pending() == ['signals']
+    assert scheduler.seconds_until_next() == 3600, "Следующий запуск - на следующем закрытии"
+    print("✅ test_candle_job_runs_at_close PASSED")
+
+
+def test_interval_jobs_and_retry():
+    """Интервальные задачи со своим ритмом, ошибка не останавливает планировщик"""
+    clock = FakeClock(1000)
+    scheduler = Scheduler(clock=clock)
+    calls = {'risk': 0, 'balance': 0}
+    interval = {'risk': 10}
+
+    def failing_balance():
+        calls['balance'] += 1
+        raise RuntimeError("сеть недоступна")
+
+    scheduler.add_interval_job('risk', lambda: interval['risk'], lambda: calls.__setitem__('risk', calls['risk'] + 1))
+    scheduler.add_interval_job('balance', 300, failing_balance, retry_delay=30)
+
+    for step in range(1, 31):
+        clock.now = 1000 + step * 10
+        scheduler.run_pending()
+    assert calls['risk'] == 30, f"Проверка рисков каждые 10 сек, вызвано {calls['risk']}"
+    assert calls['balance'] == 1, "Баланс - раз в 300 сек"
+    assert scheduler.jobs['balance'].errors == 1
+
+    clock.now = 1300 + 30
+    scheduler.run_pending()
+    assert calls['balance'] == 2, "После ошибки - повтор через retry_delay"
+
+    # Интервал меняется на лету через настройки
+    interval['risk'] = 60
+    clock.now += 10
+    scheduler.run_pending()
+    count = calls['risk']
+    clock.now += 30
+    scheduler.run_pending()
+    assert calls['risk'] == count
+    print("✅ test_interval_jobs_and_retry PASSED")
+
+
+def test_run_now():
+    """Внеочередной запуск не дублирует задачу в очереди, дальше - по расписанию"""
+    clock = FakeClock(3600 * 10 + 100)
+    scheduler = Scheduler(clock=clock)
+    runs = []
+    scheduler.add_candle_job('signals', '1h', lambda: runs.append(clock.now), delay=2)
+
+    assert scheduler.run_now('signals') and not scheduler.run_now('unknown')
+    assert scheduler.seconds_until_next() == 0
+    assert scheduler.run_pending() == ['signals']
+    assert len(scheduler._queue) == 1
+    assert scheduler.seconds_until_next() == 3600 - 100 + 2, "Следующий запуск - на закрытии свечи"
+
+    # Запрос внеочередного запуска во время выполнения задачи
+    requested = []
+
+    def request_once():
+        if not requested:
+            requested.append(scheduler.run_now('signals'))
+
+    scheduler.jobs['signals'].callback = request_once
+    clock.now = 3600 * 11 + 2
+    assert scheduler.run_pending() == ['signals', 'signals']
+    assert len(scheduler._queue) == 1
+    assert scheduler.seconds_until_next() == 3600
+    print("✅ test_run_now PASSED")
+
+
+if __name__ == '__main__':
+    test_candle_boundaries()
+    test_candle_job_runs_at_close()
+    test_interval_jobs_and_retry()
+    test_run_now()
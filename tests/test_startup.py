@@ -0,0 +1,93 @@
+"""
+Тесты ленивых импортов и профилировщика запуска (utils/startup.py)
+"""
+import sys
+import os
+import json
+import subprocess
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.startup import StartupProfiler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_MARKER = 'RESULT:'
+
+
+def run_python(code, **env):
+    """Код в отдельном процессе (sys.modules текущего процесса уже заполнен другими тестами).
+
+    Результат - строка RESULT_MARKER + json, записанная одним write(): логи пишет
+    фоновый поток, и они могут попасть в stdout после нее.
+    """
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                            env={**os.environ, **env}, timeout=120)
+    assert result.returncode == 0, result.stderr
+    lines = [line for line in result.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    assert len(lines) == 1, result.stdout
+    return json.loads(lines[0][len(RESULT_MARKER):])
+
+
+def test_light_imports_do_not_load_bot():
+    """Импорт ограничителя/шлюза/Telegram не загружает бота и sklearn"""
+    loaded = run_python(
+        "import sys, json\n"
+        "import telegram.bot, core.rate_limiter, webapp.exchange_gateway\n"
+        "sys.stdout.write('RESULT:' + json.dumps([m for m in ('core.bot', 'sklearn', 'ml.model', 'ccxt') if m in sys.modules]) + '\\n')")
+    assert loaded == [], loaded
+    print("✅ test_light_imports_do_not_load_bot PASSED")
+
+
+def test_bot_import_defers_ml_dependencies():
+    """core.bot импортируется без sklearn/joblib; реэкспорты пакетов работают"""
+    result = run_python(
+        "import sys, json\n"
+        "import core.bot\n"
+        "from core import ExchangeManager, AdvancedTradingBot\n"
+        "from strategies import EmaMlStrategy, STRATEGY_CLASSES\n"
+        "from core.pair_state import create_strategies\n"
+        "heavy = [m for m in ('sklearn', 'joblib', 'pandas') if m in sys.modules]\n"
+        "sys.stdout.write('RESULT:' + json.dumps({'heavy': heavy, 'strategies': sorted(create_strategies()),\n"
+        "                                         'same': AdvancedTradingBot is core.bot.AdvancedTradingBot}) + '\\n')")
+    assert result['heavy'] == [], result
+    assert result['strategies'] == ['bollinger', 'ema_ml', 'macd_rsi', 'price_action']
+    assert result['same']
+    print("✅ test_bot_import_defers_ml_dependencies PASSED")
+
+
+def test_import_timing_profile():
+    """STARTUP_PROFILE_IMPORTS=1: время импорта модулей с учетом вложенных"""
+    report = run_python(
+        "import sys, json\n"
+        "from utils.startup import startup_profiler\n"
+        "import core.exchange\n"
+        "sys.stdout.write('RESULT:' + json.dumps(startup_profiler.report(limit=500)) + '\\n')",
+        STARTUP_PROFILE_IMPORTS='1')
+    assert report['import_timing']
+    imports = {item['module']: item for item in report['imports']}
+    assert 'core.exchange' in imports and 'core.fills_cache' in imports
+    assert imports['core.exchange']['total_ms'] >= imports['core.fills_cache']['total_ms']
+    assert imports['core.exchange']['self_ms'] <= imports['core.exchange']['total_ms']
+    print("✅ test_import_timing_profile PASSED")
+
+
+def test_subsystem_ready_times():
+    """Готовность подсистем: первый вызов ready() фиксирует момент"""
+    profiler = StartupProfiler(start=time.perf_counter())
+    with profiler.stage('settings'):
+        time.sleep(0.01)
+    profiler.ready('markets')
+    time.sleep(0.01)
+    profiler.ready('markets')
+    report = profiler.report()
+    assert list(report['subsystems']) == ['settings', 'markets']
+    assert report['subsystems']['settings']['duration'] >= 0.01
+    assert report['subsystems']['markets']['ready_at'] < report['uptime'] - 0.005
+    print("✅ test_subsystem_ready_times PASSED")
+
+
+if __name__ == '__main__':
+    test_light_imports_do_not_load_bot()
+    test_bot_import_defers_ml_dependencies()
+    test_import_timing_profile()
+    test_subsystem_ready_times()
@@ -0,0 +1,116 @@
+"""
+Тесты метрик Prometheus (utils/telemetry.py) и их сбора в горячих путях
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+from utils.telemetry import Registry, EXCHANGE_REQUEST_SECONDS, EXCHANGE_ERRORS_TOTAL, registry
+from utils.cache import SWRCache
+from core.rate_limiter import ExchangeRateLimiter
+
+
+def test_histogram_render():
+    """Накопленные корзины, _sum/_count и метки в текстовом формате"""
+    metrics = Registry()
+    histogram = metrics.histogram('test_seconds', 'Тестовая гистограмма', ('endpoint',), buckets=(0.1, 1.0))
+    child = histogram.labels('market/"x"')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+    text = metrics.render()
+    assert '# TYPE kucoinbot_test_seconds histogram' in text
+    assert 'kucoinbot_test_seconds_bucket{endpoint="market/\\"x\\"",le="0.1"} 2' in text
+    assert 'kucoinbot_test_seconds_bucket{endpoint="market/\\"x\\"",le="1"} 3' in text
+    assert 'kucoinbot_test_seconds_bucket{endpoint="market/\\"x\\"",le="+Inf"} 4' in text
+    assert 'kucoinbot_test_seconds_count{endpoint="market/\\"x\\""} 4' in text
+    assert 'kucoinbot_test_seconds_sum{endpoint="market/\\"x\\""} 3.65' in text
+    print("✅ test_histogram_render PASSED")
+
+
+def test_quantile_and_gauges():
+    """Оценка p50/p99 по корзинам, гауг с функцией и счетчик"""
+    metrics = Registry()
+    histogram = metrics.histogram('latency_seconds', 'Задержка', buckets=(0.01, 0.1, 1.0))
+    for _ in range(98):
+        histogram.observe(0.005)
+    histogram.observe(0.5)
+    histogram.observe(0.5)
+    child = histogram.labels()
+    assert child.quantile(0.5) <= 0.01
+    assert 0.1 < child.quantile(0.995) <= 1.0
+
+    clients = []
+    metrics.gauge('clients', 'Клиенты').set_function(lambda: len(clients))
+    counter = metrics.counter('errors_total', 'Ошибки', ('error',))
+    counter.labels('Timeout').inc()
+    counter.labels('Timeout').inc(2)
+    clients.extend([1, 2])
+    text = metrics.render()
+    assert 'kucoinbot_clients 2' in text
+    assert 'kucoinbot_errors_total{error="Timeout"} 3' in text
+    try:
+        counter.labels('a', 'b')
+        assert False, 'ValueError expected'
+    except ValueError:
+        pass
+    print("✅ test_quantile_and_gauges PASSED")
+
+
+def test_cache_hit_ratio_collected():
+    """Обращения к SWRCache - счетчики /metrics, которые не уменьшаются при пересоздании кэша"""
+    import gc
+    cache = SWRCache(ttl=60, name='test_telemetry')
+    cache.get('k', lambda: 1)
+    cache.get('k', lambda: 2)
+    cache.get('k', lambda: 3)
+    text = registry.render()
+    assert 'kucoinbot_cache_requests_total{cache="test_telemetry",result="misses"} 1' in text
+    assert 'kucoinbot_cache_requests_total{cache="test_telemetry",result="hits"} 2' in text
+    ratio = [line for line in text.splitlines() if line.startswith('kucoinbot_cache_hit_ratio{cache="test_telemetry"}')]
+    assert ratio and abs(float(ratio[0].split()[-1]) - 2 / 3) < 1e-9, ratio
+
+    # Кэш заменен новым (старый собран сборщиком мусора) - счетчики продолжают расти
+    del cache
+    gc.collect()
+    SWRCache(ttl=60, name='test_telemetry').get('k', lambda: 4)
+    text = registry.render()
+    assert 'kucoinbot_cache_requests_total{cache="test_telemetry",result="misses"} 2' in text
+    assert 'kucoinbot_cache_requests_total{cache="test_telemetry",result="hits"} 2' in text
+    print("✅ test_cache_hit_ratio_collected PASSED")
+
+
+def test_exchange_latency_per_endpoint():
+    """Обертка fetch2 замеряет каждый REST-запрос по шаблону пути и считает ошибки"""
+    class FakeClient:
+        last_response_headers = {}
+        fail = False
+
+        def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers,
+                             request_body):
+            return response_body
+
+        def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            if self.fail:
+                raise ccxt.NetworkError('timeout')
+            return {}
+
+    client = ExchangeRateLimiter().install(FakeClient())
+    before = EXCHANGE_REQUEST_SECONDS.labels('orders/{orderId}', 'GET').snapshot()[2]
+    client.fetch2('orders/{orderId}', 'private', 'GET')
+    client.fail = True
+    try:
+        client.fetch2('orders/{orderId}', 'private', 'GET')
+        assert False, 'NetworkError expected'
+    except ccxt.NetworkError:
+        pass
+    assert EXCHANGE_REQUEST_SECONDS.labels('orders/{orderId}', 'GET').snapshot()[2] == before + 2
+    assert EXCHANGE_ERRORS_TOTAL.labels('orders/{orderId}', 'NetworkError').value >= 1
+    print("✅ test_exchange_latency_per_endpoint PASSED")
+
+
+if __name__ == '__main__':
+    test_histogram_render()
+    test_quantile_and_gauges()
+    test_cache_hit_ratio_collected()
+    test_exchange_latency_per_endpoint()
@@ -0,0 +1,86 @@
+"""
+Тесты пакетного получения тикеров (ExchangeManager.get_tickers)
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.exchange import ExchangeManager
+
+
+class SlowExchange:
+    """Имитация ccxt-клиента с медленными запросами тикеров"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def _ticker(self, symbol):
+        return {'last': float(len(symbol)), 'high': 1.0, 'low': 1.0, 'baseVolume': 1.0,
+                'percentage': 1.5, 'timestamp': 0}
+
+    def fetch_ticker(self, symbol):
+        self.calls.append(('fetch_ticker', [symbol]))
+        time.sleep(self.delay)
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None):
+        self.calls.append(('fetch_tickers', list(symbols)))
+        time.sleep(self.delay)
+        return {symbol: self._ticker(symbol) for symbol in symbols}
+
+
+def make_manager(delay=0.0):
+    manager = ExchangeManager.__new__(ExchangeManager)
+    manager.exchange = SlowExchange(delay)
+    manager.market_feed = None
+    manager._ticker_cache = {}
+    manager._ticker_inflight = {}
+    manager._ticker_lock = threading.Lock()
+    manager.markets_loaded = threading.Event()
+    manager.markets_loaded.set()
+    return manager
+
+
+def test_bulk_fetch_single_request():
+    """Несколько пар (с повторами) - один запрос fetch_tickers"""
+    manager = make_manager()
+    symbols = ['BTC/USDT', 'ETH/USDT', 'BTC/USDT', 'SOL/USDT']
+    tickers = manager.get_tickers(symbols)
+    assert set(tickers) == {'BTC/USDT', 'ETH/USDT', 'SOL/USDT'}
+    assert tickers['ETH/USDT']['change'] == 1.5
+    assert manager.exchange.calls == [('fetch_tickers', ['BTC/USDT', 'ETH/USDT', 'SOL/USDT'])]
+    print("✅ test_bulk_fetch_single_request PASSED")
+
+
+def test_ttl_cache():
+    """В пределах TTL тикеры берутся из кэша, после - запрашиваются снова"""
+    manager = make_manager()
+    manager.get_tickers(['BTC/USDT', 'ETH/USDT'])
+    assert manager.get_ticker('BTC/USDT')['last'] == 8.0
+    assert len(manager.exchange.calls) == 1, "Свежий тикер - без запроса"
+    assert manager.get_tickers(['BTC/USDT'], max_age=0) and len(manager.exchange.calls) == 2
+    print("✅ test_ttl_cache PASSED")
+
+
+def test_concurrent_requests_coalesced():
+    """Параллельные запросы одной пары ждут один общий запрос к бирже"""
+    manager = make_manager(delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_ticker('BTC/USDT')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8 and all(r and r['last'] == 8.0 for r in results)
+    assert len(manager.exchange.calls) == 1, f"Ожидался 1 запрос, было {len(manager.exchange.calls)}"
+    print("✅ test_concurrent_requests_coalesced PASSED")
+
+
+if __name__ == '__main__':
+    test_bulk_fetch_single_request()
+    test_ttl_cache()
+    test_concurrent_requests_coalesced()
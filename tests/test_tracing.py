@@ -0,0 +1,122 @@
+"""
+Тесты трассировки торговых циклов (utils/tracing.py)
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tracing import CycleTracer, span, record_span
+from core.rate_limiter import ExchangeRateLimiter
+from core.bot import AdvancedTradingBot
+from config.settings import SettingsManager
+
+
+def test_spans_nested_in_cycle():
+    """Этапы записываются с глубиной вложенности и атрибутами, вне цикла - не записываются"""
+    tracer = CycleTracer(capacity=10)
+    with span('outside'):
+        pass
+    with tracer.cycle('trading_cycle') as trace:
+        with span('pair', symbol='BTC/USDT'):
+            with span('ml_predict'):
+                time.sleep(0.01)
+        record_span('exchange', time.perf_counter(), 0.002, endpoint='GET accounts')
+    assert [(name, depth) for name, _, _, depth, _ in trace.spans] == [('ml_predict', 1), ('pair', 0), ('exchange', 0)]
+    cycle = tracer.report()['last']
+    assert cycle['duration_ms'] >= 10
+    assert cycle['spans'][1] == dict(cycle['spans'][1], name='pair', symbol='BTC/USDT')
+    assert cycle['spans'][0]['duration_ms'] >= 10
+    print("✅ test_spans_nested_in_cycle PASSED")
+
+
+def test_ring_buffer_and_report():
+    """Буфер хранит последние N циклов, отчет - этапы по доле времени и самые долгие циклы"""
+    tracer = CycleTracer(capacity=3)
+    for delay in (0.001, 0.02, 0.002, 0.003):
+        with tracer.cycle():
+            with span('signal'):
+                time.sleep(delay)
+            with span('signal_sized'):
+                pass
+    report = tracer.report(slowest=1)
+    assert report['recorded'] == 3 and report['total'] == 4
+    assert list(report['stages']) == ['signal', 'signal_sized']
+    assert report['stages']['signal']['cycles'] == 3
+    assert report['stages']['signal']['max_ms'] >= 20
+    assert len(report['slowest']) == 1 and report['slowest'][0]['duration_ms'] >= 20
+    assert report['cycle_ms']['max'] >= report['cycle_ms']['p50'] > 0
+
+    try:
+        with tracer.cycle():
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    assert tracer.report()['last']['error'] == 'RuntimeError: boom'
+    print("✅ test_ring_buffer_and_report PASSED")
+
+
+def test_exchange_requests_traced():
+    """REST-запросы ccxt внутри цикла попадают в трассу как этапы 'exchange'"""
+    class FakeClient:
+        last_response_headers = {}
+
+        def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers,
+                             request_body):
+            return response_body
+
+        def fetch2(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            return {}
+
+    client = ExchangeRateLimiter().install(FakeClient())
+    tracer = CycleTracer()
+    client.fetch2('accounts', 'private', 'GET')  # вне цикла
+    with tracer.cycle() as trace:
+        with span('balance'):
+            client.fetch2('accounts', 'private', 'GET')
+    assert [(name, depth, attrs) for name, _, _, depth, attrs in trace.spans] == [
+        ('exchange', 1, {'endpoint': 'GET accounts'}), ('balance', 0, {})]
+    print("✅ test_exchange_requests_traced PASSED")
+
+
+def test_market_data_workers_traced():
+    """Запросы из потоков пула рыночных данных попадают в трассу цикла под этапом market_data"""
+    class FakeExchange:
+        def get_market_data(self, symbol, timeframe='1h', ema_fast_period=9, ema_slow_period=21):
+            started = time.perf_counter()
+            time.sleep(0.01)
+            record_span('exchange', started, time.perf_counter() - started, endpoint=f"GET ticker {symbol}")
+            return {'current_price': 100.0, 'symbol': symbol}
+
+    bot = AdvancedTradingBot.__new__(AdvancedTradingBot)
+    bot.settings = SettingsManager()
+    bot.exchange = FakeExchange()
+    bot._init_pairs()
+    symbols = ['BTC/USDT', 'SOL/USDT', 'ETH/USDT']
+    tracer = CycleTracer()
+    try:
+        with tracer.cycle() as trace:
+            with span('pairs'):
+                with span('market_data', pairs=len(symbols)):
+                    data = bot.fetch_market_data(symbols)
+    finally:
+        bot._market_executor.shutdown(wait=False)
+
+    assert set(data) == set(symbols)
+    spans = {(name, attrs.get('symbol') or attrs.get('endpoint')): (started, duration, depth)
+             for name, started, duration, depth, attrs in trace.spans}
+    market_started, market_duration, market_depth = spans[('market_data', None)]
+    for symbol in symbols:
+        pair_started, pair_duration, pair_depth = spans[('market_data_pair', symbol)]
+        exchange_started, exchange_duration, exchange_depth = spans[('exchange', f"GET ticker {symbol}")]
+        assert pair_depth == market_depth + 1 and exchange_depth == market_depth + 2
+        assert market_started <= pair_started <= exchange_started
+        assert exchange_started + exchange_duration <= market_started + market_duration
+    print("✅ test_market_data_workers_traced PASSED")
+
+
+if __name__ == '__main__':
+    test_spans_nested_in_cycle()
+    test_ring_buffer_and_report()
+    test_exchange_requests_traced()
+    test_market_data_workers_traced()
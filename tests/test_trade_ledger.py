@@ -0,0 +1,136 @@
+"""
+Тесты журнала сделок (analytics/ledger.py) и AnalyticsMetrics с журналом
+"""
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics.ledger import TradeLedger
+from analytics.metrics import AnalyticsMetrics
+from analytics.reporter import ReportGenerator
+
+PROFITS = [1.5, -0.5, 2.0, -1.0, 0.7]
+
+
+def feed(metrics, start=None):
+    start = start or datetime(2024, 3, 4, 12, 0)
+    for i, profit in enumerate(PROFITS):
+        metrics.update_metrics({
+            'symbol': 'BTC/USDT' if i % 2 == 0 else 'ETH/USDT',
+            'strategy': 'ema_ml',
+            'signal': 'sell',
+            'profit': profit,
+            'profit_percent': profit,
+            'profit_usdt': profit * 10,
+            'position_size_usdt': 1000,
+            'price': 100 + i,
+        }, timestamp=start + timedelta(days=i))
+
+
+def test_rollups_match_trades():
+    """Итоги по дням/неделям/месяцам/парам совпадают с суммами сделок"""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = AnalyticsMetrics(ledger=TradeLedger(os.path.join(tmp, 'trades.db')))
+        feed(metrics)
+        ledger = metrics.ledger
+        total = ledger.rollup('all')
+        assert total['trades'] == 5 and total['wins'] == 3 and total['losses'] == 2
+        assert abs(total['profit'] - sum(PROFITS)) < 1e-9
+        assert total['best'] == 2.0 and total['worst'] == -1.0
+        assert ledger.rollup('day', datetime(2024, 3, 6))['profit'] == 2.0
+        # 4-8 марта 2024 - одна ISO-неделя, 4-я сделка (7 марта) в ней же
+        assert ledger.rollup('week', datetime(2024, 3, 4))['trades'] == 5
+        assert ledger.rollup('month', datetime(2024, 3, 1))['trades'] == 5
+        assert ledger.rollup('all', scope='symbol:ETH/USDT')['trades'] == 2
+        assert set(ledger.scopes('symbol')) == {'BTC/USDT', 'ETH/USDT'}
+        assert metrics.get_strategy_performance()['ema_ml']['trades'] == 5
+        assert [t['profit'] for t in metrics.get_recent_trades(2)] == PROFITS[-2:]
+        ledger.close()
+    print("✅ test_rollups_match_trades PASSED")
+
+
+def test_metrics_survive_restart():
+    """Счетчики, метрики риска и последние сделки восстанавливаются из журнала"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'trades.db')
+        metrics = AnalyticsMetrics(ledger=TradeLedger(db_path))
+        feed(metrics)
+        summary, risk = metrics.get_summary(), metrics.get_risk_metrics()
+        metrics.ledger.close()
+
+        restored = AnalyticsMetrics(ledger=TradeLedger(db_path))
+        assert restored.get_summary() == summary
+        assert restored.get_risk_metrics() == risk
+        assert [t['profit'] for t in restored.trade_history] == PROFITS
+        assert isinstance(restored.trade_history[0]['timestamp'], datetime)
+
+        restored.reset_metrics()
+        assert restored.ledger.count() == 0 and restored.total_trades == 0
+        restored.ledger.close()
+    print("✅ test_metrics_survive_restart PASSED")
+
+
+def test_risk_metrics_match_full_scan():
+    """Накопленные метрики риска совпадают с расчетом по всей истории"""
+    metrics = AnalyticsMetrics()
+    feed(metrics)
+    returns = PROFITS
+    avg = sum(returns) / len(returns)
+    std = (sum((r - avg) ** 2 for r in returns) / len(returns)) ** 0.5
+    equity, peak, max_dd = 10000, None, 0
+    for profit in returns:
+        equity += profit * 10
+        peak = equity if peak is None or equity > peak else peak
+        max_dd = max(max_dd, (peak - equity) / peak * 100)
+    risk = metrics.get_risk_metrics()
+    assert abs(risk['avg_trade_return'] - avg) < 1e-12
+    assert abs(risk['volatility'] - std) < 1e-12
+    assert abs(risk['max_drawdown_usdt'] - max_dd) < 1e-12
+
+    flat = AnalyticsMetrics()
+    for _ in range(3):
+        flat.update_metrics({'profit': 0.1, 'profit_usdt': 1})
+    assert flat.get_risk_metrics()['sharpe_ratio'] == 0
+    print("✅ test_risk_metrics_match_full_scan PASSED")
+
+
+def test_reports_use_rollups():
+    """Отчеты за период и дневной отчет строятся по итогам журнала"""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = AnalyticsMetrics(ledger=TradeLedger(os.path.join(tmp, 'trades.db')))
+        feed(metrics, start=datetime.now())
+        reporter = ReportGenerator(metrics)
+        assert 'Сделок: <b>1</b>' in reporter.generate_daily_report()
+        assert 'ema_ml' in reporter.generate_strategy_comparison()
+        assert metrics.get_daily_summary()['profit'] == PROFITS[0]
+        metrics.ledger.close()
+    print("✅ test_reports_use_rollups PASSED")
+
+
+def test_period_report_uses_period_values():
+    """Отчет за период: убыток по модулю, Profit Factor периода, метрики всего времени помечены"""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = AnalyticsMetrics(ledger=TradeLedger(os.path.join(tmp, 'trades.db')))
+        now = datetime.now()
+        for profit, moment in ((-3.0, now - timedelta(days=40)), (1.5, now), (-0.5, now)):
+            metrics.update_metrics({'symbol': 'BTC/USDT', 'strategy': 'ema_ml', 'profit': profit,
+                                    'profit_usdt': profit * 10, 'position_size_usdt': 1000}, timestamp=moment)
+        reporter = ReportGenerator(metrics)
+        report = reporter.generate_performance_report('day')
+        assert 'Всего сделок: <b>2</b>' in report
+        assert 'Средний убыток: <b>0.50 USDT</b>' in report
+        assert 'Profit Factor: <b>3.00</b>' in report
+        assert 'Макс просадка (всё время)' in report and 'Серия поражений (всё время)' in report
+        assert '(всё время)' not in reporter.generate_performance_report('all')
+        metrics.ledger.close()
+    print("✅ test_period_report_uses_period_values PASSED")
+
+
+if __name__ == '__main__':
+    test_rollups_match_trades()
+    test_metrics_survive_restart()
+    test_risk_metrics_match_full_scan()
+    test_reports_use_rollups()
+    test_period_report_uses_period_values()
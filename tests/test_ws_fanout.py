@@ -0,0 +1,119 @@
+"""
+Тесты рассылки по WebSocket (webapp/ws_fanout.py)
+"""
+import sys
+import os
+import asyncio
+import gc
+import json
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from webapp.ws_fanout import WebSocketFanout
+
+
+class FakeWebSocket:
+    """Имитация starlette WebSocket с задержкой отправки"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+        self.closed = False
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_slow_client_does_not_delay_others():
+    """Быстрые клиенты получают каждое обновление, медленный - последнее (склейка)"""
+    async def scenario():
+        hub = WebSocketFanout()
+        fast = [FakeWebSocket() for _ in range(5)]
+        slow = FakeWebSocket(delay=0.3)
+        for ws in fast + [slow]:
+            hub.register(ws)
+        for tick in range(5):
+            hub.publish({'type': 'market_update', 'tick': tick})
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.7)
+        return hub, fast, slow
+
+    hub, fast, slow = asyncio.run(scenario())
+    for ws in fast:
+        assert [json.loads(f)['tick'] for f in ws.frames] == [0, 1, 2, 3, 4]
+    ticks = [json.loads(f)['tick'] for f in slow.frames]
+    assert ticks[-1] == 4 and len(ticks) < 5, f"Медленный клиент получил {ticks}"
+    assert hub.stats['dropped'] > 0
+    print("✅ test_slow_client_does_not_delay_others PASSED")
+
+
+def test_frame_encoded_once():
+    """Все клиенты получают один и тот же объект кадра"""
+    async def scenario():
+        hub = WebSocketFanout()
+        clients = [FakeWebSocket() for _ in range(3)]
+        for ws in clients:
+            hub.register(ws)
+        hub.publish({'type': 'market_update', 'price': 1.5})
+        await asyncio.sleep(0.05)
+        return clients
+
+    clients = asyncio.run(scenario())
+    frames = [ws.frames[0] for ws in clients]
+    assert all(frame is frames[0] for frame in frames), "Кадр должен сериализоваться один раз"
+    print("✅ test_frame_encoded_once PASSED")
+
+
+def test_stuck_client_evicted():
+    """Клиент, который не принимает данные дольше таймаута, отключается"""
+    async def scenario():
+        hub = WebSocketFanout(send_timeout=0.1)
+        stuck = FakeWebSocket(delay=10)
+        ok = FakeWebSocket()
+        hub.register(stuck)
+        hub.register(ok)
+        hub.publish({'type': 'market_update'})
+        await asyncio.sleep(0.3)
+        return hub, stuck, ok
+
+    hub, stuck, ok = asyncio.run(scenario())
+    assert stuck not in hub.clients and stuck.closed
+    assert ok in hub.clients and len(ok.frames) == 1
+    assert hub.stats['evicted'] == 1
+    print("✅ test_stuck_client_evicted PASSED")
+
+
+def test_publish_cost_with_many_clients():
+    """Публикация на 5000 клиентов не ждет отправки и занимает миллисекунды"""
+    async def scenario():
+        hub = WebSocketFanout()
+        clients = [FakeWebSocket(delay=0.05) for _ in range(5000)]
+        for ws in clients:
+            hub.register(ws)
+        await asyncio.sleep(0)
+        gc.collect()  # мусор предыдущих тестов не должен собираться во время замера
+        started = time.perf_counter()
+        hub.publish({'type': 'market_update', 'price': 1.0})
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        return elapsed, clients
+
+    elapsed, clients = asyncio.run(scenario())
+    assert elapsed < 0.1, f"Публикация заняла {elapsed:.3f}s"
+    assert all(len(ws.frames) == 1 for ws in clients)
+    print("✅ test_publish_cost_with_many_clients PASSED")
+
+
+if __name__ == '__main__':
+    test_slow_client_does_not_delay_others()
+    test_frame_encoded_once()
+    test_stuck_client_evicted()
+    test_publish_cost_with_many_clients()
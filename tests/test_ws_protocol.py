@@ -0,0 +1,121 @@
+"""
+Тесты протокола WebSocket: снимок + дельты (webapp/ws_protocol.py)
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from webapp import ws_protocol
+from webapp.ws_protocol import DeltaStream, DeltaClient, encode, negotiate
+from webapp.ws_fanout import WebSocketFanout
+
+
+def make_update(price, signal='buy', open_count=1):
+    return {
+        'type': 'market_update',
+        'market': {'symbol': 'BTC/USDT', 'current_price': price, 'change_24h': 1.234},
+        'ema': {'signal': signal, 'percent': 0.12345, 'text': 'EMA'},
+        'ml': {'prediction': 0.61234},
+        'positions': {'open_count': open_count},
+        'timestamp': '2024-01-01T00:00:00',
+    }
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self):
+        pass
+
+
+def test_snapshot_and_deltas_roundtrip():
+    """Клиент восстанавливает полное сообщение из снимка и дельт (JSON и msgpack, если установлен)"""
+    encodings = ['json'] + (['msgpack'] if ws_protocol.msgpack is not None else [])
+    for encoding in encodings:
+        stream = DeltaStream()
+        client = DeltaClient()
+        stream.update(make_update(100.0))
+        first = client.feed(encode(stream.snapshot(), encoding))
+        assert first['market']['current_price'] == 100.0
+        assert first['ema']['percent'] == 0.1235 and first['type'] == 'market_update'
+
+        delta = stream.update(make_update(101.5, signal='sell'))
+        assert delta['d'] == {'m': {'p': 101.5}, 'e': {'s': 'sell'}}, delta
+        message = client.feed(encode(delta, encoding))
+        assert message['market']['current_price'] == 101.5
+        assert message['ema']['signal'] == 'sell'
+        assert message['positions']['open_count'] == 1
+    print("✅ test_snapshot_and_deltas_roundtrip PASSED")
+
+
+def test_unchanged_state_produces_no_frame():
+    """Без изменений дельта не отправляется, номер не растет"""
+    stream = DeltaStream()
+    stream.update(make_update(100.0))
+    assert stream.update(make_update(100.0)) is None
+    assert stream.seq == 1
+    print("✅ test_unchanged_state_produces_no_frame PASSED")
+
+
+def test_sequence_gap_requires_snapshot():
+    """Пропущенная дельта -> клиент требует снимок и после него снова принимает дельты"""
+    stream = DeltaStream()
+    client = DeltaClient()
+    stream.update(make_update(100.0))
+    client.feed(stream.snapshot())
+    stream.update(make_update(101.0))  # потеряна
+    assert client.feed(stream.update(make_update(102.0))) is None
+    assert client.feed(stream.snapshot())['market']['current_price'] == 102.0
+    assert client.feed(stream.update(make_update(103.0)))['market']['current_price'] == 103.0
+    print("✅ test_sequence_gap_requires_snapshot PASSED")
+
+
+def test_negotiate_fallback():
+    """Без параметра - прежний формат, msgpack без библиотеки заменяется JSON"""
+    assert negotiate(None) == ws_protocol.LEGACY
+    assert negotiate('json') == 'json'
+    assert negotiate('msgpack') == ('msgpack' if ws_protocol.msgpack is not None else 'json')
+    print("✅ test_negotiate_fallback PASSED")
+
+
+def test_lagging_client_gets_snapshot():
+    """Если дельта вытеснена из очереди медленного клиента, он получает снимок"""
+    async def scenario():
+        hub = WebSocketFanout()
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=0.2)
+        hub.register(fast, 'json')
+        hub.register(slow, 'json')
+        stream = DeltaStream()
+        for price in (100.0, 101.0, 102.0, 103.0):
+            delta = stream.update(make_update(price))
+            hub.publish_frames('state', {'json': encode(delta, 'json')}, {'json': encode(stream.snapshot(), 'json')})
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.5)
+        return fast, slow
+
+    fast, slow = asyncio.run(scenario())
+    slow_client = DeltaClient()
+    messages = [slow_client.feed(frame) for frame in slow.frames]
+    assert len(slow.frames) < 4
+    assert messages[-1] is not None and messages[-1]['market']['current_price'] == 103.0
+    assert len(fast.frames) == 4
+    print("✅ test_lagging_client_gets_snapshot PASSED")
+
+
+if __name__ == '__main__':
+    test_snapshot_and_deltas_roundtrip()
+    test_unchanged_state_produces_no_frame()
+    test_sequence_gap_requires_snapshot()
+    test_negotiate_fallback()
+    test_lagging_client_gets_snapshot()
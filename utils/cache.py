@@ -0,0 +1,229 @@
+"""
+КЭШ С ФОНОВЫМ ОБНОВЛЕНИЕМ (STALE-WHILE-REVALIDATE, SINGLE-FLIGHT, LRU)
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from utils.logger import log_error
+from utils.telemetry import registry, CACHE_REQUESTS_TOTAL, CACHE_HIT_RATIO
+
+DEFAULT_MAX_SIZE = 256
+DEFAULT_TTL = 5.0         # сек: значение свежее
+DEFAULT_STALE_TTL = 30.0  # сек после TTL: отдается устаревшее значение, пока идет обновление
+
+REQUEST_RESULTS = ('hits', 'stale_hits', 'misses', 'coalesced')
+
+
+def _collect_metrics():
+    """Доля попаданий по счетчикам обращений (при чтении /metrics, без затрат в get())"""
+    totals = {}
+    for (name, result), value in CACHE_REQUESTS_TOTAL.values().items():
+        stats = totals.setdefault(name, dict.fromkeys(REQUEST_RESULTS, 0))
+        stats[result] = value
+    for name, stats in totals.items():
+        lookups = sum(stats.values())
+        CACHE_HIT_RATIO.labels(name).set((lookups - stats['misses']) / lookups if lookups else 0.0)
+
+
+registry.add_collector(_collect_metrics)
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'ttl', 'stale_ttl')
+
+    def __init__(self, value, ttl, stale_ttl):
+        self.value = value
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+
+class _Flight:
+    """Один выполняющийся запрос значения, который ждут остальные потоки"""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SWRCache:
+    """Кэш значений по ключу с TTL на каждую запись.
+
+    - свежее значение отдается сразу;
+    - устаревшее (в пределах stale_ttl) тоже отдается сразу, а обновление идет в фоне (одно на ключ);
+    - при промахе значение запрашивает один вызывающий, остальные ждут его результат;
+    - при переполнении вытесняются давно не использованные ключи.
+    get() - для синхронного кода (fetch - функция), aget() - для asyncio (fetch - корутинная функция).
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, name='cache'):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = {}        # key -> _Flight (синхронные запросы)
+        self._async_flights = {}  # key -> asyncio.Future
+        self._refreshing = set()  # ключи с фоновым обновлением
+        self._tasks = set()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                      'refreshes': 0, 'errors': 0, 'evictions': 0}
+        # Счетчики /metrics общие для кэшей с одним именем и только растут (пересоздание кэша их не сбрасывает)
+        self._requests = {result: CACHE_REQUESTS_TOTAL.labels(name, result) for result in REQUEST_RESULTS}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _count(self, result):
+        self.stats[result] += 1
+        self._requests[result].inc()
+
+    def _lookup(self, key):
+        """Значение из кэша: (найдено, значение, нужно_обновить). Вызывается под блокировкой"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None, False
+        age = time.monotonic() - entry.stored_at
+        if age < entry.ttl:
+            self._count('hits')
+        elif age < entry.ttl + entry.stale_ttl:
+            self._count('stale_hits')
+        else:
+            return False, None, False
+        self._entries.move_to_end(key)
+        refresh = age >= entry.ttl and key not in self._refreshing
+        if refresh:
+            self._refreshing.add(key)
+        return True, entry.value, refresh
+
+    def set(self, key, value, ttl=None, stale_ttl=None):
+        """Запись значения (с вытеснением самых старых ключей)"""
+        entry = _Entry(value, self.ttl if ttl is None else ttl, self.stale_ttl if stale_ttl is None else stale_ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def peek(self, key):
+        """Значение без учета TTL и статистики (None, если ключа нет)"""
+        entry = self._entries.get(key)
+        return entry.value if entry else None
+
+    def invalidate(self, key=None):
+        """Удаление ключа (или всего кэша); для кортежных ключей key может быть префиксом"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                return
+            for cached_key in list(self._entries):
+                if cached_key == key or (isinstance(cached_key, tuple) and cached_key[:1] == (key,)):
+                    del self._entries[cached_key]
+
+    def get_stats(self):
+        """Счетчики попаданий/промахов и размер кэша"""
+        stats = dict(self.stats)
+        stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_ratio'] = (stats['hits'] + stats['stale_hits'] + stats['coalesced']) / lookups if lookups else 0.0
+        return stats
+
+    # ---------- синхронный режим ----------
+
+    def get(self, key, fetch, ttl=None, stale_ttl=None):
+        """Значение по ключу; fetch() вызывается при промахе или в фоне при устаревании"""
+        with self._lock:
+            found, value, refresh = self._lookup(key)
+            if not found:
+                flight = self._flights.get(key)
+                owner = flight is None
+                if owner:
+                    flight = self._flights[key] = _Flight()
+                    self._count('misses')
+                else:
+                    self._count('coalesced')
+        if found:
+            if refresh:
+                threading.Thread(target=self._refresh, args=(key, fetch, ttl, stale_ttl), daemon=True).start()
+            return value
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fetch()
+            self.set(key, flight.value, ttl, stale_ttl)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _refresh(self, key, fetch, ttl, stale_ttl):
+        """Фоновое обновление устаревшего значения"""
+        try:
+            self.set(key, fetch(), ttl, stale_ttl)
+            self.stats['refreshes'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            log_error(f"❌ Ошибка фонового обновления кэша {self.name} {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # ---------- asyncio ----------
+
+    async def aget(self, key, fetch, ttl=None, stale_ttl=None):
+        """Значение по ключу; await fetch() при промахе или фоновой задачей при устаревании"""
+        with self._lock:
+            found, value, refresh = self._lookup(key)
+        if found:
+            if refresh:
+                task = asyncio.get_running_loop().create_task(self._arefresh(key, fetch, ttl, stale_ttl))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+
+        future = self._async_flights.get(key)
+        if future is not None:
+            self._count('coalesced')
+            return await asyncio.shield(future)
+
+        self._count('misses')
+        future = asyncio.get_running_loop().create_future()
+        self._async_flights[key] = future
+        try:
+            value = await fetch()
+            self.set(key, value, ttl, stale_ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # ошибка уже передана вызывающему - не логировать как забытую
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    async def _arefresh(self, key, fetch, ttl, stale_ttl):
+        try:
+            self.set(key, await fetch(), ttl, stale_ttl)
+            self.stats['refreshes'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            log_error(f"❌ Ошибка фонового обновления кэша {self.name} {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -1,12 +1,14 @@
 """
 ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 """
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# Разовый расчет по списку цен - векторно; пересчет по каждой новой свече - utils/indicators.py.
+# pandas импортируется при первом расчете: импорт бота его не загружает
 def calculate_ema(prices, period):
     """Расчет EMA"""
+    import pandas as pd
     return pd.Series(prices).ewm(span=period, adjust=False).mean().iloc[-1]
 
 def calculate_rsi(prices, period=14):
@@ -30,6 +32,7 @@ def calculate_rsi(prices, period=14):
 
 def calculate_macd(prices, fast=12, slow=26, signal=9):
     """Расчет MACD"""
+    import pandas as pd
     try:
         exp1 = pd.Series(prices).ewm(span=fast).mean()
         exp2 = pd.Series(prices).ewm(span=slow).mean()
@@ -41,6 +44,7 @@ def calculate_macd(prices, fast=12, slow=26, signal=9):
 
 def calculate_bollinger_bands(prices, period=20, std_dev=2):
     """Расчет Bollinger Bands"""
+    import pandas as pd
     try:
         series = pd.Series(prices)
         sma = series.rolling(period).mean()
@@ -0,0 +1,343 @@
+"""
+ПОТОКОВЫЕ ИНДИКАТОРЫ (O(1) НА СВЕЧУ)
+"""
+import math
+import threading
+from collections import deque
+import numpy as np
+
+
+class EMA:
+    """Экспоненциальная скользящая средняя (как pandas ewm(span=period))"""
+
+    def __init__(self, period, adjust=False):
+        self.period = period
+        self.adjust = adjust
+        self._decay = 1 - 2 / (period + 1)
+        self._new_wt = 1.0 if adjust else 2 / (period + 1)
+        self._old_wt = 1.0
+        self.value = None
+
+    def _next(self, value, old_wt, x):
+        """Следующее состояние (формула совпадает с pandas)"""
+        if value is None:
+            return x, 1.0
+        old_wt *= self._decay
+        if value != x:
+            value = (old_wt * value + self._new_wt * x) / (old_wt + self._new_wt)
+        old_wt = old_wt + self._new_wt if self.adjust else 1.0
+        return value, old_wt
+
+    def update(self, x):
+        """Добавление закрытой свечи"""
+        self.value, self._old_wt = self._next(self.value, self._old_wt, float(x))
+        return self.value
+
+    def peek(self, x):
+        """Значение с учетом незакрытой свечи (без изменения состояния)"""
+        return self._next(self.value, self._old_wt, float(x))[0]
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class MACD:
+    """MACD и сигнальная линия (как calculate_macd)"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast, adjust=True)
+        self.slow = EMA(slow, adjust=True)
+        self.signal = EMA(signal, adjust=True)
+        self.value = None
+
+    def update(self, x):
+        """Добавление закрытой свечи"""
+        macd = self.fast.update(x) - self.slow.update(x)
+        self.value = (macd, self.signal.update(macd))
+        return self.value
+
+    def peek(self, x):
+        """Значение с учетом незакрытой свечи"""
+        macd = self.fast.peek(x) - self.slow.peek(x)
+        return macd, self.signal.peek(macd)
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class RollingWindow:
+    """Скользящие среднее и стандартное отклонение (ddof=1) по окну"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self._state = (0, 0.0, 0.0)  # количество, среднее, сумма квадратов отклонений
+
+    @staticmethod
+    def _add(state, x):
+        count, mean, ssqd = state
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        ssqd += (count - 1) * delta * delta / count
+        return count, mean, ssqd
+
+    @staticmethod
+    def _remove(state, x):
+        count, mean, ssqd = state
+        count -= 1
+        if count == 0:
+            return 0, 0.0, 0.0
+        delta = x - mean
+        mean -= delta / count
+        ssqd -= (count + 1) * delta * delta / count
+        return count, mean, max(ssqd, 0.0)
+
+    def _shift(self, state, x):
+        """Состояние окна после добавления x"""
+        state = self._add(state, x)
+        if len(self.window) >= self.period:
+            state = self._remove(state, self.window[0])
+        return state
+
+    def _result(self, state):
+        count, mean, ssqd = state
+        if count < self.period:
+            return math.nan, math.nan
+        std = math.sqrt(ssqd / (count - 1)) if count > 1 else math.nan
+        return mean, std
+
+    def update(self, x):
+        """Добавление закрытой свечи, возвращает (среднее, std)"""
+        x = float(x)
+        self._state = self._shift(self._state, x)
+        self.window.append(x)
+        if len(self.window) > self.period:
+            self.window.popleft()
+        return self._result(self._state)
+
+    def peek(self, x):
+        """(среднее, std) с учетом незакрытой свечи"""
+        return self._result(self._shift(self._state, float(x)))
+
+    @property
+    def value(self):
+        return self._result(self._state)
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class BollingerBands:
+    """Полосы Боллинджера (как calculate_bollinger_bands)"""
+
+    def __init__(self, period=20, std_dev=2):
+        self.std_dev = std_dev
+        self.window = RollingWindow(period)
+
+    def _bands(self, mean_std):
+        mean, std = mean_std
+        return mean, mean + std * self.std_dev, mean - std * self.std_dev
+
+    def update(self, x):
+        """Добавление закрытой свечи, возвращает (средняя, верхняя, нижняя)"""
+        return self._bands(self.window.update(x))
+
+    def peek(self, x):
+        """Полосы с учетом незакрытой свечи"""
+        return self._bands(self.window.peek(x))
+
+    @property
+    def value(self):
+        return self._bands(self.window.value)
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class RSI:
+    """RSI: smoothing='sma' как calculate_rsi, smoothing='wilder' - классический RSI Уайлдера"""
+
+    def __init__(self, period=14, smoothing='sma'):
+        self.period = period
+        self.smoothing = smoothing
+        self.prev = None
+        self.window = deque()  # (gain, loss) последних period изменений
+        self._sum_gain = 0.0
+        self._sum_loss = 0.0
+        self._loss_count = 0  # ненулевые потери в окне - для точного avg_losses == 0
+        self._avg_gain = None
+        self._avg_loss = None
+        self.value = None
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss, has_losses):
+        if not has_losses:
+            return 100
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def _calc(self, gain, loss, commit):
+        if self.smoothing == 'wilder':
+            count = len(self.window) + 1
+            if self._avg_gain is None:
+                # Пока не накоплен период - простое среднее
+                avg_gain = (self._sum_gain + gain) / count
+                avg_loss = (self._sum_loss + loss) / count
+            else:
+                avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+                avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+            if commit:
+                if self._avg_gain is None:
+                    self.window.append((gain, loss))
+                    self._sum_gain += gain
+                    self._sum_loss += loss
+                    if count >= self.period:
+                        self._avg_gain, self._avg_loss = avg_gain, avg_loss
+                else:
+                    self._avg_gain, self._avg_loss = avg_gain, avg_loss
+            return self._rsi(avg_gain, avg_loss, avg_loss != 0)
+
+        sum_gain = self._sum_gain + gain
+        sum_loss = self._sum_loss + loss
+        loss_count = self._loss_count + (loss > 0)
+        count = len(self.window) + 1
+        if count > self.period:
+            old_gain, old_loss = self.window[0]
+            sum_gain -= old_gain
+            sum_loss -= old_loss
+            loss_count -= old_loss > 0
+            count -= 1
+        if commit:
+            self.window.append((gain, loss))
+            if len(self.window) > self.period:
+                self.window.popleft()
+            self._sum_gain, self._sum_loss, self._loss_count = sum_gain, sum_loss, loss_count
+        return self._rsi(sum_gain / count, sum_loss / count, loss_count > 0)
+
+    def update(self, x):
+        """Добавление закрытой свечи"""
+        x = float(x)
+        if self.prev is not None:
+            delta = x - self.prev
+            self.value = self._calc(max(delta, 0.0), max(-delta, 0.0), commit=True)
+        self.prev = x
+        return self.value
+
+    def peek(self, x):
+        """RSI с учетом незакрытой свечи"""
+        if self.prev is None:
+            return self.value
+        delta = float(x) - self.prev
+        return self._calc(max(delta, 0.0), max(-delta, 0.0), commit=False)
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class RollingMinMax:
+    """Скользящие минимум и максимум (монотонные очереди)"""
+
+    def __init__(self, period):
+        self.period = period
+        self.index = 0
+        self._min = deque()  # (индекс, значение)
+        self._max = deque()
+
+    def update(self, x, high=None, low=None):
+        """Добавление свечи (можно передать отдельно high и low)"""
+        high = float(x if high is None else high)
+        low = float(x if low is None else low)
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._max.append((self.index, high))
+        self._min.append((self.index, low))
+        self.index += 1
+        oldest = self.index - self.period
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        """(минимум, максимум) по окну"""
+        if not self._max:
+            return None, None
+        return self._min[0][1], self._max[0][1]
+
+    def seed(self, values):
+        """Инициализация по истории"""
+        for x in values:
+            self.update(x)
+        return self
+
+
+class IndicatorEngine:
+    """Набор индикаторов по цене закрытия, синхронизируемый со свечами OHLCV.
+
+    Закрытые свечи добавляются в индикаторы один раз, последняя (незакрытая)
+    свеча учитывается через peek(). Индикаторы копят всю историю с момента
+    инициализации: для оконных RSI и полос Боллинджера это тот же результат,
+    что пересчет по окну свечей, а EMA/MACD зависят от начала окна и с
+    пересчетом по окну (calculate_ema, calculate_macd) не совпадают.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory  # функция, создающая словарь {имя: индикатор}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Сброс состояния всех индикаторов"""
+        self.indicators = self.factory()
+        self.last_timestamp = None
+        self.last_close = None
+
+    def sync(self, ohlcv):
+        """Синхронизация со свечами, возвращает словарь значений индикаторов"""
+        candles = np.asarray(ohlcv, dtype=np.float64)
+        if candles.ndim != 2 or len(candles) == 0:
+            return {}
+        with self._lock:
+            return self._sync(candles)
+
+    def _sync(self, candles):
+        """Синхронизация под блокировкой"""
+        closed = candles[:-1]
+        if self.last_timestamp is not None:
+            known = np.searchsorted(closed[:, 0], self.last_timestamp)
+            if (known < len(closed) and closed[known, 0] == self.last_timestamp
+                    and closed[known, 4] == self.last_close):
+                closed = closed[known + 1:]
+            else:
+                # Разрыв или другая история (например, другая пара) - пересчитываем с нуля
+                self.reset()
+
+        for candle in closed:
+            for indicator in self.indicators.values():
+                indicator.update(candle[4])
+            self.last_timestamp = candle[0]
+            self.last_close = candle[4]
+
+        current = candles[-1, 4]
+        return {name: (indicator.peek(current) if hasattr(indicator, 'peek') else indicator.value)
+                for name, indicator in self.indicators.items()}
@@ -1,66 +1,237 @@
 """
 ЛОГГИРОВАНИЕ v0.1.16
 Система логирования без иконок
+
+⚡ ОПТИМИЗАЦИЯ: log_*() только кладет запись в очередь, запись в файл и stdout
+делает фоновый поток (QueueListener). Файл - JSON-строки с ротацией по размеру
+и сжатием gzip, уровни - по категориям (модуль вызывающего кода), повторяющиеся
+INFO/DEBUG из одного места кода прореживаются.
 """
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
 import sys
+import threading
+import time
 from datetime import datetime
 
+LOGGER_NAME = 'TradingBot'
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_FILE = 'bot.jsonl'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 5))
+LOG_QUEUE_SIZE = 10000
+# Не больше LOG_SAMPLE_BURST записей INFO/DEBUG из одной строки кода за LOG_SAMPLE_WINDOW сек
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 20))
+LOG_SAMPLE_WINDOW = float(os.getenv('LOG_SAMPLE_WINDOW', 10.0))
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога -> одна JSON-строка"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'category': getattr(record, 'category', record.name),
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Прежний формат консоли + счетчик прореженных записей"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} (+{suppressed} похожих пропущено)" if suppressed else text
+
+
+def _gzip_rotator(source, dest):
+    """Ротация: старый файл сжимается (в потоке записи, не в торговом цикле)"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Очередь переполнена (диск не успевает) - запись отбрасывается, а не блокирует поток"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class LogSampler:
+    """Прореживание повторяющихся сообщений по месту вызова (файл, строка)"""
+
+    def __init__(self, burst=LOG_SAMPLE_BURST, window=LOG_SAMPLE_WINDOW):
+        self.burst = burst
+        self.window = window
+        self._sites = {}  # место вызова -> [начало окна, записано, пропущено]
+        self._lock = threading.Lock()
+
+    def allow(self, site):
+        """(записывать ли, сколько записей пропущено перед этой)"""
+        if self.burst <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+                return True, suppressed
+            if state[1] < self.burst:
+                state[1] += 1
+                return True, 0
+            state[2] += 1
+            return False, 0
+
+
+def _parse_levels(spec):
+    """'webapp=WARNING,core.exchange=DEBUG' -> {категория: уровень}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+_listener = None
+_sampler = LogSampler()
+_category_loggers = {}
+
+
 def setup_logger():
-    """Настройка логгера"""
+    """Настройка логгера (повторный вызов возвращает уже настроенный)"""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
     # Создаем папку для логов если ее нет
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Простое форматирование
-    formatter = logging.Formatter(
-        '%(asctime)s [%(levelname)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Файловый логгер с UTF-8 кодировкой
-    file_handler = logging.FileHandler(
-        f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log',
-        encoding='utf-8'
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    # Файл: JSON-строки, ротация по размеру, старые части сжимаются
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(LOG_DIR, LOG_FILE), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8'
     )
-    file_handler.setFormatter(formatter)
-    
+    file_handler.namer = lambda name: f"{name}.gz"
+    file_handler.rotator = _gzip_rotator
+    file_handler.setFormatter(JsonFormatter())
+
     # Консольный логгер с правильной кодировкой для Windows
     # На Windows используем sys.stdout/stderr, которые уже переконфигурированы в entry points
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    
-    # Настройка основного логгера
-    logger = logging.getLogger('TradingBot')
-    logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    handlers = [file_handler]
+    if os.getenv('LOG_CONSOLE', '1') != '0':
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(TextFormatter())
+        handlers.append(console_handler)
+
+    # Настройка основного логгера: в потоке вызова - только постановка в очередь
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    logger.setLevel(logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper()))
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    logger.propagate = False
+    for category, level in _parse_levels(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(f"{LOGGER_NAME}.{category}").setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush_logs)
     return logger
 
+
+def flush_logs():
+    """Дописать очередь и остановить поток записи (при выходе из процесса)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in logging.getLogger(LOGGER_NAME).handlers[:]:
+            if isinstance(handler, DroppingQueueHandler):
+                logging.getLogger(LOGGER_NAME).removeHandler(handler)
+
+
+def log_stats():
+    """Глубина очереди логов и число отброшенных записей"""
+    handler = next((h for h in logging.getLogger(LOGGER_NAME).handlers if isinstance(h, DroppingQueueHandler)), None)
+    return {
+        'queued': handler.queue.qsize() if handler else 0,
+        'dropped': DroppingQueueHandler.dropped,
+    }
+
+
+def _category_logger(category):
+    """Дочерний логгер категории: уровни задаются через LOG_LEVELS по префиксу модуля"""
+    category_logger = _category_loggers.get(category)
+    if category_logger is None:
+        category_logger = _category_loggers[category] = logging.getLogger(f"{LOGGER_NAME}.{category}")
+    return category_logger
+
+
+def _log(level, message, category=None, depth=2):
+    frame = sys._getframe(depth)
+    category = category or frame.f_globals.get('__name__', 'main')
+    category_logger = _category_logger(category)
+    if not category_logger.isEnabledFor(level):
+        return
+    suppressed = 0
+    if level < logging.WARNING:
+        allowed, suppressed = _sampler.allow((frame.f_code.co_filename, frame.f_lineno))
+        if not allowed:
+            return
+    # Запись собирается без logging.findCaller (обхода стека) - место вызова уже известно
+    record = category_logger.makeRecord(
+        category_logger.name, level, frame.f_code.co_filename, frame.f_lineno, message, (), None,
+        func=frame.f_code.co_name, extra={'category': category, 'suppressed': suppressed}
+    )
+    category_logger.handle(record)
+
+
 # Создаем глобальный логгер
 logger = setup_logger()
 
-def log_info(message):
+def log_info(message, category=None):
     """Логирование информационного сообщения"""
-    logger.info(message)
+    _log(logging.INFO, message, category)
 
-def log_error(message):
+def log_error(message, category=None):
     """Логирование ошибки"""
-    logger.error(message)
+    _log(logging.ERROR, message, category)
 
-def log_warning(message):
+def log_warning(message, category=None):
     """Логирование предупреждения"""
-    logger.warning(message)
+    _log(logging.WARNING, message, category)
 
-def log_debug(message):
+def log_debug(message, category=None):
     """Логирование отладочной информации"""
-    logger.debug(message)
+    _log(logging.DEBUG, message, category)
 
 def log_separator(char="=", length=80):
     """Вывод разделительной линии для лучшей читаемости"""
-    logger.info(char * length)
+    _log(logging.INFO, char * length)
 
 def log_section(title, char="=", length=80):
     """Вывод заголовка секции с разделителями"""
@@ -69,10 +240,10 @@ def log_section(title, char="=", length=80):
     header = f"{char * padding} {title} {char * padding}"
     if len(header) < length:
         header += char
-    logger.info(separator)
-    logger.info(header)
-    logger.info(separator)
+    _log(logging.INFO, separator)
+    _log(logging.INFO, header)
+    _log(logging.INFO, separator)
 
 def log_empty_line():
     """Вывод пустой строки для разделения"""
-    logger.info("")
\ No newline at end of file
+    _log(logging.INFO, "")
@@ -0,0 +1,324 @@
+"""
+ХРАНИЛИЩЕ ОТКРЫТЫХ ПОЗИЦИЙ (SQLITE WAL + КЭШ В ПАМЯТИ)
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from utils.logger import log_info, log_error
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATE_FILE = os.path.join(PROJECT_ROOT, 'position_state.json')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    pair TEXT PRIMARY KEY,
+    next_position_id INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS positions (
+    pair TEXT NOT NULL,
+    id TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    position_size_usdt REAL NOT NULL,
+    amount_crypto REAL NOT NULL,
+    opened_at INTEGER NOT NULL DEFAULT 0,
+    order_id TEXT,
+    is_legacy INTEGER NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (pair, id)
+);
+"""
+
+_POSITION_FIELDS = ('id', 'entry_price', 'position_size_usdt', 'amount_crypto', 'opened_at', 'order_id', 'is_legacy', 'note')
+
+
+def empty_pair(next_position_id=1):
+    """Данные пары без открытых позиций (формат position_state.json)"""
+    return {
+        'positions': [],
+        'total_position_size_usdt': 0,
+        'average_entry_price': 0,
+        'max_entry_price': 0,
+        'total_amount_crypto': 0,
+        'next_position_id': next_position_id
+    }
+
+
+def convert_legacy_state(data):
+    """Старый формат position_state.json (одна позиция на пару) -> массив позиций"""
+    converted = {}
+    for pair_symbol, pair_data in data.items():
+        if not isinstance(pair_data, dict):
+            continue
+        # Если это старый формат (есть 'position' но нет 'positions')
+        if 'position' in pair_data and 'positions' not in pair_data:
+            if pair_data.get('position') == 'long' and pair_data.get('position_size_usdt', 0) > 0:
+                entry_price = pair_data.get('entry_price', 0)
+                position_size = pair_data.get('position_size_usdt', 0)
+                converted[pair_symbol] = {
+                    'positions': [{
+                        'id': 'legacy_auto',
+                        'entry_price': entry_price,
+                        'position_size_usdt': position_size,
+                        'amount_crypto': position_size / entry_price if entry_price > 0 else 0,
+                        'opened_at': pair_data.get('opened_at', 0),
+                        'order_id': None,
+                        'is_legacy': True,
+                        'note': 'Авто-конвертировано из старого формата'
+                    }],
+                    'total_position_size_usdt': position_size,
+                    'average_entry_price': entry_price,
+                    'max_entry_price': entry_price,
+                    'total_amount_crypto': position_size / entry_price if entry_price > 0 else 0,
+                    'next_position_id': 2
+                }
+            else:
+                # Позиция закрыта
+                converted[pair_symbol] = empty_pair()
+        else:
+            # Уже новый формат
+            converted[pair_symbol] = pair_data
+    return converted
+
+
+def read_state_file(file_path):
+    """Чтение position_state.json (только для переноса в хранилище)"""
+    for encoding in ['utf-8', 'latin-1', 'utf-16']:
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                return convert_legacy_state(json.load(f))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            continue
+    return {}
+
+
+class PositionStore:
+    """Открытые позиции по парам.
+
+    Все чтения идут из словаря в памяти (формат прежнего position_state.json),
+    каждое изменение - одна транзакция SQLite в режиме WAL: запись не переписывает
+    остальные позиции и не повреждает базу при падении процесса.
+    Итоги пары (объем, средняя и максимальная цена входа) пересчитываются
+    по изменению, а не по всему списку.
+    """
+
+    def __init__(self, db_path, legacy_file=None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._pairs = {}
+        self._load()
+        if not self._pairs and legacy_file and os.path.exists(legacy_file):
+            self._import_file(legacy_file)
+
+    # ---------- загрузка ----------
+
+    def _load(self):
+        for pair, next_id in self._conn.execute('SELECT pair, next_position_id FROM pairs'):
+            self._pairs[pair] = empty_pair(next_id)
+        rows = self._conn.execute(
+            f"SELECT pair, {', '.join(_POSITION_FIELDS)} FROM positions ORDER BY rowid")
+        for row in rows:
+            position = dict(zip(_POSITION_FIELDS, row[1:]))
+            position['id'] = self._restore_id(position['id'])
+            position['is_legacy'] = bool(position['is_legacy'])
+            pair_data = self._pairs.setdefault(row[0], empty_pair())
+            self._append(pair_data, position)
+
+    def _import_file(self, file_path):
+        """Перенос позиций из position_state.json (один раз, при первом запуске)"""
+        try:
+            state = read_state_file(file_path)
+            with self._transaction():
+                for pair, pair_data in state.items():
+                    self._pairs[pair] = empty_pair(pair_data.get('next_position_id', 1))
+                    self._save_pair(pair)
+                    for position in pair_data.get('positions', []):
+                        position = self._normalize(position)
+                        self._insert(pair, position)
+                        self._append(self._pairs[pair], position)
+            log_info(f"💾 Позиции перенесены из {os.path.basename(file_path)} в {os.path.basename(self.db_path)}")
+        except Exception as e:
+            self._pairs = {}
+            log_error(f"❌ Ошибка переноса позиций из {file_path}: {e}")
+
+    @staticmethod
+    def _restore_id(value):
+        return int(value) if isinstance(value, str) and value.isdigit() else value
+
+    @staticmethod
+    def _normalize(position):
+        return {
+            'id': position.get('id'),
+            'entry_price': position.get('entry_price', 0) or 0,
+            'position_size_usdt': position.get('position_size_usdt', 0) or 0,
+            'amount_crypto': position.get('amount_crypto', 0) or 0,
+            'opened_at': position.get('opened_at', 0) or 0,
+            'order_id': position.get('order_id'),
+            'is_legacy': bool(position.get('is_legacy', False)),
+            'note': position.get('note', '') or '',
+        }
+
+    # ---------- итоги пары ----------
+
+    @staticmethod
+    def _append(pair_data, position):
+        pair_data['positions'].append(position)
+        pair_data['total_position_size_usdt'] += position['position_size_usdt']
+        pair_data['total_amount_crypto'] += position['amount_crypto']
+        pair_data['max_entry_price'] = max(pair_data['max_entry_price'], position['entry_price'])
+        PositionStore._update_average(pair_data)
+
+    @staticmethod
+    def _update_average(pair_data):
+        total_amount = pair_data['total_amount_crypto']
+        pair_data['average_entry_price'] = pair_data['total_position_size_usdt'] / total_amount if total_amount > 0 else 0
+
+    @staticmethod
+    def _discard(pair_data, position):
+        pair_data['positions'].remove(position)
+        if not pair_data['positions']:
+            # Без позиций итоги обнуляются точно (без накопленной ошибки вычитания)
+            pair_data.update(empty_pair(pair_data['next_position_id']))
+            return
+        pair_data['total_position_size_usdt'] -= position['position_size_usdt']
+        pair_data['total_amount_crypto'] -= position['amount_crypto']
+        if position['entry_price'] >= pair_data['max_entry_price']:
+            pair_data['max_entry_price'] = max(p['entry_price'] for p in pair_data['positions'])
+        PositionStore._update_average(pair_data)
+
+    # ---------- запись ----------
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _save_pair(self, pair, next_position_id=None):
+        if next_position_id is None:
+            next_position_id = self._pairs[pair]['next_position_id']
+        self._conn.execute(
+            'INSERT INTO pairs (pair, next_position_id) VALUES (?, ?) '
+            'ON CONFLICT(pair) DO UPDATE SET next_position_id = excluded.next_position_id',
+            (pair, next_position_id))
+
+    def _insert(self, pair, position):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO positions (pair, {', '.join(_POSITION_FIELDS)}) VALUES (?{', ?' * len(_POSITION_FIELDS)})",
+            (pair, str(position['id']), position['entry_price'], position['position_size_usdt'],
+             position['amount_crypto'], position['opened_at'],
+             None if position['order_id'] is None else str(position['order_id']),
+             int(position['is_legacy']), position['note']))
+
+    def add_position(self, pair_symbol, entry_price, position_size_usdt, amount_crypto, order_id=None):
+        """Добавление позиции пары"""
+        with self._lock:
+            pair_data = self._pairs.setdefault(pair_symbol, empty_pair())
+            next_id = pair_data['next_position_id']
+            position = {
+                'id': next_id,
+                'entry_price': entry_price,
+                'position_size_usdt': position_size_usdt,
+                'amount_crypto': amount_crypto,
+                'opened_at': int(datetime.now().timestamp() * 1000),
+                'order_id': order_id,
+                'is_legacy': False,
+                'note': ''
+            }
+            with self._transaction():
+                self._save_pair(pair_symbol, next_id + 1)
+                self._insert(pair_symbol, position)
+            # Память меняется только после успешного COMMIT
+            pair_data['next_position_id'] = next_id + 1
+            self._append(pair_data, position)
+            return dict(position)
+
+    def remove_position(self, pair_symbol, position_id):
+        """Удаление одной позиции (закрыта вручную); False, если позиции нет"""
+        with self._lock:
+            pair_data = self._pairs.get(pair_symbol)
+            if not pair_data:
+                return False
+            position = next((p for p in pair_data['positions'] if str(p['id']) == str(position_id)), None)
+            if position is None:
+                return False
+            numeric_ids = [p['id'] for p in pair_data['positions'] if p is not position and isinstance(p['id'], int)]
+            next_id = max(numeric_ids) + 1 if numeric_ids else 1
+            with self._transaction():
+                self._conn.execute('DELETE FROM positions WHERE pair = ? AND id = ?', (pair_symbol, str(position['id'])))
+                self._save_pair(pair_symbol, next_id)
+            pair_data['next_position_id'] = next_id
+            self._discard(pair_data, position)
+            return True
+
+    def close_all(self, pair_symbol):
+        """Закрытие всех позиций пары (номер следующей позиции сохраняется)"""
+        with self._lock:
+            pair_data = self._pairs.get(pair_symbol)
+            if pair_data is None:
+                return False
+            with self._transaction():
+                self._conn.execute('DELETE FROM positions WHERE pair = ?', (pair_symbol,))
+            pair_data.update(empty_pair(pair_data['next_position_id']))
+            return True
+
+    # ---------- чтение (из памяти) ----------
+
+    def get_pair(self, pair_symbol):
+        """Копия данных пары ({} - пары нет)"""
+        with self._lock:
+            pair_data = self._pairs.get(pair_symbol)
+            return dict(pair_data, positions=[dict(p) for p in pair_data['positions']]) if pair_data else {}
+
+    def get_state(self):
+        """Копия всех пар в формате position_state.json"""
+        with self._lock:
+            return {pair: dict(data, positions=[dict(p) for p in data['positions']]) for pair, data in self._pairs.items()}
+
+    def count(self, pair_symbol=None):
+        """Число открытых позиций пары (или всех пар)"""
+        with self._lock:
+            if pair_symbol is not None:
+                return len(self._pairs.get(pair_symbol, {}).get('positions', []))
+            return sum(len(data['positions']) for data in self._pairs.values())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK при ошибке)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        return False
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_position_store(file_path=DEFAULT_STATE_FILE, create=True):
+    """Хранилище для position_state.json по пути file_path (база - рядом, position_state.db).
+
+    create=False - только чтение: None, если ни базы, ни файла еще нет (файлы не создаются).
+    """
+    file_path = os.path.abspath(file_path)
+    with _stores_lock:
+        store = _stores.get(file_path)
+        if store is None:
+            db_path = os.path.splitext(file_path)[0] + '.db'
+            if not create and not os.path.exists(db_path) and not os.path.exists(file_path):
+                return None
+            store = _stores[file_path] = PositionStore(db_path, legacy_file=file_path)
+        return store
@@ -0,0 +1,128 @@
+"""
+ПРОФИЛИРОВАНИЕ РАБОТАЮЩЕГО БОТА ПО ЗАПРОСУ (СЭМПЛИРОВАНИЕ СТЕКОВ ВСЕХ ПОТОКОВ)
+"""
+import os
+import sys
+import threading
+import time
+from utils.logger import log_info
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_INTERVAL = 0.01      # сек между снимками стеков (100 Гц)
+PROFILE_MAX_SECONDS = 60     # предел длительности одного профилирования
+PROFILE_MAX_DEPTH = 128      # кадров стека в одном снимке (глубже - обрезается у корня)
+
+
+class ProfileResult:
+    """Собранные стеки: (поток, кадры от корня к листу) -> число снимков"""
+
+    def __init__(self, stacks, samples, duration, interval):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+
+    def collapsed(self):
+        """Свернутые стеки ('поток;f1;f2 N') - вход flamegraph.pl, speedscope, inferno"""
+        lines = [';'.join((thread,) + frames) + f" {count}"
+                 for (thread, frames), count in sorted(self.stacks.items(), key=lambda item: -item[1])]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def top(self, limit=15):
+        """Функции с наибольшим собственным (лист стека) и полным временем, доля от снимков стеков всех потоков"""
+        own = {}
+        total = {}
+        threads = {}
+        for (thread, frames), count in self.stacks.items():
+            threads[thread] = threads.get(thread, 0) + count
+            if frames:
+                own[frames[-1]] = own.get(frames[-1], 0) + count
+            for frame in set(frames):
+                total[frame] = total.get(frame, 0) + count
+        samples = sum(threads.values()) or 1
+
+        def rank(counts):
+            return [{'function': name, 'samples': count, 'share': round(count / samples, 4)}
+                    for name, count in sorted(counts.items(), key=lambda item: -item[1])[:limit]]
+
+        return {
+            'samples': self.samples,
+            'duration': round(self.duration, 3),
+            'interval_ms': round(self.interval * 1000, 2),
+            'threads': dict(sorted(threads.items(), key=lambda item: -item[1])),
+            'self': rank(own),
+            'total': rank(total),
+        }
+
+
+class SamplingProfiler:
+    """Периодические снимки стеков всех потоков через sys._current_frames().
+
+    Без профилирования не работает ни одного потока и хука, во время него
+    цена для бота - один снимок стеков раз в interval; одновременно идет
+    только одно профилирование.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._busy = threading.Lock()
+        self._labels = {}  # объект кода -> 'функция (файл:строка)'
+
+    @property
+    def running(self):
+        return self._busy.locked()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(PROJECT_ROOT):
+                filename = os.path.relpath(filename, PROJECT_ROOT)
+            else:
+                filename = os.path.join(*filename.replace('\\', '/').split('/')[-2:])
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ',')
+        return label
+
+    def sample(self, stacks, skip_ident=None):
+        """Один снимок стеков всех потоков (кроме skip_ident) в словарь stacks"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            frames = []
+            while frame is not None and len(frames) < PROFILE_MAX_DEPTH:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            frames.reverse()
+            key = (names.get(ident, f"thread-{ident}").replace(';', ','), tuple(frames))
+            stacks[key] = stacks.get(key, 0) + 1
+
+    def profile(self, seconds, interval=None):
+        """Профилирование в вызывающем потоке на seconds сек; None - уже идет другое"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            interval = interval or self.interval
+            seconds = max(0.0, min(float(seconds), PROFILE_MAX_SECONDS))
+            own_ident = threading.get_ident()
+            stacks = {}
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            log_info(f"🔬 Профилирование всех потоков: {seconds:.1f}s, снимок раз в {interval * 1000:.0f} мс")
+            while True:
+                self.sample(stacks, own_ident)
+                samples += 1
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                time.sleep(min(interval, deadline - now))
+            duration = time.perf_counter() - started
+            log_info(f"🔬 Профилирование завершено: {samples} снимков, {len(stacks)} разных стеков")
+            return ProfileResult(stacks, samples, duration, interval)
+        finally:
+            self._labels.clear()
+            self._busy.release()
+
+
+sampling_profiler = SamplingProfiler()
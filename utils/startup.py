@@ -0,0 +1,173 @@
+"""
+ЛЕНИВЫЕ ИМПОРТЫ И ПРОФИЛИРОВАНИЕ ЗАПУСКА
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Точка отсчета запуска: модуль импортируется первым в точках входа (webapp/server_dev.py)
+PROCESS_START = time.perf_counter()
+# STARTUP_PROFILE_IMPORTS=1 - замер времени импорта каждого модуля
+IMPORT_PROFILE_ENV = 'STARTUP_PROFILE_IMPORTS'
+
+
+def lazy_exports(package, exports):
+    """Функции __getattr__/__dir__ (PEP 562) для __init__.py пакета.
+
+    exports: имя -> относительный модуль. Модуль импортируется при первом
+    обращении к имени, поэтому `import core.rate_limiter` не тянет за собой
+    core.bot со всеми зависимостями.
+    """
+    def __getattr__(name):
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
+
+
+class _TimedLoader:
+    """Загрузчик модуля, который замеряет exec_module (остальное - как у исходного)"""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = self._profiler._import_stack()
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            self._profiler._record_import(module.__name__, total, total - children)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer:
+    """Finder в начале sys.meta_path: находит модуль остальными finder'ами и оборачивает загрузчик"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self._profiler)
+        return spec
+
+
+class StartupProfiler:
+    """Время импорта модулей и готовности подсистем с момента запуска процесса"""
+
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._imports = {}  # модуль -> (с вложенными импортами, собственное), сек
+        self._subsystems = {}  # подсистема -> {'ready_at', 'duration'}
+        self._timer = None
+
+    # ---------- импорты ----------
+
+    def enable_import_timing(self):
+        """Замер времени импорта всех следующих модулей"""
+        if self._timer is None:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def disable_import_timing(self):
+        if self._timer is not None:
+            try:
+                sys.meta_path.remove(self._timer)
+            except ValueError:
+                pass
+            self._timer = None
+
+    def _import_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record_import(self, name, total, own):
+        with self._lock:
+            self._imports[name] = (total, own)
+
+    def imports(self, limit=15):
+        """Самые долгие импорты: [{'module', 'total_ms', 'self_ms'}, ...]"""
+        with self._lock:
+            items = sorted(self._imports.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [{'module': name, 'total_ms': round(total * 1000, 1), 'self_ms': round(own * 1000, 1)}
+                for name, (total, own) in items]
+
+    # ---------- подсистемы ----------
+
+    @contextmanager
+    def stage(self, name):
+        """Синхронная инициализация подсистемы: длительность и момент готовности"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ready(name, time.perf_counter() - started)
+
+    def ready(self, name, duration=None):
+        """Подсистема готова (для фоновых - вызывается из их потока); учитывается первый вызов"""
+        now = time.perf_counter()
+        with self._lock:
+            if name in self._subsystems:
+                return
+            self._subsystems[name] = {
+                'ready_at': round(now - self.start, 3),
+                'duration': round(duration, 3) if duration is not None else None,
+            }
+
+    def report(self, limit=15):
+        with self._lock:
+            subsystems = dict(sorted(self._subsystems.items(), key=lambda item: item[1]['ready_at']))
+        return {
+            'uptime': round(time.perf_counter() - self.start, 3),
+            'subsystems': subsystems,
+            'imports': self.imports(limit),
+            'import_timing': self._timer is not None,
+        }
+
+    def log_report(self, limit=10):
+        """Сводка запуска в лог"""
+        from utils.logger import log_info
+        report = self.report(limit)
+        log_info("⏱️ Готовность подсистем (сек от запуска): " + ", ".join(
+            f"{name} {info['ready_at']:.2f}" for name, info in report['subsystems'].items()))
+        for item in report['imports']:
+            log_info(f"   импорт {item['module']}: {item['total_ms']:.0f} мс (собственное {item['self_ms']:.0f} мс)")
+
+
+startup_profiler = StartupProfiler()
+if os.getenv(IMPORT_PROFILE_ENV) == '1':
+    startup_profiler.enable_import_timing()
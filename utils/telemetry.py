@@ -0,0 +1,299 @@
+"""
+МЕТРИКИ В ФОРМАТЕ PROMETHEUS (СЧЕТЧИКИ, ГАУГИ, ГИСТОГРАММЫ)
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+METRICS_PREFIX = 'kucoinbot'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы корзин гистограмм (сек)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+CYCLE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Метрика с набором меток: labels(...) возвращает (и кэширует) значение для комбинации меток"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}  # кортеж значений меток -> значение
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}, получено {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self):
+        """[(суффикс, значения меток, доп. метка, значение), ...]"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class _CounterValue:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик (имя должно оканчиваться на _total)"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def values(self):
+        """Текущие значения: кортеж значений меток -> значение"""
+        return {key: child.value for key, child in list(self._children.items())}
+
+    def _samples(self):
+        return [('', key, None, child.value) for key, child in list(self._children.items())]
+
+
+class _GaugeValue:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Значение вычисляется при чтении метрик (нет затрат в рабочем коде)"""
+        self.function = function
+
+    def get(self):
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return math.nan
+
+
+class Gauge(_Metric):
+    """Текущее значение (число клиентов, размер очереди)"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value):
+        self._children[()].set(value)
+
+    def set_function(self, function):
+        self._children[()].set_function(function)
+
+    def _samples(self):
+        return [('', key, None, child.get()) for key, child in list(self._children.items())]
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина - +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        # ⚡ ОПТИМИЗАЦИЯ: бинарный поиск корзины и одно увеличение, накопление - при выдаче метрик
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Замер длительности блока"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self):
+        """(накопленные счетчики по корзинам, сумма, количество)"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+    def quantile(self, q):
+        """Оценка квантиля по корзинам (как histogram_quantile в Prometheus)"""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        lower_bound, lower_count = 0.0, 0
+        for bound, cumulative_count in zip(self.bounds, cumulative):
+            if cumulative_count >= rank:
+                bucket = cumulative_count - lower_count
+                return lower_bound + (bound - lower_bound) * ((rank - lower_count) / bucket if bucket else 0)
+            lower_bound, lower_count = bound, cumulative_count
+        return self.bounds[-1]
+
+
+class Histogram(_Metric):
+    """Распределение длительностей по фиксированным корзинам (p50/p99 - histogram_quantile)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _samples(self):
+        samples = []
+        for key, child in list(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, value in zip(self.buckets + (math.inf,), cumulative):
+                samples.append(('_bucket', key, ('le', _format_value(bound)), value))
+            samples.append(('_sum', key, None, total))
+            samples.append(('_count', key, None, count))
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса и функций, дописывающих метрики при чтении"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # модуль импортирован повторно - метрика общая
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(f"{METRICS_PREFIX}_{name}")
+
+    def add_collector(self, collector):
+        """collector() вызывается перед выдачей метрик (обновляет гауги из статистики модулей)"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                pass
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda item: item.name):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Метрики горячих путей (имена без префикса kucoinbot_)
+EXCHANGE_REQUEST_SECONDS = registry.histogram(
+    'exchange_request_seconds', 'Длительность REST-запроса к бирже', ('endpoint', 'method'))
+EXCHANGE_ERRORS_TOTAL = registry.counter(
+    'exchange_errors_total', 'Ошибки REST-запросов к бирже', ('endpoint', 'error'))
+RATE_LIMIT_WAIT_SECONDS = registry.histogram(
+    'rate_limit_wait_seconds', 'Ожидание токенов ограничителя запросов', ('pool', 'lane'), FAST_BUCKETS)
+TRADING_CYCLE_SECONDS = registry.histogram(
+    'trading_cycle_seconds', 'Длительность торгового цикла по всем парам', buckets=CYCLE_BUCKETS)
+ML_INFERENCE_SECONDS = registry.histogram(
+    'ml_inference_seconds', 'Время предсказания ML-модели', buckets=FAST_BUCKETS)
+CACHE_REQUESTS_TOTAL = registry.counter(
+    'cache_requests_total', 'Обращения к кэшу по результату', ('cache', 'result'))
+CACHE_HIT_RATIO = registry.gauge(
+    'cache_hit_ratio', 'Доля обращений к кэшу без запроса к источнику', ('cache',))
+WS_FANOUT_SECONDS = registry.histogram(
+    'ws_fanout_seconds', 'Время рассылки обновления клиентам WebSocket', buckets=FAST_BUCKETS)
+WS_CLIENTS = registry.gauge('ws_clients', 'Подключенные клиенты WebSocket')
+TELEGRAM_SEND_SECONDS = registry.histogram(
+    'telegram_send_seconds', 'Длительность отправки сообщения в Telegram', ('result',))
@@ -0,0 +1,184 @@
+"""
+ТРАССИРОВКА ТОРГОВЫХ ЦИКЛОВ (ЭТАПЫ ЦИКЛА В КОЛЬЦЕВОМ БУФЕРЕ)
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_CYCLES = int(os.getenv('TRACE_CYCLES', 100))  # последних циклов в памяти
+MAX_SPANS_PER_CYCLE = 500  # дальше этапы не записываются (защита от циклов по сотням пар)
+
+_local = threading.local()
+
+
+class CycleTrace:
+    """Один цикл: этапы с началом и длительностью относительно старта цикла"""
+    __slots__ = ('name', 'started', 'started_at', 'duration', 'spans', 'dropped', 'error')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []  # (имя, начало, длительность, глубина, атрибуты)
+        self.dropped = 0
+        self.error = None
+
+    def add(self, name, started, duration, depth, attrs=None):
+        # Этапы добавляют и рабочие потоки цикла (attach): list.append атомарен
+        if len(self.spans) >= MAX_SPANS_PER_CYCLE:
+            self.dropped += 1
+            return
+        self.spans.append((name, started - self.started, duration, depth, attrs))
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round((self.duration or 0.0) * 1000, 2),
+            'error': self.error,
+            'dropped_spans': self.dropped,
+            'spans': [
+                dict({'name': name, 'start_ms': round(start * 1000, 2), 'duration_ms': round(duration * 1000, 2),
+                      'depth': depth}, **(attrs or {}))
+                for name, start, duration, depth, attrs in self.spans
+            ],
+        }
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CycleTracer:
+    """Кольцевой буфер последних циклов.
+
+    Вне цикла span() ничего не записывает, внутри - два perf_counter() и
+    добавление кортежа в список, поэтому трассировка включена постоянно.
+    """
+
+    def __init__(self, capacity=TRACE_CYCLES):
+        self._cycles = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    @contextmanager
+    def cycle(self, name='trading_cycle'):
+        """Цикл текущего потока: этапы внутри блока записываются в его трассу"""
+        if getattr(_local, 'trace', None) is not None:
+            with span(name):  # вложенный цикл - этап внешнего
+                yield
+            return
+        trace = _local.trace = CycleTrace(name)
+        _local.depth = 0
+        try:
+            yield trace
+        except Exception as e:
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _local.trace = None
+            _local.depth = 0
+            trace.duration = time.perf_counter() - trace.started
+            with self._lock:
+                self._cycles.append(trace)
+                self.total += 1
+
+    def cycles(self):
+        with self._lock:
+            return list(self._cycles)
+
+    def clear(self):
+        with self._lock:
+            self._cycles.clear()
+
+    def report(self, slowest=5):
+        """Разбивка времени по этапам за последние циклы и самые долгие циклы"""
+        cycles = self.cycles()
+        stages = {}
+        depths = {}
+        for trace in cycles:
+            per_cycle = {}
+            for name, _, duration, depth, _ in trace.spans:
+                per_cycle[name] = per_cycle.get(name, 0.0) + duration
+                depths[name] = min(depth, depths.get(name, depth))
+            for name, duration in per_cycle.items():
+                stages.setdefault(name, []).append(duration)
+        durations = sorted(trace.duration for trace in cycles)
+        total_time = sum(durations)
+        breakdown = {}
+        for name, values in sorted(stages.items(), key=lambda item: sum(item[1]), reverse=True):
+            values.sort()
+            breakdown[name] = {
+                'depth': depths[name],  # вложенные этапы входят во время внешних
+                'cycles': len(values),
+                'avg_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(_percentile(values, 0.5) * 1000, 2),
+                'p99_ms': round(_percentile(values, 0.99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+                'share': round(sum(values) / total_time, 4) if total_time else 0.0,
+            }
+        return {
+            'recorded': len(cycles),
+            'total': self.total,
+            'cycle_ms': {
+                'avg': round(total_time / len(durations) * 1000, 2) if durations else 0.0,
+                'p50': round(_percentile(durations, 0.5) * 1000, 2),
+                'p99': round(_percentile(durations, 0.99) * 1000, 2),
+                'max': round(durations[-1] * 1000, 2) if durations else 0.0,
+            },
+            'stages': breakdown,
+            'slowest': [trace.to_dict() for trace in sorted(cycles, key=lambda t: t.duration, reverse=True)[:slowest]],
+            'last': cycles[-1].to_dict() if cycles else None,
+        }
+
+
+@contextmanager
+def span(name, **attrs):
+    """Этап текущего цикла (вне цикла - без записи)"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        yield
+        return
+    depth = _local.depth
+    _local.depth = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        trace.add(name, started, time.perf_counter() - started, depth, attrs)
+
+
+def record_span(name, started, duration, **attrs):
+    """Уже замеренный этап (started - perf_counter() начала), например REST-запрос в обертке ccxt"""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.add(name, started, duration, _local.depth, attrs)
+
+
+def capture():
+    """Трасса цикла и глубина текущего этапа - для передачи в рабочий поток (None вне цикла)"""
+    trace = getattr(_local, 'trace', None)
+    return None if trace is None else (trace, _local.depth)
+
+
+@contextmanager
+def attach(context):
+    """Этапы рабочего потока (пул потоков цикла) записываются в трассу, захваченную capture()"""
+    if context is None or getattr(_local, 'trace', None) is not None:
+        yield
+        return
+    _local.trace, _local.depth = context
+    try:
+        yield
+    finally:
+        _local.trace = None
+        _local.depth = 0
+
+
+cycle_tracer = CycleTracer()
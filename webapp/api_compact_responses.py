@@ -8,6 +8,7 @@ v0.1.9 - Компактные ответы, меньше трафика, быс
 from fastapi import Query
 from datetime import datetime
 import time
+from webapp.ws_protocol import shorten, STATUS_SCHEMA, MARKET_SCHEMA, POSITION_SCHEMA
 
 # Добавить в webapp/server.py перед конечными эндпоинтами
 
@@ -23,20 +24,12 @@ def compact_status_response(full_response: dict) -> dict:
     
     # Защита от случая, когда positions это список (обратная совместимость)
     if isinstance(positions, list):
-        positions = {'open_count': len(positions), 'size_usdt': 0, 'entry_price': 0, 'current_profit_percent': 0, 'current_profit_usdt': 0, 'to_take_profit': 0}
+        full_response = dict(full_response, positions={'open_count': len(positions)})
     
-    # Компактный формат
-    return {
-        'p': {  # positions
-            'c': positions.get('open_count', 0),  # count
-            's': round(positions.get('size_usdt', 0), 2),  # size
-            'e': round(positions.get('entry_price', 0), 2),  # entry
-            'pr': round(positions.get('current_profit_percent', 0), 2),  # profit_percent
-            'pu': round(positions.get('current_profit_usdt', 0), 2),  # profit_usdt
-            't': round(positions.get('to_take_profit', 0), 2),  # to_take_profit
-        },
-        'ts': int(time.time())  # timestamp (Unix время - компактнее ISO)
-    }
+    # Компактный формат (ключи - webapp/ws_protocol.py STATUS_SCHEMA)
+    result = shorten(full_response, STATUS_SCHEMA)
+    result['ts'] = int(time.time())  # timestamp (Unix время - компактнее ISO)
+    return result
 
 
 def compact_market_response(full_response: dict) -> dict:
@@ -46,27 +39,10 @@ def compact_market_response(full_response: dict) -> dict:
     Было: 1.5 KB
     Стало: 0.5 KB (экономия 67%)
     """
-    ema = full_response.get('ema', {})
-    ml = full_response.get('ml', {})
-    
-    # Компактный формат
-    return {
-        'sym': full_response.get('symbol', ''),  # symbol
-        'p': round(full_response.get('current_price', 0), 2),  # price
-        'h': round(full_response.get('high_24h', 0), 2),  # high
-        'l': round(full_response.get('low_24h', 0), 2),  # low
-        'v': int(full_response.get('volume_24h', 0)),  # volume
-        'ch': round(full_response.get('change_24h', 0), 2),  # change
-        'e': {  # ema
-            's': ema.get('signal', 'wait'),  # signal
-            'p': round(ema.get('percent', 0), 2),  # percent
-        },
-        'sg': full_response.get('signal', 'wait'),  # signal
-        'm': {  # ml
-            'pr': round(ml.get('prediction', 0.5), 2),  # prediction
-        },
-        'ts': int(time.time())  # timestamp
-    }
+    # Компактный формат (ключи - webapp/ws_protocol.py MARKET_SCHEMA)
+    result = shorten(full_response, MARKET_SCHEMA)
+    result['ts'] = int(time.time())  # timestamp
+    return result
 
 
 def compact_positions_response(full_response: dict) -> list:
@@ -86,19 +62,9 @@ def compact_positions_response(full_response: dict) -> list:
         # Если это прямой список позиций
         positions = full_response if isinstance(full_response, list) else []
     
-    # Компактный формат - возвращаем список, как и полный ответ
+    # Компактный формат - возвращаем список, как и полный ответ (ключи - POSITION_SCHEMA)
     return [
-        {
-            'id': p.get('id'),
-            'sym': p.get('pair', p.get('symbol', '')),  # Поддерживаем оба имени
-            'sz': round(p.get('position_size_usdt', 0), 2),  # size
-            'ep': round(p.get('entry_price', 0), 2),  # entry_price
-            'cp': round(p.get('current_price', 0), 2),  # current_price
-            'amt': round(p.get('amount', 0), 8),  # amount
-            'pnl': round(p.get('pnl', 0), 2),  # pnl
-            'pnl%': round(p.get('pnl_percent', 0), 2),  # pnl_percent
-            'sts': p.get('status', 'long'),  # status
-        }
+        shorten(dict(p, pair=p.get('pair', p.get('symbol', ''))), POSITION_SCHEMA)  # Поддерживаем оба имени
         for p in positions
     ]
 
@@ -0,0 +1,93 @@
+"""
+АСИНХРОННЫЙ ДОСТУП К БИРЖЕ ДЛЯ WEB APP
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.rate_limiter import exchange_lane
+from utils.logger import log_error
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 5.0
+
+# Сколько запросов эндпоинта одновременно может ждать биржу
+ENDPOINT_LIMITS = {
+    'status': 4,
+    'market': 4,
+    'positions': 4,
+    'ws': 1,
+}
+
+# Таймаут (сек) с учетом ожидания в очереди
+ENDPOINT_TIMEOUTS = {
+    'status': 3.0,
+    'market': 3.0,
+    'positions': 5.0,
+    'ws': 2.0,
+}
+
+
+class ExchangeGateway:
+    """Синхронные методы ExchangeManager в ограниченном пуле потоков.
+
+    Обработчики FastAPI ждут ответ биржи через await, поэтому медленный KuCoin
+    задерживает только запросы, которым нужны свежие данные, а не весь event loop.
+    Каждый эндпоинт имеет свой лимит параллельных запросов и таймаут.
+    """
+
+    def __init__(self, exchange, max_workers=DEFAULT_MAX_WORKERS, limits=None, timeouts=None):
+        self.exchange = exchange
+        self.limits = {**ENDPOINT_LIMITS, **(limits or {})}
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='exchange-gateway')
+        self._semaphores = {}
+        self.stats = {'calls': 0, 'timeouts': 0, 'errors': 0}
+
+    def _semaphore(self, endpoint):
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(endpoint, DEFAULT_MAX_WORKERS))
+            self._semaphores[endpoint] = semaphore
+        return semaphore
+
+    async def call(self, endpoint, func, *args, default=None, **kwargs):
+        """Вызов func(*args, **kwargs) в пуле; при таймауте или ошибке - default"""
+        timeout = self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+        deadline = time.monotonic() + timeout
+        semaphore = self._semaphore(endpoint)
+        self.stats['calls'] += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+            try:
+                loop = asyncio.get_running_loop()
+                # 🚦 Запросы Web App - в очереди 'ui': ордера и баланс бота идут вперед них
+                call = exchange_lane('ui')(functools.partial(func, *args, **kwargs))
+                future = loop.run_in_executor(self._executor, call)
+                remaining = max(0.0, deadline - time.monotonic())
+                # Поток при таймауте дорабатывает сам, но обработчик его уже не ждет
+                return await asyncio.wait_for(future, remaining)
+            finally:
+                semaphore.release()
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            log_error(f"⌛️ Биржа не ответила за {timeout}s ({endpoint}: {getattr(func, '__name__', func)})")
+            return default
+        except Exception as e:
+            self.stats['errors'] += 1
+            log_error(f"❌ Ошибка запроса к бирже ({endpoint}: {getattr(func, '__name__', func)}): {e}")
+            return default
+
+    def markets_ready(self):
+        """Загружены ли рынки (без ожидания)"""
+        markets_loaded = getattr(self.exchange, 'markets_loaded', None)
+        return markets_loaded is None or markets_loaded.is_set()
+
+    async def get_ticker(self, symbol, endpoint='market'):
+        return await self.call(endpoint, self.exchange.get_ticker, symbol)
+
+    async def get_tickers(self, symbols, endpoint='positions'):
+        return await self.call(endpoint, self.exchange.get_tickers, list(symbols), default={})
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -22,12 +22,20 @@ from fastapi import FastAPI, HTTPException, Query, Body, WebSocket, WebSocketDis
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 import asyncio
 import json
 
-from utils.logger import log_info, log_error
+from utils.logger import log_info, log_error, log_debug
+from webapp.exchange_gateway import ExchangeGateway
+from utils.cache import SWRCache
+from webapp.ws_fanout import WebSocketFanout
+from webapp import ws_protocol
+from utils.startup import startup_profiler
+from utils import telemetry
+from utils.tracing import cycle_tracer
+from utils.profiler import sampling_profiler, PROFILE_MAX_SECONDS
 import time
 
 # Импортируем компактные форматы для оптимизации трафика
@@ -71,40 +79,48 @@ app.add_middleware(
 
 # Глобальная переменная для экземпляра бота (будет установлена при запуске)
 trading_bot = None
-
-# ⚡ КЭШ для оптимизации API запросов
-_api_cache = {
-    'status': {'data': None, 'timestamp': 0},
-    'market': {'data': None, 'timestamp': 0},
-    'positions': {'data': None, 'timestamp': 0},
-}
-_cache_ttl = {
-    'status': 2,     # 2 секунды для статуса
-    'market': 3,     # 3 секунды для рынка  
-    'positions': 5,  # 5 секунд для позиций
+# ⚡ Запросы к бирже из обработчиков идут через пул потоков, не блокируя event loop
+exchange_gateway = None
+
+# ⚡ КЭШ ответов API: TTL по эндпоинтам, один запрос на ключ, устаревшее отдается во время обновления
+API_CACHE_TTL = {
+    'status': 2,      # 2 секунды для статуса
+    'market': 3,      # 3 секунды для рынка
+    'positions': 5,   # 5 секунд для позиций
+    'analytics': 10,  # 10 секунд для аналитики
 }
+api_cache = SWRCache(max_size=128, stale_ttl=30, name='api')
 
-def _get_cached_or_fetch(cache_key: str, fetch_func, *args, **kwargs):
-    """Возвращает кэшированные данные или вызывает функцию для получения новых"""
-    import time
-    now = time.time()
-    cache = _api_cache.get(cache_key)
-    
-    if cache and cache['data'] and (now - cache['timestamp']) < _cache_ttl.get(cache_key, 5):
-        return cache['data']
-    
-    # Получаем новые данные
-    data = fetch_func(*args, **kwargs)
-    _api_cache[cache_key] = {'data': data, 'timestamp': now}
-    return data
+
+@app.middleware("http")
+async def invalidate_api_cache(request, call_next):
+    """Любое изменяющее действие (POST /api/...) сбрасывает кэш ответов"""
+    response = await call_next(request)
+    if request.method != 'GET' and request.url.path.startswith('/api/'):
+        api_cache.invalidate()
+    return response
 
 def set_trading_bot(bot):
     """Устанавливает экземпляр торгового бота"""
     global trading_bot
     trading_bot = bot
+    _get_exchange_gateway()
     log_info("[OK] Trading bot установлен в Web App сервере")
 
 
+def _get_exchange_gateway() -> Optional[ExchangeGateway]:
+    """Шлюз к бирже текущего бота (создается при смене бота)"""
+    global exchange_gateway
+    exchange = getattr(trading_bot, 'exchange', None)
+    if exchange is None:
+        return None
+    if exchange_gateway is None or exchange_gateway.exchange is not exchange:
+        if exchange_gateway is not None:
+            exchange_gateway.shutdown()
+        exchange_gateway = ExchangeGateway(exchange)
+    return exchange_gateway
+
+
 def _get_bot_token() -> Optional[str]:
     """Безопасно получает токен Telegram бота из экземпляра trading_bot.
     Возвращает None, если токен недоступен.
@@ -278,6 +294,55 @@ async def debug_paths():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Метрики процесса в текстовом формате Prometheus (задержки биржи, торгового цикла, ML, WS, Telegram)"""
+    return Response(content=telemetry.registry.render(), media_type=telemetry.CONTENT_TYPE)
+
+
+@app.get("/api/debug/startup")
+async def debug_startup():
+    """Время готовности подсистем с момента запуска и самые долгие импорты"""
+    return startup_profiler.report()
+
+
+@app.get("/api/debug/cycles")
+async def debug_cycles(slowest: int = Query(5, ge=0, le=50, description="Сколько самых долгих циклов вернуть")):
+    """Трассы последних торговых циклов: время по этапам (p50/p99) и самые долгие циклы"""
+    return cycle_tracer.report(slowest)
+
+
+@app.post("/api/debug/profile")
+async def debug_profile(
+    init_data: str = Body(...),
+    seconds: float = Body(10, gt=0, le=PROFILE_MAX_SECONDS),
+    format: str = Body('collapsed', description="collapsed - стеки для flamegraph, summary - самые долгие функции")
+):
+    """Профилирование всех потоков процесса на seconds сек (бот продолжает работать)"""
+    bot_token = _get_bot_token()
+    if not bot_token or not verify_telegram_webapp_data(init_data, bot_token):
+        raise HTTPException(status_code=401, detail="Unauthorized: Invalid Telegram data")
+    if format not in ('collapsed', 'summary'):
+        raise HTTPException(status_code=400, detail="format: collapsed или summary")
+    # Снимки делает отдельный поток: цикл событий uvicorn продолжает обслуживать запросы и сам попадает в профиль
+    result = await asyncio.to_thread(sampling_profiler.profile, seconds)
+    if result is None:
+        raise HTTPException(status_code=409, detail="Profiling already in progress")
+    if format == 'summary':
+        return result.top()
+    return Response(content=result.collapsed(), media_type='text/plain; charset=utf-8')
+
+
+@app.get("/api/debug/rate-limits")
+async def debug_rate_limits():
+    """Ограничитель запросов к бирже: токены пулов, глубина очередей, ожидание и паузы"""
+    exchange = getattr(trading_bot, 'exchange', None) if trading_bot else None
+    rate_limiter = getattr(exchange, 'rate_limiter', None)
+    if rate_limiter is None:
+        return {"available": False}
+    return {"available": True, "pools": rate_limiter.stats()}
+
+
 @app.get("/api/status")
 async def get_bot_status(
     init_data: str = Query(..., description="Telegram Web App init data"),
@@ -299,12 +364,19 @@ async def get_bot_status(
     if not bot_token or not verify_telegram_webapp_data(init_data, bot_token):
         raise HTTPException(status_code=401, detail="Unauthorized: Invalid Telegram data")
     
+    # ⚡ ОПТИМИЗАЦИЯ: ответ общий для всех клиентов - кэш с фоновым обновлением
+    return await api_cache.aget(('status', compact), lambda: _build_status(compact), ttl=API_CACHE_TTL['status'])
+
+
+async def _build_status(compact: int):
+    """Сборка ответа /api/status"""
     try:
         # Быстрый ранний ответ, если рынки ещё не загружены (не блокируем UI)
+        gateway = _get_exchange_gateway()
         markets_ready = True
         try:
-            if hasattr(trading_bot, 'exchange') and hasattr(trading_bot.exchange, 'wait_for_markets'):
-                markets_ready = trading_bot.exchange.wait_for_markets(timeout=0.1)
+            if gateway:
+                markets_ready = gateway.markets_ready()
         except Exception:
             markets_ready = False
 
@@ -343,7 +415,7 @@ async def get_bot_status(
         # Получаем текущую цену
         current_price = 0
         try:
-            ticker = trading_bot.exchange.get_ticker(trading_bot.settings.trading_pairs['active_pair'])
+            ticker = await gateway.get_ticker(trading_bot.settings.trading_pairs['active_pair'], endpoint='status')
             current_price = ticker.get('last', 0) if ticker else 0
         except:
             pass
@@ -369,8 +441,12 @@ async def get_bot_status(
         
         # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
         position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-        if os.path.exists(position_state_path):
-            state = load_position_state(position_state_path)
+        state = load_position_state(position_state_path)  # ⚡ из памяти (utils/position_store.py)
+        if state:
+            # ⚡ ОПТИМИЗАЦИЯ: тикеры всех пар с позициями одним запросом
+            tickers = await gateway.get_tickers(
+                [symbol for symbol, data in state.items() if isinstance(data, dict) and data.get('positions')],
+                endpoint='status')
             
             # Считаем общее количество открытых позиций по всем парам
             for pair_symbol, pair_data in state.items():
@@ -382,7 +458,7 @@ async def get_bot_status(
                     # Рассчитываем общий PnL
                     for pos in positions_list:
                         try:
-                            ticker = trading_bot.exchange.get_ticker(pair_symbol)
+                            ticker = tickers.get(pair_symbol)
                             current_price_pair = ticker.get('last', 0) if ticker else 0
                             
                             entry_price = pos.get('entry_price', 0)
@@ -461,12 +537,20 @@ async def get_market_data(
     if not bot_token or not verify_telegram_webapp_data(init_data, bot_token):
         raise HTTPException(status_code=401, detail="Unauthorized: Invalid Telegram data")
     
+    symbol = symbol or trading_bot.settings.trading_pairs.get('active_pair', 'BTC/USDT')
+    return await api_cache.aget(('market', symbol, compact), lambda: _build_market(symbol, compact),
+                                ttl=API_CACHE_TTL['market'])
+
+
+async def _build_market(symbol: Optional[str], compact: int):
+    """Сборка ответа /api/market"""
     try:
         # Быстрый ранний ответ, если рынки ещё не загружены (не блокируем UI)
+        gateway = _get_exchange_gateway()
         markets_ready = True
         try:
-            if hasattr(trading_bot, 'exchange') and hasattr(trading_bot.exchange, 'wait_for_markets'):
-                markets_ready = trading_bot.exchange.wait_for_markets(timeout=0.1)
+            if gateway:
+                markets_ready = gateway.markets_ready()
         except Exception:
             markets_ready = False
 
@@ -511,8 +595,8 @@ async def get_market_data(
         if not symbol:
             symbol = trading_bot.settings.trading_pairs['active_pair']
         
-        # Получаем данные о рынке через метод get_ticker из exchange.py
-        ticker = trading_bot.exchange.get_ticker(symbol)
+        # Получаем данные о рынке через метод get_ticker из exchange.py (в пуле шлюза)
+        ticker = await gateway.get_ticker(symbol, endpoint='market')
         
         if not ticker:
             raise HTTPException(status_code=500, detail="Failed to fetch ticker data")
@@ -774,9 +858,8 @@ async def get_trades(
     
     try:
         # Получаем последние сделки из метрик
-        trades = []
-        if hasattr(trading_bot.metrics, 'trades_history'):
-            trades = trading_bot.metrics.trades_history[-limit:]
+        # ⚡ ОПТИМИЗАЦИЯ: последние limit сделок из журнала (индекс), а не срез всей истории
+        trades = trading_bot.metrics.get_recent_trades(limit)
         
         return {
             "trades": trades,
@@ -800,6 +883,12 @@ async def get_positions(
     if not bot_token or not verify_telegram_webapp_data(init_data, bot_token):
         raise HTTPException(status_code=401, detail="Unauthorized: Invalid Telegram data")
     
+    return await api_cache.aget(('positions', compact), lambda: _build_positions(compact),
+                                ttl=API_CACHE_TTL['positions'])
+
+
+async def _build_positions(compact: int):
+    """Сборка ответа /api/positions"""
     try:
         import os
         import json
@@ -810,8 +899,12 @@ async def get_positions(
         # Загружаем ВСЕ позиции из файла состояния
         # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
         position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-        if os.path.exists(position_state_path):
-            state = load_position_state(position_state_path)
+        state = load_position_state(position_state_path)  # ⚡ из памяти (utils/position_store.py)
+        if state:
+            # ⚡ ОПТИМИЗАЦИЯ: тикеры всех пар одним запросом, а не на каждую позицию
+            tickers = await _get_exchange_gateway().get_tickers(
+                [symbol for symbol, data in state.items() if isinstance(data, dict) and data.get('positions')],
+                endpoint='positions')
             
             # Проходим по всем парам
             for pair_symbol, pair_data in state.items():
@@ -819,7 +912,7 @@ async def get_positions(
                     # Проходим по всем открытым позициям в паре
                     for pos_data in pair_data.get('positions', []):
                         try:
-                            ticker = trading_bot.exchange.get_ticker(pair_symbol)
+                            ticker = tickers.get(pair_symbol)
                             current_price = ticker['last'] if ticker else 0
                             
                             entry_price = pos_data.get('entry_price', 0)
@@ -850,8 +943,8 @@ async def get_positions(
         # Если файл позиций не найден, возвращаем текущую позицию для обратной совместимости
         if not positions and trading_bot.position and trading_bot.position != 'none':
             try:
-                ticker = trading_bot.exchange.get_ticker(
-                    trading_bot.settings.trading_pairs['active_pair']
+                ticker = await _get_exchange_gateway().get_ticker(
+                    trading_bot.settings.trading_pairs['active_pair'], endpoint='positions'
                 )
                 current_price = ticker['last'] if ticker else 0
                 
@@ -906,8 +999,7 @@ async def close_position(
     
     try:
         import os
-        import json
-        from utils.position_manager import load_position_state
+        from utils.position_manager import load_position_state, remove_position
         
         # Парсим ID позиции (формат: "PAIR_ID")
         parts = position_id.split('_')
@@ -923,9 +1015,8 @@ async def close_position(
         # Загружаем состояние
         # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
         position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-        if os.path.exists(position_state_path):
-            state = load_position_state(position_state_path)
-            
+        state = load_position_state(position_state_path)  # ⚡ из памяти (utils/position_store.py)
+        if state:
             if pair_symbol in state and 'positions' in state[pair_symbol]:
                 pair_data = state[pair_symbol]
                 
@@ -945,28 +1036,8 @@ async def close_position(
                         result = trading_bot.exchange.sell(pair_symbol, amount)
                         log_info(f"[CLOSE] Позиция {pair_symbol}#{pos_id} закрыта вручную через WebApp. Результат: {result}")
                         
-                        # Удаляем позицию из списка
-                        pair_data['positions'].pop(pos_index)
-                        pair_data['next_position_id'] = max(p['id'] for p in pair_data['positions']) + 1 if pair_data['positions'] else 1
-                        
-                        # Пересчитываем итоги
-                        pair_data['total_position_size_usdt'] = sum(p['position_size_usdt'] for p in pair_data['positions'])
-                        pair_data['total_amount_crypto'] = sum(p['amount_crypto'] for p in pair_data['positions'])
-                        
-                        if pair_data['positions']:
-                            total_cost = pair_data['total_position_size_usdt']
-                            total_amount = pair_data['total_amount_crypto']
-                            pair_data['average_entry_price'] = total_cost / total_amount if total_amount > 0 else 0
-                            pair_data['max_entry_price'] = max(p['entry_price'] for p in pair_data['positions'])
-                        else:
-                            pair_data['average_entry_price'] = 0
-                            pair_data['max_entry_price'] = 0
-                        
-                        # Сохраняем обновленное состояние
-                        # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
-                        position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-                        with open(position_state_path, 'w') as f:
-                            json.dump(state, f, indent=2)
+                        # Удаляем позицию (итоги пары пересчитывает хранилище)
+                        remove_position(pair_symbol, position.get('id'), position_state_path)
                         
                         return {
                             "status": "success",
@@ -1016,8 +1087,7 @@ async def close_all_positions(init_data: str = Body(..., embed=True)):
     
     try:
         import os
-        import json
-        from utils.position_manager import load_position_state
+        from utils.position_manager import load_position_state, remove_position
         
         closed_count = 0
         errors = []
@@ -1025,9 +1095,8 @@ async def close_all_positions(init_data: str = Body(..., embed=True)):
         # Загружаем состояние
         # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
         position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-        if os.path.exists(position_state_path):
-            state = load_position_state(position_state_path)
-            
+        state = load_position_state(position_state_path)  # ⚡ из памяти (utils/position_store.py)
+        if state:
             # Проходим по всем парам
             for pair_symbol, pair_data in list(state.items()):
                 if isinstance(pair_data, dict) and 'positions' in pair_data:
@@ -1042,30 +1111,10 @@ async def close_all_positions(init_data: str = Body(..., embed=True)):
                                 log_info(f"[CLOSE-ALL] Позиция {pair_symbol}#{pos.get('id')} закрыта. Результат: {result}")
                                 
                                 # Удаляем позицию
-                                pair_data['positions'].remove(pos)
+                                remove_position(pair_symbol, pos.get('id'), position_state_path)
                         except Exception as e:
                             log_error(f"Ошибка закрытия позиции {pair_symbol}#{pos.get('id')}: {e}")
                             errors.append(f"{pair_symbol}#{pos.get('id')}: {str(e)}")
-                    
-                    # Пересчитываем итоги для пары
-                    pair_data['next_position_id'] = max(p['id'] for p in pair_data['positions']) + 1 if pair_data['positions'] else 1
-                    pair_data['total_position_size_usdt'] = sum(p['position_size_usdt'] for p in pair_data['positions'])
-                    pair_data['total_amount_crypto'] = sum(p['amount_crypto'] for p in pair_data['positions'])
-                    
-                    if pair_data['positions']:
-                        total_cost = pair_data['total_position_size_usdt']
-                        total_amount = pair_data['total_amount_crypto']
-                        pair_data['average_entry_price'] = total_cost / total_amount if total_amount > 0 else 0
-                        pair_data['max_entry_price'] = max(p['entry_price'] for p in pair_data['positions'])
-                    else:
-                        pair_data['average_entry_price'] = 0
-                        pair_data['max_entry_price'] = 0
-            
-            # Сохраняем обновленное состояние
-            # 🔧 ИСПОЛЬЗУЕМ АБСОЛЮТНЫЙ ПУТЬ К ФАЙЛУ СОСТОЯНИЯ
-            position_state_path = os.path.join(PROJECT_ROOT, 'position_state.json')
-            with open(position_state_path, 'w') as f:
-                json.dump(state, f, indent=2)
         
         log_info(f"[CLOSE-ALL] Все позиции закрыты вручную через WebApp (закрыто: {closed_count})")
         
@@ -1093,55 +1142,41 @@ async def get_analytics(
     if not bot_token or not verify_telegram_webapp_data(init_data, bot_token):
         raise HTTPException(status_code=401, detail="Unauthorized: Invalid Telegram data")
     
+    return await api_cache.aget(('analytics', compact), lambda: _build_analytics(compact),
+                                ttl=API_CACHE_TTL['analytics'])
+
+
+async def _build_analytics(compact: int):
+    """Сборка ответа /api/analytics"""
     try:
         metrics = trading_bot.metrics
         
-        # Основная статистика
-        total_trades = getattr(metrics, 'total_trades', 0)
-        winning_trades = getattr(metrics, 'winning_trades', 0)
-        losing_trades = getattr(metrics, 'losing_trades', 0)
+        # ⚡ ОПТИМИЗАЦИЯ: счетчики метрик и итоги журнала за сегодня - без перебора истории сделок
+        summary = metrics.get_summary()
+        total = metrics.get_period_summary('all') if metrics.ledger is not None else {}
+        today = metrics.get_daily_summary(datetime.now().date())
         
+        total_trades = summary['total_trades']
+        winning_trades = summary['winning_trades']
+        losing_trades = summary['losing_trades']
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # Прибыли/убытки
-        total_profit = getattr(metrics, 'total_profit', 0.0)
-        avg_profit = (total_profit / total_trades) if total_trades > 0 else 0
-        
-        # Максимальные значения
-        max_win = getattr(metrics, 'max_win', 0.0)
-        max_loss = getattr(metrics, 'max_loss', 0.0)
+        total_profit = summary['total_profit']
         
         # Средние значения для прибыльных и убыточных сделок
-        avg_win = 0
-        avg_loss = 0
+        avg_win = total.get('average_win', 0)
+        avg_loss = total.get('average_loss', 0)
         
-        if hasattr(metrics, 'trades_history') and metrics.trades_history:
-            profitable_trades = [t for t in metrics.trades_history if t.get('pnl', 0) > 0]
-            losing_trades_list = [t for t in metrics.trades_history if t.get('pnl', 0) < 0]
-            
-            if profitable_trades:
-                avg_win = sum(t['pnl'] for t in profitable_trades) / len(profitable_trades)
-            if losing_trades_list:
-                avg_loss = sum(t['pnl'] for t in losing_trades_list) / len(losing_trades_list)
+        # Максимальные значения
+        max_win = summary['best_trade']
+        max_loss = summary['worst_trade']
         
         # Статистика за сегодня
-        today_stats = {"trades": 0, "pnl": 0, "win_rate": 0, "best_trade": 0}
-        
-        if hasattr(metrics, 'trades_history') and metrics.trades_history:
-            from datetime import date
-            today = date.today()
-            today_trades = [
-                t for t in metrics.trades_history 
-                if 'timestamp' in t and t['timestamp'].startswith(today.isoformat())
-            ]
-            
-            if today_trades:
-                today_stats["trades"] = len(today_trades)
-                today_stats["pnl"] = sum(t.get('pnl', 0) for t in today_trades)
-                today_winning = len([t for t in today_trades if t.get('pnl', 0) > 0])
-                today_stats["win_rate"] = (today_winning / len(today_trades) * 100) if today_trades else 0
-                today_pnls = [t.get('pnl', 0) for t in today_trades]
-                today_stats["best_trade"] = max(today_pnls) if today_pnls else 0
+        today_stats = {
+            "trades": today.get('trades', 0),
+            "pnl": today.get('profit', 0),
+            "win_rate": today.get('win_rate', 0),
+            "best_trade": today.get('best_trade', 0)
+        }
         
         full_response = {
             "total_trades": total_trades,
@@ -1184,8 +1219,8 @@ async def reset_analytics(init_data: str = Body(..., embed=True)):
     
     try:
         # Сбрасываем метрики
-        if hasattr(trading_bot.metrics, 'reset'):
-            trading_bot.metrics.reset()
+        if hasattr(trading_bot.metrics, 'reset_metrics'):
+            trading_bot.metrics.reset_metrics()
         else:
             trading_bot.metrics.total_trades = 0
             trading_bot.metrics.winning_trades = 0
@@ -1468,6 +1503,8 @@ async def update_general_settings(
         if settings.trading_enabled is not None:
             trading_bot.settings.settings['trading_enabled'] = settings.trading_enabled
             updated.append(f"Торговля: {'включена' if settings.trading_enabled else 'выключена'}")
+            if settings.trading_enabled:
+                trading_bot.trigger_signal_cycle()
         
         if settings.demo_mode is not None:
             trading_bot.settings.settings['demo_mode'] = settings.demo_mode
@@ -1609,55 +1646,60 @@ class ConnectionManager:
     """Менеджер WebSocket подключений для рассылки обновлений в реальном времени"""
     
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        # ⚡ ОПТИМИЗАЦИЯ: сообщение сериализуется один раз, клиенты получают его параллельно
+        self.fanout = WebSocketFanout()
+        # ⚡ ОПТИМИЗАЦИЯ: клиенты протокола (/ws?proto=json|msgpack) получают снимок и только изменившиеся поля
+        self.stream = ws_protocol.DeltaStream()
         self._broadcast_task = None
+        telemetry.WS_CLIENTS.set_function(lambda: len(self.fanout))
+
+    @property
+    def active_connections(self) -> list:
+        return list(self.fanout.clients)
         
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, encoding: str = ws_protocol.LEGACY):
         """Добавляет новое WebSocket подключение"""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        log_info(f"[WS] Новое подключение. Всего активных: {len(self.active_connections)}")
+        self.fanout.register(websocket, encoding)
+        log_info(f"[WS] Новое подключение ({encoding}). Всего активных: {len(self.fanout)}")
         
     def disconnect(self, websocket: WebSocket):
         """Удаляет WebSocket подключение"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            log_info(f"[WS] Подключение закрыто. Осталось активных: {len(self.active_connections)}")
+        if self.fanout.unregister(websocket):
+            log_info(f"[WS] Подключение закрыто. Осталось активных: {len(self.fanout)}")
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Отправляет сообщение конкретному клиенту с обработкой ошибок"""
-        try:
-            await websocket.send_json(message)
-        except ConnectionResetError as e:
-            # Ошибка Windows: удаленный хост разорвал соединение
-            log_info(f"[WS] Соединение было разорвано клиентом (ConnectionResetError)")
-            self.disconnect(websocket)
-        except Exception as e:
-            log_error(f"[WS] Ошибка отправки персонального сообщения: {e}")
-            self.disconnect(websocket)
+        """Отправляет сообщение конкретному клиенту (через его очередь, после ранее поставленных)"""
+        if not self.fanout.send(websocket, message):
+            log_info("[WS] Сообщение не отправлено: клиент уже отключен")
     
+    def send_snapshot(self, websocket: WebSocket):
+        """Снимок состояния потока клиенту протокола (при подключении и по запросу resync)"""
+        encoding = self.fanout.get_encoding(websocket)
+        if encoding in (None, ws_protocol.LEGACY) or not self.stream.state:
+            return
+        self.fanout.send(websocket, ws_protocol.encode(self.stream.snapshot(), encoding), key='state')
+
     async def broadcast(self, message: dict):
-        """Рассылает сообщение всем подключенным клиентам с обработкой разорванных соединений"""
-        disconnected = []
-        
-        for connection in list(self.active_connections):  # Создаем копию списка для безопасной итерации
-            try:
-                await connection.send_json(message)
-            except ConnectionResetError:
-                # Нормальная ошибка - клиент отключился на Windows
-                log_info(f"[WS] Клиент отключился (ConnectionResetError), удаляем из списка")
-                disconnected.append(connection)
-            except (RuntimeError, OSError) as e:
-                # Другие сетевые ошибки
-                log_info(f"[WS] Сетевая ошибка при отправке сообщения: {type(e).__name__}")
-                disconnected.append(connection)
-            except Exception as e:
-                log_error(f"[WS] Ошибка отправки сообщения клиенту: {e}")
-                disconnected.append(connection)
-        
-        # Удаляем отключенные соединения
-        for conn in disconnected:
-            self.disconnect(conn)
+        """Рассылает сообщение всем подключенным клиентам (медленные клиенты получают последнее)"""
+        with telemetry.WS_FANOUT_SECONDS.time():
+            self._fan_out(message)
+
+    def _fan_out(self, message: dict):
+        self.fanout.publish(message)
+        if message.get('type') != self.stream.message_type:
+            return
+        delta = self.stream.update(message)
+        encodings = self.fanout.encodings() - {ws_protocol.LEGACY}
+        if delta is None or not encodings:
+            return
+        snapshot = self.stream.snapshot()
+        # Кадр кодируется один раз на формат; отставшему клиенту вместо дельты уходит снимок
+        self.fanout.publish_frames(
+            'state',
+            {encoding: ws_protocol.encode(delta, encoding) for encoding in encodings},
+            {encoding: ws_protocol.encode(snapshot, encoding) for encoding in encodings},
+        )
     
     async def start_broadcasting(self):
         """Запускает фоновую задачу для периодической рассылки данных"""
@@ -1671,7 +1713,7 @@ class ConnectionManager:
         """Фоновый цикл рассылки данных каждую секунду"""
         while True:
             try:
-                if self.active_connections and trading_bot:
+                if len(self.fanout) and trading_bot:
                     # Получаем свежие данные
                     data = await self._get_realtime_data()
                     if data:
@@ -1692,15 +1734,15 @@ class ConnectionManager:
             # Получаем активную пару
             symbol = trading_bot.settings.trading_pairs.get('active_pair', 'BTC/USDT')
             
-            # Получаем данные о рынке
-            ticker = trading_bot.exchange.get_ticker(symbol)
+            # Получаем данные о рынке (общий с эндпоинтами кэш тикеров)
+            ticker = (await _get_exchange_gateway().get_tickers([symbol], endpoint='ws')).get(symbol)
             if not ticker:
                 log_error(f"[WS] Не удалось получить ticker для {symbol}")
                 return None
             
             # 🔍 DEBUG: Логируем значение change для отладки
             change_24h = ticker.get('change', 0)
-            log_info(f"[WS] Получены данные: symbol={symbol}, change_24h={change_24h}, ticker_keys={list(ticker.keys())}")
+            log_debug(f"[WS] Получены данные: symbol={symbol}, change_24h={change_24h}, ticker_keys={list(ticker.keys())}")
             
             # Формируем данные
             data = {
@@ -1812,9 +1854,11 @@ manager = ConnectionManager()
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint для получения обновлений в реальном времени
-    Клиент подключается к ws://server/ws и получает обновления каждую секунду
+    Клиент подключается к ws://server/ws и получает обновления каждую секунду.
+    ws://server/ws?proto=json|msgpack - снимок и дельты с номерами (webapp/ws_protocol.py)
     """
-    await manager.connect(websocket)
+    encoding = ws_protocol.negotiate(websocket.query_params.get('proto'))
+    await manager.connect(websocket, encoding)
     
     # Запускаем фоновую рассылку, если еще не запущена
     if not manager._broadcast_task:
@@ -1825,8 +1869,11 @@ async def websocket_endpoint(websocket: WebSocket):
         await manager.send_personal_message({
             "type": "connected",
             "message": "WebSocket подключен успешно",
+            "proto": encoding,
+            "v": ws_protocol.PROTOCOL_VERSION,
             "timestamp": datetime.now().isoformat()
         }, websocket)
+        manager.send_snapshot(websocket)
         
         # Ожидаем сообщений от клиента (для keep-alive)
         while True:
@@ -1838,6 +1885,8 @@ async def websocket_endpoint(websocket: WebSocket):
                         "type": "pong",
                         "timestamp": datetime.now().isoformat()
                     }, websocket)
+                elif data == "resync":
+                    manager.send_snapshot(websocket)
             except ConnectionResetError:
                 # Нормальное отключение на Windows
                 log_info("[WS] Клиент отключился (ConnectionResetError)")
@@ -1862,6 +1911,9 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
+startup_profiler.ready('webapp')
+
+
 if __name__ == "__main__":
     import uvicorn
     log_info("[WEB] Запуск Web App сервера...")
@@ -8,6 +8,9 @@ import sys
 # Добавляем корневую директорию в путь
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# ⏱️ Первым импортом: отсчет времени запуска (STARTUP_PROFILE_IMPORTS=1 - время импорта модулей)
+from utils.startup import startup_profiler
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -21,6 +24,7 @@ try:
     trading_bot = AdvancedTradingBot()
     set_trading_bot(trading_bot)
     print("✅ Бот инициализирован для dev режима\n", flush=True)
+    startup_profiler.log_report()
 except Exception as e:
     print(f"\n❌ Ошибка инициализации бота: {e}", flush=True)
     trading_bot = None
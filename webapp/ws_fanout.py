@@ -0,0 +1,200 @@
+"""
+РАССЫЛКА ОБНОВЛЕНИЙ ПО WEBSOCKET (FAN-OUT С ОЧЕРЕДЬЮ НА КЛИЕНТА)
+"""
+import asyncio
+import json
+from collections import OrderedDict
+from utils.logger import log_info, log_error
+
+DEFAULT_QUEUE_SIZE = 8      # сообщений в очереди клиента (разных типов)
+DEFAULT_SEND_TIMEOUT = 5.0  # сек на отправку одного кадра, дольше - клиент отключается
+DEFAULT_MAX_DROPS = 100     # вытесненных сообщений подряд без успешной отправки - клиент отключается
+
+
+def encode_message(message):
+    """Сообщение -> текст кадра (один раз на рассылку)"""
+    return message if isinstance(message, (str, bytes)) else json.dumps(message, ensure_ascii=False, default=str)
+
+
+class ClientChannel:
+    """Очередь и задача отправки одного клиента.
+
+    Сообщения с одинаковым ключом склеиваются (в очереди остается последнее),
+    при переполнении вытесняется самое старое - медленный клиент получает
+    свежие данные реже, но не задерживает остальных.
+    """
+
+    def __init__(self, websocket, hub, max_queue, encoding='legacy'):
+        self.websocket = websocket
+        self.hub = hub
+        self.max_queue = max_queue
+        self.encoding = encoding  # формат кадров клиента (webapp/ws_protocol.py)
+        self.pending = OrderedDict()  # ключ -> кадр
+        self.lost = None  # ключи, кадры которых были вытеснены из очереди (создается при первой потере)
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.drops_in_row = 0
+        self.closed = False
+        self.task = None
+
+    def push(self, key, frame, snapshot=None):
+        """Постановка кадра в очередь (без ожидания).
+
+        snapshot - самодостаточный кадр, который отправляется вместо frame, если предыдущий
+        кадр с этим ключом был потерян (дельты нельзя склеивать - нужен снимок).
+        """
+        if self.closed:
+            return
+        lost = False
+        if self.lost:
+            lost = key in self.lost
+            self.lost.discard(key)
+        if key in self.pending:
+            del self.pending[key]
+            self._drop()
+            lost = True
+        elif len(self.pending) >= self.max_queue:
+            dropped_key, _ = self.pending.popitem(last=False)
+            if self.lost is None:
+                self.lost = set()
+            self.lost.add(dropped_key)
+            self._drop()
+        if lost and snapshot is not None:
+            frame = snapshot
+        self.pending[key] = frame
+        self.wakeup.set()
+
+    def _drop(self):
+        self.dropped += 1
+        self.drops_in_row += 1
+        self.hub.stats['dropped'] += 1
+        if self.drops_in_row > self.hub.max_drops:
+            self.hub._evict(self, f"не успевает получать обновления ({self.drops_in_row} пропущено)")
+
+    async def run(self):
+        """Отправка кадров из очереди, пока клиент подключен"""
+        try:
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.pending and not self.closed:
+                    _, frame = self.pending.popitem(last=False)
+                    send = self.websocket.send_bytes if isinstance(frame, bytes) else self.websocket.send_text
+                    await asyncio.wait_for(send(frame), self.hub.send_timeout)
+                    self.sent += 1
+                    self.drops_in_row = 0
+                    self.hub.stats['sent'] += 1
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self.hub._evict(self, f"отправка дольше {self.hub.send_timeout}s")
+        except Exception as e:
+            # Клиент отключился (ConnectionResetError, RuntimeError и т.п.)
+            self.hub._evict(self, type(e).__name__)
+
+
+class WebSocketFanout:
+    """Рассылка одного обновления всем клиентам.
+
+    publish() сериализует сообщение один раз и кладет кадр в очереди клиентов,
+    отправку выполняют задачи клиентов параллельно - стоимость публикации
+    не зависит от скорости самых медленных соединений.
+    """
+
+    def __init__(self, max_queue=DEFAULT_QUEUE_SIZE, send_timeout=DEFAULT_SEND_TIMEOUT, max_drops=DEFAULT_MAX_DROPS):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.max_drops = max_drops
+        self.clients = {}  # websocket -> ClientChannel
+        self.stats = {'published': 0, 'sent': 0, 'dropped': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self.clients)
+
+    def register(self, websocket, encoding='legacy'):
+        """Подключение уже принятого websocket к рассылке"""
+        channel = ClientChannel(websocket, self, self.max_queue, encoding)
+        self.clients[websocket] = channel
+        channel.task = asyncio.get_running_loop().create_task(channel.run())
+        return channel
+
+    def unregister(self, websocket):
+        """Отключение клиента от рассылки"""
+        channel = self.clients.pop(websocket, None)
+        if channel is None:
+            return False
+        channel.closed = True
+        channel.pending.clear()
+        if channel.task is not None and channel.task is not asyncio.current_task():
+            channel.task.cancel()
+        return True
+
+    def _evict(self, channel, reason):
+        if self.unregister(channel.websocket):
+            self.stats['evicted'] += 1
+            log_info(f"[WS] Клиент отключен от рассылки: {reason}. Осталось: {len(self.clients)}")
+            asyncio.get_running_loop().create_task(self._close(channel.websocket))
+
+    @staticmethod
+    async def _close(websocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    def publish(self, message, key=None, encoding='legacy'):
+        """Рассылка сообщения клиентам формата encoding: кадр кодируется один раз"""
+        if not self.clients:
+            return 0
+        if key is None:
+            key = message.get('type', 'message') if isinstance(message, dict) else 'message'
+        try:
+            frame = encode_message(message)
+        except Exception as e:
+            log_error(f"[WS] Ошибка сериализации сообщения {key}: {e}")
+            return 0
+        self.stats['published'] += 1
+        count = 0
+        for channel in list(self.clients.values()):
+            if channel.encoding == encoding:
+                channel.push(key, frame)
+                count += 1
+        return count
+
+    def publish_frames(self, key, frames, snapshots=None):
+        """Рассылка готовых кадров по форматам: frames = {формат: кадр}"""
+        snapshots = snapshots or {}
+        count = 0
+        for channel in list(self.clients.values()):
+            frame = frames.get(channel.encoding)
+            if frame is not None:
+                channel.push(key, frame, snapshots.get(channel.encoding))
+                count += 1
+        if count:
+            self.stats['published'] += 1
+        return count
+
+    def encodings(self):
+        """Форматы подключенных клиентов"""
+        return {channel.encoding for channel in self.clients.values()}
+
+    def send(self, websocket, message, key=None):
+        """Сообщение одному клиенту через его очередь"""
+        channel = self.clients.get(websocket)
+        if channel is None:
+            return False
+        if key is None:
+            key = message.get('type', 'message') if isinstance(message, dict) else 'message'
+        channel.push(key, encode_message(message))
+        return True
+
+    def get_encoding(self, websocket):
+        channel = self.clients.get(websocket)
+        return channel.encoding if channel else None
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['clients'] = len(self.clients)
+        stats['queued'] = sum(len(channel.pending) for channel in self.clients.values())
+        return stats
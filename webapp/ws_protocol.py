@@ -0,0 +1,244 @@
+"""
+ПРОТОКОЛ WEBSOCKET: СНИМОК + ДЕЛЬТЫ С НОМЕРАМИ (JSON / MSGPACK)
+
+Клиент выбирает формат параметром /ws?proto=json|msgpack (без параметра - прежние
+полные JSON-сообщения). Кадры протокола:
+    снимок: {"t": "s", "v": версия, "q": номер, "ts": время, "ty": тип, "k": таблица ключей, "d": состояние}
+    дельта: {"t": "d", "q": номер, "ts": время, "d": изменившиеся поля (null - поле удалено)}
+Ключи состояния - короткие, таблица "k" из снимка восстанавливает полные имена.
+Если номер дельты не равен предыдущему + 1, клиент отправляет текст "resync" и получает снимок.
+"""
+import json
+import time
+
+try:
+    import msgpack
+except ImportError:  # msgpack необязателен: без него бинарный формат заменяется JSON
+    msgpack = None
+
+PROTOCOL_VERSION = 1
+LEGACY = 'legacy'
+ENCODINGS = (LEGACY, 'json', 'msgpack')
+
+
+def round2(value):
+    return round(value or 0, 2)
+
+
+def round4(value):
+    return round(value or 0, 4)
+
+
+def round8(value):
+    return round(value or 0, 8)
+
+
+# Схема: полный ключ -> (короткий ключ, преобразование или вложенная схема, значение по умолчанию)
+STATUS_SCHEMA = {
+    'positions': ('p', {
+        'open_count': ('c', None, 0),
+        'size_usdt': ('s', round2, 0),
+        'entry_price': ('e', round2, 0),
+        'current_profit_percent': ('pr', round2, 0),
+        'current_profit_usdt': ('pu', round2, 0),
+        'to_take_profit': ('t', round2, 0),
+    }, {}),
+}
+
+MARKET_SCHEMA = {
+    'symbol': ('sym', None, ''),
+    'current_price': ('p', round2, 0),
+    'high_24h': ('h', round2, 0),
+    'low_24h': ('l', round2, 0),
+    'volume_24h': ('v', int, 0),
+    'change_24h': ('ch', round2, 0),
+    'ema': ('e', {
+        'signal': ('s', None, 'wait'),
+        'percent': ('p', round2, 0),
+    }, {}),
+    'signal': ('sg', None, 'wait'),
+    'ml': ('m', {
+        'prediction': ('pr', round2, 0.5),
+    }, {}),
+}
+
+POSITION_SCHEMA = {
+    'id': ('id', None, None),
+    'pair': ('sym', None, ''),
+    'position_size_usdt': ('sz', round2, 0),
+    'entry_price': ('ep', round2, 0),
+    'current_price': ('cp', round2, 0),
+    'amount': ('amt', round8, 0),
+    'pnl': ('pnl', round2, 0),
+    'pnl_percent': ('pnl%', round2, 0),
+    'status': ('sts', None, 'long'),
+}
+
+# Поток market_update из ConnectionManager._get_realtime_data (цена без округления - есть дешевые монеты)
+MARKET_UPDATE_SCHEMA = {
+    'market': ('m', {
+        'symbol': ('s', None, ''),
+        'current_price': ('p', None, 0),
+        'change_24h': ('c', round2, 0),
+    }, {}),
+    'ema': ('e', {
+        'signal': ('s', None, 'wait'),
+        'percent': ('p', round4, 0),
+        'text': ('t', None, ''),
+    }, {}),
+    'ml': ('ml', {
+        'prediction': ('p', round4, 0.5),
+    }, {}),
+    'positions': ('ps', {
+        'open_count': ('c', None, 0),
+    }, {}),
+}
+
+
+def shorten(data, schema, defaults=True):
+    """Полный словарь -> словарь с короткими ключами по схеме.
+
+    defaults=True - отсутствующие поля заполняются значениями по умолчанию (ответы compact=1),
+    defaults=False - отсутствующие поля пропускаются (поток дельт).
+    """
+    result = {}
+    for key, (short, transform, default) in schema.items():
+        if key in data:
+            value = data[key]
+        elif defaults:
+            value = default
+        else:
+            continue
+        if isinstance(transform, dict):
+            value = shorten(value if isinstance(value, dict) else {}, transform, defaults)
+        elif transform is not None:
+            value = transform(value)
+        result[short] = value
+    return result
+
+
+def key_table(schema):
+    """Таблица для восстановления полных ключей: короткий -> полный или [полный, вложенная таблица]"""
+    table = {}
+    for key, (short, transform, _) in schema.items():
+        table[short] = [key, key_table(transform)] if isinstance(transform, dict) else key
+    return table
+
+
+def expand(data, table):
+    """Короткие ключи -> полные (обратное преобразование shorten)"""
+    result = {}
+    for short, value in data.items():
+        entry = table.get(short, short)
+        if isinstance(entry, list):
+            result[entry[0]] = expand(value, entry[1]) if isinstance(value, dict) else value
+        else:
+            result[entry] = value
+    return result
+
+
+def diff(old, new):
+    """Изменившиеся поля new относительно old (удаленные поля - None)"""
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff(previous, value)
+            if nested:
+                delta[key] = nested
+        elif key not in old or previous != value:
+            delta[key] = value
+    for key in old:
+        if key not in new:
+            delta[key] = None
+    return delta
+
+
+def apply_delta(state, delta):
+    """Применение дельты к состоянию клиента (на месте)"""
+    for key, value in delta.items():
+        if value is None:
+            state.pop(key, None)
+        elif isinstance(value, dict) and isinstance(state.get(key), dict):
+            apply_delta(state[key], value)
+        else:
+            state[key] = value
+    return state
+
+
+def negotiate(requested):
+    """Формат клиента по параметру proto: msgpack (если установлен), json или прежний"""
+    requested = (requested or '').lower()
+    if requested == 'msgpack':
+        return 'msgpack' if msgpack is not None else 'json'
+    if requested == 'json':
+        return 'json'
+    return LEGACY
+
+
+def encode(message, encoding):
+    """Кадр протокола: bytes для msgpack, компактный JSON-текст для json"""
+    if encoding == 'msgpack' and msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def decode(frame):
+    """Разбор кадра (по типу: bytes - msgpack, str - JSON)"""
+    if isinstance(frame, (bytes, bytearray)):
+        return msgpack.unpackb(frame, raw=False)
+    return json.loads(frame)
+
+
+class DeltaStream:
+    """Состояние потока одного типа сообщений: номер, текущий снимок и дельты"""
+
+    def __init__(self, schema=MARKET_UPDATE_SCHEMA, message_type='market_update'):
+        self.schema = schema
+        self.message_type = message_type
+        self.keys = key_table(schema)
+        self.state = {}
+        self.seq = 0
+
+    def update(self, message):
+        """Новое полное сообщение -> дельта-кадр (None, если ничего не изменилось)"""
+        state = shorten(message, self.schema, defaults=False)
+        delta = diff(self.state, state)
+        if not delta:
+            return None
+        self.state = state
+        self.seq += 1
+        return {'t': 'd', 'q': self.seq, 'ts': int(time.time()), 'd': delta}
+
+    def snapshot(self):
+        """Снимок текущего состояния (для новых и отставших клиентов)"""
+        return {'t': 's', 'v': PROTOCOL_VERSION, 'q': self.seq, 'ts': int(time.time()),
+                'ty': self.message_type, 'k': self.keys, 'd': self.state}
+
+
+class DeltaClient:
+    """Сборка сообщений из кадров протокола (эталон для клиентов, используется в тестах)"""
+
+    def __init__(self):
+        self.state = {}
+        self.keys = {}
+        self.message_type = None
+        self.seq = None
+
+    def feed(self, frame):
+        """Кадр -> полное сообщение; None, если нужен снимок (пропущена дельта)"""
+        message = decode(frame) if isinstance(frame, (str, bytes, bytearray)) else frame
+        if message.get('t') == 's':
+            self.state = message['d']
+            self.keys = message['k']
+            self.message_type = message['ty']
+            self.seq = message['q']
+        elif message.get('t') == 'd':
+            if self.seq is None or message['q'] != self.seq + 1:
+                self.seq = None
+                return None
+            apply_delta(self.state, message['d'])
+            self.seq = message['q']
+        else:
+            return message
+        return dict(expand(self.state, self.keys), type=self.message_type)